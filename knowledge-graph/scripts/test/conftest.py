@@ -13,6 +13,10 @@ from unittest.mock import MagicMock, patch
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, project_root)
 
+# Backend sources (infrastructure/, scripts/elasticsearch_indexer.py, ...)
+backend_root = os.path.join(project_root, 'src', 'backend')
+sys.path.insert(0, backend_root)
+
 # Test configuration
 TEST_CONFIG = {
     'TESTING': True,
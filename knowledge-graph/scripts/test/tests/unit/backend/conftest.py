@@ -0,0 +1,22 @@
+"""
+Fixtures for the Elasticsearch indexing tests (the Elasticsearch client is mocked).
+"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture
+def es_client():
+    """Mocked ElasticsearchClient that reports a live connection."""
+    client = MagicMock()
+    client.is_connected.return_value = True
+    return client
+
+
+@pytest.fixture
+def indexer(tmp_path, es_client):
+    """DocumentIndexer over an empty knowledge base in tmp_path, without process pools."""
+    from scripts.elasticsearch_indexer import DocumentIndexer
+
+    with patch('scripts.elasticsearch_indexer.get_elasticsearch_client', return_value=es_client):
+        yield DocumentIndexer(str(tmp_path), index_name='docs', workers=1, extraction_cache_dir=None)
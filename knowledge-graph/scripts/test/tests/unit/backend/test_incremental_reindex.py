@@ -0,0 +1,104 @@
+"""
+Unit tests for incremental reindexing (change detection by file state and content_hash).
+"""
+from datetime import datetime
+from unittest.mock import patch
+
+from infrastructure.external_services.search.text_extractors import EXTRACTOR_VERSION, ExtractionError
+
+
+def indexed_state(indexer, file_path, **overrides):
+    """Index state of file_path as fetch_indexed_state would return it."""
+    stat = file_path.stat()
+    state = {
+        "file_size": stat.st_size,
+        "updated_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        "content_hash": "hash",
+        "extractor_version": EXTRACTOR_VERSION,
+    }
+    state.update(overrides)
+    return {indexer.generate_document_id(file_path): state}
+
+
+def new_stats():
+    return {"added": 0, "updated": 0, "touched": 0, "unchanged": 0, "deleted": 0, "failed": 0}
+
+
+class TestChangedFiles:
+    """Test the scan stage of incremental reindexing."""
+
+    def test_classification(self, indexer, tmp_path):
+        """Only new or modified files, or files indexed by an older extractor, are read."""
+        unchanged = tmp_path / "unchanged.txt"
+        resized = tmp_path / "resized.txt"
+        stale = tmp_path / "stale.pdf"
+        added = tmp_path / "added.md"
+        for path in (unchanged, resized, stale, added):
+            path.write_text(path.name)
+
+        indexed = {}
+        indexed.update(indexed_state(indexer, unchanged))
+        indexed.update(indexed_state(indexer, resized, file_size=1))
+        indexed.update(indexed_state(indexer, stale, extractor_version=None))
+
+        seen = set()
+        stats = new_stats()
+        files = [unchanged, resized, stale, added]
+        changed = list(indexer.changed_files(files, indexed, seen, stats))
+
+        assert changed == [resized, stale, added]
+        assert stats["unchanged"] == 1
+        assert seen == {indexer.generate_document_id(path) for path in files}
+
+    def test_modified_time(self, indexer, tmp_path):
+        """A file whose modification time changed is read again."""
+        path = tmp_path / "doc.txt"
+        path.write_text("text")
+        indexed = indexed_state(indexer, path, updated_at="2000-01-01T00:00:00")
+
+        assert list(indexer.changed_files([path], indexed, set(), new_stats())) == [path]
+
+    def test_failed_extraction_retried(self, indexer, tmp_path):
+        """A file indexed with the fallback description after a failed extraction is read again."""
+        from scripts.elasticsearch_indexer import PipelineStats
+
+        path = tmp_path / "broken.pdf"
+        path.write_bytes(b"%PDF")
+        with patch('scripts.elasticsearch_indexer.extract_text', side_effect=ExtractionError("未安装 PyPDF2")):
+            [document] = indexer.read_documents([path], PipelineStats())
+            assert indexer.create_document(path)["extractor_version"] is None
+
+        assert document["content"] == indexer.describe_file(path)
+        assert document["extractor_version"] is None
+
+        indexed = {document["id"]: {key: document[key] for key in ("file_size", "updated_at", "extractor_version")}}
+        assert list(indexer.changed_files([path], indexed, set(), new_stats())) == [path]
+
+
+class TestChangedDocuments:
+    """Test the content_hash comparison of incremental reindexing."""
+
+    def test_classification(self, indexer, tmp_path):
+        """New and changed documents are reindexed, same-content documents only get metadata updates."""
+        paths = {name: tmp_path / f"{name}.txt" for name in ("same", "changed", "added")}
+        for name, path in paths.items():
+            path.write_text(f"content of {name}")
+        documents = {name: indexer.create_document(path) for name, path in paths.items()}
+
+        indexed = {
+            documents["same"]["id"]: {"content_hash": documents["same"]["content_hash"]},
+            documents["changed"]["id"]: {"content_hash": "outdated"},
+        }
+        touched = {}
+        stats = new_stats()
+        reindexed = list(indexer.changed_documents(documents.values(), indexed, touched, stats))
+
+        assert [doc["id"] for doc in reindexed] == [documents["changed"]["id"], documents["added"]["id"]]
+        assert stats["added"] == 1 and stats["updated"] == 1 and stats["touched"] == 1
+        assert touched == {
+            documents["same"]["id"]: {
+                "file_size": documents["same"]["file_size"],
+                "updated_at": documents["same"]["updated_at"],
+                "extractor_version": EXTRACTOR_VERSION,
+            }
+        }
@@ -0,0 +1,83 @@
+"""
+Unit tests for versioned indices behind an alias (atomic swap, pruning, rollback).
+"""
+from unittest.mock import MagicMock, call
+
+from infrastructure.external_services.search.elasticsearch_client import ElasticsearchClient
+
+
+def client_with(aliases=None, concrete_index=False):
+    """ElasticsearchClient over a mocked connection."""
+    client = ElasticsearchClient.__new__(ElasticsearchClient)
+    client.es = MagicMock()
+    client.es.indices.get_alias.return_value = aliases or {}
+    client.es.indices.exists.return_value = concrete_index
+    client.es.indices.exists_alias.return_value = bool(aliases)
+    return client
+
+
+class TestSwapAlias:
+    """Test ElasticsearchClient.swap_alias."""
+
+    def test_moves_alias_in_one_request(self):
+        """Old indices are removed from the alias and the new one added in a single update_aliases call."""
+        client = client_with(aliases={"docs_1": {}, "docs_2": {}})
+
+        assert client.swap_alias("docs", "docs_3")
+        client.es.indices.update_aliases.assert_called_once_with(actions=[
+            {"remove": {"index": "docs_1", "alias": "docs"}},
+            {"remove": {"index": "docs_2", "alias": "docs"}},
+            {"add": {"index": "docs_3", "alias": "docs"}},
+        ])
+
+    def test_replaces_concrete_index(self):
+        """A legacy concrete index named like the alias is dropped in the same request."""
+        client = client_with(concrete_index=True)
+
+        assert client.swap_alias("docs", "docs_1")
+        client.es.indices.update_aliases.assert_called_once_with(actions=[
+            {"remove_index": {"index": "docs"}},
+            {"add": {"index": "docs_1", "alias": "docs"}},
+        ])
+
+    def test_failure(self):
+        """Errors from Elasticsearch are reported as False."""
+        client = client_with()
+        client.es.indices.update_aliases.side_effect = RuntimeError("cluster unavailable")
+
+        assert not client.swap_alias("docs", "docs_1")
+
+
+class TestIndexVersions:
+    """Test DocumentIndexer.prune_index_versions and rollback."""
+
+    def test_prune_keeps_live_and_rollback_versions(self, indexer, es_client):
+        """The live index and the `keep` versions before it survive, older ones are deleted."""
+        es_client.get_alias_indices.return_value = ["docs_4"]
+        es_client.list_indices.return_value = ["docs_1", "docs_2", "docs_3", "docs_4"]
+
+        indexer.prune_index_versions(keep=1)
+        assert es_client.delete_index.call_args_list == [call("docs_1"), call("docs_2")]
+
+        es_client.delete_index.reset_mock()
+        indexer.prune_index_versions(keep=0)
+        assert es_client.delete_index.call_args_list == [call("docs_1"), call("docs_2"), call("docs_3")]
+
+    def test_prune_without_alias(self, indexer, es_client):
+        """Nothing is deleted while the alias does not exist yet."""
+        es_client.get_alias_indices.return_value = []
+
+        indexer.prune_index_versions()
+        es_client.delete_index.assert_not_called()
+
+    def test_rollback(self, indexer, es_client):
+        """Rollback points the alias at the newest version older than the live one."""
+        es_client.get_alias_indices.return_value = ["docs_3"]
+        es_client.list_indices.return_value = ["docs_1", "docs_2", "docs_3"]
+        es_client.swap_alias.return_value = True
+
+        assert indexer.rollback()
+        es_client.swap_alias.assert_called_once_with("docs", "docs_2")
+
+        es_client.list_indices.return_value = ["docs_3"]
+        assert not indexer.rollback()
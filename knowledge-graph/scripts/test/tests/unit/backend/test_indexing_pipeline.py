@@ -0,0 +1,146 @@
+"""
+Unit tests for the streaming indexing pipeline (stage statistics, bounded submission, bulk results).
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from infrastructure.external_services.search.text_extractors import ExtractionTimeout
+from scripts.elasticsearch_indexer import MAX_REPORTED_FAILURES, PipelineStats, _bounded_submit
+
+
+class ImmediateExecutor:
+    """Executor stand-in that runs tasks on submit and records how many were submitted."""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, func, *args):
+        self.submitted += 1
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+def hang(file_path, **options):
+    """Extractor stand-in that never returns in time (module level so worker processes can import it)."""
+    time.sleep(60)
+
+
+class TestPipelineStats:
+    """Test PipelineStats."""
+
+    def test_report_subtracts_upstream_time(self):
+        """Each stage's own time excludes the time spent waiting on earlier stages."""
+        stats = PipelineStats()
+        stats.items.update({"scan": 10, "read": 10, "tokenize": 8, "bulk": 8})
+        stats.elapsed.update({"scan": 1.0, "read": 3.0, "tokenize": 4.0, "bulk": 8.0})
+        stats.fail("read", "a.pdf", "broken")
+        stats.fail("bulk", "doc-1", "mapping error")
+
+        report = stats.report()
+        assert {stage: info["seconds"] for stage, info in report["stages"].items()} == {
+            "scan": 1.0, "read": 2.0, "tokenize": 1.0, "bulk": 4.0
+        }
+        assert report["stages"]["read"]["items_per_second"] == 5.0
+        assert report["indexed"] == 7
+        assert report["failed"] == 2
+        assert report["failures"][0] == {"stage": "read", "source": "a.pdf", "error": "broken"}
+
+    def test_report_caps_failures(self):
+        """Only the first MAX_REPORTED_FAILURES failures are listed."""
+        stats = PipelineStats()
+        for i in range(MAX_REPORTED_FAILURES + 5):
+            stats.fail("read", f"file-{i}", "error")
+
+        report = stats.report()
+        assert report["failed"] == MAX_REPORTED_FAILURES + 5
+        assert len(report["failures"]) == MAX_REPORTED_FAILURES
+        assert report["stages"]["scan"]["items_per_second"] is None
+
+    def test_timed(self):
+        """timed counts items and bytes without changing the stream."""
+        stats = PipelineStats()
+        assert list(stats.timed("read", ["ab", "cde"], size=len)) == ["ab", "cde"]
+        assert stats.items["read"] == 2
+        assert stats.bytes["read"] == 5
+        assert stats.failed() == 0
+
+
+class TestBoundedSubmit:
+    """Test _bounded_submit."""
+
+    def test_order_and_bound(self):
+        """Results come back in input order with at most `limit` tasks queued ahead of the consumer."""
+        executor = ImmediateExecutor()
+        yielded = 0
+        results = []
+        for item, future in _bounded_submit(executor, lambda x: x * 2, range(10), limit=3, arg=lambda x: x + 1):
+            yielded += 1
+            assert executor.submitted - yielded < 3
+            results.append((item, future.result()))
+
+        assert results == [(i, (i + 1) * 2) for i in range(10)]
+
+    def test_lazy_input(self):
+        """Input is consumed lazily, so generators are not drained up front."""
+        consumed = []
+
+        def items():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        submitted = _bounded_submit(ImmediateExecutor(), str, items(), limit=4)
+        next(submitted)
+        assert len(consumed) == 4
+
+
+class TestExtractContents:
+    """Test extraction timeouts."""
+
+    def test_timeout_off_main_thread(self, indexer, tmp_path, monkeypatch):
+        """Off the main thread (a web request), a single-worker indexer still enforces the timeout."""
+        path = tmp_path / "slow.txt"
+        path.write_text("text")
+        indexer.extract_timeout = 0.5
+        monkeypatch.setattr('scripts.elasticsearch_indexer.extract_text', hang)
+        monkeypatch.setattr('scripts.elasticsearch_indexer.EXTRACT_TIMEOUT_GRACE', 1)
+
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(indexer.extract_contents([path])))
+        started = time.monotonic()
+        thread.start()
+        thread.join(timeout=30)
+
+        assert not thread.is_alive()
+        assert time.monotonic() - started < 30
+        [(file_path, content)] = results
+        assert file_path == path
+        assert isinstance(content, ExtractionTimeout)
+
+
+class TestIndexStream:
+    """Test DocumentIndexer.index_stream with a mocked bulk helper."""
+
+    def test_bulk_failures(self, indexer, es_client, tmp_path):
+        """Rejected documents are reported and make the run fail."""
+        for name in ("a", "b"):
+            (tmp_path / f"{name}.txt").write_text(f"文档 {name}")
+        documents = [indexer.create_document(path) for path in sorted(tmp_path.iterdir())]
+        rejected = documents[1]["id"]
+
+        def stream_index_documents(index_name, docs, **kwargs):
+            for doc in docs:
+                if doc["id"] == rejected:
+                    yield False, doc["id"], "rejected"
+                else:
+                    yield True, doc["id"], None
+
+        es_client.stream_index_documents.side_effect = stream_index_documents
+
+        assert not indexer.index_stream(documents)
+        report = indexer.last_pipeline_report
+        assert report["indexed"] == 1
+        assert report["failures"] == [{"stage": "bulk", "source": rejected, "error": "rejected"}]
+        assert all("content_tokens" in doc and "title_tokens" in doc for doc in documents)
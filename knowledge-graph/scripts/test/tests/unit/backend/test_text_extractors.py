@@ -0,0 +1,179 @@
+"""
+Unit tests for document text extraction (formats, extraction cache, timeout).
+"""
+import json
+import time
+
+import pytest
+
+from infrastructure.external_services.search import text_extractors
+from infrastructure.external_services.search.text_extractors import (
+    ExtractionError, ExtractionTimeout, extract_text, register_extractor
+)
+
+
+def minimal_pdf(text: str) -> bytes:
+    """Single-page PDF showing `text` in Helvetica."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+@pytest.fixture
+def extractor_registry(monkeypatch):
+    """Extractors registered by a test are removed afterwards."""
+    monkeypatch.setattr(text_extractors, "_EXTRACTORS", dict(text_extractors._EXTRACTORS))
+
+
+class TestFormats:
+    """Test the built-in extractors."""
+
+    def test_plain_text(self, tmp_path):
+        """UTF-8 and GBK text files are decoded, Markdown is read as text."""
+        utf8 = tmp_path / "a.txt"
+        utf8.write_text("知识库", encoding="utf-8")
+        gbk = tmp_path / "b.txt"
+        gbk.write_bytes("知识库".encode("gbk"))
+        markdown = tmp_path / "c.md"
+        markdown.write_text("# 标题\n正文", encoding="utf-8")
+
+        assert extract_text(utf8, cache_dir=None) == "知识库"
+        assert extract_text(gbk, cache_dir=None) == "知识库"
+        assert extract_text(markdown, cache_dir=None) == "# 标题\n正文"
+
+    def test_json(self, tmp_path):
+        """JSON is pretty-printed without escaping Chinese."""
+        path = tmp_path / "a.json"
+        path.write_text('{"名称":"图谱"}', encoding="utf-8")
+
+        assert json.loads(extract_text(path, cache_dir=None)) == {"名称": "图谱"}
+        assert "图谱" in extract_text(path, cache_dir=None)
+
+    def test_html(self, tmp_path):
+        """Visible HTML text is kept, scripts and styles are dropped."""
+        path = tmp_path / "a.html"
+        path.write_text(
+            "<html><head><title>标题</title><style>p{}</style></head>"
+            "<body><p>第一段</p><script>var x = 1;</script><div>第二段 &amp; 更多</div></body></html>",
+            encoding="utf-8"
+        )
+
+        assert extract_text(path, cache_dir=None).split("\n") == ["标题", "第一段", "第二段 & 更多"]
+
+    def test_xml(self, tmp_path):
+        """Element text and tails are collected in document order."""
+        path = tmp_path / "a.xml"
+        path.write_text("<doc><title>标题</title>前言<p>正文<b>加粗</b>结尾</p></doc>", encoding="utf-8")
+
+        text = extract_text(path, cache_dir=None)
+        assert set(text.split("\n")) == {"标题", "前言", "正文", "加粗", "结尾"}
+
+    def test_pdf(self, tmp_path):
+        """PDF pages are extracted up to max_pages."""
+        pytest.importorskip("PyPDF2")
+        path = tmp_path / "a.pdf"
+        path.write_bytes(minimal_pdf("Knowledge Graph"))
+
+        assert "Knowledge Graph" in extract_text(path, cache_dir=None)
+        assert extract_text(path, max_pages=0, cache_dir=None) == ""
+
+    def test_docx(self, tmp_path):
+        """DOCX paragraphs and table rows are extracted."""
+        docx = pytest.importorskip("docx")
+        document = docx.Document()
+        document.add_paragraph("第一段")
+        table = document.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = "名称"
+        table.cell(0, 1).text = "图谱"
+        path = tmp_path / "a.docx"
+        document.save(str(path))
+
+        assert extract_text(path, cache_dir=None).split("\n") == ["第一段", "名称\t图谱"]
+
+    def test_max_chars_and_unknown_type(self, tmp_path):
+        """Text is truncated to max_chars; unsupported types return None."""
+        path = tmp_path / "a.txt"
+        path.write_text("x" * 100)
+        other = tmp_path / "a.bin"
+        other.write_bytes(b"\x00")
+
+        assert extract_text(path, max_chars=10, cache_dir=None) == "x" * 10
+        assert extract_text(other, cache_dir=None) is None
+
+    def test_errors_are_wrapped(self, tmp_path):
+        """Parser errors surface as ExtractionError."""
+        path = tmp_path / "a.json"
+        path.write_text("{broken")
+
+        with pytest.raises(ExtractionError):
+            extract_text(path, cache_dir=None)
+
+
+class TestCacheAndTimeout:
+    """Test the extraction cache and the per-file timeout."""
+
+    def test_cache_hit(self, tmp_path, extractor_registry):
+        """Cached formats are parsed once per file content and extraction settings."""
+        calls = []
+
+        @register_extractor(".slow")
+        def extract_slow(file_path, max_chars, max_pages):
+            calls.append(file_path.name)
+            return file_path.read_text()
+
+        cache_dir = tmp_path / "cache"
+        path = tmp_path / "a.slow"
+        path.write_text("内容")
+        copy = tmp_path / "b.slow"
+        copy.write_text("内容")
+
+        assert extract_text(path, cache_dir=str(cache_dir)) == "内容"
+        assert extract_text(copy, cache_dir=str(cache_dir)) == "内容"
+        assert calls == ["a.slow"]
+
+        extract_text(path, max_pages=1, cache_dir=str(cache_dir))
+        path.write_text("新内容")
+        assert extract_text(path, cache_dir=str(cache_dir)) == "新内容"
+        assert calls == ["a.slow", "a.slow", "a.slow"]
+
+    def test_uncached_format(self, tmp_path):
+        """Plain text is never written to the cache."""
+        cache_dir = tmp_path / "cache"
+        path = tmp_path / "a.txt"
+        path.write_text("text")
+
+        extract_text(path, cache_dir=str(cache_dir))
+        assert not cache_dir.exists()
+
+    def test_timeout(self, tmp_path, extractor_registry):
+        """Extraction running past the timeout raises ExtractionTimeout and nothing is cached."""
+        @register_extractor(".hang")
+        def extract_hang(file_path, max_chars, max_pages):
+            time.sleep(5)
+            return "never"
+
+        cache_dir = tmp_path / "cache"
+        path = tmp_path / "a.hang"
+        path.write_text("x")
+
+        started = time.monotonic()
+        with pytest.raises(ExtractionTimeout):
+            extract_text(path, timeout=0.2, cache_dir=str(cache_dir))
+        assert time.monotonic() - started < 2
+        assert not any(cache_dir.rglob("*.txt"))
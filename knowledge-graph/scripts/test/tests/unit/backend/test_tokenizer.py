@@ -0,0 +1,71 @@
+"""
+Unit tests for the shared jieba tokenizer (title cache, user words, batch tokenization).
+"""
+from unittest.mock import MagicMock
+
+from infrastructure.external_services.search.tokenizer import MIN_POOL_BATCH, ChineseTokenizer, tokenize_fields
+
+# 不在 jieba 词典中的词，加入用户词典前会被切开（jieba 词典是全局的，每个测试用不同的词）
+USER_WORD = "蓝鲸知识图谱平台"
+KNOWN_WORD = "青鸾文档中心系统"
+POOL_WORD = "玄武检索引擎服务"
+
+
+class TestChineseTokenizer:
+    """Test ChineseTokenizer."""
+
+    def test_title_cache(self):
+        """Repeated titles are served from the cache."""
+        tokenizer = ChineseTokenizer()
+        tokenizer.cut_title("部署指南")
+        tokenizer.cut_title("部署指南")
+
+        info = tokenizer._cut_title.cache_info()
+        assert info.hits == 1 and info.misses == 1
+
+    def test_user_words_invalidate_cache(self):
+        """Adding user words clears cached titles and shuts down the worker pool."""
+        tokenizer = ChineseTokenizer()
+        title = f"{USER_WORD}使用说明"
+        assert USER_WORD not in tokenizer.cut_title(title).split()
+
+        pool = MagicMock()
+        tokenizer._pool = pool
+        assert tokenizer.load_user_words([USER_WORD, " ", None]) == 1
+
+        assert tokenizer._cut_title.cache_info().currsize == 0
+        assert USER_WORD in tokenizer.cut_title(title).split()
+        pool.shutdown.assert_called_once_with(wait=False)
+        assert tokenizer._pool is None
+
+    def test_known_words_keep_cache(self):
+        """Loading words that are already known leaves the cache and pool alone."""
+        tokenizer = ChineseTokenizer()
+        tokenizer.load_user_words([KNOWN_WORD])
+        tokenizer.cut_title("部署指南")
+        pool = MagicMock()
+        tokenizer._pool = pool
+
+        assert tokenizer.load_user_words([KNOWN_WORD]) == 0
+        assert tokenizer._cut_title.cache_info().currsize == 1
+        pool.shutdown.assert_not_called()
+
+    def test_small_batch_skips_pool(self):
+        """Batches below MIN_POOL_BATCH are tokenized in-process."""
+        tokenizer = ChineseTokenizer(workers=4)
+        documents = [{"title": "标题", "content": "内容"}] * (MIN_POOL_BATCH - 1)
+
+        tokens = tokenizer.tokenize_batch(documents)
+        assert tokenizer._pool is None
+        assert tokens[0] == {"content_tokens": "内容", "title_tokens": "标题"}
+        assert len(tokens) == len(documents)
+
+    def test_process_pool_spawns_workers(self):
+        """Worker processes are spawned (not forked) and load the parent's user words."""
+        tokenizer = ChineseTokenizer()
+        tokenizer.load_user_words([POOL_WORD])
+
+        with tokenizer.process_pool(1) as pool:
+            assert pool._mp_context.get_start_method() == "spawn"
+            tokens = pool.submit(tokenize_fields, {"content": f"{POOL_WORD}上线"}).result(timeout=60)
+        assert POOL_WORD in tokens["content_tokens"].split()
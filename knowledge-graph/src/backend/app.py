@@ -16,6 +16,8 @@ from flask_cors import CORS
 from infrastructure.config.settings import get_config
 from infrastructure.config.port_config import port_config
 from infrastructure.persistence.database import db
+from infrastructure.persistence.models import TagModel
+from infrastructure.external_services.search import get_tokenizer
 from presentation.api import api_bp
 
 
@@ -27,6 +29,19 @@ class UUIDEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def init_tokenizer(app):
+    """预加载jieba词典并将标签名加入用户词典，避免首个请求承担词典加载时间"""
+    tokenizer = get_tokenizer()
+    tokenizer.initialize()
+    
+    try:
+        with app.app_context():
+            tag_names = [name for (name,) in db.session.query(TagModel.name)]
+        tokenizer.load_user_words(tag_names)
+    except Exception as e:
+        app.logger.warning(f"加载标签用户词典失败: {e}")
+
+
 def create_app(config_name='development'):
     """应用工厂函数"""
     app = Flask(__name__)
@@ -65,6 +80,9 @@ def create_app(config_name='development'):
     # 注册蓝图
     app.register_blueprint(api_bp)
     
+    # 预加载分词词典
+    init_tokenizer(app)
+    
     # 健康检查端点
     @app.route('/health')
     def health_check():
@@ -1,6 +1,12 @@
 """
 搜索服务模块
 """
-from .elasticsearch_client import ElasticsearchClient, get_elasticsearch_client
+from .elasticsearch_client import DOCUMENT_INDEX_ALIAS, ElasticsearchClient, get_elasticsearch_client
+from .tokenizer import ChineseTokenizer, get_tokenizer, tokenize_fields
+from .text_extractors import ExtractionError, ExtractionTimeout, extract_text, register_extractor
 
-__all__ = ['ElasticsearchClient', 'get_elasticsearch_client']
\ No newline at end of file
+__all__ = [
+    'DOCUMENT_INDEX_ALIAS', 'ElasticsearchClient', 'get_elasticsearch_client',
+    'ChineseTokenizer', 'get_tokenizer', 'tokenize_fields',
+    'ExtractionError', 'ExtractionTimeout', 'extract_text', 'register_extractor'
+]
\ No newline at end of file
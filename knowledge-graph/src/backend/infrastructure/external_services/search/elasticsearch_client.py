@@ -3,13 +3,17 @@ Elasticsearch客户端配置和连接管理
 """
 import os
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import ConnectionError, NotFoundError
-import jieba
+
+from .tokenizer import get_tokenizer
 
 logger = logging.getLogger(__name__)
 
+# 文档搜索使用的别名（指向当前版本的文档索引），所有读取都通过别名进行
+DOCUMENT_INDEX_ALIAS = os.getenv('ELASTICSEARCH_DOCUMENT_INDEX', 'knowledge_base_documents')
+
 
 class ElasticsearchClient:
     """Elasticsearch客户端管理类"""
@@ -17,6 +21,7 @@ class ElasticsearchClient:
     def __init__(self):
         self.host = os.getenv('ELASTICSEARCH_HOST', 'localhost')
         self.port = int(os.getenv('ELASTICSEARCH_PORT', '9200'))
+        self.tokenizer = get_tokenizer()
         self.es = None
         self._connect()
     
@@ -75,14 +80,62 @@ class ElasticsearchClient:
             logger.error(f"Failed to delete index {index_name}: {e}")
             return False
     
+    def update_index_settings(self, index_name: str, settings: Dict[str, Any]) -> bool:
+        """更新索引的动态设置（如 number_of_replicas、refresh_interval）"""
+        try:
+            self.es.indices.put_settings(index=index_name, settings={"index": settings})
+            logger.info(f"Updated settings of {index_name}: {settings}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to update settings of {index_name}: {e}")
+            return False
+    
+    def list_indices(self, pattern: str) -> List[str]:
+        """列出与通配符匹配的索引名（按名称排序）"""
+        try:
+            return sorted(self.es.indices.get(index=pattern, expand_wildcards="open"))
+        
+        except NotFoundError:
+            return []
+    
+    def get_alias_indices(self, alias: str) -> List[str]:
+        """获取别名当前指向的索引"""
+        try:
+            return sorted(self.es.indices.get_alias(name=alias))
+        
+        except NotFoundError:
+            return []
+    
+    def swap_alias(self, alias: str, index_name: str) -> bool:
+        """
+        原子地将别名切换到 index_name。
+        
+        别名原来指向的索引保留（用于回滚）；若存在与别名同名的旧索引，在同一操作中删除。
+        """
+        try:
+            actions = [
+                {"remove": {"index": old_index, "alias": alias}}
+                for old_index in self.get_alias_indices(alias)
+                if old_index != index_name
+            ]
+            if self.es.indices.exists(index=alias) and not self.es.indices.exists_alias(name=alias):
+                actions.append({"remove_index": {"index": alias}})
+            actions.append({"add": {"index": index_name, "alias": alias}})
+            
+            self.es.indices.update_aliases(actions=actions)
+            logger.info(f"Alias {alias} now points to {index_name}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to swap alias {alias} to {index_name}: {e}")
+            return False
+    
     def index_document(self, index_name: str, doc_id: str, document: Dict[str, Any]) -> bool:
         """索引单个文档"""
         try:
             # 对中文内容进行分词处理
-            if 'content' in document:
-                document['content_tokens'] = ' '.join(jieba.cut(document['content']))
-            if 'title' in document:
-                document['title_tokens'] = ' '.join(jieba.cut(document['title']))
+            document.update(self.tokenizer.tokenize_fields(document))
                 
             self.es.index(index=index_name, id=doc_id, body=document)
             logger.debug(f"Indexed document {doc_id} in {index_name}")
@@ -97,14 +150,12 @@ class ElasticsearchClient:
         try:
             from elasticsearch.helpers import bulk
             
+            # 对中文内容进行分词处理（文档较多时在进程池中批量分词）
+            for doc, tokens in zip(documents, self.tokenizer.tokenize_batch(documents)):
+                doc.update(tokens)
+            
             actions = []
             for doc in documents:
-                # 对中文内容进行分词处理
-                if 'content' in doc:
-                    doc['content_tokens'] = ' '.join(jieba.cut(doc['content']))
-                if 'title' in doc:
-                    doc['title_tokens'] = ' '.join(jieba.cut(doc['title']))
-                
                 action = {
                     "_index": index_name,
                     "_id": doc.get('id', doc.get('doc_id')),
@@ -120,6 +171,91 @@ class ElasticsearchClient:
             logger.error(f"Failed to bulk index documents: {e}")
             return False
     
+    def stream_index_documents(self, index_name: str, documents: Iterable[Dict[str, Any]],
+                               chunk_size: int = 500, max_chunk_bytes: int = 10 * 1024 * 1024,
+                               thread_count: int = 1) -> Iterator[Tuple[bool, str, Any]]:
+        """
+        流式批量索引文档，按文档逐个返回 (是否成功, 文档ID, 错误信息)。
+        
+        documents 可以是生成器，按 chunk_size / max_chunk_bytes 分批发送，不会一次性构建全部请求；
+        已包含 content_tokens 的文档不再分词；thread_count > 1 时使用 parallel_bulk 并发发送。
+        """
+        from elasticsearch.helpers import parallel_bulk, streaming_bulk
+        
+        def actions():
+            for doc in documents:
+                if 'content_tokens' not in doc:
+                    doc.update(self.tokenizer.tokenize_fields(doc))
+                yield {
+                    "_index": index_name,
+                    "_id": doc.get('id', doc.get('doc_id')),
+                    "_source": doc
+                }
+        
+        options = {
+            "chunk_size": chunk_size,
+            "max_chunk_bytes": max_chunk_bytes,
+            "raise_on_error": False,
+            "raise_on_exception": False
+        }
+        if thread_count > 1:
+            results = parallel_bulk(self.es, actions(), thread_count=thread_count, **options)
+        else:
+            results = streaming_bulk(self.es, actions(), **options)
+        
+        for ok, item in results:
+            info = item.get('index', {})
+            yield ok, info.get('_id'), None if ok else info.get('error', info)
+    
+    def bulk_update_documents(self, index_name: str, updates: Dict[str, Dict[str, Any]]) -> bool:
+        """批量部分更新文档（不重新分词，用于只更新元数据）"""
+        try:
+            from elasticsearch.helpers import bulk
+            
+            actions = [
+                {"_op_type": "update", "_index": index_name, "_id": doc_id, "doc": fields}
+                for doc_id, fields in updates.items()
+            ]
+            success, failed = bulk(self.es, actions, raise_on_error=False)
+            logger.info(f"Bulk updated {success} documents, {len(failed)} failed")
+            return len(failed) == 0
+        
+        except Exception as e:
+            logger.error(f"Failed to bulk update documents: {e}")
+            return False
+    
+    def bulk_delete_documents(self, index_name: str, doc_ids: List[str]) -> bool:
+        """批量删除文档（不存在的文档视为已删除）"""
+        try:
+            from elasticsearch.helpers import bulk
+            
+            actions = [
+                {"_op_type": "delete", "_index": index_name, "_id": doc_id}
+                for doc_id in doc_ids
+            ]
+            success, failed = bulk(self.es, actions, raise_on_error=False)
+            failed = [item for item in failed if item.get('delete', {}).get('status') != 404]
+            logger.info(f"Bulk deleted {success} documents, {len(failed)} failed")
+            return len(failed) == 0
+        
+        except Exception as e:
+            logger.error(f"Failed to bulk delete documents: {e}")
+            return False
+    
+    def scan_documents(self, index_name: str, source_fields: Optional[List[str]] = None,
+                       batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """通过 scroll 遍历索引中的全部文档（只取 source_fields 指定的字段）"""
+        from elasticsearch.helpers import scan
+        
+        query = {"query": {"match_all": {}}}
+        if source_fields is not None:
+            query["_source"] = source_fields
+        
+        for hit in scan(self.es, index=index_name, query=query, size=batch_size):
+            doc = hit.get("_source", {})
+            doc["id"] = hit["_id"]
+            yield doc
+    
     def search_documents(self, index_name: str, query: str, 
                         filters: Optional[Dict[str, Any]] = None,
                         size: int = 10, from_: int = 0,
@@ -254,10 +390,7 @@ class ElasticsearchClient:
         """更新文档"""
         try:
             # 对更新的中文内容进行分词处理
-            if 'content' in updates:
-                updates['content_tokens'] = ' '.join(jieba.cut(updates['content']))
-            if 'title' in updates:
-                updates['title_tokens'] = ' '.join(jieba.cut(updates['title']))
+            updates.update(self.tokenizer.tokenize_fields(updates))
                 
             self.es.update(index=index_name, id=doc_id, body={"doc": updates})
             logger.debug(f"Updated document {doc_id} in {index_name}")
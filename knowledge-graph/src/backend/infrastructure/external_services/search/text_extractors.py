@@ -0,0 +1,317 @@
+"""
+文档文本提取（PDF、DOCX、HTML、XML、纯文本）
+"""
+import os
+import json
+import codecs
+import signal
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    PdfReader = None
+
+try:
+    import docx
+except ImportError:
+    docx = None
+
+logger = logging.getLogger(__name__)
+
+# 提取结果的最大字符数（超出部分截断）
+MAX_CHARS = 1_000_000
+
+# PDF 最多提取的页数
+MAX_PDF_PAGES = 200
+
+# 单个文件的提取超时（秒）
+EXTRACT_TIMEOUT = 60
+
+# 提取结果缓存目录（按文件内容哈希存储，跨多次索引复用）
+EXTRACTION_CACHE_DIR = os.getenv(
+    'EXTRACTION_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'knowledge_base', 'extraction')
+)
+
+# 提取逻辑变化时递增，使旧缓存失效
+EXTRACTOR_VERSION = 1
+
+# 流式读取的块大小
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ExtractionError(Exception):
+    """文本提取失败"""
+    pass
+
+
+class ExtractionTimeout(ExtractionError):
+    """文本提取超时"""
+    pass
+
+
+# 扩展名 -> (提取函数, 是否缓存结果)
+_EXTRACTORS: Dict[str, Tuple[Callable[..., str], bool]] = {}
+
+
+def register_extractor(*extensions: str, cached: bool = True):
+    """
+    注册提取函数的装饰器。
+    
+    提取函数签名为 func(file_path: Path, max_chars: int, max_pages: int) -> str；
+    cached 为 True 时结果按文件内容哈希缓存到磁盘（适用于解析开销大的格式）。
+    """
+    def decorator(func):
+        for extension in extensions:
+            _EXTRACTORS[extension.lower()] = (func, cached)
+        return func
+    return decorator
+
+
+def supported_extensions() -> List[str]:
+    """已注册提取函数的扩展名"""
+    return sorted(_EXTRACTORS)
+
+
+def extract_text(file_path, max_chars: int = MAX_CHARS, max_pages: int = MAX_PDF_PAGES,
+                 timeout: Optional[float] = EXTRACT_TIMEOUT,
+                 cache_dir: Optional[str] = EXTRACTION_CACHE_DIR) -> Optional[str]:
+    """
+    提取文件文本（模块级函数，可在进程池中调用）。
+    
+    没有对应提取函数时返回 None；提取失败抛出 ExtractionError，超时抛出 ExtractionTimeout。
+    """
+    file_path = Path(file_path)
+    extractor = _EXTRACTORS.get(file_path.suffix.lower())
+    if extractor is None:
+        return None
+    func, cached = extractor
+    
+    cache_path = None
+    if cached and cache_dir:
+        cache_path = _cache_path(file_path, cache_dir, max_chars, max_pages)
+        if cache_path.exists():
+            return cache_path.read_text(encoding='utf-8')
+    
+    try:
+        with _time_limit(timeout):
+            text = func(file_path, max_chars=max_chars, max_pages=max_pages)
+    except ExtractionError:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"{type(e).__name__}: {e}") from e
+    
+    text = text[:max_chars]
+    if cache_path is not None:
+        _write_cache(cache_path, text)
+    return text
+
+
+def _cache_path(file_path: Path, cache_dir: str, max_chars: int, max_pages: int) -> Path:
+    """缓存文件路径：文件内容哈希 + 提取参数"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    key = hashlib.sha256(
+        f"{digest.hexdigest()}:{EXTRACTOR_VERSION}:{max_chars}:{max_pages}".encode('utf-8')
+    ).hexdigest()
+    return Path(cache_dir) / key[:2] / f"{key}.txt"
+
+
+def _write_cache(cache_path: Path, text: str):
+    """原子写入缓存（多个进程可能同时写入同一条目）"""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(text, encoding='utf-8')
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Failed to write extraction cache {cache_path}: {e}")
+
+
+def time_limit_supported() -> bool:
+    """当前线程能否限制提取时间（SIGALRM 只在主线程生效；其他线程需在子进程中提取）"""
+    return hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def _time_limit(timeout: Optional[float]):
+    """
+    在当前进程内限制执行时间（基于 SIGALRM，只在主线程生效）。
+    
+    进程池的工作进程中任务在主线程执行，超时后抛出 ExtractionTimeout，工作进程可继续处理后续文件。
+    """
+    if not timeout or not time_limit_supported():
+        yield
+        return
+    
+    def handler(signum, frame):
+        raise ExtractionTimeout(f"提取超时（{timeout} 秒）")
+    
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _read_text(file_path: Path, max_chars: int) -> str:
+    """读取文本文件（UTF-8，失败时尝试 GBK），最多读取 max_chars 个字符"""
+    for encoding in ('utf-8', 'gbk'):
+        try:
+            with open(file_path, 'r', encoding=encoding) as f:
+                return f.read(max_chars)
+        except UnicodeDecodeError:
+            continue
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read(max_chars)
+
+
+@register_extractor('.txt', '.md', cached=False)
+def extract_plain_text(file_path: Path, max_chars: int, max_pages: int) -> str:
+    """纯文本和 Markdown"""
+    return _read_text(file_path, max_chars)
+
+
+@register_extractor('.json', cached=False)
+def extract_json(file_path: Path, max_chars: int, max_pages: int) -> str:
+    """JSON（格式化输出）"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return json.dumps(data, ensure_ascii=False, indent=2)[:max_chars]
+
+
+@register_extractor('.pdf')
+def extract_pdf(file_path: Path, max_chars: int, max_pages: int) -> str:
+    """PDF：逐页提取，最多 max_pages 页"""
+    if PdfReader is None:
+        raise ExtractionError("未安装 PyPDF2")
+    
+    parts = []
+    length = 0
+    with open(file_path, 'rb') as f:
+        reader = PdfReader(f)
+        if reader.is_encrypted:
+            reader.decrypt('')
+        
+        for page_number, page in enumerate(reader.pages):
+            if page_number >= max_pages:
+                logger.info(f"PDF {file_path} has more than {max_pages} pages, truncated")
+                break
+            text = page.extract_text() or ''
+            parts.append(text)
+            length += len(text)
+            if length >= max_chars:
+                break
+    
+    return '\n'.join(parts)
+
+
+@register_extractor('.docx')
+def extract_docx(file_path: Path, max_chars: int, max_pages: int) -> str:
+    """DOCX：段落和表格"""
+    if docx is None:
+        raise ExtractionError("未安装 python-docx")
+    
+    document = docx.Document(str(file_path))
+    parts = []
+    length = 0
+    
+    def add(text: str) -> bool:
+        nonlocal length
+        if text:
+            parts.append(text)
+            length += len(text)
+        return length < max_chars
+    
+    for paragraph in document.paragraphs:
+        if not add(paragraph.text):
+            return '\n'.join(parts)
+    for table in document.tables:
+        for row in table.rows:
+            if not add('\t'.join(cell.text for cell in row.cells)):
+                return '\n'.join(parts)
+    
+    return '\n'.join(parts)
+
+
+class _HTMLTextParser(HTMLParser):
+    """收集 HTML 可见文本，跳过脚本和样式"""
+    
+    SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+    BLOCK_TAGS = {'p', 'div', 'br', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'title', 'section', 'article'}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.length = 0
+        self._skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+    
+    def handle_data(self, data):
+        if not self._skip_depth and data.strip():
+            self.parts.append(data.strip())
+            self.length += len(data)
+    
+    def text(self) -> str:
+        lines = (line.strip() for line in ' '.join(self.parts).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+
+@register_extractor('.html', '.htm')
+def extract_html(file_path: Path, max_chars: int, max_pages: int) -> str:
+    """HTML：分块解析可见文本"""
+    parser = _HTMLTextParser()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            parser.feed(decoder.decode(block))
+            if parser.length >= max_chars:
+                break
+        else:
+            parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    
+    return parser.text()
+
+
+@register_extractor('.xml')
+def extract_xml(file_path: Path, max_chars: int, max_pages: int) -> str:
+    """XML：流式解析元素文本"""
+    parts = []
+    length = 0
+    
+    for _, element in ElementTree.iterparse(str(file_path), events=('end',)):
+        # 元素的 tail 在其结束事件之后才解析，由父元素结束时收集
+        for text in [element.text] + [child.tail for child in element]:
+            if text and text.strip():
+                parts.append(text.strip())
+                length += len(text)
+        tail = element.tail
+        element.clear()
+        element.tail = tail
+        if length >= max_chars:
+            break
+    
+    return '\n'.join(parts)
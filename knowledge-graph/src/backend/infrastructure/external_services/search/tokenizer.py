@@ -0,0 +1,143 @@
+"""
+中文分词组件（基于jieba）
+"""
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import jieba
+
+logger = logging.getLogger(__name__)
+
+# 标题分词缓存的条目数
+TITLE_CACHE_SIZE = 10000
+
+# 批量分词时文档数少于该值则直接在当前进程分词（进程间传输的开销大于收益）
+MIN_POOL_BATCH = 32
+
+
+class ChineseTokenizer:
+    """
+    jieba分词器。
+    
+    - initialize 预加载词典；cache_file 指定序列化词典缓存的位置（默认位于临时目录，容器重启后失效）
+    - load_user_words 将标签名等加入用户词典
+    - tokenize_batch 在进程池中批量分词，子进程以 spawn 方式启动（Web 进程是多线程的，fork 不安全），
+      启动时从缓存文件加载词典并载入用户词
+    - 标题按内容缓存分词结果（用户词典变化时清空）
+    """
+    
+    def __init__(self, cache_file: Optional[str] = None, workers: int = 0,
+                 title_cache_size: int = TITLE_CACHE_SIZE):
+        self.cache_file = cache_file
+        self.workers = workers
+        self.user_words = set()
+        self._initialized = False
+        self._pool = None
+        self._cut_title = lru_cache(maxsize=title_cache_size)(self.cut)
+    
+    def initialize(self):
+        """加载jieba词典（首次调用时加载，之后直接返回）"""
+        if self._initialized:
+            return
+        
+        start = time.perf_counter()
+        if self.cache_file:
+            jieba.dt.cache_file = self.cache_file
+        jieba.initialize()
+        self._initialized = True
+        logger.info(f"Loaded jieba dictionary in {time.perf_counter() - start:.2f}s")
+    
+    def load_user_words(self, words: Iterable[str]) -> int:
+        """将词语加入用户词典，返回新增的词数"""
+        self.initialize()
+        
+        added = 0
+        for word in words:
+            word = (word or '').strip()
+            if word and word not in self.user_words:
+                jieba.add_word(word)
+                self.user_words.add(word)
+                added += 1
+        
+        if added:
+            # 已缓存的标题分词和进程池中的词典都已过期
+            self._cut_title.cache_clear()
+            self._shutdown_pool()
+            logger.info(f"Added {added} user words to jieba dictionary")
+        return added
+    
+    def cut(self, text: str) -> str:
+        """分词，返回以空格分隔的词语"""
+        self.initialize()
+        return ' '.join(jieba.cut(text))
+    
+    def cut_title(self, title: str) -> str:
+        """标题分词（缓存结果）"""
+        return self._cut_title(title)
+    
+    def tokenize_fields(self, document: Dict[str, Any]) -> Dict[str, str]:
+        """对文档标题和内容分词，返回 content_tokens、title_tokens"""
+        tokens = {}
+        if 'content' in document:
+            tokens['content_tokens'] = self.cut(document['content'])
+        if 'title' in document:
+            tokens['title_tokens'] = self.cut_title(document['title'])
+        return tokens
+    
+    def tokenize_batch(self, documents: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """批量分词，文档数足够多且配置了 workers 时使用进程池"""
+        if self.workers <= 1 or len(documents) < MIN_POOL_BATCH:
+            return [self.tokenize_fields(doc) for doc in documents]
+        
+        if self._pool is None:
+            self._pool = self.process_pool(self.workers)
+        texts = [{key: doc[key] for key in ('title', 'content') if key in doc} for doc in documents]
+        chunksize = max(1, len(texts) // (self.workers * 4))
+        return list(self._pool.map(tokenize_fields, texts, chunksize=chunksize))
+    
+    def process_pool(self, max_workers: int) -> ProcessPoolExecutor:
+        """创建分词进程池：先在当前进程加载词典（生成缓存文件），spawn 子进程启动时载入相同的缓存文件和用户词"""
+        self.initialize()
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=self._worker_args()
+        )
+    
+    def _worker_args(self) -> Tuple[Optional[str], List[str]]:
+        return self.cache_file, sorted(self.user_words)
+    
+    def _shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+def _init_worker(cache_file: Optional[str], user_words: List[str]):
+    """进程池初始化：使用父进程的缓存文件加载词典并载入用户词"""
+    global tokenizer
+    if tokenizer.cache_file != cache_file:
+        tokenizer = ChineseTokenizer(cache_file=cache_file)
+    tokenizer.load_user_words(user_words)
+
+
+def tokenize_fields(document: Dict[str, Any]) -> Dict[str, str]:
+    """使用全局分词器对文档分词（模块级函数，可在进程池中调用）"""
+    return tokenizer.tokenize_fields(document)
+
+
+# 全局分词器实例
+tokenizer = ChineseTokenizer(
+    cache_file=os.getenv('JIEBA_CACHE_FILE'),
+    workers=int(os.getenv('TOKENIZER_WORKERS', '0'))
+)
+
+
+def get_tokenizer() -> ChineseTokenizer:
+    """获取分词器实例"""
+    return tokenizer
@@ -6,7 +6,7 @@ from typing import Dict, Any, List, Optional
 from flask import request, jsonify
 from flask_restx import Resource, Namespace, fields
 
-from infrastructure.external_services.search import get_elasticsearch_client
+from infrastructure.external_services.search import DOCUMENT_INDEX_ALIAS, get_elasticsearch_client
 from application.services.document_service import DocumentService
 
 logger = logging.getLogger(__name__)
@@ -123,7 +123,7 @@ class DocumentSearchResource(Resource):
             
             # 执行搜索
             results = es_client.search_documents(
-                index_name='knowledge_base_documents',
+                index_name=DOCUMENT_INDEX_ALIAS,
                 query=query,
                 filters=filters if filters else None,
                 size=size,
@@ -219,7 +219,7 @@ class SearchSuggestionsResource(Resource):
             
             # 获取搜索建议
             suggestions = es_client.suggest_completions(
-                index_name='knowledge_base_documents',
+                index_name=DOCUMENT_INDEX_ALIAS,
                 text=text,
                 field='title'
             )
@@ -275,7 +275,7 @@ class SearchCategoriesResource(Resource):
             }
             
             response = es_client.es.search(
-                index='knowledge_base_documents',
+                index=DOCUMENT_INDEX_ALIAS,
                 body=search_body
             )
             
@@ -322,7 +322,7 @@ class SearchStatsResource(Resource):
                 return {'error': 'Elasticsearch服务不可用'}, 503
             
             # 检查索引是否存在
-            index_name = 'knowledge_base_documents'
+            index_name = DOCUMENT_INDEX_ALIAS
             if not es_client.es.indices.exists(index=index_name):
                 return {
                     'exists': False,
@@ -341,7 +341,7 @@ class SearchStatsResource(Resource):
             return {
                 'exists': True,
                 'document_count': db_stats['total_documents'],
-                'index_size': stats['indices'][index_name]['total']['store']['size_in_bytes'],
+                'index_size': stats['_all']['total']['store']['size_in_bytes'],
                 'created': True
             }
             
@@ -358,9 +358,16 @@ class SearchReindexResource(Resource):
         """
         重新索引所有文档
         ---
-        重新扫描company_knowledge_base目录并更新Elasticsearch索引
+        重新扫描company_knowledge_base目录并更新Elasticsearch索引。
+        默认增量索引（只处理新增、修改和删除的文件）；请求体 {"mode": "full"} 时重建新版本索引并切换别名，
+        {"mode": "rollback"} 时将别名切换回上一个版本的索引。
         """
         try:
+            data = request.get_json(silent=True) or {}
+            mode = data.get('mode', 'incremental')
+            if mode not in ('incremental', 'full', 'rollback'):
+                return {'error': f'不支持的索引模式: {mode}'}, 400
+            
             # 导入索引器
             import sys
             import os
@@ -369,16 +376,27 @@ class SearchReindexResource(Resource):
             from scripts.elasticsearch_indexer import DocumentIndexer
             
             # 创建索引器并执行重新索引
+            # workers=1：不创建多进程池（每个请求会各占满 CPU），在请求线程中分词；
+            # 请求线程无法用 SIGALRM 中断提取，提取在单个 spawn 工作进程中执行以保证超时生效
+            # （多线程的 Flask 进程中 fork 不安全）。大批量重建请使用命令行脚本 scripts/elasticsearch_indexer.py
             knowledge_base_path = "/root/knowledge-base-app/company_knowledge_base"
-            indexer = DocumentIndexer(knowledge_base_path)
+            indexer = DocumentIndexer(knowledge_base_path, workers=1)
             
-            success = indexer.reindex_all()
+            if mode == 'rollback':
+                success = indexer.rollback()
+            elif mode == 'full':
+                success = indexer.reindex_all()
+            else:
+                success = indexer.reindex_incremental()
             
             if success:
                 stats = indexer.get_index_stats()
                 return {
                     'success': True,
                     'message': '重新索引完成',
+                    'mode': mode,
+                    'changes': indexer.last_run_stats,
+                    'pipeline': indexer.last_pipeline_report,
                     'stats': stats
                 }
             else:
@@ -4,17 +4,30 @@ Elasticsearch文档索引器
 """
 import os
 import sys
-import json
+import time
+import argparse
 import logging
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple
 from datetime import datetime
 import hashlib
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from infrastructure.external_services.search import get_elasticsearch_client
+from infrastructure.external_services.search import (
+    DOCUMENT_INDEX_ALIAS, extract_text, get_elasticsearch_client, get_tokenizer, tokenize_fields
+)
+from infrastructure.external_services.search.text_extractors import (
+    EXTRACT_TIMEOUT, EXTRACTION_CACHE_DIR, EXTRACTOR_VERSION, MAX_PDF_PAGES, ExtractionTimeout,
+    time_limit_supported
+)
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +36,28 @@ logger = logging.getLogger(__name__)
 # 支持的文件类型
 SUPPORTED_EXTENSIONS = {'.txt', '.md', '.doc', '.docx', '.pdf', '.json', '.xml', '.html'}
 
+# 全量重建时保留的旧版本索引数量（用于回滚）
+ROLLBACK_VERSIONS = 1
+
+# 批量导入期间的索引设置（关闭副本和刷新），导入完成后恢复
+BULK_LOAD_SETTINGS = {"number_of_replicas": 0, "refresh_interval": "-1"}
+
+# 流式批量索引：每批文档数和每批最大字节数
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+
+# 提取和分词进程池中每个进程排队的任务数（限制同时在内存中的文档数量）
+POOL_QUEUE_PER_WORKER = 4
+
+# 等待提取结果的额外时间（秒）；超时由工作进程自己中断，这里只是兜底
+EXTRACT_TIMEOUT_GRACE = 10
+
+# 索引报告中最多列出的失败文档数
+MAX_REPORTED_FAILURES = 100
+
+# 增量索引时从已有索引读取的字段（用于判断文件是否变化，提取逻辑升级后重新提取）
+INDEXED_STATE_FIELDS = ['file_size', 'updated_at', 'content_hash', 'extractor_version']
+
 # 文档索引映射配置
 DOCUMENT_INDEX_MAPPING = {
     "mappings": {
@@ -77,6 +112,9 @@ DOCUMENT_INDEX_MAPPING = {
             "content_hash": {
                 "type": "keyword"
             },
+            "extractor_version": {
+                "type": "integer"
+            },
             "tags": {
                 "type": "keyword"
             },
@@ -99,28 +137,190 @@ DOCUMENT_INDEX_MAPPING = {
 }
 
 
+class PipelineStats:
+    """
+    索引管道各阶段（扫描、读取、分词、写入）的处理数量、耗时和失败文档。
+    
+    各阶段串联为生成器，阶段耗时为主进程等待该阶段产出的时间减去上游阶段的时间。
+    """
+    
+    STAGES = ("scan", "read", "tokenize", "bulk")
+    
+    def __init__(self):
+        self.items = {stage: 0 for stage in self.STAGES}
+        self.bytes = {stage: 0 for stage in self.STAGES}
+        self.elapsed = {stage: 0.0 for stage in self.STAGES}
+        self.failures: List[Dict[str, str]] = []
+    
+    def timed(self, stage: str, iterable: Iterable, size: Optional[Callable[[Any], int]] = None) -> Iterator:
+        """统计阶段产出的数量、字节数和耗时（含上游阶段）"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.elapsed[stage] += time.perf_counter() - start
+                return
+            self.elapsed[stage] += time.perf_counter() - start
+            self.items[stage] += 1
+            if size:
+                self.bytes[stage] += size(item)
+            yield item
+    
+    def fail(self, stage: str, source: str, error: Any):
+        """记录单个文档的失败"""
+        logger.warning(f"[{stage}] 文档处理失败 {source}: {error}")
+        self.failures.append({"stage": stage, "source": source, "error": str(error)})
+    
+    def failed(self, *stages: str) -> int:
+        """指定阶段（默认全部）的失败文档数"""
+        return sum(1 for failure in self.failures if not stages or failure["stage"] in stages)
+    
+    def report(self) -> Dict[str, Any]:
+        """生成报告：各阶段数量、耗时、吞吐量及失败文档"""
+        stages = {}
+        upstream = 0.0
+        for stage in self.STAGES:
+            seconds = max(self.elapsed[stage] - upstream, 0.0)
+            upstream = max(upstream, self.elapsed[stage])
+            stages[stage] = {
+                "items": self.items[stage],
+                "bytes": self.bytes[stage],
+                "seconds": round(seconds, 3),
+                "items_per_second": round(self.items[stage] / seconds, 1) if seconds else None
+            }
+        
+        return {
+            "stages": stages,
+            "indexed": self.items["bulk"] - self.failed("bulk"),
+            "failed": len(self.failures),
+            "failures": self.failures[:MAX_REPORTED_FAILURES]
+        }
+
+
+def _terminate_pool(executor: ProcessPoolExecutor):
+    """关闭进程池且不等待正在执行的任务，并终止其工作进程（shutdown 本身无法中断卡住的任务）"""
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+
+
+def _bounded_submit(executor: ProcessPoolExecutor, func: Callable, items: Iterable, limit: int,
+                    arg: Callable[[Any], Any] = lambda item: item) -> Iterator:
+    """
+    按顺序提交 func(arg(item)) 并返回 (item, future)，最多 limit 个任务同时排队
+    （executor.map 会一次性提交全部输入）。
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(func, arg(item))))
+        if len(pending) >= limit:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
 class DocumentIndexer:
     """文档索引器"""
     
-    def __init__(self, knowledge_base_path: str, index_name: str = "knowledge_base_documents"):
+    def __init__(self, knowledge_base_path: str, index_name: str = DOCUMENT_INDEX_ALIAS,
+                 workers: Optional[int] = None, chunk_size: int = BULK_CHUNK_SIZE,
+                 max_chunk_bytes: int = BULK_MAX_CHUNK_BYTES, bulk_threads: int = 1,
+                 max_pdf_pages: int = MAX_PDF_PAGES, extract_timeout: Optional[float] = EXTRACT_TIMEOUT,
+                 extraction_cache_dir: Optional[str] = EXTRACTION_CACHE_DIR):
         self.knowledge_base_path = Path(knowledge_base_path)
         self.index_name = index_name
         self.es_client = get_elasticsearch_client()
+        # 分词进程数（<= 1 时在主进程分词）
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.bulk_threads = bulk_threads
+        # 文本提取参数（extraction_cache_dir 为 None 时不使用提取缓存）
+        self.extract_timeout = extract_timeout
+        self.extract_options = {
+            "max_pages": max_pdf_pages,
+            "timeout": extract_timeout,
+            "cache_dir": extraction_cache_dir
+        }
+        # 最近一次索引的变更统计和管道报告
+        self.last_run_stats: Dict[str, int] = {}
+        self.last_pipeline_report: Dict[str, Any] = {}
         
         if not self.es_client.is_connected():
             raise ConnectionError("无法连接到Elasticsearch")
     
-    def initialize_index(self) -> bool:
-        """初始化索引"""
-        logger.info(f"初始化索引: {self.index_name}")
+    def initialize_index(self) -> Optional[str]:
+        """
+        创建带时间戳的新版本索引（index_name 为指向当前版本的别名），返回新索引名。
         
-        # 删除现有索引（如果存在）
-        if self.es_client.es.indices.exists(index=self.index_name):
-            logger.info(f"删除现有索引: {self.index_name}")
-            self.es_client.delete_index(self.index_name)
+        新索引在批量导入期间关闭副本和刷新，由 publish_index 恢复。
+        """
+        new_index = f"{self.index_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        logger.info(f"初始化索引: {new_index}")
         
-        # 创建新索引
-        return self.es_client.create_index(self.index_name, DOCUMENT_INDEX_MAPPING)
+        mapping = dict(DOCUMENT_INDEX_MAPPING)
+        mapping["settings"] = {**DOCUMENT_INDEX_MAPPING["settings"], **BULK_LOAD_SETTINGS}
+        
+        if not self.es_client.create_index(new_index, mapping):
+            return None
+        return new_index
+    
+    def publish_index(self, new_index: str) -> bool:
+        """恢复副本和刷新设置，将别名原子地切换到新索引，并清理多余的旧版本"""
+        settings = DOCUMENT_INDEX_MAPPING["settings"]
+        restored = {
+            "number_of_replicas": settings.get("number_of_replicas", 1),
+            "refresh_interval": settings.get("refresh_interval", "1s"),
+        }
+        if not self.es_client.update_index_settings(new_index, restored):
+            return False
+        self.es_client.es.indices.refresh(index=new_index)
+        
+        if not self.es_client.swap_alias(self.index_name, new_index):
+            return False
+        logger.info(f"别名 {self.index_name} 已切换到: {new_index}")
+        
+        self.prune_index_versions()
+        return True
+    
+    def list_index_versions(self) -> List[str]:
+        """列出全部版本索引（按创建时间从旧到新）"""
+        return self.es_client.list_indices(f"{self.index_name}_*")
+    
+    def prune_index_versions(self, keep: int = ROLLBACK_VERSIONS):
+        """删除多余的旧版本索引：保留别名当前指向的索引及其之前的 keep 个版本"""
+        live = self.es_client.get_alias_indices(self.index_name)
+        if not live:
+            return
+        
+        versions = self.list_index_versions()
+        older = [index for index in versions if index < live[0]]
+        retained = set(live) | set(older[-keep:] if keep > 0 else [])
+        
+        for index in versions:
+            if index not in retained:
+                logger.info(f"删除旧版本索引: {index}")
+                self.es_client.delete_index(index)
+    
+    def rollback(self) -> bool:
+        """将别名切换回上一个版本的索引"""
+        live = self.es_client.get_alias_indices(self.index_name)
+        if not live:
+            logger.error(f"别名 {self.index_name} 不存在，无法回滚")
+            return False
+        
+        older = [index for index in self.list_index_versions() if index < live[0]]
+        if not older:
+            logger.error("没有可回滚的旧版本索引")
+            return False
+        
+        logger.info(f"回滚索引: {live[0]} -> {older[-1]}")
+        return self.es_client.swap_alias(self.index_name, older[-1])
     
     def extract_category_info(self, file_path: Path) -> Dict[str, str]:
         """从文件路径提取分类信息"""
@@ -141,25 +341,22 @@ class DocumentIndexer:
         }
     
     def read_file_content(self, file_path: Path) -> Optional[str]:
-        """读取文件内容"""
+        """读取文件内容（提取文本失败或不支持提取的文件类型使用文件基本信息）"""
+        return self._read_content(file_path)[0]
+    
+    def _read_content(self, file_path: Path) -> Tuple[str, bool]:
+        """读取文件内容，返回 (内容, 是否提取失败)"""
         try:
-            if file_path.suffix.lower() == '.md':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            elif file_path.suffix.lower() == '.txt':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            elif file_path.suffix.lower() == '.json':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return json.dumps(data, ensure_ascii=False, indent=2)
-            else:
-                # 对于其他文件类型，返回基本信息
-                return f"文件类型: {file_path.suffix}\n文件大小: {file_path.stat().st_size} bytes"
-                
+            content = extract_text(file_path, **self.extract_options)
         except Exception as e:
             logger.error(f"读取文件失败 {file_path}: {e}")
-            return None
+            return self.describe_file(file_path), True
+        
+        return (content if content is not None else self.describe_file(file_path)), False
+    
+    def describe_file(self, file_path: Path) -> str:
+        """文件基本信息（无法提取文本时作为文档内容）"""
+        return f"文件类型: {file_path.suffix}\n文件大小: {file_path.stat().st_size} bytes"
     
     def generate_document_title(self, file_path: Path) -> str:
         """生成文档标题"""
@@ -178,6 +375,10 @@ class DocumentIndexer:
         """生成内容哈希"""
         return hashlib.md5(content.encode('utf-8')).hexdigest()
     
+    def generate_document_id(self, file_path: Path) -> str:
+        """生成文档ID（由文件路径决定，同一文件重新索引时ID不变）"""
+        return hashlib.md5(str(file_path).encode('utf-8')).hexdigest()
+    
     def extract_tags_from_path(self, file_path: Path) -> List[str]:
         """从路径提取标签"""
         tags = []
@@ -194,13 +395,17 @@ class DocumentIndexer:
         
         return tags
     
-    def create_document(self, file_path: Path) -> Optional[Dict[str, Any]]:
-        """创建文档对象"""
+    def create_document(self, file_path: Path, content: Optional[str] = None,
+                        extraction_failed: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        创建文档对象（content 为 None 时读取文件内容）。
+        
+        提取失败（以文件基本信息作为内容）的文档不记录提取器版本，下次增量索引时重新提取。
+        """
         try:
             # 读取文件内容
-            content = self.read_file_content(file_path)
             if content is None:
-                return None
+                content, extraction_failed = self._read_content(file_path)
             
             # 获取文件统计信息
             stat = file_path.stat()
@@ -221,12 +426,13 @@ class DocumentIndexer:
                 "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
                 "updated_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
                 "content_hash": self.generate_content_hash(content),
+                "extractor_version": None if extraction_failed else EXTRACTOR_VERSION,
                 "tags": self.extract_tags_from_path(file_path),
                 "description": f"来自 {category_info['category']} 的文档"
             }
             
             # 生成文档ID
-            document["id"] = hashlib.md5(str(file_path).encode('utf-8')).hexdigest()
+            document["id"] = self.generate_document_id(file_path)
             
             return document
             
@@ -234,24 +440,29 @@ class DocumentIndexer:
             logger.error(f"创建文档失败 {file_path}: {e}")
             return None
     
+    def iter_files(self) -> Iterator[Path]:
+        """遍历知识库目录中支持的文件"""
+        for file_path in self.knowledge_base_path.rglob('*'):
+            if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                yield file_path
+    
     def scan_directory(self) -> List[Dict[str, Any]]:
         """扫描目录获取所有文档"""
         documents = []
         
         logger.info(f"扫描目录: {self.knowledge_base_path}")
         
-        for file_path in self.knowledge_base_path.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
-                document = self.create_document(file_path)
-                if document:
-                    documents.append(document)
-                    logger.debug(f"添加文档: {file_path}")
+        for file_path in self.iter_files():
+            document = self.create_document(file_path)
+            if document:
+                documents.append(document)
+                logger.debug(f"添加文档: {file_path}")
         
         logger.info(f"找到 {len(documents)} 个文档")
         return documents
     
-    def index_documents(self, documents: List[Dict[str, Any]]) -> bool:
-        """索引文档到Elasticsearch"""
+    def index_documents(self, documents: List[Dict[str, Any]], index_name: Optional[str] = None) -> bool:
+        """索引文档到Elasticsearch（默认写入别名指向的当前索引）"""
         if not documents:
             logger.warning("没有文档需要索引")
             return True
@@ -259,7 +470,7 @@ class DocumentIndexer:
         logger.info(f"开始索引 {len(documents)} 个文档")
         
         # 批量索引
-        success = self.es_client.bulk_index_documents(self.index_name, documents)
+        success = self.index_stream(documents, index_name)
         
         if success:
             logger.info(f"成功索引 {len(documents)} 个文档")
@@ -268,22 +479,265 @@ class DocumentIndexer:
         
         return success
     
+    def extract_contents(self, files: Iterable[Path]) -> Iterator[Tuple[Path, Any]]:
+        """
+        提取文件文本，按原顺序返回 (文件, 文本或异常)。
+        
+        workers > 1 时在进程池中提取；单个文件超过 extract_timeout 时由工作进程中断并返回 ExtractionTimeout。
+        工作进程无法被中断（如卡在 C 扩展中）时，超过兜底时间后终止整个进程池并重建，
+        排队中尚未完成的文件重新提交。
+        
+        workers <= 1 时在当前线程提取；当前线程无法限制提取时间（如 Web 请求线程）时
+        改为在单个工作进程中提取，使超时同样生效。不在主线程时以 spawn 方式创建工作进程
+        （多线程进程中 fork 不安全）。
+        """
+        if self.workers <= 1 and (not self.extract_timeout or time_limit_supported()):
+            for file_path in files:
+                try:
+                    content = extract_text(file_path, **self.extract_options)
+                except Exception as e:
+                    content = e
+                yield file_path, content
+            return
+        
+        workers = max(self.workers, 1)
+        wait = self.extract_timeout + EXTRACT_TIMEOUT_GRACE if self.extract_timeout else None
+        limit = workers * POOL_QUEUE_PER_WORKER
+        extract = partial(extract_text, **self.extract_options)
+        main_thread = threading.current_thread() is threading.main_thread()
+        context = None if main_thread else multiprocessing.get_context('spawn')
+        new_pool = partial(ProcessPoolExecutor, max_workers=workers, mp_context=context)
+        files = iter(files)
+        pending = deque()
+        executor = new_pool()
+        try:
+            while True:
+                for file_path in islice(files, limit - len(pending)):
+                    pending.append((file_path, executor.submit(extract, str(file_path))))
+                if not pending:
+                    return
+                
+                file_path, future = pending.popleft()
+                try:
+                    content = future.result(timeout=wait)
+                except FuturesTimeoutError:
+                    content = ExtractionTimeout(f"提取超时（超过 {wait} 秒未返回，已终止进程池）")
+                    finished = [future.done() for _, future in pending]
+                    _terminate_pool(executor)
+                    executor = new_pool()
+                    pending = deque(
+                        (path, future if done else executor.submit(extract, str(path)))
+                        for (path, future), done in zip(pending, finished)
+                    )
+                except Exception as e:
+                    content = e
+                yield file_path, content
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def read_documents(self, files: Iterable[Path], stats: PipelineStats) -> Iterator[Dict[str, Any]]:
+        """读取阶段：提取文本并创建文档，提取失败或超时的文件以文件基本信息作为内容（并记录失败）"""
+        for file_path, content in self.extract_contents(files):
+            failed = isinstance(content, Exception)
+            if failed:
+                stats.fail("extract", str(file_path), content)
+                content = None
+            
+            try:
+                if content is None:
+                    content = self.describe_file(file_path)
+                document = self.create_document(file_path, content, extraction_failed=failed)
+            except OSError as e:
+                logger.error(f"读取文件失败 {file_path}: {e}")
+                document = None
+            if document is None:
+                stats.fail("read", str(file_path), "无法读取文件内容")
+                continue
+            yield document
+    
+    def tokenize_documents(self, documents: Iterable[Dict[str, Any]],
+                           stats: PipelineStats) -> Iterator[Dict[str, Any]]:
+        """分词阶段：在进程池中分词（只传递标题和内容），按原顺序产出"""
+        if self.workers <= 1:
+            for document in documents:
+                try:
+                    document.update(tokenize_fields(document))
+                except Exception as e:
+                    stats.fail("tokenize", document["file_path"], e)
+                    continue
+                yield document
+            return
+        
+        # 在主进程预加载词典，子进程直接继承
+        with get_tokenizer().process_pool(self.workers) as executor:
+            submitted = _bounded_submit(
+                executor, tokenize_fields, documents,
+                limit=self.workers * POOL_QUEUE_PER_WORKER,
+                arg=lambda doc: {"title": doc["title"], "content": doc["content"]}
+            )
+            for document, future in submitted:
+                try:
+                    document.update(future.result())
+                except Exception as e:
+                    stats.fail("tokenize", document["file_path"], e)
+                    continue
+                yield document
+    
+    def index_stream(self, documents: Iterable[Dict[str, Any]], index_name: Optional[str] = None,
+                     stats: Optional[PipelineStats] = None) -> bool:
+        """
+        流式索引管道：分词（进程池）→ streaming_bulk / parallel_bulk 分批写入。
+        
+        documents 为生成器时，同时在内存中的文档数只取决于进程池队列和批大小。
+        读取失败的文件只记录在报告中；分词或写入失败时返回 False。
+        """
+        stats = stats or PipelineStats()
+        index_name = index_name or self.index_name
+        
+        tokenized = stats.timed("tokenize", self.tokenize_documents(documents, stats))
+        results = self.es_client.stream_index_documents(
+            index_name, tokenized,
+            chunk_size=self.chunk_size,
+            max_chunk_bytes=self.max_chunk_bytes,
+            thread_count=self.bulk_threads
+        )
+        for ok, doc_id, error in stats.timed("bulk", results):
+            if not ok:
+                stats.fail("bulk", doc_id, error)
+        
+        self.last_pipeline_report = stats.report()
+        logger.info(f"索引管道完成: 写入 {self.last_pipeline_report['indexed']} 个文档，"
+                    f"失败 {self.last_pipeline_report['failed']} 个")
+        for stage, info in self.last_pipeline_report["stages"].items():
+            logger.info(f"  {stage}: {info['items']} 个，{info['seconds']} 秒，{info['items_per_second']} 个/秒")
+        
+        return stats.failed("tokenize", "bulk") == 0
+    
     def reindex_all(self) -> bool:
-        """重新索引所有文档"""
+        """
+        重新索引所有文档。
+        
+        文档导入新版本索引，完成后再切换别名，重建期间搜索仍使用旧索引；
+        导入失败时删除新索引，别名保持不变。
+        """
+        new_index = None
         try:
             # 初始化索引
-            if not self.initialize_index():
+            new_index = self.initialize_index()
+            if not new_index:
                 logger.error("索引初始化失败")
                 return False
             
-            # 扫描文档
-            documents = self.scan_directory()
+            # 扫描、读取、分词并写入新索引
+            stats = PipelineStats()
+            files = stats.timed("scan", self.iter_files())
+            documents = stats.timed("read", self.read_documents(files, stats), size=lambda doc: doc["file_size"])
+            success = self.index_stream(documents, new_index, stats)
+            self.last_run_stats = {"added": self.last_pipeline_report["indexed"], "failed": stats.failed()}
             
-            # 索引文档
-            return self.index_documents(documents)
+            # 切换别名
+            if success and self.publish_index(new_index):
+                return True
             
         except Exception as e:
             logger.error(f"重新索引失败: {e}")
+        
+        if new_index:
+            logger.info(f"删除未完成的索引: {new_index}")
+            self.es_client.delete_index(new_index)
+        return False
+    
+    def fetch_indexed_state(self) -> Dict[str, Dict[str, Any]]:
+        """通过 scroll 批量读取已索引文档的文件大小、修改时间、内容哈希和提取器版本"""
+        return {
+            doc.pop("id"): doc
+            for doc in self.es_client.scan_documents(self.index_name, INDEXED_STATE_FIELDS)
+        }
+    
+    def changed_files(self, files: Iterable[Path], indexed: Dict[str, Dict[str, Any]], seen: set,
+                      stats: Dict[str, int]) -> Iterator[Path]:
+        """
+        增量索引的扫描阶段：跳过文件大小、修改时间和提取器版本都与索引一致的文件。
+        
+        提取器版本不一致（包括升级前只索引了文件基本信息的文档、提取失败或超时的文档）时重新提取。
+        
+        遍历时记录出现过的文档ID（seen），用于删除已不存在的文件对应的文档。
+        """
+        for file_path in files:
+            doc_id = self.generate_document_id(file_path)
+            seen.add(doc_id)
+            previous = indexed.get(doc_id)
+            
+            stat = file_path.stat()
+            updated_at = datetime.fromtimestamp(stat.st_mtime).isoformat()
+            if (previous and previous.get("file_size") == stat.st_size
+                    and previous.get("updated_at") == updated_at
+                    and previous.get("extractor_version") == EXTRACTOR_VERSION):
+                stats["unchanged"] += 1
+                continue
+            
+            yield file_path
+    
+    def changed_documents(self, documents: Iterable[Dict[str, Any]], indexed: Dict[str, Dict[str, Any]],
+                          touched: Dict[str, Dict[str, Any]], stats: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+        """增量索引：只产出新增或内容变化的文档，内容未变只需更新元数据的文档记入 touched"""
+        for document in documents:
+            doc_id = document["id"]
+            previous = indexed.get(doc_id)
+            
+            if previous and previous.get("content_hash") == document["content_hash"]:
+                touched[doc_id] = {
+                    "file_size": document["file_size"],
+                    "updated_at": document["updated_at"],
+                    "extractor_version": document["extractor_version"]
+                }
+                stats["touched"] += 1
+            else:
+                stats["updated" if previous else "added"] += 1
+                yield document
+    
+    def reindex_incremental(self) -> bool:
+        """
+        增量索引：只重新索引新增或变化的文件，删除已不存在的文件对应的文档。
+        
+        - 文件大小、修改时间和提取器版本都与索引中一致：视为未变化，不读取文件
+        - 修改时间或提取器版本变化但内容哈希一致：只更新索引中的元数据，不重新分词
+        - 索引不存在时执行全量索引
+        """
+        try:
+            if not self.es_client.es.indices.exists(index=self.index_name):
+                logger.info(f"索引不存在，执行全量索引: {self.index_name}")
+                return self.reindex_all()
+            
+            indexed = self.fetch_indexed_state()
+            logger.info(f"已索引文档: {len(indexed)} 个")
+            
+            stats = {"added": 0, "updated": 0, "touched": 0, "unchanged": 0, "deleted": 0, "failed": 0}
+            touched = {}
+            seen = set()
+            
+            # 新增和内容变化的文档边扫描边送入索引管道
+            pipeline = PipelineStats()
+            files = pipeline.timed("scan", self.changed_files(self.iter_files(), indexed, seen, stats))
+            changed = self.changed_documents(self.read_documents(files, pipeline), indexed, touched, stats)
+            documents = pipeline.timed("read", changed, size=lambda doc: doc["file_size"])
+            success = self.index_stream(documents, stats=pipeline)
+            stats["failed"] = pipeline.failed()
+            
+            deleted = [doc_id for doc_id in indexed if doc_id not in seen]
+            stats["deleted"] = len(deleted)
+            
+            if touched:
+                success = self.es_client.bulk_update_documents(self.index_name, touched) and success
+            if deleted:
+                success = self.es_client.bulk_delete_documents(self.index_name, deleted) and success
+            
+            self.last_run_stats = stats
+            logger.info(f"增量索引完成: {stats}")
+            return success
+        
+        except Exception as e:
+            logger.error(f"增量索引失败: {e}")
             return False
     
     def get_index_stats(self) -> Dict[str, Any]:
@@ -298,7 +752,8 @@ class DocumentIndexer:
             return {
                 "exists": True,
                 "document_count": count["count"],
-                "index_size": stats["indices"][self.index_name]["total"]["store"]["size_in_bytes"],
+                "index_size": stats["_all"]["total"]["store"]["size_in_bytes"],
+                "indices": self.es_client.get_alias_indices(self.index_name),
                 "created": True
             }
             
@@ -309,6 +764,21 @@ class DocumentIndexer:
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='将知识库文档索引到Elasticsearch')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--full', action='store_true', help='重建新版本索引并切换别名（默认增量索引）')
+    mode.add_argument('--rollback', action='store_true', help='将别名切换回上一个版本的索引')
+    parser.add_argument('--workers', type=int, default=None, help='分词进程数（默认：CPU 核数，1 表示不使用进程池）')
+    parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE, help=f'每批写入的文档数（默认：{BULK_CHUNK_SIZE}）')
+    parser.add_argument('--max-chunk-mb', type=float, default=BULK_MAX_CHUNK_BYTES / 1024 / 1024,
+                        help=f'每批写入的最大字节数，单位 MB（默认：{BULK_MAX_CHUNK_BYTES // 1024 // 1024}）')
+    parser.add_argument('--bulk-threads', type=int, default=1, help='并发写入线程数（>1 时使用 parallel_bulk，默认：1）')
+    parser.add_argument('--max-pdf-pages', type=int, default=MAX_PDF_PAGES, help=f'PDF 最多提取的页数（默认：{MAX_PDF_PAGES}）')
+    parser.add_argument('--extract-timeout', type=float, default=EXTRACT_TIMEOUT,
+                        help=f'单个文件的文本提取超时，单位秒（默认：{EXTRACT_TIMEOUT}）')
+    parser.add_argument('--no-extraction-cache', action='store_true', help='不使用文本提取缓存')
+    args = parser.parse_args()
+    
     # 配置路径
     knowledge_base_path = "/root/knowledge-base-app/company_knowledge_base"
     
@@ -318,14 +788,28 @@ def main():
     
     try:
         # 创建索引器
-        indexer = DocumentIndexer(knowledge_base_path)
+        indexer = DocumentIndexer(
+            knowledge_base_path,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_chunk_bytes=int(args.max_chunk_mb * 1024 * 1024),
+            bulk_threads=args.bulk_threads,
+            max_pdf_pages=args.max_pdf_pages,
+            extract_timeout=args.extract_timeout,
+            extraction_cache_dir=None if args.no_extraction_cache else EXTRACTION_CACHE_DIR
+        )
         
         # 获取当前索引状态
         stats = indexer.get_index_stats()
         logger.info(f"当前索引状态: {stats}")
         
         # 重新索引
-        success = indexer.reindex_all()
+        if args.rollback:
+            success = indexer.rollback()
+        elif args.full:
+            success = indexer.reindex_all()
+        else:
+            success = indexer.reindex_incremental()
         
         if success:
             # 显示最终统计
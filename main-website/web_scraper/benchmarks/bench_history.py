@@ -0,0 +1,28 @@
+"""
+历史记录加载 / 保存基准
+
+作者：伍志勇
+"""
+
+import pytest
+
+from utils.history_manager import load_history, save_history
+
+
+def _load(output_dir: str) -> int:
+    return len(load_history('example.com', output_dir).urls)
+
+
+@pytest.mark.benchmark(group='history')
+def test_load_history(run_benchmark, history_dir):
+    """load_history（解析 crawl_history.json 为紧凑条目）"""
+    history = load_history('example.com', history_dir)
+    count = run_benchmark(_load, history_dir, items=len(history.urls))
+    assert count == len(history.urls)
+
+
+@pytest.mark.benchmark(group='history')
+def test_save_history(run_benchmark, history_dir):
+    """save_history（原子写入 crawl_history.json）"""
+    history = load_history('example.com', history_dir)
+    run_benchmark(save_history, history, history_dir, items=len(history.urls))
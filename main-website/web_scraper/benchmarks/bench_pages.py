@@ -0,0 +1,33 @@
+"""
+页面处理基准：内容哈希与链接重写
+
+作者：伍志勇
+"""
+
+import pytest
+
+from mainsite_scraper.pipelines import SaveHtmlPipeline
+from utils.content_hash import compute_hash
+
+
+def _hash_all(pages: list[tuple[str, str]]) -> int:
+    return len({compute_hash(html) for _, html in pages})
+
+
+def _fix_links_all(pipeline: SaveHtmlPipeline, pages: list[tuple[str, str]]) -> int:
+    return sum(len(pipeline._fix_html_links(html, url)) for url, html in pages)
+
+
+@pytest.mark.benchmark(group='compute_hash')
+def test_compute_hash(run_benchmark, page_corpus):
+    """compute_hash（规范化后 SHA256）"""
+    distinct = run_benchmark(_hash_all, page_corpus, items=len(page_corpus))
+    assert distinct > 0
+
+
+@pytest.mark.benchmark(group='fix_html_links')
+def test_fix_html_links(run_benchmark, page_corpus, tmp_path):
+    """SaveHtmlPipeline._fix_html_links（相对链接转为绝对链接）"""
+    pipeline = SaveHtmlPipeline(output_dir=str(tmp_path))
+    size = run_benchmark(_fix_links_all, pipeline, page_corpus, items=len(page_corpus))
+    assert size > 0
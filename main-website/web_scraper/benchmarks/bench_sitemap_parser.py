@@ -0,0 +1,37 @@
+"""
+Sitemap 解析基准
+
+作者：伍志勇
+"""
+
+import gzip
+
+import pytest
+
+from utils.sitemap_parser import get_urls_with_lastmod
+
+
+def _parse_all(sitemaps: list[tuple[str, bytes]]) -> int:
+    total = 0
+    for sitemap_url, body in sitemaps:
+        total += len(get_urls_with_lastmod(sitemap_url, body))
+    return total
+
+
+@pytest.fixture(scope='module')
+def gzipped_sitemaps(sitemaps) -> list[tuple[str, bytes]]:
+    return [(f'{url}.gz', gzip.compress(body)) for url, body in sitemaps]
+
+
+@pytest.mark.benchmark(group='sitemap_parser')
+def test_get_urls_with_lastmod(run_benchmark, sitemaps):
+    """逐个解析 sitemap 文件"""
+    count = run_benchmark(_parse_all, sitemaps, items=sum(len(body) for _, body in sitemaps))
+    assert count > 0
+
+
+@pytest.mark.benchmark(group='sitemap_parser')
+def test_get_urls_with_lastmod_gzip(run_benchmark, gzipped_sitemaps):
+    """解析 .xml.gz 压缩的 sitemap 文件"""
+    count = run_benchmark(_parse_all, gzipped_sitemaps, items=sum(len(body) for _, body in gzipped_sitemaps))
+    assert count > 0
@@ -0,0 +1,31 @@
+"""
+URL 过滤基准
+
+作者：伍志勇
+"""
+
+import pytest
+
+from utils.url_filter import UrlFilter, filter_url
+
+
+def _filter_all(urls: list[str]) -> int:
+    return sum(1 for url in urls if filter_url(url, 'example.com')[0])
+
+
+def _filter_all_with(url_filter: UrlFilter, urls: list[str]) -> int:
+    return sum(1 for url in urls if url_filter.filter(url)[0])
+
+
+@pytest.mark.benchmark(group='url_filter')
+def test_filter_url(run_benchmark, urls):
+    """filter_url（按目标域名缓存的过滤器）"""
+    kept = run_benchmark(_filter_all, urls, items=len(urls))
+    assert 0 < kept < len(urls)
+
+
+@pytest.mark.benchmark(group='url_filter')
+def test_url_filter_instance(run_benchmark, urls):
+    """直接使用 UrlFilter 实例"""
+    kept = run_benchmark(_filter_all_with, UrlFilter('example.com'), urls, items=len(urls))
+    assert 0 < kept < len(urls)
@@ -0,0 +1,104 @@
+"""
+性能基准套件（pytest-benchmark）的公共选项与合成数据
+
+数据规模（--bench-scale 1.0 时）：
+- 100 万条 URL（filter_url），分为 20 个 5 万条的 sitemap（get_urls_with_lastmod）
+- 每种页面大小 1 万个页面（compute_hash、SaveHtmlPipeline._fix_html_links）
+- 50 万条历史记录（load_history / save_history）
+
+合成数据在会话内只生成一次；每轮处理全部数据，结果按轮统计。
+
+作者：伍志勇
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from utils.history_manager import CrawlHistory, save_history
+from fixtures import synthetic_corpus, synthetic_history_entries, synthetic_sitemaps, synthetic_urls
+
+# --bench-scale 1.0 时的数据量
+URL_COUNT = 1_000_000
+PAGE_COUNT = 10_000
+HISTORY_COUNT = 500_000
+
+# 与已保存的运行对比（--benchmark-compare）时的默认失败条件：最短耗时变慢 15% 以上（最短耗时受调度抖动影响最小）
+REGRESSION_THRESHOLD = 'min:15%'
+
+# 页面语料的平均大小（KB），各页面在 0.5~1.5 倍间浮动
+PAGE_SIZES_KB = (4, 16, 64)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('web_scraper benchmarks')
+    group.addoption(
+        '--bench-scale',
+        type=float,
+        default=1.0,
+        help='合成数据规模系数（默认：1.0，即 100 万 URL / 1 万页面 / 50 万历史条目）'
+    )
+    group.addoption(
+        '--bench-rounds',
+        type=int,
+        default=3,
+        help='每个基准的轮数（默认：3）'
+    )
+
+
+def pytest_configure(config):
+    # 在 pytest-benchmark 初始化（trylast）之前补上默认失败条件；命令行指定时以命令行为准
+    if config.getoption('benchmark_compare', None) and not config.getoption('benchmark_compare_fail', None):
+        from pytest_benchmark.utils import parse_compare_fail
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_THRESHOLD)]
+
+
+def scaled(config, count: int) -> int:
+    """按 --bench-scale 缩放数据量"""
+    return max(1, int(count * config.getoption('--bench-scale')))
+
+
+@pytest.fixture
+def run_benchmark(benchmark, request):
+    """
+    每轮调用一次 func(*args)，记录每轮处理的条目数。
+
+    Returns:
+        callable: run(func, *args, items=条目数)，返回 func 的结果
+    """
+    rounds = request.config.getoption('--bench-rounds')
+
+    def run(func, *args, items: int):
+        benchmark.extra_info['items'] = items
+        return benchmark.pedantic(func, args=args, rounds=rounds, iterations=1)
+
+    return run
+
+
+@pytest.fixture(scope='session')
+def urls(request) -> list[str]:
+    return synthetic_urls(scaled(request.config, URL_COUNT))
+
+
+@pytest.fixture(scope='session')
+def sitemaps(urls) -> list[tuple[str, bytes]]:
+    return synthetic_sitemaps(urls)
+
+
+@pytest.fixture(scope='session', params=PAGE_SIZES_KB, ids=lambda kb: f'{kb}kb')
+def page_corpus(request) -> list[tuple[str, str]]:
+    return synthetic_corpus(scaled(request.config, PAGE_COUNT), request.param)
+
+
+@pytest.fixture(scope='session')
+def history_dir(request, tmp_path_factory) -> str:
+    """包含一个 example.com 站点 crawl_history.json 的输出目录"""
+    output_dir = str(tmp_path_factory.mktemp('output'))
+    entries = synthetic_history_entries(scaled(request.config, HISTORY_COUNT))
+    save_history(CrawlHistory('example.com', '2026-01-01T00:00:00', '2026-01-01T00:00:00', entries), output_dir)
+    return output_dir
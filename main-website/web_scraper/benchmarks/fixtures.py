@@ -0,0 +1,136 @@
+"""
+基准测试合成数据生成
+
+作者：伍志勇
+"""
+
+import hashlib
+import random
+from datetime import datetime, timedelta
+
+# 合成数据的随机种子，保证各次运行数据一致
+SEED = 20260316
+
+_SECTIONS = ['products', 'solutions', 'news', 'blog', 'support', 'about', 'cases', 'downloads']
+
+
+def synthetic_urls(count: int, domain: str = 'example.com', seed: int = SEED) -> list[str]:
+    """生成 count 个门户风格的 URL（路径深度、语言前缀、查询参数混合）"""
+    rng = random.Random(seed)
+    urls = []
+    for i in range(count):
+        section = rng.choice(_SECTIONS)
+        depth = rng.randint(1, 4)
+        parts = [section] + [f'{section[:3]}-{rng.randint(0, 9999)}' for _ in range(depth - 1)]
+        roll = rng.random()
+        if roll < 0.1:
+            parts.insert(0, rng.choice(['zh', 'de', 'fr', 'ja']))
+        elif roll < 0.15:
+            parts.append(f'item-{i}.pdf')
+        else:
+            parts.append(f'item-{i}/')
+        url = f"https://www.{domain}/{'/'.join(parts)}"
+        if rng.random() < 0.05:
+            url += f'?page={rng.randint(1, 50)}'
+        urls.append(url)
+    return urls
+
+
+def synthetic_history_entries(count: int, seed: int = SEED) -> dict[str, dict]:
+    """生成 count 条 crawl_history.json 格式的 URL 条目"""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    entries = {}
+    for i, url in enumerate(synthetic_urls(count, seed=seed)):
+        path = url.split('://', 1)[1].split('/', 1)[1].rstrip('/') or 'index'
+        entries[url] = {
+            'first_seen': (base + timedelta(seconds=rng.randint(0, 90 * 86400))).isoformat(),
+            'content_hash': hashlib.sha256(str(i).encode()).hexdigest(),
+            'local_path': f'output/example.com/{path}.html',
+            'last_modified': (base + timedelta(days=rng.randint(0, 90))).date().isoformat(),
+        }
+    return entries
+
+
+_WORDS = (
+    'industrial automation solution platform service customer quality global product engineering '
+    'support reliable performance partner innovation system design network energy efficient data'
+).split()
+
+
+def synthetic_pages(count: int, size_kb: int = 60, seed: int = SEED) -> list[tuple[str, str]]:
+    """
+    生成 count 个门户风格的 HTML 页面 (url, html)。
+
+    页面包含导航链接、脚本与样式、图片和正文段落，大小约为 size_kb KB（各页面在 0.5~1.5 倍间浮动）。
+    """
+    rng = random.Random(seed)
+    urls = synthetic_urls(count, seed=seed)
+    pages = []
+    for i, url in enumerate(urls):
+        target = int(size_kb * 1024 * rng.uniform(0.5, 1.5))
+        head = (
+            f'<html><head><title>Page {i}</title>'
+            '<link rel="stylesheet" href="/static/css/site.css">'
+            '<script src="/static/js/app.js"></script>'
+            '<style>body { margin: 0; } .nav a { color: #333; }</style></head><body>'
+            '<div class="nav">'
+            + ''.join(f'<a href="/{s}/">{s}</a>' for s in _SECTIONS)
+            + '</div>'
+        )
+        body = []
+        size = len(head)
+        n = 0
+        while size < target:
+            words = ' '.join(rng.choice(_WORDS) for _ in range(40))
+            block = (
+                f'<div class="block"><h2>Section {n}</h2><p>{words}</p>'
+                f'<a href="../item-{rng.randint(0, count)}/">more</a>'
+                f'<img src="img/photo-{n % 20}.jpg" alt="photo"></div>'
+            )
+            body.append(block)
+            size += len(block)
+            n += 1
+        pages.append((url, head + ''.join(body) + '<script>var x = "<a href=\\"/no\\">";</script></body></html>'))
+    return pages
+
+
+def synthetic_corpus(count: int, size_kb: int, unique: int = 500, seed: int = SEED) -> list[tuple[str, str]]:
+    """
+    生成 count 个页面 (url, html) 的语料。
+
+    HTML 循环取自 unique 个不同的合成页面（大语料也只占用 unique 个页面的内存），URL 各不相同。
+    """
+    urls = synthetic_urls(count, seed=seed)
+    pages = synthetic_pages(min(count, unique), size_kb, seed=seed)
+    return [(url, pages[i % len(pages)][1]) for i, url in enumerate(urls)]
+
+
+def synthetic_sitemaps(
+    urls: list[str],
+    per_sitemap: int = 50000,
+    seed: int = SEED
+) -> list[tuple[str, bytes]]:
+    """
+    把 urls 写成 sitemap 文件 (sitemap_url, xml)。
+
+    与真实站点一样按协议上限每个文件最多 per_sitemap 个 URL，约 90% 带 lastmod。
+    """
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    domain = urls[0].split('/')[2] if urls else 'www.example.com'
+    sitemaps = []
+    for start in range(0, len(urls), per_sitemap):
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        for url in urls[start:start + per_sitemap]:
+            loc = url.replace('&', '&amp;')
+            if rng.random() < 0.9:
+                lastmod = (base + timedelta(days=rng.randint(0, 90))).date().isoformat()
+                lines.append(f'<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>')
+            else:
+                lines.append(f'<url><loc>{loc}</loc></url>')
+        lines.append('</urlset>')
+        number = start // per_sitemap + 1
+        sitemaps.append((f'https://{domain}/sitemap-{number}.xml', '\n'.join(lines).encode('utf-8')))
+    return sitemaps
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+历史记录内存基准
+
+对比 CrawlHistory.urls 中普通字典条目与紧凑 UrlHistory 条目的内存占用。
+
+用法：
+    python benchmarks/history_memory.py            # 100 万条合成 URL
+    python benchmarks/history_memory.py --count 200000
+
+作者：伍志勇
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from utils.history_manager import UrlHistory
+from fixtures import synthetic_history_entries
+
+
+def measure(build) -> int:
+    """返回 build() 返回对象在内存中保留的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description='历史记录内存基准')
+    parser.add_argument('--count', type=int, default=1_000_000, help='合成 URL 数量（默认：1000000）')
+    args = parser.parse_args()
+
+    print(f"生成 {args.count} 条合成历史记录...")
+    blob = json.dumps(synthetic_history_entries(args.count))
+
+    # 与 load_history 相同的方式从 JSON 解析，两种表示的 URL 键开销一致
+    dict_bytes = measure(lambda: json.loads(blob))
+    compact_bytes = measure(lambda: json.loads(blob, object_hook=_compact_entry))
+
+    print(f"\n{'表示':<16}{'内存 (MB)':>14}{'每 URL (B)':>14}")
+    print('-' * 44)
+    for name, size in (('dict', dict_bytes), ('UrlHistory', compact_bytes)):
+        print(f"{name:<16}{size / 1024 / 1024:>14.1f}{size / args.count:>14.0f}")
+    print(f"\n内存节省: {(1 - compact_bytes / dict_bytes) * 100:.0f}%")
+
+
+def _compact_entry(obj: dict):
+    """与 history_manager 加载时相同的条目转换"""
+    return UrlHistory.from_dict(obj) if 'first_seen' in obj else obj
+
+
+if __name__ == '__main__':
+    main()
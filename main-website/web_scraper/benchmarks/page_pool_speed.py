@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+页面处理进程池吞吐量基准
+
+对比在当前进程内处理（Pipeline 默认，运行在 reactor 线程）与提交到 1 / 2 / 4 / 8 个工作进程时
+每秒处理的页面数。页面处理包括 HTML 扫描、内容哈希、SimHash 指纹、链接重写与 UTF-8 编码
+（utils/page_worker.process_page），进行中的任务数与 Pipeline 一样限制为 2 × 进程数。
+
+用法：
+    python benchmarks/page_pool_speed.py                     # 2000 个约 60KB 的页面
+    python benchmarks/page_pool_speed.py --count 500 --size-kb 200 --workers 1 2 4
+
+作者：伍志勇
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from utils.page_worker import process_page
+from fixtures import synthetic_pages
+
+
+def run_inline(pages: list[tuple[str, str]]) -> float:
+    """当前进程内逐个处理，返回耗时秒数"""
+    start = time.perf_counter()
+    for url, html in pages:
+        process_page(html, url)
+    return time.perf_counter() - start
+
+
+def run_pool(pages: list[tuple[str, str]], workers: int) -> float:
+    """提交到进程池（进行中任务数上限 2 × workers），返回耗时秒数（不含进程启动）"""
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        # 预热：启动全部工作进程并完成模块导入
+        list(pool.map(process_page, [pages[0][1]] * workers, [pages[0][0]] * workers))
+
+        start = time.perf_counter()
+        in_flight = set()
+        for url, html in pages:
+            if len(in_flight) >= 2 * workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(pool.submit(process_page, html, url))
+        for future in in_flight:
+            future.result()
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='页面处理进程池吞吐量基准')
+    parser.add_argument('--count', type=int, default=2000, help='合成页面数量（默认：2000）')
+    parser.add_argument('--size-kb', type=int, default=60, help='平均页面大小 KB（默认：60）')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='工作进程数（默认：1 2 4 8）')
+    args = parser.parse_args()
+
+    print(f"生成 {args.count} 个约 {args.size_kb}KB 的合成页面...")
+    pages = synthetic_pages(args.count, args.size_kb)
+    total_mb = sum(len(html) for _, html in pages) / 1024 / 1024
+    print(f"合计 {total_mb:.1f}MB，CPU 核数: {os.cpu_count()}")
+
+    results = [('inline', run_inline(pages))]
+    for workers in args.workers:
+        results.append((f'{workers} workers', run_pool(pages, workers)))
+
+    inline_seconds = results[0][1]
+    print(f"\n{'模式':<14}{'耗时 (s)':>10}{'页面/秒':>10}{'MB/秒':>10}{'相对 inline':>14}")
+    print('-' * 58)
+    for name, seconds in results:
+        print(
+            f"{name:<14}{seconds:>10.2f}{args.count / seconds:>10.1f}"
+            f"{total_mb / seconds:>10.1f}{inline_seconds / seconds:>13.2f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
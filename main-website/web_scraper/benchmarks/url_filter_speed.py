@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+URL 过滤速度基准
+
+对比逐个模式 re.search 的原始过滤实现与预编译 UrlFilter 在合成 sitemap 上的耗时。
+
+用法：
+    python benchmarks/url_filter_speed.py            # 100 万条合成 URL
+    python benchmarks/url_filter_speed.py --count 200000
+
+作者：伍志勇
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from utils.url_filter import (
+    COMMON_EXCLUDE_PATTERNS,
+    EXCLUDE_EXTENSIONS,
+    LANGUAGE_EXCLUDE_PATTERNS,
+    LANGUAGE_INCLUDE_PATTERNS,
+    UrlFilter,
+    get_allowed_domains,
+)
+from fixtures import synthetic_urls
+
+
+def legacy_filter_url(url: str, target_domain: str) -> tuple[bool, str]:
+    """原始实现：每次调用重新计算允许域名，逐个模式匹配"""
+    netloc = urllib.parse.urlparse(url).netloc.lower()
+    if netloc not in get_allowed_domains(target_domain):
+        return False, "域名不在允许范围内"
+
+    url_lower = url.lower()
+    for pattern in LANGUAGE_EXCLUDE_PATTERNS:
+        if re.search(pattern, url_lower):
+            return False, "非英文页面"
+    for pattern in LANGUAGE_INCLUDE_PATTERNS:
+        if re.search(pattern, url_lower):
+            break
+
+    for pattern in COMMON_EXCLUDE_PATTERNS:
+        if re.search(pattern, url):
+            return False, "匹配排除模式"
+    for ext in EXCLUDE_EXTENSIONS:
+        if url.lower().endswith(ext):
+            return False, "匹配排除模式"
+
+    return True, "通过"
+
+
+def timed(run) -> tuple[float, list]:
+    """返回 (耗时秒数, 结果列表)"""
+    start = time.perf_counter()
+    results = run()
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='URL 过滤速度基准')
+    parser.add_argument('--count', type=int, default=1_000_000, help='合成 URL 数量（默认：1000000）')
+    parser.add_argument('--domain', type=str, default='example.com', help='目标域名（默认：example.com）')
+    args = parser.parse_args()
+
+    print(f"生成 {args.count} 条合成 sitemap URL...")
+    urls = synthetic_urls(args.count, args.domain)
+
+    url_filter = UrlFilter(args.domain)
+    legacy_seconds, legacy_results = timed(lambda: [legacy_filter_url(u, args.domain) for u in urls])
+    compiled_seconds, compiled_results = timed(lambda: [url_filter.filter(u) for u in urls])
+
+    # 原始实现的路径语言模式不生效，只比较不涉及路径语言前缀的 URL
+    mismatched = sum(
+        1 for a, b in zip(legacy_results, compiled_results)
+        if a != b and b != (False, "非英文页面")
+    )
+    kept = sum(1 for ok, _ in compiled_results if ok)
+
+    print(f"\n{'实现':<16}{'耗时 (s)':>12}{'每 URL (µs)':>14}")
+    print('-' * 42)
+    for name, seconds in (('legacy', legacy_seconds), ('UrlFilter', compiled_seconds)):
+        print(f"{name:<16}{seconds:>12.2f}{seconds / args.count * 1e6:>14.2f}")
+    print(f"\n加速比: {legacy_seconds / compiled_seconds:.1f}x")
+    print(f"保留 URL: {kept} / {args.count}，结果不一致: {mismatched}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+爬取性能遥测扩展
+
+按站点记录下载延迟、下载间隔、响应字节数，并向爬虫与 Pipeline 提供计时器
+（spider.telemetry），记录 parse_page CPU 时间、内容哈希与 Pipeline 各阶段耗时。
+爬虫结束时（及可选的每 TELEMETRY_INTERVAL 秒）写出 JSON 或 Prometheus 文本报告。
+
+本爬虫仅供学习研究使用，请遵守目标网站的robots协议及所有法律法规。不得用于任何商业用途或非法用途。
+
+作者：伍志勇
+"""
+
+import os
+import logging
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet import task
+
+from mainsite_scraper.utils.telemetry import CrawlTelemetry
+
+logger = logging.getLogger(__name__)
+
+# 报告格式及对应的文件扩展名
+REPORT_FORMATS = {'json': 'json', 'prometheus': 'prom'}
+
+
+class CrawlTelemetryExtension:
+    """爬取性能遥测扩展（TELEMETRY_ENABLED = True 时启用）"""
+
+    def __init__(self, crawler, report_path: str | None = None, report_format: str = 'json', interval: float = 0):
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"不支持的报告格式: {report_format}，可选: {', '.join(REPORT_FORMATS)}")
+
+        self.crawler = crawler
+        self.report_path = report_path
+        self.report_format = report_format
+        self.interval = interval
+        self.telemetry = CrawlTelemetry()
+        self._loop: task.LoopingCall | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('TELEMETRY_ENABLED'):
+            raise NotConfigured
+
+        extension = cls(
+            crawler,
+            report_path=crawler.settings.get('TELEMETRY_PATH'),
+            report_format=crawler.settings.get('TELEMETRY_FORMAT', 'json'),
+            interval=crawler.settings.getfloat('TELEMETRY_INTERVAL', 0),
+        )
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        return extension
+
+    def spider_opened(self, spider):
+        """向爬虫提供计时器（Pipeline 通过 spider.telemetry 使用），按需启动定时报告"""
+        spider.telemetry = self.telemetry
+        if not self.report_path:
+            self.report_path = self._default_path(spider)
+
+        if self.interval > 0:
+            self._loop = task.LoopingCall(self._write_report)
+            self._loop.start(self.interval, now=False)
+
+        logger.info(f"性能遥测报告: {self.report_path}")
+
+    def spider_closed(self, spider, reason):
+        """停止定时报告，写出最终报告并输出汇总"""
+        if self._loop is not None and self._loop.running:
+            self._loop.stop()
+        self._loop = None
+
+        self._write_report()
+        for line in self.telemetry.summary_lines():
+            logger.info(f"性能遥测 {line}")
+
+    def response_received(self, response, request, spider):
+        """记录下载延迟、下载槽位的请求间隔与响应字节数"""
+        domain = request.meta.get('portal') or urlparse_cached(request).hostname
+        telemetry = self.telemetry
+
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            telemetry.observe('download_latency_seconds', domain, latency)
+
+        slot = self._download_slot(request)
+        if slot is not None:
+            telemetry.observe('download_delay_seconds', domain, slot.delay)
+
+        telemetry.observe('response_bytes', domain, len(response.body))
+
+    def _download_slot(self, request):
+        """请求所在的下载槽位（自适应礼貌策略调整的是槽位的 delay）"""
+        engine = self.crawler.engine
+        downloader = getattr(engine, 'downloader', None) if engine is not None else None
+        if downloader is None:
+            return None
+        return downloader.slots.get(downloader.get_slot_key(request))
+
+    def _write_report(self) -> None:
+        try:
+            self.telemetry.write_report(self.report_path, self.report_format)
+        except OSError as e:
+            logger.error(f"写入性能遥测报告失败: {self.report_path}, 错误: {e}")
+
+    def _default_path(self, spider) -> str:
+        """默认报告路径：单站点保存在站点目录，多站点按爬虫名保存在输出目录"""
+        filename = f'crawl_telemetry.{REPORT_FORMATS[self.report_format]}'
+        if hasattr(spider, 'state_path'):
+            return spider.state_path(filename)
+        output_dir = self.crawler.settings.get('OUTPUT_DIR', './output')
+        return os.path.join(output_dir, f'{spider.name}_{filename}')
@@ -32,5 +32,29 @@ class WebPageItem(scrapy.Item):
     domain = scrapy.Field()
     """目标域名"""
 
+    status = scrapy.Field()
+    """HTTP 状态码"""
+
+    response_headers = scrapy.Field()
+    """响应头（归档模式写入记录）"""
+
     download_assets = scrapy.Field()
     """是否下载资源文件"""
+
+    lastmod = scrapy.Field()
+    """sitemap lastmod"""
+
+    etag = scrapy.Field()
+    """响应头 ETag"""
+
+    http_last_modified = scrapy.Field()
+    """响应头 Last-Modified"""
+
+    simhash = scrapy.Field()
+    """规范化文本的 SimHash 指纹（16 位十六进制）"""
+
+    duplicate_of = scrapy.Field()
+    """近似重复时对应的已保存页面 URL"""
+
+    links = scrapy.Field()
+    """页面出链（仅链接发现站点，写入历史供下次运行跳过未变化页面时继续发现链接）"""
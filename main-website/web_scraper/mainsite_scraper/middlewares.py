@@ -3,10 +3,16 @@
 """
 
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
 import logging
 from user_agents import parse
 import random
 
+from mainsite_scraper.utils.politeness import BACKOFF_STATUSES, PolitenessController, parse_retry_after, robots_delay
+
+logger = logging.getLogger(__name__)
+
 
 class GenericPortalSpiderMiddleware:
     """通用爬虫中间件"""
@@ -48,3 +54,145 @@ class RandomUserAgentMiddleware:
         """为每个请求添加随机User-Agent"""
         request.headers['User-Agent'] = random.choice(self.USER_AGENTS)
         return None
+
+
+class AdaptivePolitenessMiddleware:
+    """
+    自适应礼貌策略中间件（替代固定 DOWNLOAD_DELAY 与 AutoThrottle）
+
+    按下载槽位（站点）学习响应延迟与错误率，调整槽位的请求间隔与并发数（见 utils/politeness.py）；
+    遵守 robots.txt 的 Crawl-delay / Request-rate 与 429 / 503 的 Retry-After，
+    各项决策计入 politeness/* 统计项，爬虫结束时写入每个站点的最终状态。
+
+    顺序号大于 RetryMiddleware（550），在重试之前看到原始的 429 / 503 响应与下载异常。
+    """
+
+    def __init__(self, crawler, controller: PolitenessController):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.controller = controller
+        # 与 RobotsTxtMiddleware 相同的 User-agent 匹配 robots.txt 规则
+        self.user_agent = crawler.settings.get('ROBOTSTXT_USER_AGENT') or crawler.settings.get('USER_AGENT') or '*'
+        self._robots_delays: dict[str, float] = {}  # 主机名 -> robots.txt 要求的间隔
+        self._jitter: dict[str, float] = {}  # 槽位的默认随机抖动
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('POLITENESS_ENABLED'):
+            raise NotConfigured
+        if settings.getbool('AUTOTHROTTLE_ENABLED'):
+            logger.warning("AutoThrottle 与自适应礼貌策略同时调整请求间隔，建议设置 AUTOTHROTTLE_ENABLED = False")
+
+        controller = PolitenessController(
+            min_delay=settings.getfloat('POLITENESS_MIN_DELAY', 0.25),
+            max_delay=settings.getfloat('POLITENESS_MAX_DELAY', 30.0),
+            start_delay=settings.getfloat('DOWNLOAD_DELAY', 1.0),
+            start_concurrency=settings.getint('POLITENESS_START_CONCURRENCY', 1),
+            max_concurrency=settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN', 4),
+            ramp_after=settings.getint('POLITENESS_RAMP_AFTER', 10),
+            error_threshold=settings.getfloat('POLITENESS_ERROR_THRESHOLD', 0.1),
+            max_retry_after=settings.getfloat('POLITENESS_MAX_RETRY_AFTER', 600.0),
+            max_crawl_delay=settings.getfloat('POLITENESS_MAX_CRAWL_DELAY', 60.0),
+        )
+        middleware = cls(crawler, controller)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self, request):
+        """首次遇到有 Crawl-delay 的主机时设置下限，并把站点状态应用到槽位"""
+        key = self._slot_key(request)
+        if key is None:
+            return None
+
+        robots = self._robots_delays.get(urlparse_cached(request).hostname)
+        if robots is not None and self.controller.state(key).crawl_delay is None:
+            applied = self.controller.set_crawl_delay(key, robots)
+            self.stats.inc_value('politeness/crawl_delay')
+            logger.info(f"站点 {key} 遵守 robots.txt 请求间隔 {applied:g}s，并发数 1")
+
+        self._apply(key)
+        return None
+
+    def process_response(self, request, response):
+        """记录 robots.txt 的请求间隔；其他响应按状态码与下载耗时调整站点状态"""
+        if urlparse_cached(request).path == '/robots.txt':
+            if response.status == 200:
+                delay = robots_delay(response.body, self.user_agent)
+                if delay:
+                    self._robots_delays[urlparse_cached(request).hostname] = delay
+            return response
+
+        key = self._slot_key(request)
+        if key is None:
+            return response
+
+        retry_after = None
+        if response.status in BACKOFF_STATUSES:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+        decisions = self.controller.on_response(
+            key, response.status, request.meta.get('download_latency'), retry_after
+        )
+        self._record(key, decisions, f"HTTP {response.status}", retry_after)
+        self._apply(key)
+        return response
+
+    def process_exception(self, request, exception):
+        """连接错误、超时计入站点错误率"""
+        if isinstance(exception, IgnoreRequest):
+            return None
+        key = self._slot_key(request)
+        if key is not None:
+            self._record(key, self.controller.on_error(key), type(exception).__name__)
+            self._apply(key)
+        return None
+
+    def spider_closed(self, spider):
+        """写入每个站点的最终状态（politeness/hosts/<站点>/<字段>）"""
+        self.stats.set_value('politeness/hosts', len(self.controller.hosts))
+        for key, state in self.controller.hosts.items():
+            for name, value in state.to_dict().items():
+                if value is not None:
+                    self.stats.set_value(f'politeness/hosts/{key}/{name}', value)
+
+    def _record(self, key: str, decisions: list[str], reason: str, retry_after: float | None = None) -> None:
+        """决策计入统计项，退避时输出日志"""
+        for decision in decisions:
+            self.stats.inc_value(f'politeness/{decision}')
+        if 'backoff' in decisions or 'ramp_down' in decisions:
+            state = self.controller.state(key)
+            wait = f"，Retry-After {retry_after:g}s" if retry_after is not None else ''
+            logger.info(f"站点 {key} 减速（{reason}{wait}）: 并发数 {state.concurrency}，请求间隔 {state.delay:.2f}s")
+
+    def _apply(self, key: str) -> None:
+        """把站点状态写入下载槽位（槽位尚未创建时在下一个请求时写入）"""
+        slot = self._slot(key)
+        if slot is None:
+            return
+
+        state = self.controller.state(key)
+        delay = state.delay
+        strict = state.crawl_delay is not None
+        if state.backoff_until > slot.lastseen + delay:
+            # Retry-After：下一个请求不早于 backoff_until（槽位按 lastseen + delay 发出请求）
+            delay = state.backoff_until - slot.lastseen
+            strict = True
+
+        default_jitter = self._jitter.setdefault(key, slot.jitter)
+        slot.delay = delay
+        slot.concurrency = state.concurrency
+        # 随机抖动可能让实际间隔低于 Crawl-delay / Retry-After 的要求
+        slot.jitter = 0 if strict else default_jitter
+
+    def _downloader(self):
+        engine = self.crawler.engine
+        return getattr(engine, 'downloader', None) if engine is not None else None
+
+    def _slot_key(self, request) -> str | None:
+        downloader = self._downloader()
+        return downloader.get_slot_key(request) if downloader is not None else None
+
+    def _slot(self, key: str):
+        downloader = self._downloader()
+        return downloader.slots.get(key) if downloader is not None else None
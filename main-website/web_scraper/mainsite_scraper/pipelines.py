@@ -7,27 +7,116 @@
 """
 
 import os
-import re
+import sqlite3
 import urllib.parse
 import logging
-from typing import Set
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from scrapy.exceptions import DropItem
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import defer, threads
+from twisted.python.failure import Failure
+from twisted.python.threadpool import ThreadPool
+
+from mainsite_scraper.utils.asset_store import AssetStore, create_session
+from mainsite_scraper.utils.html_rewriter import parse_html
+from mainsite_scraper.utils.page_archive import ARCHIVE_FORMATS, PageArchive, check_format, encode_record, utc_now
+from mainsite_scraper.utils.page_worker import PageResult, process_page, render_document, render_page
+from mainsite_scraper.utils.path_mapper import PathMapper
+from mainsite_scraper.utils.simhash import SimHashIndex, max_distance
+from mainsite_scraper.utils.telemetry import NULL_TELEMETRY
+from mainsite_scraper.utils.visited_urls import VISITED_DB_NAME, VisitedUrls
 
 logger = logging.getLogger(__name__)
 
+# 作为静态资源下载的扩展名（其余同域链接按页面处理）
+ASSET_EXTENSIONS = {
+    '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.bmp', '.ico',
+    '.mp4', '.webm', '.ogg', '.mp3', '.wav', '.woff', '.woff2', '.ttf', '.eot', '.otf'
+}
+
+# 近似重复处理方式
+DEDUP_MODES = ('off', 'link', 'skip')
+
+# 页面输出方式：逐页文件或归档分段
+OUTPUT_MODES = ('files',) + ARCHIVE_FORMATS
+
+# 爬虫未提供已访问 URL 集合时，Pipeline 自己的精确表文件名（与爬虫的区分）
+PIPELINE_VISITED_DB_NAME = f'pipeline_{VISITED_DB_NAME}'
+
 
 class SaveHtmlPipeline:
     """通用 HTML 文件保存 Pipeline"""
 
-    def __init__(self, output_dir: str):
+    def __init__(
+        self,
+        output_dir: str,
+        asset_workers: int = 8,
+        asset_timeout: float = 30.0,
+        user_agent: str | None = None,
+        dedup_mode: str = 'off',
+        dedup_similarity: float = 0.9,
+        page_workers: int = 0,
+        page_max_in_flight: int = 0,
+        output_mode: str = 'files',
+        archive_segment_bytes: int = 1024 * 1024 * 1024,
+        archive_zstd_level: int = 3
+    ):
+        if dedup_mode not in DEDUP_MODES:
+            raise ValueError(f"不支持的去重方式: {dedup_mode}，可选: {', '.join(DEDUP_MODES)}")
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"不支持的输出方式: {output_mode}，可选: {', '.join(OUTPUT_MODES)}")
+        if output_mode != 'files':
+            check_format(output_mode)
+
         self.output_dir = output_dir
-        self.visited_urls: Set[str] = set()
+        # 已访问 URL：优先使用爬虫的共享实例（open_spider 时绑定）
+        self.visited_urls: VisitedUrls | None = None
+        self._owns_visited_urls = False
         self.target_domain: str | None = None
+        self._path_mappers: dict[str, PathMapper] = {}
+
+        # 资源下载：有界线程池 + 共享 keep-alive 会话，不阻塞 reactor
+        self.asset_workers = asset_workers
+        self.asset_timeout = asset_timeout
+        self.user_agent = user_agent
+        self._asset_pool: ThreadPool | None = None
+        self._asset_session = None
+        self._asset_stores: dict[str, AssetStore] = {}
+        self._pending_assets: dict[str, defer.Deferred] = {}
+
+        # 近似重复检测：每个站点一个已保存页面的 SimHash 索引（URL -> 指纹），及页面本地路径
+        self.dedup_mode = dedup_mode
+        self.dedup_distance = max_distance(dedup_similarity)
+        self._dedup_indexes: dict[str, SimHashIndex] = {}
+        self._dedup_paths: dict[str, str] = {}
+
+        # 页面处理进程池（0 表示在 reactor 线程内处理）；进行中的任务数受信号量限制，内存有界
+        self.page_workers = page_workers
+        self.page_max_in_flight = page_max_in_flight or 2 * page_workers
+        self._page_pool: ProcessPoolExecutor | None = None
+        self._page_slots: defer.DeferredSemaphore | None = None
+
+        # 归档输出：每个站点一个分段归档（files 模式不使用）
+        self.output_mode = output_mode
+        self.archive_segment_bytes = archive_segment_bytes
+        self.archive_zstd_level = archive_zstd_level
+        self._archives: dict[str, PageArchive] = {}
 
     @classmethod
     def from_crawler(cls, crawler):
         return cls(
-            output_dir=crawler.settings.get('OUTPUT_DIR', './output')
+            output_dir=crawler.settings.get('OUTPUT_DIR', './output'),
+            asset_workers=crawler.settings.getint('ASSET_DOWNLOAD_WORKERS', 8),
+            asset_timeout=crawler.settings.getfloat('ASSET_DOWNLOAD_TIMEOUT', 30.0),
+            user_agent=crawler.settings.get('USER_AGENT'),
+            dedup_mode=crawler.settings.get('DEDUP_MODE', 'off'),
+            dedup_similarity=crawler.settings.getfloat('DEDUP_SIMILARITY', 0.9),
+            page_workers=crawler.settings.getint('PAGE_WORKERS', 0),
+            page_max_in_flight=crawler.settings.getint('PAGE_WORKER_MAX_IN_FLIGHT', 0),
+            output_mode=crawler.settings.get('OUTPUT_MODE', 'files'),
+            archive_segment_bytes=int(crawler.settings.getfloat('ARCHIVE_SEGMENT_MB', 1024) * 1024 * 1024),
+            archive_zstd_level=crawler.settings.getint('ARCHIVE_ZSTD_LEVEL', 3),
         )
 
     def open_spider(self, spider):
@@ -44,45 +133,122 @@ class SaveHtmlPipeline:
         if not os.path.exists(domain_output_dir):
             os.makedirs(domain_output_dir, exist_ok=True)
 
+        # 与爬虫共用已访问 URL 集合；爬虫未提供时使用自己的（带精确表，Bloom 误判不会丢弃新页面）
+        shared = getattr(spider, 'visited_urls', None)
+        if isinstance(shared, VisitedUrls):
+            self.visited_urls = shared
+        else:
+            self.visited_urls = VisitedUrls(db_path=os.path.join(domain_output_dir, PIPELINE_VISITED_DB_NAME))
+            self._owns_visited_urls = True
+
         logger.info(f"输出目录: {domain_output_dir}")
 
-    def process_item(self, item, spider):
+        if self.page_workers > 0:
+            # spawn：不在已启动线程的 reactor 进程中 fork
+            self._page_pool = ProcessPoolExecutor(
+                max_workers=self.page_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            self._page_slots = defer.DeferredSemaphore(self.page_max_in_flight)
+            logger.info(f"页面处理进程池: {self.page_workers} 个进程，最多 {self.page_max_in_flight} 个页面在处理中")
+
+    def close_spider(self, spider):
+        """爬虫结束时保存路径索引、关闭归档并停止资源下载线程池"""
+        for mapper in self._path_mappers.values():
+            try:
+                mapper.save()
+            except OSError as e:
+                logger.error(f"保存路径索引失败: {mapper.index_path}, 错误: {e}")
+
+        for domain, archive in self._archives.items():
+            try:
+                archive.close()
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"关闭归档失败: {archive.archive_dir}, 错误: {e}")
+                continue
+            logger.info(
+                f"页面归档 {domain}: 写入 {archive.records_written} 条记录，"
+                f"{archive.bytes_written / 1024 / 1024:.1f}MB"
+            )
+        self._archives.clear()
+
+        if self._owns_visited_urls:
+            self.visited_urls.close()
+
+        if self._page_pool is not None:
+            self._page_pool.shutdown(wait=True, cancel_futures=True)
+            self._page_pool = None
+
+        if self._asset_pool is not None:
+            self._asset_pool.stop()
+            self._asset_pool = None
+        if self._asset_session is not None:
+            self._asset_session.close()
+            self._asset_session = None
+
+        for domain, store in self._asset_stores.items():
+            logger.info(
+                f"资源存储 {domain}: 新增 {store.blobs_written} 个文件，"
+                f"重复内容复用 {store.blobs_reused} 次"
+            )
+
+    async def process_item(self, item, spider):
         """处理每个 item，保存为 HTML 文件"""
 
         url = item['url']
+        # 各阶段耗时（CrawlTelemetryExtension 启用时记录）
+        telemetry = getattr(spider, 'telemetry', NULL_TELEMETRY)
 
-        # 检查 URL 是否已被处理
-        if url in self.visited_urls:
+        # 检查并记录 URL（规范化后相同的 URL 只保存一次）
+        if not self.visited_urls.add(url):
             raise DropItem(f"Duplicate URL: {url}")
 
-        self.visited_urls.add(url)
-
         # 获取域名（用于按域名组织输出）
         domain = item.get('domain', self.target_domain or self._extract_domain(url))
 
         # 生成本地文件路径（按域名组织）
         local_path = self._generate_local_path(url, domain, item.get('title', ''))
 
-        # 修正 HTML 中的链接
-        html_content = self._fix_html_links(item['html'], url)
-
-        # 判断是否需要下载资源
+        # 单次扫描得到规范化文本、内容哈希与 SimHash 指纹；不下载资源时同时完成链接重写
         download_assets = item.get('download_assets', False)
+        page = await self._process_page(item['html'], url, not download_assets, telemetry, domain)
+        item['content_hash'] = page.content_hash
+
+        # 近似重复检测（与本次及以往运行中已保存的页面比较）
+        fingerprint = page.simhash
+        item['simhash'] = f'{fingerprint:016x}'
+        if self.dedup_mode != 'off':
+            with telemetry.timer('pipeline_dedup_seconds', domain):
+                duplicate = self._check_duplicate(item, domain, fingerprint, spider)
+            if duplicate:
+                return item
+
+        # 下载资源后链接替换为本地路径，否则已转换为绝对 URL
+        body = page.body
         if download_assets:
-            html_content = self._download_and_rewrite_assets(
-                html_content, url, local_path, domain
-            )
+            with telemetry.timer('pipeline_assets_seconds', domain):
+                replacements = await self._download_assets(page.links, url, local_path, domain)
+            body = await self._render_page(page, item['html'], url, replacements, telemetry, domain)
 
-        # 保存 HTML 文件
+        # 保存 HTML 文件（归档模式下追加到分段文件，local_path 为导出后的路径）
         try:
-            dir_path = os.path.dirname(local_path)
-            if dir_path:
-                os.makedirs(dir_path, exist_ok=True)
-
-            with open(local_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            if self.output_mode == 'files':
+                with telemetry.timer('pipeline_write_seconds', domain):
+                    dir_path = os.path.dirname(local_path)
+                    if dir_path:
+                        os.makedirs(dir_path, exist_ok=True)
+
+                    with open(local_path, 'wb') as f:
+                        f.write(body)
+                written = len(body)
+            else:
+                written = await self._archive_page(item, body, local_path, domain, telemetry)
+            telemetry.observe('written_bytes', domain, written)
 
             item['local_path'] = local_path
+            self._get_path_mapper(domain).mark_saved(url)
+            if self.dedup_mode != 'off':
+                self._get_dedup_index(domain, spider).add(url, fingerprint)
+                self._dedup_paths[url] = local_path
             logger.info(f"已保存: {url} -> {local_path}")
 
         except Exception as e:
@@ -91,183 +257,294 @@ class SaveHtmlPipeline:
 
         return item
 
-    def _extract_domain(self, url: str) -> str:
-        """从 URL 提取域名"""
-        parsed = urllib.parse.urlparse(url)
-        domain = parsed.netloc.lower()
-        if domain.startswith('www.'):
-            domain = domain[4:]
-        return domain
-
-    def _generate_local_path(self, url: str, domain: str, title: str = '') -> str:
-        """根据 URL 和域名生成本地文件路径"""
+    async def _process_page(self, html: str, url: str, render: bool, telemetry, domain: str) -> PageResult:
+        """扫描页面并计算哈希与指纹（启用进程池时在工作进程中执行）"""
+        if self._page_pool is None:
+            return process_page(html, url, render, keep_document=not render, telemetry=telemetry, domain=domain)
 
-        # 解析 URL
-        parsed = urllib.parse.urlparse(url)
-        path = parsed.path.strip('/')
-
-        # 如果路径为空，使用 index.html
-        if not path:
-            path = 'index.html'
+        with telemetry.timer('pipeline_worker_seconds', domain):
+            return await maybe_deferred_to_future(self._run_in_pool(process_page, html, url, render))
 
-        # 处理路径中的查询参数
-        if parsed.query:
-            query_hash = hash(parsed.query) % 10000
-            path = f"{path}_q{query_hash}.html"
-
-        # 如果路径不以 .html 结尾，添加 .html
-        if not path.endswith('.html'):
-            path = path.rstrip('/')
-            if '.' not in path.split('/')[-1]:
-                path = path + '.html'
+    async def _render_page(
+        self,
+        page: PageResult,
+        html: str,
+        url: str,
+        replacements: dict[str, str],
+        telemetry,
+        domain: str
+    ) -> bytes:
+        """按替换表重写链接（进程内复用已分词的文档，进程池中重新扫描）"""
+        if page.document is not None:
+            return render_document(page.document, replacements, telemetry, domain)
 
-        # 构建完整路径（按域名组织）
-        domain_output_dir = os.path.join(self.output_dir, domain)
-        full_path = os.path.join(domain_output_dir, path)
+        with telemetry.timer('pipeline_worker_seconds', domain):
+            return await maybe_deferred_to_future(self._run_in_pool(render_page, html, url, replacements))
 
-        return full_path
+    async def _archive_page(self, item, body: bytes, local_path: str, domain: str, telemetry) -> int:
+        """
+        把页面编码为压缩记录（启用进程池时在工作进程中压缩）并追加到站点归档。
 
-    def _fix_html_links(self, html: str, base_url: str) -> str:
-        """修正 HTML 中的链接，将相对链接转换为绝对链接"""
+        Returns:
+            int: 写入的记录字节数
+        """
+        url = item['url']
+        archive = self._get_archive(domain)
+        relpath = os.path.relpath(local_path, archive.site_dir).replace('\\', '/')
+        fetched = utc_now()
+        args = (
+            self.output_mode, url, body, item.get('status', 200), item.get('response_headers'),
+            item.get('content_hash'), item.get('simhash'), relpath, fetched, self.archive_zstd_level
+        )
 
-        parsed_base = urllib.parse.urlparse(base_url)
-        base_domain = f"{parsed_base.scheme}://{parsed_base.netloc}"
+        if self._page_pool is None:
+            with telemetry.timer('pipeline_compress_seconds', domain):
+                record = encode_record(*args)
+        else:
+            with telemetry.timer('pipeline_worker_seconds', domain):
+                record = await maybe_deferred_to_future(self._run_in_pool(encode_record, *args))
+
+        with telemetry.timer('pipeline_write_seconds', domain):
+            archive.append(url, record, fetched, item.get('content_hash'), relpath)
+        return len(record)
+
+    def _get_archive(self, domain: str) -> PageArchive:
+        """获取站点的页面归档"""
+        archive = self._archives.get(domain)
+        if archive is None:
+            archive = PageArchive(
+                os.path.join(self.output_dir, domain),
+                archive_format=self.output_mode,
+                segment_bytes=self.archive_segment_bytes
+            )
+            self._archives[domain] = archive
+        return archive
+
+    def _page_saved(self, domain: str, url: str, local_path: str) -> bool:
+        """页面是否仍然保存着（目录模式检查文件，归档模式检查归档索引）"""
+        if self.output_mode == 'files':
+            return os.path.exists(local_path)
+        return url in self._get_archive(domain)
+
+    def _run_in_pool(self, func, *args) -> defer.Deferred:
+        """在进程池中执行函数；进行中的任务数达到上限时排队等待"""
+        return self._page_slots.run(self._submit_to_pool, func, *args)
+
+    def _submit_to_pool(self, func, *args) -> defer.Deferred:
+        """提交到进程池，结果通过 reactor 线程回调 Deferred"""
+        from twisted.internet import reactor
+
+        result = defer.Deferred()
+
+        def done(future):
+            try:
+                value = future.result()
+            except BaseException as e:
+                reactor.callFromThread(result.errback, Failure(e))
+            else:
+                reactor.callFromThread(result.callback, value)
+
+        self._page_pool.submit(func, *args).add_done_callback(done)
+        return result
+
+    def _get_dedup_index(self, domain: str, spider) -> SimHashIndex:
+        """获取站点的近似重复索引（首次使用时用历史中已保存页面的指纹初始化）"""
+        index = self._dedup_indexes.get(domain)
+        if index is not None:
+            return index
+
+        index = SimHashIndex(self.dedup_distance)
+        self._dedup_indexes[domain] = index
+
+        if hasattr(spider, 'history_for'):
+            history = spider.history_for(domain)
+        else:
+            history = getattr(spider, 'history', None)
+        if history is None:
+            return index
 
-        patterns = [
-            (r'href=["\'](?!#|javascript:|mailto:|tel:|data:)([^"\']+)["\']',
-             lambda m: f'href="{self._to_absolute_url(m.group(1), base_domain, parsed_base.path)}"'),
-            (r'src=["\'](?!#|javascript:|data:)([^"\']+)["\']',
-             lambda m: f'src="{self._to_absolute_url(m.group(1), base_domain, parsed_base.path)}"'),
-            (r'action=["\']([^"\']+)["\']',
-             lambda m: f'action="{self._to_absolute_url(m.group(1), base_domain, parsed_base.path)}"'),
-        ]
+        for url, entry in history.urls.items():
+            if entry.simhash is None or not entry.local_path or entry.duplicate_of:
+                continue
+            index.add(url, entry.simhash)
+            self._dedup_paths[url] = entry.local_path
 
-        for pattern, replacer in patterns:
-            html = re.sub(pattern, replacer, html)
+        logger.info(f"近似重复索引 {domain}: 载入 {len(index)} 个页面指纹")
+        return index
 
-        return html
+    def _check_duplicate(self, item, domain: str, fingerprint: int, spider) -> bool:
+        """
+        检查页面是否与已保存页面近似重复。
 
-    def _to_absolute_url(self, url: str, base_domain: str, base_path: str) -> str:
-        """将相对 URL 转换为绝对 URL"""
+        link 模式下把 local_path 指向已保存的页面并返回 True（不再另存文件）；
+        skip 模式下丢弃 item。
 
-        if url.startswith('http://') or url.startswith('https://'):
-            return url
+        Returns:
+            bool: 是否为近似重复页面
+        """
+        url = item['url']
+        index = self._get_dedup_index(domain, spider)
+        match = index.query(fingerprint, exclude=url)
+        if match is None:
+            return False
+
+        original, distance = match
+        original_path = self._dedup_paths.get(original)
+        if not original_path or not self._page_saved(domain, original, original_path):
+            # 原页面文件已不存在，按新页面保存
+            index.remove(original)
+            self._dedup_paths.pop(original, None)
+            return False
+
+        item['duplicate_of'] = original
+        # 页面自身此前保存的指纹已不再代表当前内容
+        index.remove(url)
+        self._dedup_paths.pop(url, None)
+        crawler = getattr(spider, 'crawler', None)
+        if crawler is not None:
+            crawler.stats.inc_value(f'dedup/near_duplicate_{self.dedup_mode}')
+
+        if self.dedup_mode == 'skip':
+            raise DropItem(f"Near-duplicate of {original} (distance {distance}): {url}")
+
+        item['local_path'] = original_path
+        logger.info(f"近似重复: {url} ≈ {original}（汉明距离 {distance}），复用 {original_path}")
+        return True
 
-        if url.startswith('//'):
-            return base_domain.split('://')[0] + ':' + url
+    def _extract_domain(self, url: str) -> str:
+        """从 URL 提取域名"""
+        parsed = urllib.parse.urlparse(url)
+        domain = parsed.netloc.lower()
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        return domain
 
-        if url.startswith('/'):
-            return base_domain + url
+    def _generate_local_path(self, url: str, domain: str, title: str = '') -> str:
+        """根据 URL 和域名生成本地文件路径（跨运行稳定，见 utils/path_mapper.py）"""
+        return self._get_path_mapper(domain).local_path(url)
 
-        base_dir = os.path.dirname(base_path)
-        if base_dir == '/':
-            base_dir = ''
+    def _get_path_mapper(self, domain: str) -> PathMapper:
+        """获取站点的路径映射（按域名组织）"""
+        mapper = self._path_mappers.get(domain)
+        if mapper is None:
+            mapper = PathMapper(os.path.join(self.output_dir, domain), verify_files=self.output_mode == 'files')
+            self._path_mappers[domain] = mapper
+        return mapper
 
-        return urllib.parse.urljoin(base_domain + '/' + base_dir, url)
+    def _fix_html_links(self, html: str, base_url: str) -> str:
+        """修正 HTML 中的链接，将相对链接转换为绝对链接"""
+        return parse_html(html, base_url).render()
 
-    def _download_and_rewrite_assets(
+    async def _download_assets(
         self,
-        html: str,
+        links: list[str],
         page_url: str,
         local_path: str,
         domain: str
-    ) -> str:
-        """下载资源并替换为本地路径"""
-        import requests
+    ) -> dict[str, str]:
+        """
+        并行下载页面引用的资源（按内容寻址存储）。
 
-        # 动态获取允许的域名
-        allowed_domains = self._get_allowed_domains(page_url, domain)
+        Args:
+            links: 页面中的链接（绝对 URL，已去重）
 
-        asset_exts = {
-            '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.bmp', '.ico',
-            '.mp4', '.webm', '.ogg', '.mp3', '.wav', '.woff', '.woff2', '.ttf', '.eot', '.otf'
-        }
+        Returns:
+            dict[str, str]: 链接替换表，资源和已保存页面映射为本地相对路径
+        """
 
-        attr_re = re.compile(
-            r'(?P<attr>href|src|poster|data-src|content)=["\'](?P<url>[^"\']+)["\']',
-            re.IGNORECASE
-        )
-        srcset_re = re.compile(r'srcset=["\'](?P<value>[^"\']+)["\']', re.IGNORECASE)
+        # 动态获取允许的域名
+        allowed_domains = self._get_allowed_domains(page_url, domain)
 
-        replacements = {}
         page_dir = os.path.dirname(local_path)
+        store = self._get_asset_store(domain)
 
-        def to_local(url: str) -> str | None:
-            if url.startswith('//'):
-                url = 'https:' + url
-            if url.startswith('data:') or url.startswith('javascript:') or url.startswith('mailto:') or url.startswith('tel:'):
+        def classify(link: str) -> str | None:
+            """返回同域链接的扩展名，站外链接返回 None"""
+            parsed = urllib.parse.urlparse(link)
+            if parsed.netloc not in allowed_domains:
+                return None
+            return os.path.splitext(parsed.path)[1].lower()
+
+        # 收集页面引用的资源
+        assets: dict[str, str] = {}
+        for link in links:
+            ext = classify(link)
+            if ext in ASSET_EXTENSIONS:
+                assets[link] = ext
+
+        # 并行下载（线程池），本次运行已下载的 URL 直接复用
+        missing = [u for u in assets if store.lookup(u) is None]
+        if missing:
+            await maybe_deferred_to_future(defer.DeferredList(
+                [self._fetch_asset(store, u, assets[u]) for u in missing],
+                consumeErrors=True
+            ))
+
+        def to_local(link: str) -> str | None:
+            ext = classify(link)
+            if ext is None:
                 return None
 
-            abs_url = urllib.parse.urljoin(page_url, url)
-            parsed = urllib.parse.urlparse(abs_url)
+            if ext not in ASSET_EXTENSIONS:
+                return self._to_local_html_ref(link, page_dir, allowed_domains, domain)
 
-            if parsed.netloc not in allowed_domains:
+            blob_path = store.lookup(link)
+            if blob_path is None:
                 return None
+            return os.path.relpath(blob_path, start=page_dir).replace('\\', '/')
 
-            path = parsed.path.lstrip('/')
-            _, ext = os.path.splitext(path)
-
-            if ext.lower() not in asset_exts:
-                return self._to_local_html_ref(abs_url, page_dir, allowed_domains)
-
-            if parsed.query:
-                base, ext = os.path.splitext(path)
-                path = f"{base}_q{hash(parsed.query) % 10000}{ext}"
-
-            # 使用域名特定的资源目录
-            asset_full = os.path.join(self.output_dir, domain, '_assets', path)
-
-            if abs_url in replacements:
-                return replacements[abs_url]
-
-            if not os.path.exists(asset_full):
-                os.makedirs(os.path.dirname(asset_full), exist_ok=True)
-                try:
-                    resp = requests.get(abs_url, timeout=30, stream=True)
-                    if resp.status_code == 200:
-                        with open(asset_full, 'wb') as f:
-                            for chunk in resp.iter_content(chunk_size=1024 * 64):
-                                if chunk:
-                                    f.write(chunk)
-                    else:
-                        return None
-                except Exception as e:
-                    logger.error(f"资源下载失败: {abs_url}, 错误: {e}")
+        replacements = {}
+        for link in links:
+            local = to_local(link)
+            if local is not None:
+                replacements[link] = local
+        return replacements
+
+    def _get_asset_store(self, domain: str) -> AssetStore:
+        """获取站点的资源存储（首次使用时启动下载线程池）"""
+        if self._asset_pool is None:
+            self._asset_session = create_session(self.asset_workers, self.user_agent)
+            self._asset_pool = ThreadPool(
+                minthreads=0, maxthreads=self.asset_workers, name='asset-download'
+            )
+            self._asset_pool.start()
+
+        store = self._asset_stores.get(domain)
+        if store is None:
+            store = AssetStore(
+                os.path.join(self.output_dir, domain),
+                session=self._asset_session,
+                timeout=self.asset_timeout
+            )
+            self._asset_stores[domain] = store
+        return store
+
+    def _fetch_asset(self, store: AssetStore, url: str, ext: str) -> defer.Deferred:
+        """在线程池中下载资源；同一 URL 并发请求共享一次下载"""
+        from twisted.internet import reactor
+
+        pending = self._pending_assets.get(url)
+        if pending is None:
+            pending = threads.deferToThreadPool(reactor, self._asset_pool, store.fetch, url, ext)
+            self._pending_assets[url] = pending
+
+            def done(result):
+                self._pending_assets.pop(url, None)
+                if isinstance(result, Failure):
+                    logger.error(f"资源下载失败: {url}, 错误: {result.getErrorMessage()}")
                     return None
+                return result
 
-            rel = os.path.relpath(asset_full, start=page_dir).replace('\\', '/')
-            replacements[abs_url] = rel
-            return rel
-
-        def replace_attr(match: re.Match) -> str:
-            raw_url = match.group('url')
-            local = to_local(raw_url)
-            if not local:
-                return match.group(0)
-            return f"{match.group('attr')}=\"{local}\""
-
-        def replace_srcset(match: re.Match) -> str:
-            value = match.group('value')
-            parts = [p.strip() for p in value.split(',') if p.strip()]
-            new_parts = []
-            changed = False
-            for part in parts:
-                pieces = part.split()
-                if not pieces:
-                    continue
-                url_part = pieces[0]
-                local = to_local(url_part)
-                if local:
-                    pieces[0] = local
-                    changed = True
-                new_parts.append(' '.join(pieces))
-            if not changed:
-                return match.group(0)
-            return f"srcset=\"{', '.join(new_parts)}\""
-
-        html = attr_re.sub(replace_attr, html)
-        html = srcset_re.sub(replace_srcset, html)
-        return html
+            pending.addBoth(done)
+
+        waiter = defer.Deferred()
+
+        def notify(result):
+            waiter.callback(result)
+            return result
+
+        pending.addBoth(notify)
+        return waiter
 
     def _get_allowed_domains(self, page_url: str, domain: str) -> set[str]:
         """获取允许的域名列表"""
@@ -288,7 +565,8 @@ class SaveHtmlPipeline:
         self,
         abs_url: str,
         page_dir: str,
-        allowed_domains: set[str]
+        allowed_domains: set[str],
+        domain: str
     ) -> str | None:
         """将页面 URL 转换为本地 HTML 路径"""
         parsed = urllib.parse.urlparse(abs_url)
@@ -303,8 +581,9 @@ class SaveHtmlPipeline:
         if path and '.' in path.split('/')[-1] and not path.lower().endswith('.html'):
             return None
 
-        local_full = self._generate_local_path(abs_url, self._extract_domain(abs_url))
-        if not os.path.exists(local_full):
+        # 以路径索引为准（冲突时追加摘要的路径也能找到）
+        local_full = self._get_path_mapper(domain).saved_path(abs_url)
+        if local_full is None:
             return None
 
         return os.path.relpath(local_full, start=page_dir).replace('\\', '/')
@@ -0,0 +1,278 @@
+"""
+持久化爬取队列调度器
+
+替代 Scrapy 的内存调度器，请求保存在 SQLite 爬取队列中（见 utils/frontier_store.py）：
+- 新 URL 优先，其次按 sitemap lastmod 从新到旧，再按深度从浅到深
+- 各站点（下载槽位）轮流出队；同时参与轮转的站点数不超过爬虫打开的历史数上限
+  （多站点爬虫的 max_open_histories），其余站点等待前面的站点完成后加入
+- 请求在回调输出处理完毕（产出的条目经过管道）后才标记为完成，
+  被杀时正在处理的请求下次运行重新抓取
+- 进程被杀后重新运行同一命令，从中断处继续；正常结束时清空队列
+
+本爬虫仅供学习研究使用，请遵守目标网站的robots协议及所有法律法规。不得用于任何商业用途或非法用途。
+
+作者：伍志勇
+"""
+
+import os
+import pickle
+import logging
+from collections import deque
+
+from scrapy import Request, signals
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.request import request_from_dict
+
+from mainsite_scraper.utils.frontier_store import FrontierStore
+
+logger = logging.getLogger(__name__)
+
+# 请求 meta 中保存队列 ID 的键
+FRONTIER_ID_KEY = 'frontier_id'
+
+# 队列数据库文件名
+FRONTIER_DB_NAME = 'crawl_frontier.sqlite3'
+
+
+class FrontierScheduler(BaseScheduler):
+    """基于持久化爬取队列的 Scrapy 调度器"""
+
+    def __init__(
+        self,
+        crawler,
+        frontier_path: str | None = None,
+        commit_every: int = 500,
+        max_active_domains: int | None = None
+    ):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.frontier_path = frontier_path
+        self.commit_every = commit_every
+        # None 表示沿用爬虫的 max_open_histories（没有则不限制）
+        self.max_active_domains = max_active_domains
+        self.spider = None
+        self.store: FrontierStore | None = None
+        # 无法序列化的请求（如 lambda 回调）保存在内存中，不能跨进程恢复
+        self._memory: deque = deque()
+        self._logged_unserializable = False
+        # 正在由爬虫回调处理的请求 ID -> 尚在管道中的条目数；回调输出已结束的请求 ID
+        self._scraping: dict[int, int] = {}
+        self._output_finished: set[int] = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = cls(
+            crawler,
+            frontier_path=crawler.settings.get('FRONTIER_PATH'),
+            commit_every=crawler.settings.getint('FRONTIER_COMMIT_ITEMS', 500),
+        )
+        for signal in (signals.item_scraped, signals.item_dropped, signals.item_error):
+            crawler.signals.connect(scheduler.item_finished, signal=signal)
+        crawler.signals.connect(scheduler.spider_error, signal=signals.spider_error)
+        return scheduler
+
+    def open(self, spider):
+        """打开（或恢复）爬取队列"""
+        self.spider = spider
+        path = self.frontier_path or self._default_path(spider)
+        max_active = self.max_active_domains
+        if max_active is None:
+            max_active = getattr(spider, 'max_open_histories', 0)
+        self.store = FrontierStore(path, commit_every=self.commit_every, max_active_domains=max_active)
+        logger.info(f"爬取队列: {path}")
+
+    def close(self, reason: str):
+        """爬取正常完成时清空队列，否则保留以便下次恢复"""
+        if self.store is None:
+            return
+        if reason == 'finished':
+            self.store.clear()
+        else:
+            logger.info(f"爬取中断（{reason}），保留 {len(self.store)} 个待抓取请求，下次运行时恢复")
+        self.store.close()
+        self.store = None
+
+    def has_pending_requests(self) -> bool:
+        return bool(self._memory) or len(self) > 0
+
+    def __len__(self) -> int:
+        return len(self._memory) + (len(self.store) if self.store is not None else 0)
+
+    def enqueue_request(self, request) -> bool:
+        """
+        请求入队；指纹已存在（待抓取、下载中或已完成）时返回 False。
+
+        带有队列 ID 且未进入回调的请求来自下载中间件（重定向、重试），
+        新请求入队后原请求即标记为完成。
+        """
+        parent_id = request.meta.pop(FRONTIER_ID_KEY, None)
+        try:
+            return self._enqueue(request)
+        finally:
+            if parent_id is not None and parent_id not in self._scraping:
+                self._done(parent_id)
+
+    def _enqueue(self, request) -> bool:
+
+        fingerprint = None
+        if not request.dont_filter:
+            fingerprint = self.crawler.request_fingerprinter.fingerprint(request).hex()
+
+        try:
+            payload = pickle.dumps(request.to_dict(spider=self.spider), protocol=4)
+        except (ValueError, TypeError, AttributeError, pickle.PicklingError) as e:
+            if not self._logged_unserializable:
+                logger.warning(f"请求无法序列化，保存在内存中（不能跨进程恢复）: {request}, 原因: {e}")
+                self._logged_unserializable = True
+            self.stats.inc_value('scheduler/unserializable')
+            self._memory.append(request)
+            self.stats.inc_value('scheduler/enqueued/memory')
+            self.stats.inc_value('scheduler/enqueued')
+            return True
+
+        meta = request.meta
+        stored = self.store.push(
+            payload,
+            domain=meta.get('download_slot') or urlparse_cached(request).hostname or '',
+            fingerprint=fingerprint,
+            priority=request.priority,
+            is_new=meta.get('new_url', True),
+            lastmod=meta.get('lastmod'),
+            depth=meta.get('depth', 0),
+        )
+        if not stored:
+            self.stats.inc_value('frontier/duplicate')
+            logger.debug(f"过滤重复请求: {request}")
+            return False
+
+        self.stats.inc_value('scheduler/enqueued/disk')
+        self.stats.inc_value('scheduler/enqueued')
+        return True
+
+    def next_request(self):
+        """取出下一个请求"""
+        if self._memory:
+            self.stats.inc_value('scheduler/dequeued/memory')
+            self.stats.inc_value('scheduler/dequeued')
+            return self._memory.popleft()
+
+        entry = self.store.pop() if self.store is not None else None
+        if entry is None:
+            return None
+
+        request_id, payload = entry
+        request = request_from_dict(pickle.loads(payload), spider=self.spider)
+        request.meta[FRONTIER_ID_KEY] = request_id
+        self.stats.inc_value('scheduler/dequeued/disk')
+        self.stats.inc_value('scheduler/dequeued')
+        return request
+
+    def response_started(self, request) -> None:
+        """请求的响应开始由爬虫回调处理"""
+        request_id = request.meta.get(FRONTIER_ID_KEY)
+        if request_id is not None:
+            self._scraping.setdefault(request_id, 0)
+
+    def item_started(self, request) -> None:
+        """回调产出一个条目（进入管道）"""
+        request_id = request.meta.get(FRONTIER_ID_KEY)
+        if request_id in self._scraping:
+            self._scraping[request_id] += 1
+
+    def output_finished(self, request) -> None:
+        """回调输出结束（正常结束或抛出异常）"""
+        request_id = request.meta.get(FRONTIER_ID_KEY)
+        if request_id in self._scraping:
+            self._output_finished.add(request_id)
+            self._finish(request_id)
+
+    def item_finished(self, item, response, spider, **kwargs) -> None:
+        """条目离开管道（保存、丢弃或出错）"""
+        request_id = self._response_id(response)
+        if request_id in self._scraping:
+            self._scraping[request_id] -= 1
+            self._finish(request_id)
+
+    def spider_error(self, failure, response, spider) -> None:
+        """回调或爬虫中间件抛出异常（可能没有经过 process_spider_output）"""
+        request_id = self._response_id(response)
+        if request_id is not None:
+            self._scraping.setdefault(request_id, 0)
+            self._output_finished.add(request_id)
+            self._finish(request_id)
+
+    def _finish(self, request_id: int) -> None:
+        """回调输出已结束且条目全部离开管道时标记为完成"""
+        if request_id in self._output_finished and self._scraping.get(request_id, 0) <= 0:
+            self._output_finished.discard(request_id)
+            del self._scraping[request_id]
+            self._done(request_id)
+
+    def _done(self, request_id: int) -> None:
+        if self.store is not None:
+            self.store.done(request_id)
+
+    @staticmethod
+    def _response_id(response) -> int | None:
+        request = getattr(response, 'request', None)
+        return request.meta.get(FRONTIER_ID_KEY) if request is not None else None
+
+    def _default_path(self, spider) -> str:
+        """默认队列路径：单站点保存在站点目录，多站点按爬虫名保存在输出目录"""
+        output_dir = getattr(spider, 'output_dir', None) or self.crawler.settings.get('OUTPUT_DIR', './output')
+        domain = getattr(spider, 'target_domain', None)
+        if domain:
+            return os.path.join(output_dir, domain, FRONTIER_DB_NAME)
+        return os.path.join(output_dir, f'{spider.name}_{FRONTIER_DB_NAME}')
+
+
+class FrontierSpiderMiddleware:
+    """
+    跟踪回调输出，通知 FrontierScheduler 请求何时处理完毕。
+
+    应排在其他爬虫中间件之后处理输出（顺序号小于 HttpErrorMiddleware 的 50）。
+    下载失败且没有 errback 的请求保持下载中状态，被杀后下次运行重试。
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_spider_output(self, response, result):
+        scheduler = self._scheduler()
+        if scheduler is None:
+            yield from result
+            return
+
+        scheduler.response_started(response.request)
+        try:
+            for output in result:
+                if output is not None and not isinstance(output, Request):
+                    scheduler.item_started(response.request)
+                yield output
+        finally:
+            scheduler.output_finished(response.request)
+
+    async def process_spider_output_async(self, response, result):
+        scheduler = self._scheduler()
+        if scheduler is None:
+            async for output in result:
+                yield output
+            return
+
+        scheduler.response_started(response.request)
+        try:
+            async for output in result:
+                if output is not None and not isinstance(output, Request):
+                    scheduler.item_started(response.request)
+                yield output
+        finally:
+            scheduler.output_finished(response.request)
+
+    def _scheduler(self) -> FrontierScheduler | None:
+        scheduler = getattr(self.crawler.engine, 'scheduler', None)
+        return scheduler if isinstance(scheduler, FrontierScheduler) else None
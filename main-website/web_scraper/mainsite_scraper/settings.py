@@ -20,7 +20,8 @@ ROBOTSTXT_OBEY = True
 CONCURRENT_REQUESTS = 8
 
 # Configure a delay for requests for the same website (default: 0)
-DOWNLOAD_DELAY = 3
+# 新站点尚无响应数据时的初始请求间隔，之后由自适应礼貌策略（POLITENESS_*）按站点调整
+DOWNLOAD_DELAY = 1
 
 # The download delay setting will honor only one of:
 CONCURRENT_REQUESTS_PER_DOMAIN = 4
@@ -43,17 +44,20 @@ DEFAULT_REQUEST_HEADERS = {
 # Enable or disable spider middlewares
 SPIDER_MIDDLEWARES = {
     'mainsite_scraper.middlewares.GenericPortalSpiderMiddleware': 543,
+    'mainsite_scraper.scheduler.FrontierSpiderMiddleware': 10,
 }
 
 # Enable or disable downloader middlewares
 DOWNLOADER_MIDDLEWARES = {
     'mainsite_scraper.middlewares.RandomUserAgentMiddleware': 400,
     'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': None,
+    'mainsite_scraper.middlewares.AdaptivePolitenessMiddleware': 590,
 }
 
 # Enable or disable extensions
 EXTENSIONS = {
     'scrapy.extensions.telnet.TelnetConsole': None,
+    'mainsite_scraper.extensions.CrawlTelemetryExtension': 500,
 }
 
 # Configure item pipelines
@@ -62,7 +66,8 @@ ITEM_PIPELINES = {
 }
 
 # Enable and configure the AutoThrottle extension (disabled by default)
-AUTOTHROTTLE_ENABLED = True
+# 由 AdaptivePolitenessMiddleware 替代（见下方 POLITENESS_*），两者不要同时启用
+AUTOTHROTTLE_ENABLED = False
 AUTOTHROTTLE_START_DELAY = 3
 AUTOTHROTTLE_MAX_DELAY = 10
 AUTOTHROTTLE_TARGET_CONCURRENCY = 4.0
@@ -79,6 +84,19 @@ RETRY_HTTP_CODES = [500, 502, 503, 504, 522, 524, 408, 429]
 # Depth limit (0 = unlimited)
 DEPTH_LIMIT = 0
 
+# Adaptive per-site politeness (AdaptivePolitenessMiddleware)
+# 请求间隔 = 平滑后的响应延迟 / 并发数，限制在 [最小间隔, 最大间隔] 内；并发数上限为 CONCURRENT_REQUESTS_PER_DOMAIN
+POLITENESS_ENABLED = True
+POLITENESS_MIN_DELAY = 0.25
+POLITENESS_MAX_DELAY = 30
+# 初始并发数；连续成功 POLITENESS_RAMP_AFTER 次且错误率低于阈值时加 1，429/503 或错误率超过阈值时减半
+POLITENESS_START_CONCURRENCY = 1
+POLITENESS_RAMP_AFTER = 10
+POLITENESS_ERROR_THRESHOLD = 0.1
+# Retry-After 与 robots.txt Crawl-delay 的上限（秒）
+POLITENESS_MAX_RETRY_AFTER = 600
+POLITENESS_MAX_CRAWL_DELAY = 60
+
 # ============================================================
 # 通用爬虫配置（不再硬编码特定域名）
 # ============================================================
@@ -89,11 +107,79 @@ OUTPUT_DIR = './output'
 # History expire days (for incremental crawling)
 HISTORY_EXPIRE_DAYS = 90
 
+# History storage backend: 'json' (crawl_history.json) or 'sqlite' (WAL mode, point lookups)
+# 首次切换到 sqlite 时会自动从 crawl_history.json 迁移
+HISTORY_BACKEND = 'json'
+
+# History checkpoint: flush journal (json) / commit transaction (sqlite) every N updates or T seconds
+# 进程崩溃后下次加载会回放 crawl_history.journal，已抓取页面不会重复下载
+HISTORY_CHECKPOINT_ITEMS = 100
+HISTORY_CHECKPOINT_SECONDS = 30
+
+# Asset downloads (download_assets=true): bounded worker pool sharing one keep-alive session
+# 资源下载线程数与单个资源超时（秒），下载不占用 reactor
+ASSET_DOWNLOAD_WORKERS = 8
+ASSET_DOWNLOAD_TIMEOUT = 30
+
+# Persistent crawl frontier (SQLite): new URLs first, then newest lastmod, then shallowest depth
+# 进程被杀后重新运行同一命令即从中断处继续；正常结束时清空。默认保存在 <OUTPUT_DIR>/<domain>/crawl_frontier.sqlite3
+SCHEDULER = 'mainsite_scraper.scheduler.FrontierScheduler'
+FRONTIER_PATH = None
+FRONTIER_COMMIT_ITEMS = 500
+
+# Multi-site crawls (multi_portal spider) and per-site page budget
+# 每个站点最多请求的页面数（0 表示不限制）；同时打开的站点历史数上限，超出时释放最久未用的站点（只刷新增量日志）
+PORTAL_MAX_PAGES = 0
+PORTAL_MAX_OPEN_HISTORIES = 100
+
+# Near-duplicate detection (SimHash + LSH, across runs via crawl history)
+# off: 不检测；link: 不另存文件，历史记录指向已保存的相似页面；skip: 丢弃相似页面
+DEDUP_MODE = 'off'
+# 相似度阈值（0~1），0.9 即 64 位指纹最多相差 6 位
+DEDUP_SIMILARITY = 0.9
+
+# Visited-URL set shared by spider and pipeline (canonical URLs, scalable Bloom filter)
+# Bloom 过滤器初始容量、误判率与内存上限（MB），写满后自动扩展，达到上限后不再扩展
+VISITED_BLOOM_CAPACITY = 100_000
+VISITED_BLOOM_ERROR_RATE = 0.001
+VISITED_BLOOM_MAX_MB = 64
+# Bloom 过滤器判定可能已访问时查询磁盘精确表（本次爬取的 URL），排除误判
+VISITED_EXACT = True
+
+# Crawl performance telemetry (per-domain histograms of download latency and processing stages)
+# 启用后爬虫结束时写出报告；TELEMETRY_INTERVAL > 0 时运行中每隔该秒数刷新一次
+TELEMETRY_ENABLED = False
+# 报告格式：json 或 prometheus（文本格式，可由 node_exporter textfile collector 采集）
+TELEMETRY_FORMAT = 'json'
+TELEMETRY_INTERVAL = 0
+# 报告路径（None 表示保存在站点输出目录：crawl_telemetry.json / crawl_telemetry.prom）
+TELEMETRY_PATH = None
+
+# Page processing process pool (HTML scan, hashing, SimHash, link rewriting)
+# 0 表示在 reactor 线程内处理；> 0 时提交到该数量的工作进程，大页面不阻塞网络 I/O
+PAGE_WORKERS = 0
+# 同时在进程池中处理的页面数上限（0 表示 2 × PAGE_WORKERS），超出时排队，内存有界
+PAGE_WORKER_MAX_IN_FLIGHT = 0
+
+# Page output mode: 'files' (one .html per page), 'warc' (.warc.gz segments) or 'zstd' (.zst segments, needs zstandard)
+# 归档模式下页面追加到 <OUTPUT_DIR>/<domain>/_archive/ 中的滚动分段文件，并以 SQLite 索引按 URL 随机读取；
+# 目录结构可用 scripts/export_archive.py 导出
+OUTPUT_MODE = 'files'
+# 单个分段文件大小上限（MB）及 zstd 压缩级别
+ARCHIVE_SEGMENT_MB = 1024
+ARCHIVE_ZSTD_LEVEL = 3
+
 # File size limit in bytes (skip very large files like PDFs, videos)
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 # Follow links settings
+# 站点的 sitemap 全部失败（或为空）时从首页跟随链接发现页面
 FOLLOW_LINKS = True
+# 链接发现的最大深度（首页为 0；0 表示不限制），页面数另受 PORTAL_MAX_PAGES 限制
+LINK_MAX_DEPTH = 5
+# 链接去重 Bloom 过滤器（每个站点首次发现链接时分配，默认约 1.8MB）
+LINK_BLOOM_CAPACITY = 1_000_000
+LINK_BLOOM_ERROR_RATE = 0.001
 
 # ============================================================
 # URL 过滤配置
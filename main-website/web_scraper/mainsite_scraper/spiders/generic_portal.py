@@ -2,55 +2,76 @@
 通用企业门户网站爬虫
 
 通过 CLI 参数接收目标网站 URL，支持：
-- Sitemap 优先 + 链接发现兜底
-- 增量爬取（基于历史记录和内容哈希）
+- Sitemap 优先 + 链接发现兜底（sitemap 全部失败时按深度与页面预算跟随链接）
+- 增量爬取（基于历史记录、内容哈希和 HTTP 条件请求）
 - URL 过滤（语言优先、域名边界、排除规则）
 
 作者：伍志勇
 """
 
+import os
 import scrapy
+from scrapy import signals
 import re
+import time
 import logging
-import urllib.parse
 from typing import Generator, Any
 
 from mainsite_scraper.items import WebPageItem
-from mainsite_scraper.utils.url_filter import (
-    is_allowed_domain,
-    is_english_url,
-    should_exclude,
-    get_allowed_domains,
-    filter_url,
-)
 from mainsite_scraper.utils.history_manager import (
-    load_history,
-    save_history,
     is_new_or_updated,
     update_history,
-    cleanup_expired,
+    record_not_modified,
+    get_conditional_headers,
     CrawlHistory,
 )
+from mainsite_scraper.utils.portal_site import PortalSite
+from mainsite_scraper.utils.visited_urls import VISITED_DB_NAME, VisitedUrls, canonicalize_url
 from mainsite_scraper.utils.sitemap_parser import (
-    parse_sitemap,
-    get_urls_with_lastmod,
-    is_sitemap_index,
+    iter_sitemap,
 )
-from mainsite_scraper.utils.content_hash import compute_hash
+from mainsite_scraper.utils.telemetry import NULL_TELEMETRY, CrawlTelemetry
 
 logger = logging.getLogger(__name__)
 
+# sitemap 请求优先于页面请求出队（尽早发现全部 URL）
+SITEMAP_PRIORITY = 10
+
 
 class GenericPortalSpider(scrapy.Spider):
     """通用企业门户网站爬虫"""
 
     name = 'generic_portal'
 
+    # 性能遥测（CrawlTelemetryExtension 启用时在 spider_opened 中替换）
+    telemetry: CrawlTelemetry = NULL_TELEMETRY
+
     custom_settings = {
         'DEPTH_LIMIT': 0,  # 不限制深度
-        'DOWNLOAD_DELAY': 3,
     }
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        # CLI 参数优先，未指定时使用 settings 配置
+        kwargs.setdefault('history_backend', crawler.settings.get('HISTORY_BACKEND', 'json'))
+        kwargs.setdefault('checkpoint_items', crawler.settings.getint('HISTORY_CHECKPOINT_ITEMS', 100))
+        kwargs.setdefault('checkpoint_seconds', crawler.settings.getfloat('HISTORY_CHECKPOINT_SECONDS', 30.0))
+        kwargs.setdefault('history_expire_days', crawler.settings.getint('HISTORY_EXPIRE_DAYS', 90))
+        kwargs.setdefault('max_pages', crawler.settings.getint('PORTAL_MAX_PAGES', 0))
+        kwargs.setdefault('follow_links', str(crawler.settings.getbool('FOLLOW_LINKS', True)))
+        kwargs.setdefault('max_depth', crawler.settings.getint('LINK_MAX_DEPTH', 5))
+        kwargs.setdefault('link_capacity', crawler.settings.getint('LINK_BLOOM_CAPACITY', 1_000_000))
+        kwargs.setdefault('link_error_rate', crawler.settings.getfloat('LINK_BLOOM_ERROR_RATE', 0.001))
+        kwargs.setdefault('visited_capacity', crawler.settings.getint('VISITED_BLOOM_CAPACITY', 100_000))
+        kwargs.setdefault('visited_error_rate', crawler.settings.getfloat('VISITED_BLOOM_ERROR_RATE', 0.001))
+        kwargs.setdefault('visited_max_mb', crawler.settings.getint('VISITED_BLOOM_MAX_MB', 64))
+        kwargs.setdefault('visited_exact', str(crawler.settings.getbool('VISITED_EXACT', True)))
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        # 页面保存后（pipeline 已计算哈希和本地路径）再记录历史
+        crawler.signals.connect(spider.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(spider.item_dropped, signal=signals.item_dropped)
+        return spider
+
     def __init__(self, *args, **kwargs):
         super(GenericPortalSpider, self).__init__(*args, **kwargs)
 
@@ -59,109 +80,181 @@ class GenericPortalSpider(scrapy.Spider):
         self.output_dir = kwargs.get('output_dir', './output')
         self.force_full = kwargs.get('force_full', 'false').lower() == 'true'
         self.download_assets = kwargs.get('download_assets', 'false').lower() == 'true'
+        self.history_backend = kwargs.get('history_backend', 'json')
+        self.follow_links = str(kwargs.get('follow_links', 'true')).lower() == 'true'
+
+        self.site: PortalSite | None = None
+        self.sites: dict[str, PortalSite] = {}
+        self._setup_sites(kwargs)
+
+        # 已访问 URL（所有站点共用，Pipeline 也使用同一实例）
+        exact = str(kwargs.get('visited_exact', 'true')).lower() == 'true'
+        self.visited_urls = VisitedUrls(
+            db_path=self.state_path(VISITED_DB_NAME) if exact else None,
+            initial_capacity=int(kwargs.get('visited_capacity', 100_000)),
+            error_rate=float(kwargs.get('visited_error_rate', 0.001)),
+            max_bytes=int(kwargs.get('visited_max_mb', 64)) * 1024 * 1024,
+        )
 
+        logger.info(f"输出目录: {self.output_dir}")
+        logger.info(f"强制全量: {self.force_full}")
+        logger.info(f"历史后端: {self.history_backend}")
+
+    def _setup_sites(self, kwargs: dict) -> None:
+        """创建目标站点状态（域名、URL 过滤器、历史、已访问集合）"""
         if not self.target_url:
             raise ValueError("必须提供 --url 参数")
 
-        # 解析目标域名
-        parsed = urllib.parse.urlparse(self.target_url)
-        self.target_domain = parsed.netloc.lower()
-        if self.target_domain.startswith('www.'):
-            self.target_domain = self.target_domain[4:]
+        self.site = self._create_site(self.target_url, kwargs, sitemap_url=kwargs.get('sitemap_url'))
+        self.sites[self.site.domain] = self.site
 
-        # 获取允许的域名列表
-        self.allowed_domains = get_allowed_domains(self.target_url)
+        self.target_domain = self.site.domain
+        self.allowed_domains = self.site.allowed_domains
+        self.url_filter = self.site.url_filter
+        self.sitemap_urls = self.site.sitemap_urls
 
         # 加载爬取历史
-        self.history = load_history(self.target_domain, self.output_dir)
-
-        # 清理过期历史
-        expired_count = cleanup_expired(self.history, days=90)
-        if expired_count > 0:
-            logger.info(f"清理了 {expired_count} 条过期历史记录")
-
-        # 已访问的 URL 集合
-        self.visited_urls = set()
-
-        # Sitemap URL
-        sitemap_url = kwargs.get('sitemap_url')
-        if sitemap_url:
-            self.sitemap_urls = [sitemap_url]
-        else:
-            # 尝试常见的 sitemap 路径
-            base_url = f"{parsed.scheme}://{parsed.netloc}"
-            self.sitemap_urls = [
-                f"{base_url}/sitemap.xml",
-                f"{base_url}/sitemap_index.xml",
-            ]
+        self.history = self.site.history
 
         logger.info(f"目标域名: {self.target_domain}")
         logger.info(f"允许域名: {self.allowed_domains}")
-        logger.info(f"输出目录: {self.output_dir}")
-        logger.info(f"强制全量: {self.force_full}")
+
+    def _create_site(self, target_url: str, kwargs: dict, **overrides) -> PortalSite:
+        """按爬虫参数创建站点状态"""
+        options = {
+            'history_backend': self.history_backend,
+            'checkpoint_items': int(kwargs.get('checkpoint_items', 100)),
+            'checkpoint_seconds': float(kwargs.get('checkpoint_seconds', 30.0)),
+            'max_pages': int(kwargs.get('max_pages', 0)),
+            'history_expire_days': int(kwargs.get('history_expire_days', 90)),
+            'max_depth': int(kwargs.get('max_depth', 0)),
+            'link_capacity': int(kwargs.get('link_capacity', 1_000_000)),
+            'link_error_rate': float(kwargs.get('link_error_rate', 0.001)),
+        }
+        options.update(overrides)
+        return PortalSite(target_url, self.output_dir, **options)
+
+    def state_path(self, filename: str) -> str:
+        """爬取状态文件路径：单站点保存在站点目录，多站点按爬虫名保存在输出目录"""
+        if self.target_domain:
+            return os.path.join(self.output_dir, self.target_domain, filename)
+        return os.path.join(self.output_dir, f'{self.name}_{filename}')
+
+    def history_for(self, domain: str) -> CrawlHistory | None:
+        """返回站点的爬取历史（供 pipeline 使用）"""
+        site = self.sites.get(domain)
+        return self._site_history(site) if site is not None else None
+
+    def _site_for(self, request: scrapy.Request) -> PortalSite:
+        """返回请求所属的站点"""
+        return self.sites.get(request.meta.get('portal'), self.site)
+
+    def _site_history(self, site: PortalSite) -> CrawlHistory:
+        """返回站点的爬取历史"""
+        return site.history
 
     def start_requests(self) -> Generator[scrapy.Request, None, None]:
         """从 sitemap 开始爬取，失败则从首页跟随链接"""
+        for site in self.sites.values():
+            yield from self._sitemap_requests(site)
+
+    def _sitemap_requests(self, site: PortalSite) -> Generator[scrapy.Request, None, None]:
+        """站点的 sitemap 请求"""
 
         # 首先尝试 sitemap
-        for sitemap_url in self.sitemap_urls:
+        for sitemap_url in site.sitemap_urls:
             yield scrapy.Request(
                 url=sitemap_url,
                 callback=self.parse_sitemap,
                 errback=self.errback,
-                meta={'sitemap_attempt': True},
+                meta={'sitemap_attempt': True, 'portal': site.domain, 'download_slot': site.domain},
+                priority=SITEMAP_PRIORITY,
                 dont_filter=True,
             )
 
     def parse_sitemap(self, response) -> Generator[scrapy.Request | dict, None, None]:
         """解析 sitemap 并过滤 URL"""
 
+        site = self._site_for(response.request)
         sitemap_url = response.url
         logger.info(f"解析 sitemap: {sitemap_url}")
 
-        # 检查是否为 sitemap 索引
-        if is_sitemap_index(sitemap_url, response.text):
-            logger.info(f"发现 sitemap 索引: {sitemap_url}")
-            # 提取子 sitemap URL
-            for sub_sitemap_url in self._extract_sitemap_urls(response.text):
+        # 单次流式遍历：索引产出子 sitemap，urlset 产出页面 URL（.xml.gz 自动解压）
+        url_count = 0
+        child_count = 0
+        for entry in iter_sitemap(sitemap_url, response.body):
+            if entry.is_sitemap:
+                child_count += 1
+                logger.info(f"发现子 sitemap: {entry.url}")
                 yield scrapy.Request(
-                    url=sub_sitemap_url,
+                    url=entry.url,
                     callback=self.parse_sitemap,
                     errback=self.errback,
+                    meta={'portal': site.domain, 'download_slot': site.domain},
+                    priority=SITEMAP_PRIORITY,
                     dont_filter=True,
                 )
-        else:
-            # 解析标准 sitemap
-            url_map = get_urls_with_lastmod(sitemap_url, response.text)
-            logger.info(f"从 sitemap 获取 {len(url_map)} 个 URL")
-
-            for url, lastmod in url_map.items():
-                should_crawl, reason = self._should_crawl(url, lastmod)
-                if should_crawl:
-                    yield scrapy.Request(
-                        url=url,
-                        callback=self.parse_page,
-                        errback=self.errback,
-                        meta={'lastmod': lastmod, 'source': 'sitemap'}
-                    )
-                else:
-                    logger.debug(f"跳过 URL ({reason}): {url}")
+                continue
+
+            url_count += 1
+            should_crawl, reason = self._should_crawl(site, entry.url, entry.lastmod)
+            if should_crawl:
+                yield self._page_request(site, entry.url, entry.lastmod, 'sitemap')
+            else:
+                logger.debug(f"跳过 URL ({reason}): {entry.url}")
+
+        logger.info(f"从 sitemap 获取 {url_count} 个 URL")
+
+        # sitemap 为空（如返回 HTML 错误页）同样视为失败
+        if response.meta.get('sitemap_attempt'):
+            yield from self._sitemap_attempt_done(site, url_count > 0 or child_count > 0)
+
+    def parse_conditional(self, response) -> Generator[dict | scrapy.Request, None, None]:
+        """处理条件请求的响应：304 视为未变化，其余交给 parse_page"""
+
+        if response.status != 304:
+            yield from self.parse_page(response)
+            return
+
+        site = self._site_for(response.request)
+        url = response.request.url
+        self.visited_urls.add(url)
+
+        # 服务器可能在 304 中刷新校验头
+        etag, http_last_modified = self._get_validators(response)
+        record_not_modified(
+            self._site_history(site),
+            url,
+            response.meta.get('lastmod'),
+            etag,
+            http_last_modified
+        )
+
+        self._inc_stat('conditional_get/not_modified')
+
+        logger.debug(f"页面未修改 (304): {url}")
+
+        # 页面未变化时沿用历史中的出链继续发现更深的页面
+        if self.follow_links and site.link_discovery:
+            links = self._stored_links(site, url) or ()
+            yield from self._follow_links(site, links, response.meta.get('link_depth', 0))
 
     def parse_page(self, response) -> Generator[dict | scrapy.Request, None, None]:
         """解析页面并提取内容"""
 
+        started = time.thread_time()
+        site = self._site_for(response.request)
         url = response.url
 
-        # 检查是否已访问
+        # 检查是否已访问（HTML 页面在 Pipeline 保存时记录为已访问）
         if url in self.visited_urls:
             logger.debug(f"已跳过重复 URL: {url}")
             return
 
-        self.visited_urls.add(url)
-
         # 检查内容类型
         content_type = response.headers.get('Content-Type', b'').decode('utf-8', errors='ignore')
         if 'text/html' not in content_type:
+            self.visited_urls.add(url)
             logger.debug(f"跳过非 HTML 内容: {url}")
             return
 
@@ -170,40 +263,132 @@ class GenericPortalSpider(scrapy.Spider):
         if not title:
             title = response.css('h1::text').get('').strip()
 
-        # 计算内容哈希
-        content_hash = compute_hash(response.text)
-
-        # 获取 lastmod
-        lastmod = response.meta.get('lastmod')
-
-        # 更新历史记录
-        update_history(
-            self.history,
-            url,
-            content_hash,
-            None,  # local_path 将在 pipeline 中设置
-            lastmod
-        )
+        # 获取 lastmod 与 HTTP 校验头（保存成功后写入历史）
+        etag, http_last_modified = self._get_validators(response)
 
-        # 创建 Item
+        # 创建 Item（内容哈希在 pipeline 中与链接重写一起计算）
         item = WebPageItem()
         item['url'] = url
         item['html'] = response.text
         item['depth'] = response.meta.get('depth', 0)
         item['title'] = title
-        item['content_hash'] = content_hash
-        item['domain'] = self.target_domain
+        item['domain'] = site.domain
+        item['status'] = response.status
+        item['response_headers'] = dict(response.headers.to_unicode_dict())
         item['download_assets'] = self.download_assets
+        item['lastmod'] = response.meta.get('lastmod')
+        item['etag'] = etag
+        item['http_last_modified'] = http_last_modified
+
+        # sitemap 不可用的站点从页面链接继续发现 URL（出链随条目写入历史）
+        follow = self.follow_links and site.link_discovery
+        if follow:
+            item['links'] = self._extract_links(site, response)
 
         logger.info(f"处理页面: {url} - {title}")
 
+        self.telemetry.observe('parse_page_cpu_seconds', site.domain, time.thread_time() - started)
         yield item
 
-    def _should_crawl(self, url: str, lastmod: str | None = None) -> tuple[bool, str]:
+        if follow:
+            yield from self._follow_links(site, item['links'], response.meta.get('link_depth', 0))
+
+    def _extract_links(self, site: PortalSite, response) -> list[str]:
+        """提取页面中的 http(s) 链接（去掉片段并去重，保持页面顺序）"""
+        links = {}
+        with self.telemetry.timer('extract_links_cpu_seconds', site.domain, clock=time.thread_time):
+            for href in response.xpath('//a/@href').getall():
+                url = response.urljoin(href.strip()).split('#', 1)[0]
+                if url.startswith(('http://', 'https://')):
+                    links[url] = None
+        return list(links)
+
+    def _stored_links(self, site: PortalSite, url: str) -> tuple[str, ...] | None:
+        """历史中保存的页面出链（未记录时为 None）"""
+        entry = self._site_history(site).urls.get(url)
+        return entry.links if entry is not None else None
+
+    def _follow_links(self, site: PortalSite, links, depth: int) -> list[scrapy.Request]:
+        """
+        为页面出链创建页面请求。
+
+        链接依次经过：Bloom 过滤器与已访问集合去重 → URL 过滤规则 → 历史检查 → 页面预算；
+        链接深度记录在 meta['link_depth']（首页为 0），爬取队列按深度从浅到深出队（广度优先）。
+
+        Args:
+            site: 页面所属站点
+            links: 页面出链（绝对 URL）
+            depth: 页面的链接深度
+
+        Returns:
+            list[scrapy.Request]: 页面请求
+        """
+        if not site.within_depth(depth):
+            self._inc_stat('links/depth_limit')
+            return []
+
+        requests = []
+        duplicate = 0
+        for url in links:
+            if not site.mark_seen(canonicalize_url(url)) or url in self.visited_urls:
+                duplicate += 1
+                continue
+
+            should_crawl, reason = self._should_crawl(site, url)
+            if should_crawl:
+                request = self._page_request(site, url, None, 'link')
+                request.meta['link_depth'] = depth + 1
+                requests.append(request)
+            else:
+                logger.debug(f"跳过链接 ({reason}): {url}")
+
+        self._inc_stat('links/extracted', len(links))
+        self._inc_stat('links/duplicate', duplicate)
+        self._inc_stat('links/followed', len(requests))
+        return requests
+
+    def item_scraped(self, item, response, spider):
+        """页面保存成功后更新历史记录"""
+        if spider is not self:
+            return
+
+        update_history(
+            self.history_for(item['domain']),
+            item['url'],
+            item.get('content_hash'),
+            item.get('local_path'),
+            item.get('lastmod'),
+            item.get('etag'),
+            item.get('http_last_modified'),
+            item.get('simhash'),
+            item.get('duplicate_of'),
+            item.get('links')
+        )
+
+    def item_dropped(self, item, response, exception, spider):
+        """近似重复页面被丢弃时同样记录历史，下次运行可通过条件请求跳过"""
+        if spider is not self or not item.get('duplicate_of'):
+            return
+
+        update_history(
+            self.history_for(item['domain']),
+            item['url'],
+            item.get('content_hash'),
+            None,
+            item.get('lastmod'),
+            item.get('etag'),
+            item.get('http_last_modified'),
+            item.get('simhash'),
+            item.get('duplicate_of'),
+            item.get('links')
+        )
+
+    def _should_crawl(self, site: PortalSite, url: str, lastmod: str | None = None) -> tuple[bool, str]:
         """
         判断 URL 是否应该被爬取。
 
         Args:
+            site: URL 所属站点
             url: 要检查的 URL
             lastmod: sitemap lastmod 时间戳
 
@@ -211,65 +396,137 @@ class GenericPortalSpider(scrapy.Spider):
             tuple[bool, str]: (是否爬取, 原因)
         """
         # 检查 URL 过滤规则
-        valid, reason = filter_url(url, self.target_domain)
+        valid, reason = site.url_filter.filter(url)
         if not valid:
             return False, reason
 
         # 如果强制全量爬取，跳过历史检查
         if self.force_full:
-            return True, "强制全量爬取"
-
-        # 检查是否为新页面或已更新
-        is_new, history_reason = is_new_or_updated(url, lastmod, self.history)
-        if not is_new:
-            return False, history_reason
-
-        return True, "需要爬取"
-
-    def _extract_sitemap_urls(self, sitemap_text: str) -> list[str]:
-        """从 sitemap 索引中提取子 sitemap URL"""
-        import xml.etree.ElementTree as ET
-
-        urls = []
-        try:
-            root = ET.fromstring(sitemap_text)
-            # 获取命名空间
-            ns = {}
-            if root.tag.startswith('{'):
-                ns_uri = root.tag[1:root.tag.index('}')]
-                ns = {'ns': ns_uri}
-
-            # 提取 sitemap loc
-            if ns:
-                sitemaps = root.findall('ns:sitemap/ns:loc', ns)
+            reason = "强制全量爬取"
+        else:
+            # 检查是否为新页面或已更新
+            history = self._site_history(site)
+            is_new, history_reason = is_new_or_updated(url, lastmod, history)
+            if is_new:
+                reason = "需要爬取"
+            elif not lastmod and get_conditional_headers(url, history):
+                # 无 lastmod 时无法判断是否更新，有校验头则交给服务器判断（304 即跳过）
+                reason = "条件请求校验"
+            elif not lastmod and site.link_discovery and self._stored_links(site, url) != ():
+                # 链接发现站点的非叶子页面没有校验头时重新抓取，否则其下新增的页面无法发现
+                # （出链未知的旧记录同样重新抓取；已知没有出链的叶子页面跳过）
+                reason = "链接发现重新抓取"
             else:
-                sitemaps = root.findall('.sitemap/loc')
+                return False, history_reason
+
+        # 检查站点页面预算
+        if not site.consume_budget():
+            return False, "超出站点页面预算"
 
-            for sitemap in sitemaps:
-                if sitemap.text:
-                    urls.append(sitemap.text.strip())
-        except Exception as e:
-            logger.error(f"解析 sitemap 索引失败: {e}")
+        return True, reason
 
-        return urls
+    def _page_request(
+        self,
+        site: PortalSite,
+        url: str,
+        lastmod: str | None,
+        source: str
+    ) -> scrapy.Request:
+        """
+        创建页面请求，历史中有 ETag / Last-Modified 时附带条件请求头。
+
+        Args:
+            site: URL 所属站点
+            url: 页面 URL
+            lastmod: sitemap lastmod 时间戳
+            source: 请求来源
+
+        Returns:
+            scrapy.Request: 页面请求
+        """
+        history = self._site_history(site)
+
+        # 同一站点的各子域名（www.、en.）共用一个下载槽位，按站点限制并发与延迟；
+        # new_url 供爬取队列排序（新 URL 优先）
+        meta = {
+            'lastmod': lastmod,
+            'source': source,
+            'portal': site.domain,
+            'download_slot': site.domain,
+            'new_url': url not in history.urls,
+        }
+        headers = {} if self.force_full else get_conditional_headers(url, history)
+        if not headers:
+            return scrapy.Request(
+                url=url,
+                callback=self.parse_page,
+                errback=self.errback,
+                meta=meta
+            )
+
+        meta['handle_httpstatus_list'] = [304]
+        return scrapy.Request(
+            url=url,
+            headers=headers,
+            callback=self.parse_conditional,
+            errback=self.errback,
+            meta=meta
+        )
+
+    @staticmethod
+    def _get_validators(response) -> tuple[str | None, str | None]:
+        """提取响应中的 ETag 与 Last-Modified 头"""
+        etag = response.headers.get('ETag')
+        http_last_modified = response.headers.get('Last-Modified')
+        return (
+            etag.decode('latin-1') if etag else None,
+            http_last_modified.decode('latin-1') if http_last_modified else None,
+        )
 
     def errback(self, failure):
         """处理请求失败"""
         request = failure.request
 
-        # 如果是 sitemap 请求失败，尝试从首页开始
+        # sitemap 请求失败：全部失败时从首页开始跟随链接
         if request.meta.get('sitemap_attempt'):
-            logger.warning(f"Sitemap 请求失败: {request.url}, 从首页开始爬取")
-            yield scrapy.Request(
-                url=self.target_url,
-                callback=self.parse_page,
-                errback=self.errback,
-                meta={'source': 'fallback'}
-            )
+            logger.warning(f"Sitemap 请求失败: {request.url}")
+            yield from self._sitemap_attempt_done(self._site_for(request), False)
         else:
             logger.error(f"请求失败: {request.url}, 错误: {failure.value}")
 
+    def _sitemap_attempt_done(self, site: PortalSite, found: bool) -> Generator[scrapy.Request, None, None]:
+        """记录 sitemap 尝试结果；站点的 sitemap 全部失败时请求首页并开启链接发现"""
+        if not site.sitemap_done(found):
+            return
+
+        logger.warning(f"站点没有可用的 sitemap，从首页开始爬取: {site.target_url}")
+        site.mark_seen(canonicalize_url(site.target_url))
+        yield scrapy.Request(
+            url=site.target_url,
+            callback=self.parse_page,
+            errback=self.errback,
+            meta={'source': 'fallback', 'portal': site.domain, 'download_slot': site.domain, 'link_depth': 0}
+        )
+
+    def _inc_stat(self, key: str, count: int = 1) -> None:
+        """累加 Scrapy 统计项（未绑定 crawler 时忽略）"""
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None and crawler.stats is not None and count:
+            crawler.stats.inc_value(key, count)
+
+    def _set_stat(self, key: str, value) -> None:
+        """设置 Scrapy 统计项（未绑定 crawler 时忽略）"""
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None and crawler.stats is not None:
+            crawler.stats.set_value(key, value)
+
     def closed(self, reason):
-        """爬虫结束时保存历史记录"""
-        save_history(self.history, self.output_dir)
-        logger.info(f"爬虫结束，保存历史记录: {self.target_domain}")
+        """爬虫结束时保存历史记录（每个站点各自保存）并关闭已访问 URL 集合"""
+        for site in self.sites.values():
+            site.save()
+            if site.history_loaded:
+                logger.info(f"爬虫结束，保存历史记录: {site.domain}")
+
+        for key, value in self.visited_urls.stats().items():
+            self._set_stat(f'visited_urls/{key}', value)
+        self.visited_urls.close()
@@ -0,0 +1,83 @@
+"""
+多站点门户网站爬虫
+
+一个 Scrapy 进程（一个 reactor）爬取一批目标站点，避免每个站点重复启动：
+- 每个站点独立的历史、允许域名、URL 过滤器与页面预算
+- 站点的各子域名共用一个下载槽位，CONCURRENT_REQUESTS_PER_DOMAIN 与下载延迟按站点生效，
+  全局并发由 CONCURRENT_REQUESTS 控制
+- 历史在站点首次使用时加载，打开的历史数超过上限时保存并释放最久未用的站点；
+  爬取队列同时只轮转同样数量的站点（见 FrontierStore 的 max_active_domains），避免历史被反复释放和加载
+
+用法：
+    scrapy crawl multi_portal -a targets=targets.txt
+    scrapy crawl multi_portal -a urls=https://a.com,https://b.com
+
+targets 文件每行一个站点：`<url> [sitemap_url]`，# 开头为注释。
+
+作者：伍志勇
+"""
+
+import logging
+from collections import OrderedDict
+
+from mainsite_scraper.spiders.generic_portal import GenericPortalSpider
+from mainsite_scraper.utils.history_manager import CrawlHistory
+from mainsite_scraper.utils.portal_site import PortalSite, load_targets
+
+logger = logging.getLogger(__name__)
+
+
+class MultiPortalSpider(GenericPortalSpider):
+    """多站点门户网站爬虫"""
+
+    name = 'multi_portal'
+
+    custom_settings = {
+        'DEPTH_LIMIT': 0,  # 不限制深度
+        # 各站点的均衡调度由爬取队列按下载槽位轮流出队实现（见 FrontierScheduler）
+    }
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        kwargs.setdefault('max_open_histories', crawler.settings.getint('PORTAL_MAX_OPEN_HISTORIES', 100))
+        return super().from_crawler(crawler, *args, **kwargs)
+
+    def _setup_sites(self, kwargs: dict) -> None:
+        """按目标列表创建各站点状态（历史延迟加载）"""
+        targets = load_targets(kwargs.get('targets'), kwargs.get('urls'))
+        if not targets:
+            raise ValueError("必须提供 --targets（目标列表文件）或 --urls 参数")
+
+        for target_url, sitemap_url in targets:
+            site = self._create_site(target_url, kwargs, sitemap_url=sitemap_url)
+            if site.domain in self.sites:
+                logger.warning(f"重复的目标站点，已忽略: {target_url}")
+                continue
+            self.sites[site.domain] = site
+
+        self.target_domain = None
+        self.allowed_domains = sorted({d for site in self.sites.values() for d in site.allowed_domains})
+
+        # 已加载历史的站点（按最近使用排序）
+        self.max_open_histories = int(kwargs.get('max_open_histories', 100))
+        self._open_sites: OrderedDict[str, PortalSite] = OrderedDict()
+
+        logger.info(f"目标站点: {len(self.sites)} 个")
+
+    def _site_for(self, request) -> PortalSite:
+        """返回请求所属的站点"""
+        return self.sites[request.meta['portal']]
+
+    def _site_history(self, site: PortalSite) -> CrawlHistory:
+        """返回站点历史；打开的历史超过上限时释放最久未用的站点（写入检查点）"""
+        history = site.history
+        self._open_sites[site.domain] = site
+        self._open_sites.move_to_end(site.domain)
+
+        while self.max_open_histories and len(self._open_sites) > self.max_open_histories:
+            _, idle = self._open_sites.popitem(last=False)
+            idle.release()
+            logger.debug(f"释放站点历史: {idle.domain}")
+
+        return history
+
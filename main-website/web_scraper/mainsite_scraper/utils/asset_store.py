@@ -0,0 +1,154 @@
+"""
+资源存储模块 - 按内容哈希寻址的静态资源存储
+
+相同内容的资源（即使来自不同 URL）只保存一份：
+    <output>/<domain>/_assets/blobs/ab/abcdef...0123.css
+
+页面通过相对路径引用 blob。本次运行内维护 URL -> blob 的内存索引，
+同一资源 URL 只下载一次。
+
+作者：伍志勇
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 资源目录名（位于站点输出目录下）
+ASSETS_DIR_NAME = '_assets'
+
+# 下载时每次读取的字节数
+_CHUNK_SIZE = 64 * 1024
+
+
+class AssetStore:
+    """
+    按内容哈希寻址的资源存储。
+
+    fetch() 为阻塞调用，设计为在工作线程中执行：多个线程共享同一个
+    keep-alive 的 requests.Session，内存索引由锁保护。
+    """
+
+    def __init__(
+        self,
+        site_dir: str,
+        session: requests.Session | None = None,
+        timeout: float = 30.0
+    ):
+        """
+        Args:
+            site_dir: 站点输出目录（<output>/<domain>）
+            session: 共享的 HTTP 会话（默认新建）
+            timeout: 单个资源下载超时（秒）
+        """
+        self.root = os.path.join(site_dir, ASSETS_DIR_NAME)
+        self.blobs_dir = os.path.join(self.root, 'blobs')
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+        self._index: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.blobs_written = 0
+        self.blobs_reused = 0
+
+    def lookup(self, url: str) -> str | None:
+        """返回本次运行中已下载的 URL 对应的 blob 路径"""
+        with self._lock:
+            return self._index.get(url)
+
+    def fetch(self, url: str, ext: str = '') -> str | None:
+        """
+        下载资源并存入 blob（阻塞）。
+
+        Args:
+            url: 资源绝对 URL
+            ext: 保存的扩展名（如 .css）
+
+        Returns:
+            str | None: blob 文件路径，下载失败返回 None
+        """
+        cached = self.lookup(url)
+        if cached:
+            return cached
+
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as resp:
+                if resp.status_code != 200:
+                    logger.debug(f"资源下载失败: {url}, 状态码: {resp.status_code}")
+                    return None
+                blob_path = self.put(resp.iter_content(chunk_size=_CHUNK_SIZE), ext)
+        except (requests.RequestException, OSError) as e:
+            logger.error(f"资源下载失败: {url}, 错误: {e}")
+            return None
+
+        with self._lock:
+            self._index[url] = blob_path
+        return blob_path
+
+    def put(self, chunks, ext: str = '') -> str:
+        """
+        边写临时文件边计算哈希，写完后移动到 blob 路径（已存在则丢弃临时文件）。
+
+        Args:
+            chunks: 字节块迭代器
+            ext: 保存的扩展名
+
+        Returns:
+            str: blob 文件路径
+        """
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        digest = hashlib.sha256()
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.blobs_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        digest.update(chunk)
+                        f.write(chunk)
+
+            blob_path = self.blob_path(digest.hexdigest(), ext)
+            if os.path.exists(blob_path):
+                os.remove(tmp_path)
+                self.blobs_reused += 1
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(tmp_path, blob_path)
+                self.blobs_written += 1
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return blob_path
+
+    def blob_path(self, sha256: str, ext: str = '') -> str:
+        """blob 文件路径：按哈希前两位分目录"""
+        return os.path.join(self.blobs_dir, sha256[:2], f'{sha256}{ext.lower()}')
+
+
+def create_session(pool_size: int, user_agent: str | None = None) -> requests.Session:
+    """
+    创建供多个下载线程共享的 keep-alive 会话。
+
+    Args:
+        pool_size: 每个主机的连接池大小（与下载线程数一致）
+        user_agent: User-Agent 请求头
+
+    Returns:
+        requests.Session: HTTP 会话
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if user_agent:
+        session.headers['User-Agent'] = user_agent
+    return session
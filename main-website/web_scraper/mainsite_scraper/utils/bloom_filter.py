@@ -0,0 +1,184 @@
+"""
+Bloom 过滤器模块 - 固定内存的 URL 去重集合
+
+链接发现时一个站点可能产生数百万个重复链接，用 set 保存完整 URL 字符串会让内存随链接数增长。
+Bloom 过滤器按容量和误判率一次分配位数组：不会漏判已加入的元素，
+以 error_rate 的概率把未加入的元素误判为已存在（即少量链接被跳过）。
+
+元素数事先未知时使用 ScalableBloomFilter：写满后追加容量更大、误判率更低的过滤器，
+总误判率保持在设定值以内，并可设置内存上限。
+
+作者：伍志勇
+"""
+
+import hashlib
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+def _optimal_bits(capacity: int, error_rate: float) -> int:
+    """最优位数 m = -n·ln(p) / ln(2)²"""
+    return max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+
+
+class BloomFilter:
+    """
+    固定容量的 Bloom 过滤器。
+
+    位置由 blake2b 摘要拆出的两个 64 位哈希做双重哈希生成（h1 + i * h2），
+    每个元素只计算一次摘要；结果与 PYTHONHASHSEED 无关。
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: 预计元素数（超出后误判率上升）
+            error_rate: 达到容量时的误判率
+        """
+        if capacity <= 0:
+            raise ValueError(f"容量必须大于 0: {capacity}")
+        if not 0.0 < error_rate < 1.0:
+            raise ValueError(f"误判率必须在 (0, 1) 范围内: {error_rate}")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        # 哈希函数数 k = m/n·ln(2)
+        self.num_bits = _optimal_bits(capacity, error_rate)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        """已加入的元素数（近似值，误判为已存在的元素不计入）"""
+        return self._count
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def nbytes(self) -> int:
+        """位数组占用的字节数"""
+        return len(self._bits)
+
+    @property
+    def is_full(self) -> bool:
+        """元素数是否已达到容量（此后误判率高于 error_rate）"""
+        return self._count >= self.capacity
+
+    def add(self, item: str) -> bool:
+        """
+        加入元素。
+
+        Args:
+            item: 元素（如 URL）
+
+        Returns:
+            bool: 元素此前不存在时返回 True，已存在（或被误判为已存在）时返回 False
+        """
+        bits = self._bits
+        added = False
+        for pos in self._positions(item):
+            index, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[index] & mask:
+                bits[index] |= mask
+                added = True
+        if added:
+            self._count += 1
+        return added
+
+    def _positions(self, item: str):
+        """元素对应的 num_hashes 个位位置"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        m = self.num_bits
+        return ((h1 + i * h2) % m for i in range(self.num_hashes))
+
+
+class ScalableBloomFilter:
+    """
+    可扩展的 Bloom 过滤器。
+
+    当前过滤器写满后追加一个容量乘以 growth、误判率乘以 tightening 的新过滤器；
+    各过滤器误判率之和（等比级数）不超过 error_rate。查询依次检查各过滤器。
+
+    达到 max_bytes 后不再扩展，新元素继续写入最后一个过滤器（误判率随之上升），
+    内存保持在上限以内。
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 100_000,
+        error_rate: float = 0.001,
+        max_bytes: int = 0,
+        growth: int = 2,
+        tightening: float = 0.5
+    ):
+        """
+        Args:
+            initial_capacity: 第一个过滤器的容量
+            error_rate: 总误判率上限
+            max_bytes: 位数组总字节数上限（0 表示不限制）
+            growth: 每次扩展的容量倍数
+            tightening: 每次扩展的误判率倍数（0~1）
+        """
+        if not 0.0 < tightening < 1.0:
+            raise ValueError(f"误判率倍数必须在 (0, 1) 范围内: {tightening}")
+
+        self.error_rate = error_rate
+        self.max_bytes = max_bytes
+        self.growth = growth
+        self.tightening = tightening
+        self.saturated = False
+        self._filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+
+    def __len__(self) -> int:
+        return sum(len(f) for f in self._filters)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in f for f in self._filters)
+
+    @property
+    def nbytes(self) -> int:
+        """位数组占用的总字节数"""
+        return sum(f.nbytes for f in self._filters)
+
+    @property
+    def num_filters(self) -> int:
+        """过滤器个数"""
+        return len(self._filters)
+
+    def add(self, item: str) -> bool:
+        """
+        加入元素。
+
+        Returns:
+            bool: 元素此前不存在时返回 True，已存在（或被误判为已存在）时返回 False
+        """
+        filters = self._filters
+        if len(filters) > 1 and any(item in f for f in filters[:-1]):
+            return False
+
+        current = filters[-1]
+        added = current.add(item)
+        if added and current.is_full and not self.saturated:
+            self._grow(current)
+        return added
+
+    def _grow(self, current: BloomFilter) -> None:
+        """追加下一个过滤器；超出内存上限时停止扩展"""
+        capacity = current.capacity * self.growth
+        error_rate = current.error_rate * self.tightening
+        next_bytes = (_optimal_bits(capacity, error_rate) + 7) // 8
+        if self.max_bytes and self.nbytes + next_bytes > self.max_bytes:
+            self.saturated = True
+            logger.warning(
+                f"Bloom 过滤器达到内存上限 {self.max_bytes} 字节（{len(self)} 个元素），"
+                f"不再扩展，此后误判率上升"
+            )
+            return
+        self._filters.append(BloomFilter(capacity, error_rate))
@@ -5,10 +5,11 @@
 """
 
 import hashlib
-import re
 import logging
 from typing import Optional
 
+from .html_rewriter import normalize_html
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,10 +18,9 @@ def compute_hash(html: str, normalize: bool = True) -> str:
     计算 HTML 内容的 SHA256 哈希。
 
     可选择在计算哈希前对 HTML 进行规范化处理，以忽略不重要的差异：
-    - 移除空白字符
+    - 压缩空白字符，忽略标签之间的空白
     - 移除注释
-    - 移除脚本和样式内容
-    - 统一大小写
+    - 移除脚本、样式和 noscript 内容
 
     Args:
         html: HTML 内容
@@ -40,6 +40,24 @@ def compute_hash(html: str, normalize: bool = True) -> str:
     return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 
+def compute_normalized_hash(text: str) -> str:
+    """
+    计算已规范化文本的哈希。
+
+    与 compute_hash(html) 结果一致，用于 html_rewriter 单次扫描已得到规范化文本的场景。
+
+    Args:
+        text: 规范化文本（HtmlDocument.text）
+
+    Returns:
+        str: SHA256 哈希值
+    """
+    if not text:
+        return ''
+
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
 def compute_hash_fast(html: str) -> str:
     """
     快速哈希计算（不进行规范化）。
@@ -62,12 +80,10 @@ def _normalize_html(html: str) -> str:
     """
     规范化 HTML 内容。
 
-    处理步骤：
+    单次扫描完成（见 html_rewriter.normalize_html）：
     1. 移除 HTML 注释
-    2. 移除 <script> 标签内容
-    3. 移除 <style> 标签内容
-    4. 压缩空白字符
-    5. 转换为小写
+    2. 移除 <script> / <style> / <noscript> 标签及其内容
+    3. 压缩空白字符，忽略标签之间的纯空白
 
     Args:
         html: 原始 HTML
@@ -75,28 +91,7 @@ def _normalize_html(html: str) -> str:
     Returns:
         str: 规范化后的 HTML
     """
-    # 移除 HTML 注释
-    html = re.sub(r'<!--.*?-->', '', html, flags=re.DOTALL)
-
-    # 移除 <script> 标签及其内容
-    html = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-
-    # 移除 <style> 标签及其内容
-    html = re.sub(r'<style[^>]*>.*?</style>', '', html, flags=re.DOTALL | re.IGNORECASE)
-
-    # 移除 noscript 标签
-    html = re.sub(r'<noscript[^>]*>.*?</noscript>', '', html, flags=re.DOTALL | re.IGNORECASE)
-
-    # 压缩空白字符
-    html = re.sub(r'\s+', ' ', html)
-
-    # 去除首尾空白
-    html = html.strip()
-
-    # 转换为小写（可选，根据需求）
-    # html = html.lower()
-
-    return html
+    return normalize_html(html)
 
 
 def hash_changed(hash1: str, hash2: str) -> bool:
@@ -0,0 +1,248 @@
+"""
+爬取队列存储模块 - 基于 SQLite（WAL 模式）的持久化爬取队列
+
+请求按下载槽位（站点）分组，各站点轮流出队（可限制同时参与轮转的站点数，
+站点的请求全部完成后下一个等待中的站点才加入）；同一站点内按以下顺序出队：
+1. Scrapy 请求优先级（sitemap 请求优先，尽早填充队列）
+2. 新 URL 优先于历史中已有的 URL
+3. sitemap lastmod 越新越优先
+4. 深度越浅越优先，其余按入队顺序
+
+出队的请求标记为下载中，回调处理完毕后标记为完成（保留指纹用于去重）。
+进程被杀后重新打开时，下载中的请求恢复为待抓取，从中断处继续。
+
+作者：伍志勇
+"""
+
+import os
+import sqlite3
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# 请求状态
+STATE_PENDING = 0
+STATE_IN_FLIGHT = 1
+STATE_DONE = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT,
+    domain TEXT NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    priority INTEGER NOT NULL DEFAULT 0,
+    is_new INTEGER NOT NULL DEFAULT 1,
+    lastmod TEXT NOT NULL DEFAULT '',
+    depth INTEGER NOT NULL DEFAULT 0,
+    request BLOB NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_frontier_fingerprint ON frontier (fingerprint);
+CREATE INDEX IF NOT EXISTS idx_frontier_next
+    ON frontier (domain, state, priority DESC, is_new DESC, lastmod DESC, depth, id);
+"""
+
+_NEXT_SQL = (
+    'SELECT id, request FROM frontier WHERE domain = ? AND state = 0 '
+    'ORDER BY priority DESC, is_new DESC, lastmod DESC, depth, id LIMIT 1'
+)
+
+
+class FrontierStore:
+    """
+    持久化爬取队列。
+
+    写入在同一事务中累积，每 commit_every 次变更或距上次提交超过
+    commit_interval 秒时提交一次；进程崩溃最多丢失最后一批未提交的变更。
+
+    max_active_domains 限制同时参与轮转的站点数（0 表示不限制）：站点在没有待抓取
+    和下载中的请求后退出，等待中的站点按入队顺序加入。多站点爬取时与打开的历史数上限
+    一致，避免轮转到的站点历史被反复释放和重新加载。活跃站点只剩下载中的请求时，
+    为避免空闲，等待中的站点会临时超出上限加入。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        commit_every: int = 500,
+        commit_interval: float = 5.0,
+        max_active_domains: int = 0
+    ):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.max_active_domains = max_active_domains
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+        # 上次未完成的下载恢复为待抓取
+        resumed = self._conn.execute(
+            'UPDATE frontier SET state = ? WHERE state = ?', (STATE_PENDING, STATE_IN_FLIGHT)
+        ).rowcount
+        self._conn.commit()
+
+        # 各站点待抓取数量；活跃站点（有待抓取请求的按轮转顺序排列）与等待中的站点
+        self._pending: dict[str, int] = dict(self._conn.execute(
+            'SELECT domain, COUNT(*) FROM frontier WHERE state = ? GROUP BY domain', (STATE_PENDING,)
+        ).fetchall())
+        self._rotation: deque[str] = deque()
+        self._active: set[str] = set()
+        self._waiting: deque[str] = deque()
+        # 下载中的请求 ID -> 站点，各站点下载中的请求数
+        self._in_flight: dict[int, str] = {}
+        self._in_flight_count: dict[str, int] = {}
+        for domain in self._pending:
+            self._schedule(domain)
+
+        if self._pending:
+            logger.info(f"恢复爬取队列: {db_path}, {len(self)} 个待抓取请求（其中 {resumed} 个中断时正在下载）")
+
+    def __len__(self) -> int:
+        return sum(self._pending.values())
+
+    def push(
+        self,
+        payload: bytes,
+        domain: str,
+        fingerprint: str | None = None,
+        priority: int = 0,
+        is_new: bool = True,
+        lastmod: str | None = None,
+        depth: int = 0
+    ) -> bool:
+        """
+        请求入队。
+
+        Args:
+            payload: 序列化的请求
+            domain: 下载槽位（站点）
+            fingerprint: 请求指纹（None 表示不去重）
+            priority: Scrapy 请求优先级
+            is_new: 是否为历史中没有的新 URL
+            lastmod: sitemap lastmod（ISO 8601）
+            depth: 爬取深度
+
+        Returns:
+            bool: 入队成功返回 True，指纹已存在（重复请求）返回 False
+        """
+        cursor = self._conn.execute(
+            'INSERT OR IGNORE INTO frontier (fingerprint, domain, priority, is_new, lastmod, depth, request) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (fingerprint, domain, priority, int(is_new), lastmod or '', depth, payload)
+        )
+        if cursor.rowcount == 0:
+            return False
+
+        if domain not in self._pending:
+            self._pending[domain] = 0
+            self._schedule(domain)
+        self._pending[domain] += 1
+        self._mark_dirty()
+        return True
+
+    def pop(self) -> tuple[int, bytes] | None:
+        """
+        按活跃站点轮转取出下一个请求并标记为下载中。
+
+        Returns:
+            tuple[int, bytes] | None: (请求 ID, 序列化的请求)，队列为空时返回 None
+        """
+        while self._rotation or self._admit():
+            domain = self._rotation.popleft()
+            row = self._conn.execute(_NEXT_SQL, (domain,)).fetchone()
+            if row is None:
+                self._pending.pop(domain, None)
+                self._release(domain)
+                continue
+
+            self._conn.execute('UPDATE frontier SET state = ? WHERE id = ?', (STATE_IN_FLIGHT, row[0]))
+            self._pending[domain] -= 1
+            if self._pending[domain] > 0:
+                self._rotation.append(domain)
+            else:
+                del self._pending[domain]
+            self._in_flight[row[0]] = domain
+            self._in_flight_count[domain] = self._in_flight_count.get(domain, 0) + 1
+            self._mark_dirty()
+            return row[0], row[1]
+        return None
+
+    def done(self, request_id: int) -> None:
+        """标记请求已完成（清空请求内容，保留指纹用于去重）"""
+        self._conn.execute(
+            "UPDATE frontier SET state = ?, request = x'' WHERE id = ?", (STATE_DONE, request_id)
+        )
+        self._mark_dirty()
+
+        domain = self._in_flight.pop(request_id, None)
+        if domain is not None:
+            self._in_flight_count[domain] -= 1
+            if not self._in_flight_count[domain]:
+                del self._in_flight_count[domain]
+                self._release(domain)
+
+    @property
+    def active_domains(self) -> int:
+        """参与轮转的站点数"""
+        return len(self._active)
+
+    def clear(self) -> None:
+        """清空队列（爬取正常完成后调用，下次运行重新开始）"""
+        self._conn.execute('DELETE FROM frontier')
+        self._pending.clear()
+        self._rotation.clear()
+        self._active.clear()
+        self._waiting.clear()
+        self._in_flight.clear()
+        self._in_flight_count.clear()
+        self.commit()
+
+    def commit(self) -> None:
+        """提交未完成的写入"""
+        self._conn.commit()
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """提交并关闭连接"""
+        self.commit()
+        self._conn.close()
+
+    def _schedule(self, domain: str) -> None:
+        """有了待抓取请求的站点：活跃站点回到轮转，其余在未达上限时加入，否则等待"""
+        if domain in self._active or not self.max_active_domains or len(self._active) < self.max_active_domains:
+            self._active.add(domain)
+            self._rotation.append(domain)
+        else:
+            self._waiting.append(domain)
+
+    def _admit(self) -> bool:
+        """活跃站点都没有待抓取请求时让下一个等待中的站点加入（可临时超出上限）"""
+        if not self._waiting:
+            return False
+        domain = self._waiting.popleft()
+        self._active.add(domain)
+        self._rotation.append(domain)
+        return True
+
+    def _release(self, domain: str) -> None:
+        """站点没有待抓取和下载中的请求时退出活跃站点，由等待中的站点补上"""
+        if domain in self._pending or domain in self._in_flight_count:
+            return
+        self._active.discard(domain)
+        while self._waiting and len(self._active) < self.max_active_domains:
+            self._admit()
+
+    def _mark_dirty(self) -> None:
+        self._pending_writes += 1
+        if (self._pending_writes >= self.commit_every
+                or time.monotonic() - self._last_commit >= self.commit_interval):
+            self.commit()
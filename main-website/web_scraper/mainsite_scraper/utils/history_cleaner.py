@@ -0,0 +1,445 @@
+"""
+历史记录清理模块 - 流式清理过期条目与压缩失效条目
+
+crawl_history.json 按条目流式解析、流式写出，内存中只保留当前条目，
+清理大站点时不必把整个历史文件载入内存：
+- 过期清理：删除 first_seen 早于截止时间的条目
+- 压缩：删除 local_path 对应页面已不存在的条目（归档模式下查归档索引）
+
+上次爬取中断留下 crawl_history.journal 时需要回放日志，此时按原方式整站载入。
+
+作者：伍志勇
+"""
+
+import json
+import os
+import re
+import time
+import logging
+from collections.abc import Iterator, Iterable
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Any, TextIO
+
+from .history_manager import (
+    HISTORY_BACKENDS, load_history, save_history,
+    _encode_timestamp, _get_history_path, _get_journal_path, _is_before
+)
+from .history_store import SqliteUrlStore, get_db_path
+from .page_archive import ARCHIVE_DIR, PageArchive
+
+logger = logging.getLogger(__name__)
+
+# 流式解析每次读取的字符数
+CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+
+@dataclass
+class CleanReport:
+    """单个站点的清理结果"""
+    site: str
+    backend: str = 'json'
+    scanned: int = 0  # 扫描的条目数
+    expired: int = 0  # 过期删除的条目数
+    missing: int = 0  # 页面不存在而删除的条目数
+    bytes_before: int = 0  # 历史文件清理前大小
+    bytes_after: int = 0  # 历史文件清理后大小
+    seconds: float = 0.0
+    skipped: str | None = None  # 跳过（或未压缩）的原因
+
+    @property
+    def removed(self) -> int:
+        return self.expired + self.missing
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), 'removed': self.removed}
+
+
+class _StreamReader:
+    """在按块读取的文本上逐个解码 JSON 值"""
+
+    def __init__(self, f: TextIO, chunk_size: int = CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self.raw = ''  # 上一个值在文件中的原文
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（文件结束时返回空串）"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._read_more():
+                return self._buf[self._pos:self._pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"历史文件格式错误：期望 {char!r}，实际为 {self.peek()!r}")
+        self._pos += 1
+
+    def next_member(self, closer: str) -> bool:
+        """消费成员之间的逗号；遇到结束符时消费并返回 False"""
+        char = self.peek()
+        if char == ',':
+            self._pos += 1
+            return True
+        self.expect(closer)
+        return False
+
+    def value(self) -> Any:
+        """解码下一个 JSON 值（缓冲区中不完整时继续读取）"""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._read_more():
+                    continue
+                raise
+            # 数字等值在缓冲区末尾可能被截断，多读一块确认
+            if end == len(self._buf) and self._read_more():
+                continue
+            self.raw = self._buf[self._pos:end]
+            self._pos = end
+            return value
+
+    def _read_more(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+
+def iter_history_file(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[str, Any]]:
+    """
+    流式解析 crawl_history.json 的顶层字段。
+
+    urls 字段的值为 (url, 条目字典) 迭代器，需在取下一个字段前遍历
+    （未遍历完的部分会被跳过）。
+
+    Args:
+        f: 以文本模式打开的历史文件
+        chunk_size: 每次读取的字符数
+
+    Yields:
+        tuple[str, Any]: (字段名, 值)
+    """
+    return _iter_fields(_StreamReader(f, chunk_size))
+
+
+def _iter_fields(reader: _StreamReader) -> Iterator[tuple[str, Any]]:
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == 'urls' and reader.peek() == '{':
+            entries = _iter_entries(reader)
+            yield key, entries
+            for _ in entries:
+                pass
+        else:
+            yield key, reader.value()
+        if not reader.next_member('}'):
+            return
+
+
+def _iter_entries(reader: _StreamReader) -> Iterator[tuple[str, dict]]:
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.expect('}')
+        return
+    while True:
+        url = reader.value()
+        reader.expect(':')
+        yield url, reader.value()
+        if not reader.next_member('}'):
+            return
+
+
+def clean_site_history(
+    site: str,
+    output_dir: str,
+    days: int | None = None,
+    compact: bool = False,
+    dry_run: bool = False,
+    backend: str = 'json',
+    force: bool = False
+) -> CleanReport:
+    """
+    清理单个站点的历史记录（可在进程池中执行）。
+
+    压缩时如果站点所有带 local_path 的条目都找不到页面，通常是 --output-dir
+    与爬取时不同或页面目录被移走，此时不做压缩（force=True 时仍然删除）。
+
+    Args:
+        site: 站点域名
+        output_dir: 输出目录
+        days: 删除多少天前首次发现的条目（None 表示不按时间清理）
+        compact: 是否删除页面已不存在的条目
+        dry_run: 只统计不写回
+        backend: 历史存储后端（json 或 sqlite）
+        force: 压缩时跳过上述保护
+
+    Returns:
+        CleanReport: 清理结果
+    """
+    if backend not in HISTORY_BACKENDS:
+        raise ValueError(f"不支持的历史存储后端: {backend}")
+
+    started = time.perf_counter()
+    report = CleanReport(site, backend)
+    expired = _expiry_check(days)
+    page_exists = _PageChecker(site, os.path.join(output_dir, site)) if compact else None
+
+    try:
+        if backend == 'sqlite':
+            _clean_sqlite(report, output_dir, expired, page_exists, dry_run, force)
+        elif os.path.exists(_get_journal_path(site, output_dir)):
+            _clean_loaded(report, output_dir, expired, page_exists, dry_run, force)
+        else:
+            _clean_json_stream(report, output_dir, expired, page_exists, dry_run, force)
+    finally:
+        if page_exists is not None:
+            page_exists.close()
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def summarize_reports(reports: Iterable[CleanReport]) -> dict:
+    """
+    汇总各站点的清理结果。
+
+    Returns:
+        dict: 站点数、条目数、文件大小等合计
+    """
+    totals = {
+        'sites': 0, 'sites_cleaned': 0, 'sites_skipped': 0,
+        'scanned': 0, 'expired': 0, 'missing': 0, 'removed': 0,
+        'bytes_before': 0, 'bytes_after': 0,
+    }
+    for report in reports:
+        totals['sites'] += 1
+        totals['sites_cleaned'] += 1 if report.removed else 0
+        totals['sites_skipped'] += 1 if report.skipped else 0
+        for key in ('scanned', 'expired', 'missing', 'removed', 'bytes_before', 'bytes_after'):
+            totals[key] += getattr(report, key)
+    return totals
+
+
+def _clean_json_stream(
+    report: CleanReport, output_dir: str, expired, page_exists, dry_run: bool, force: bool
+) -> None:
+    """流式读取 crawl_history.json，保留的条目写入临时文件后原子替换"""
+    history_path = _get_history_path(report.site, output_dir)
+    if not os.path.exists(history_path):
+        report.skipped = '无历史记录'
+        return
+    report.bytes_before = report.bytes_after = os.path.getsize(history_path)
+
+    tmp_path = f"{history_path}.tmp"
+    out = None if dry_run else open(tmp_path, 'w', encoding='utf-8')
+    try:
+        with open(history_path, 'r', encoding='utf-8') as src:
+            _write_history(out, src, report, expired, page_exists)
+        if out is not None:
+            out.flush()
+            os.fsync(out.fileno())
+            out.close()
+    except BaseException:
+        if out is not None:
+            out.close()
+            os.remove(tmp_path)
+        raise
+
+    if not _compact_allowed(report, page_exists, force):
+        # 压缩被保护跳过：丢弃本次结果，只按时间清理重新处理
+        if out is not None:
+            os.remove(tmp_path)
+        skipped = report.skipped
+        report.scanned = report.expired = report.missing = 0
+        _clean_json_stream(report, output_dir, expired, None, dry_run, force)
+        report.skipped = skipped
+        return
+
+    if out is None:
+        return
+    if not report.removed:
+        os.remove(tmp_path)
+        return
+    os.replace(tmp_path, history_path)
+    report.bytes_after = os.path.getsize(history_path)
+
+
+def _write_history(out: TextIO | None, src: TextIO, report: CleanReport, expired, page_exists) -> None:
+    """
+    逐条读取并写出保留的条目。
+
+    条目按文件中的原文写出，不重新序列化；缩进与 json.dump(indent=2) 写出的文件相同。
+    """
+    reader = _StreamReader(src)
+    _write(out, '{')
+    first = True
+    for key, value in _iter_fields(reader):
+        _write(out, ('\n' if first else ',\n') + '  ' + json.dumps(key, ensure_ascii=False) + ': ')
+        first = False
+        if not isinstance(value, Iterator):
+            _write(out, reader.raw)
+            continue
+        kept = 0
+        for url, entry in value:
+            if _classify(report, url, entry, expired, page_exists) is not None:
+                continue
+            _write(out, (',\n    ' if kept else '{\n    ') + json.dumps(url, ensure_ascii=False) + ': ')
+            _write(out, reader.raw)
+            kept += 1
+        _write(out, '\n  }' if kept else '{}')
+    _write(out, '}' if first else '\n}')
+
+
+def _clean_loaded(
+    report: CleanReport, output_dir: str, expired, page_exists, dry_run: bool, force: bool
+) -> None:
+    """有未回放的日志时整站载入（回放日志），清理后保存并清空日志"""
+    history_path = _get_history_path(report.site, output_dir)
+    if os.path.exists(history_path):
+        report.bytes_before = report.bytes_after = os.path.getsize(history_path)
+
+    history = load_history(report.site, output_dir)
+    removed = _removed_urls(report, history.urls.items(), expired, page_exists, force)
+    if dry_run or not removed:
+        return
+    for url in removed:
+        del history.urls[url]
+    save_history(history, output_dir)
+    report.bytes_after = os.path.getsize(history_path)
+
+
+def _clean_sqlite(
+    report: CleanReport, output_dir: str, expired, page_exists, dry_run: bool, force: bool
+) -> None:
+    """遍历 SQLite 历史，删除后 VACUUM 回收空间"""
+    db_path = get_db_path(report.site, output_dir)
+    if not os.path.exists(db_path) and not os.path.exists(_get_history_path(report.site, output_dir)):
+        report.skipped = '无历史记录'
+        return
+
+    store: SqliteUrlStore = load_history(report.site, output_dir, 'sqlite').urls
+    try:
+        report.bytes_before = report.bytes_after = os.path.getsize(db_path)
+        removed = _removed_urls(report, store.items(), expired, page_exists, force)
+        if dry_run or not removed:
+            return
+        for url in removed:
+            del store[url]
+        store.commit()
+        store.vacuum()
+    finally:
+        store.close()
+    report.bytes_after = os.path.getsize(db_path)
+
+
+def _removed_urls(report: CleanReport, items, expired, page_exists, force: bool) -> list[str]:
+    """需要删除的 URL（压缩被保护跳过时只含过期条目）"""
+    expired_urls, missing_urls = [], []
+    for url, entry in items:
+        reason = _classify(report, url, entry, expired, page_exists)
+        if reason == 'expired':
+            expired_urls.append(url)
+        elif reason == 'missing':
+            missing_urls.append(url)
+    if not _compact_allowed(report, page_exists, force):
+        report.missing = 0
+        return expired_urls
+    return expired_urls + missing_urls
+
+
+def _classify(report: CleanReport, url: str, entry, expired, page_exists) -> str | None:
+    """统计并返回条目的删除原因（expired / missing），保留时返回 None；过期优先"""
+    report.scanned += 1
+    if expired is not None and expired(entry.get('first_seen') if isinstance(entry, dict) else entry.first_seen):
+        report.expired += 1
+        return 'expired'
+    if page_exists is not None and not page_exists(url, entry):
+        report.missing += 1
+        return 'missing'
+    return None
+
+
+def _compact_allowed(report: CleanReport, page_exists, force: bool) -> bool:
+    """所有页面都找不到时视为目录不对，不压缩（force 时除外）"""
+    if page_exists is None or force or not report.missing or report.missing < page_exists.checked:
+        return True
+    report.skipped = f'{page_exists.checked} 个页面均不存在，未压缩'
+    logger.warning(f"{report.site}: 所有页面均不存在（输出目录是否正确？），跳过压缩")
+    return False
+
+
+def _expiry_check(days: int | None):
+    """
+    返回判断 first_seen 是否过期的函数。
+
+    JSON 中的 first_seen 为秒精度、无时区的 ISO 串，同一格式的字典序即时间顺序，
+    直接与截止时间串比较，无需逐条解析；其他格式解析为 epoch 后比较。
+    """
+    if days is None:
+        return None
+    cutoff = datetime.now() - timedelta(days=days)
+    cutoff_str = cutoff.isoformat(timespec='seconds')
+    cutoff_ts = int(cutoff.timestamp())
+
+    def expired(first_seen) -> bool:
+        if isinstance(first_seen, str) and len(first_seen) == 19 and first_seen[10] == 'T':
+            return first_seen < cutoff_str
+        return _is_before(_encode_timestamp(first_seen), cutoff_ts, cutoff_str)
+
+    return expired
+
+
+class _PageChecker:
+    """判断条目对应的页面是否仍然保存着（文件或归档索引）"""
+
+    def __init__(self, site: str, site_dir: str):
+        self.site = site
+        self.site_dir = site_dir
+        self.checked = 0  # 带 local_path 的条目数
+        self._archive = None
+        if os.path.isdir(os.path.join(site_dir, ARCHIVE_DIR)):
+            self._archive = PageArchive.open_existing(site_dir)
+
+    def __call__(self, url: str, entry) -> bool:
+        local_path = entry.get('local_path')
+        if not local_path:
+            # 未保存页面的条目（如跳过的重复页面）不属于压缩对象
+            return True
+        self.checked += 1
+        if os.path.exists(local_path) or os.path.exists(self._in_site_dir(local_path)):
+            return True
+        return self._archive is not None and (entry.get('duplicate_of') or url) in self._archive
+
+    def _in_site_dir(self, local_path: str) -> str:
+        """local_path 按爬取时的输出目录记录，换算到当前站点目录下"""
+        parts = local_path.replace('\\', '/').split('/')
+        if self.site in parts:
+            parts = parts[parts.index(self.site) + 1:]
+        return os.path.join(self.site_dir, *parts)
+
+    def close(self) -> None:
+        if self._archive is not None:
+            self._archive.close()
+
+
+def _write(out: TextIO | None, text: str) -> None:
+    if out is not None:
+        out.write(text)
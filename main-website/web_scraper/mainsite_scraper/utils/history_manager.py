@@ -6,22 +6,210 @@
 
 import json
 import os
+import sys
+import time
 import logging
 from datetime import datetime, timedelta
+from collections.abc import MutableMapping
 from typing import Optional
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from .history_store import SqliteUrlStore, get_db_path
+
 logger = logging.getLogger(__name__)
 
+# 支持的历史存储后端
+HISTORY_BACKENDS = ('json', 'sqlite')
 
-@dataclass
+# 历史更新日志文件名（追加写入，加载时回放）
+JOURNAL_NAME = 'crawl_history.journal'
+
+# 日志行数低于该值时不触发压缩
+JOURNAL_COMPACT_MIN_LINES = 10000
+
+# 按原样保存（驻留）的字符串字段
+_PLAIN_FIELDS = ('local_path', 'last_modified', 'etag', 'http_last_modified', 'duplicate_of')
+
+# 仅在有值时写入 JSON 的可选字段（保持旧历史文件格式不变）
+_OPTIONAL_FIELDS = ('etag', 'http_last_modified', 'simhash', 'duplicate_of', 'links')
+
+
+@dataclass(slots=True)
 class UrlHistory:
-    """单个 URL 的历史记录"""
-    first_seen: str  # ISO 格式时间戳
-    content_hash: str | None = None  # SHA256 哈希
+    """
+    单个 URL 的历史记录（紧凑内存表示）。
+
+    - first_seen 保存为 epoch 秒（int），无法解析的原始值按字符串保留
+    - content_hash 保存为 32 字节二进制摘要，非 SHA256 十六进制串按原样保留
+    - local_path / last_modified 等字符串驻留（sys.intern），重复值共享同一对象
+    - etag / http_last_modified 为上次响应的校验头，用于条件请求
+    - simhash 保存为 64 位整数（JSON 中为 16 位十六进制串），用于近似重复检测
+    - links 为链接发现站点的页面出链（元组，URL 驻留），页面未变化时据此继续发现更深的页面
+
+    支持按 JSON 字段名读写（entry['content_hash']、entry.get(...)），
+    取值时返回与 crawl_history.json 相同的外部格式。
+    """
+    first_seen: int | str | None = None  # epoch 秒
+    content_hash: bytes | str | None = None  # SHA256 摘要
     local_path: str | None = None  # 本地保存路径
     last_modified: str | None = None  # sitemap lastmod
+    etag: str | None = None  # 响应头 ETag
+    http_last_modified: str | None = None  # 响应头 Last-Modified
+    simhash: int | None = None  # SimHash 指纹
+    duplicate_of: str | None = None  # 近似重复时对应的页面 URL
+    links: tuple[str, ...] | None = None  # 页面出链（仅链接发现站点）
+
+    def __getitem__(self, key: str):
+        if key == 'first_seen':
+            return _decode_timestamp(self.first_seen)
+        if key == 'content_hash':
+            return _decode_hash(self.content_hash)
+        if key == 'simhash':
+            return _decode_simhash(self.simhash)
+        if key == 'links':
+            return list(self.links) if self.links is not None else None
+        if key in _PLAIN_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key == 'first_seen':
+            self.first_seen = _encode_timestamp(value)
+        elif key == 'content_hash':
+            self.content_hash = _encode_hash(value)
+        elif key == 'simhash':
+            self.simhash = _encode_simhash(value)
+        elif key == 'links':
+            self.links = _encode_links(value)
+        elif key in _PLAIN_FIELDS:
+            setattr(self, key, _intern(value))
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in ('first_seen', 'content_hash', 'simhash', 'links') or key in _PLAIN_FIELDS
+
+    def get(self, key: str, default=None):
+        """与 dict.get 相同的语义"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> dict:
+        """转换为 JSON 格式的字典"""
+        data = {
+            'first_seen': _decode_timestamp(self.first_seen),
+            'content_hash': _decode_hash(self.content_hash),
+            'local_path': self.local_path,
+            'last_modified': self.last_modified,
+        }
+        for key in _OPTIONAL_FIELDS:
+            value = self[key]
+            if value is not None:
+                data[key] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'UrlHistory':
+        """从 JSON 格式的字典创建"""
+        return cls(
+            first_seen=_encode_timestamp(data.get('first_seen')),
+            content_hash=_encode_hash(data.get('content_hash')),
+            local_path=_intern(data.get('local_path')),
+            last_modified=_intern(data.get('last_modified')),
+            etag=data.get('etag'),
+            http_last_modified=data.get('http_last_modified'),
+            simhash=_encode_simhash(data.get('simhash')),
+            duplicate_of=data.get('duplicate_of'),
+            links=_encode_links(data.get('links')),
+        )
+
+
+class HistoryJournal:
+    """
+    追加式历史更新日志。
+
+    每条 update_history 变更（以及 cleanup_expired 的删除）追加为一行 JSON，每 flush_every 条或每
+    flush_interval 秒写盘一次（fsync）。进程崩溃后 load_history 会在
+    crawl_history.json 的基础上回放日志，已抓取页面的哈希和 lastmod 不会丢失。
+    """
+
+    def __init__(self, path: str, flush_every: int = 100, flush_interval: float = 30.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.lines = 0  # 已写入日志的行数
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.lines = sum(1 for _ in f)
+
+    def append(self, url: str, entry: UrlHistory) -> None:
+        """追加一条更新，达到条数或时间阈值时写盘"""
+        self._append({'url': url, 'entry': entry.to_dict()})
+
+    def append_delete(self, url: str) -> None:
+        """追加一条删除，达到条数或时间阈值时写盘"""
+        self._append({'url': url, 'deleted': True})
+
+    def _append(self, record: dict) -> None:
+        self._buffer.append(json.dumps(record, ensure_ascii=False))
+        if (len(self._buffer) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """将缓冲区写入日志文件并 fsync"""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(self._buffer) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.lines += len(self._buffer)
+        self._buffer.clear()
+
+    def reset(self) -> None:
+        """历史已完整落盘后清空日志"""
+        self._buffer.clear()
+        self.lines = 0
+        self._last_flush = time.monotonic()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @staticmethod
+    def replay(path: str, urls: MutableMapping) -> int:
+        """
+        将日志回放到 urls 映射中（依次应用更新与删除）。
+
+        崩溃时最后一行可能写了一半，无法解析的行会被跳过。
+
+        Returns:
+            int: 回放的条目数量
+        """
+        if not os.path.exists(path):
+            return 0
+
+        count = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if record.get('deleted'):
+                        urls.pop(record['url'], None)
+                    else:
+                        urls[record['url']] = UrlHistory.from_dict(record['entry'])
+                    count += 1
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"跳过损坏的历史日志行: {path}")
+        return count
 
 
 @dataclass
@@ -30,7 +218,15 @@ class CrawlHistory:
     site: str  # 域名
     first_crawl: str  # 首次爬取时间
     last_crawl: str  # 最后爬取时间
-    urls: dict[str, dict] = field(default_factory=dict)  # URL -> UrlHistory
+    urls: MutableMapping[str, UrlHistory] = field(default_factory=dict)  # URL -> UrlHistory
+    journal: HistoryJournal | None = field(default=None, repr=False, compare=False)  # 增量更新日志
+
+    def __post_init__(self):
+        # 兼容以普通字典构造的条目，统一转换为紧凑表示
+        if isinstance(self.urls, dict):
+            for url, entry in self.urls.items():
+                if isinstance(entry, dict):
+                    self.urls[url] = UrlHistory.from_dict(entry)
 
     def to_dict(self) -> dict:
         """转换为字典"""
@@ -38,7 +234,7 @@ class CrawlHistory:
             'site': self.site,
             'first_crawl': self.first_crawl,
             'last_crawl': self.last_crawl,
-            'urls': self.urls
+            'urls': {url: entry.to_dict() for url, entry in self.urls.items()}
         }
 
     @classmethod
@@ -52,41 +248,57 @@ class CrawlHistory:
         )
 
 
-def load_history(domain: str, output_dir: str) -> CrawlHistory:
+def load_history(
+    domain: str,
+    output_dir: str,
+    backend: str = 'json',
+    checkpoint_items: int = 100,
+    checkpoint_seconds: float = 30.0
+) -> CrawlHistory:
     """
     加载站点的爬取历史记录。
 
+    json 后端会回放上次中断时留下的 crawl_history.journal，并挂载新的
+    日志用于爬取过程中的增量检查点；sqlite 后端按相同阈值提交事务。
+
     Args:
         domain: 站点域名
         output_dir: 输出目录
+        backend: 存储后端（json 或 sqlite）
+        checkpoint_items: 每累计多少条更新写一次检查点
+        checkpoint_seconds: 距上次检查点超过多少秒写一次检查点
 
     Returns:
         CrawlHistory: 爬取历史记录
     """
+    if backend not in HISTORY_BACKENDS:
+        raise ValueError(f"不支持的历史存储后端: {backend}")
+
+    if backend == 'sqlite':
+        return _load_sqlite_history(domain, output_dir, checkpoint_items, checkpoint_seconds)
+
     history_path = _get_history_path(domain, output_dir)
+    journal_path = _get_journal_path(domain, output_dir)
 
     if not os.path.exists(history_path):
-        logger.info(f"创建新的历史记录: {domain}")
-        return CrawlHistory(
-            site=domain,
-            first_crawl=_get_timestamp(),
-            last_crawl=_get_timestamp(),
-            urls={}
-        )
+        history = _new_history(domain)
+        if not os.path.exists(journal_path):
+            logger.info(f"创建新的历史记录: {domain}")
+    else:
+        try:
+            data = _read_json_history(history_path)
+            logger.info(f"加载历史记录: {domain}, {len(data.get('urls', {}))} 个 URL")
+            history = CrawlHistory.from_dict(data)
+        except Exception as e:
+            logger.error(f"加载历史记录失败: {history_path}, 错误: {e}")
+            history = _new_history(domain)
 
-    try:
-        with open(history_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        logger.info(f"加载历史记录: {domain}, {len(data.get('urls', {}))} 个 URL")
-        return CrawlHistory.from_dict(data)
-    except Exception as e:
-        logger.error(f"加载历史记录失败: {history_path}, 错误: {e}")
-        return CrawlHistory(
-            site=domain,
-            first_crawl=_get_timestamp(),
-            last_crawl=_get_timestamp(),
-            urls={}
-        )
+    replayed = HistoryJournal.replay(journal_path, history.urls)
+    if replayed:
+        logger.info(f"回放历史日志: {domain}, {replayed} 条更新")
+
+    history.journal = HistoryJournal(journal_path, checkpoint_items, checkpoint_seconds)
+    return history
 
 
 def save_history(history: CrawlHistory, output_dir: str) -> None:
@@ -105,14 +317,46 @@ def save_history(history: CrawlHistory, output_dir: str) -> None:
     # 更新最后爬取时间
     history.last_crawl = _get_timestamp()
 
+    if isinstance(history.urls, SqliteUrlStore):
+        history.urls.set_meta('site', history.site)
+        history.urls.set_meta('first_crawl', history.first_crawl)
+        history.urls.set_meta('last_crawl', history.last_crawl)
+        history.urls.commit()
+        logger.info(f"保存历史记录: {history.site}, {len(history.urls)} 个 URL")
+        return
+
     try:
-        with open(history_path, 'w', encoding='utf-8') as f:
-            json.dump(history.to_dict(), f, ensure_ascii=False, indent=2)
+        _write_json_atomic(history, history_path)
+        if history.journal is not None:
+            history.journal.reset()
         logger.info(f"保存历史记录: {history.site}, {len(history.urls)} 个 URL")
     except Exception as e:
         logger.error(f"保存历史记录失败: {history_path}, 错误: {e}")
 
 
+def checkpoint_history(history: CrawlHistory) -> None:
+    """
+    立即写入检查点（将缓冲中的更新落盘）。
+
+    json 后端刷新日志，日志过长时压缩为新的 crawl_history.json；
+    sqlite 后端提交当前事务。
+
+    Args:
+        history: 爬取历史记录
+    """
+    if isinstance(history.urls, SqliteUrlStore):
+        history.urls.commit()
+        return
+
+    journal = history.journal
+    if journal is None:
+        return
+
+    journal.flush()
+    if _journal_needs_compaction(history):
+        _compact_journal(history)
+
+
 def is_new_or_updated(
     url: str,
     lastmod: str | None,
@@ -137,12 +381,12 @@ def is_new_or_updated(
     Returns:
         tuple[bool, str]: (是否需要爬取, 原因)
     """
-    if url not in history.urls:
+    url_history = history.urls.get(url)
+    if url_history is None:
         return True, "新页面"
 
-    url_history = history.urls[url]
-    stored_lastmod = url_history.get('last_modified')
-    stored_hash = url_history.get('content_hash')
+    stored_lastmod = url_history.last_modified
+    stored_hash = url_history.content_hash
 
     # 检查 sitemap lastmod
     if lastmod and stored_lastmod:
@@ -151,7 +395,7 @@ def is_new_or_updated(
 
     # 检查内容哈希
     if content_hash and stored_hash:
-        if content_hash != stored_hash:
+        if _encode_hash(content_hash) != stored_hash:
             return True, "内容变化"
 
     return False, "无变化"
@@ -162,7 +406,12 @@ def update_history(
     url: str,
     content_hash: str | None,
     local_path: str | None,
-    lastmod: str | None = None
+    lastmod: str | None = None,
+    etag: str | None = None,
+    http_last_modified: str | None = None,
+    simhash: int | str | None = None,
+    duplicate_of: str | None = None,
+    links: list[str] | None = None
 ) -> None:
     """
     更新 URL 的历史记录。
@@ -173,24 +422,97 @@ def update_history(
         content_hash: 内容哈希
         local_path: 本地保存路径
         lastmod: sitemap lastmod
+        etag: 响应头 ETag
+        http_last_modified: 响应头 Last-Modified
+        simhash: SimHash 指纹
+        duplicate_of: 近似重复时对应的页面 URL（非重复页面为 None）
+        links: 页面出链（None 表示保留原有记录）
     """
-    now = _get_timestamp()
+    now = int(time.time())
 
-    if url in history.urls:
-        # 更新现有记录
-        entry = history.urls[url]
+    entry = history.urls.get(url)
+    if entry is not None:
+        # 更新现有记录（重新赋值以便写回存储后端）
         entry['content_hash'] = content_hash
         entry['local_path'] = local_path
         if lastmod:
             entry['last_modified'] = lastmod
     else:
         # 创建新记录
-        history.urls[url] = {
-            'first_seen': now,
-            'content_hash': content_hash,
-            'local_path': local_path,
-            'last_modified': lastmod
-        }
+        entry = UrlHistory(
+            first_seen=now,
+            content_hash=_encode_hash(content_hash),
+            local_path=_intern(local_path),
+            last_modified=_intern(lastmod)
+        )
+
+    if etag:
+        entry.etag = etag
+    if http_last_modified:
+        entry.http_last_modified = http_last_modified
+    if simhash is not None:
+        entry.simhash = _encode_simhash(simhash)
+    entry.duplicate_of = duplicate_of
+    if links is not None:
+        entry.links = _encode_links(links)
+
+    _store_entry(history, url, entry)
+
+
+def record_not_modified(
+    history: CrawlHistory,
+    url: str,
+    lastmod: str | None = None,
+    etag: str | None = None,
+    http_last_modified: str | None = None
+) -> None:
+    """
+    记录条件请求返回 304 的 URL。
+
+    内容哈希与本地路径保持不变，仅更新 sitemap lastmod 和服务器可能刷新的校验头。
+
+    Args:
+        history: 爬取历史记录
+        url: URL
+        lastmod: sitemap lastmod
+        etag: 304 响应中的 ETag
+        http_last_modified: 304 响应中的 Last-Modified
+    """
+    entry = history.urls.get(url)
+    if entry is None:
+        return
+
+    if lastmod:
+        entry['last_modified'] = lastmod
+    if etag:
+        entry.etag = etag
+    if http_last_modified:
+        entry.http_last_modified = http_last_modified
+
+    _store_entry(history, url, entry)
+
+
+def get_conditional_headers(url: str, history: CrawlHistory) -> dict[str, str]:
+    """
+    生成条件请求头。
+
+    Args:
+        url: URL
+        history: 爬取历史记录
+
+    Returns:
+        dict[str, str]: If-None-Match / If-Modified-Since 请求头（无历史校验头时为空）
+    """
+    entry = history.urls.get(url)
+    if entry is None:
+        return {}
+
+    headers = {}
+    if entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry.http_last_modified:
+        headers['If-Modified-Since'] = entry.http_last_modified
+    return headers
 
 
 def cleanup_expired(history: CrawlHistory, days: int = 90) -> int:
@@ -207,18 +529,28 @@ def cleanup_expired(history: CrawlHistory, days: int = 90) -> int:
     cutoff = datetime.now() - timedelta(days=days)
     cutoff_str = cutoff.isoformat()
 
-    expired_urls = [
-        url for url, entry in history.urls.items()
-        if entry.get('first_seen', '') < cutoff_str
-    ]
+    if isinstance(history.urls, SqliteUrlStore):
+        removed = history.urls.delete_first_seen_before(cutoff_str)
+    else:
+        cutoff_ts = int(cutoff.timestamp())
+        expired_urls = [
+            url for url, entry in history.urls.items()
+            if _is_before(entry.first_seen, cutoff_ts, cutoff_str)
+        ]
 
-    for url in expired_urls:
-        del history.urls[url]
+        # 删除同样记录到增量日志并立即写盘，崩溃后回放不会恢复已清理的条目
+        for url in expired_urls:
+            del history.urls[url]
+            if history.journal is not None:
+                history.journal.append_delete(url)
+        removed = len(expired_urls)
+        if removed:
+            checkpoint_history(history)
 
-    if expired_urls:
-        logger.info(f"清理过期历史记录: {history.site}, {len(expired_urls)} 个条目")
+    if removed:
+        logger.info(f"清理过期历史记录: {history.site}, {removed} 个条目")
 
-    return len(expired_urls)
+    return removed
 
 
 def get_stats(history: CrawlHistory) -> dict:
@@ -236,16 +568,215 @@ def get_stats(history: CrawlHistory) -> dict:
         'first_crawl': history.first_crawl,
         'last_crawl': history.last_crawl,
         'total_urls': len(history.urls),
-        'urls_with_hash': sum(1 for e in history.urls.values() if e.get('content_hash')),
-        'urls_with_local_path': sum(1 for e in history.urls.values() if e.get('local_path')),
+        'urls_with_hash': sum(1 for e in history.urls.values() if e.content_hash),
+        'urls_with_local_path': sum(1 for e in history.urls.values() if e.local_path),
     }
 
 
+def migrate_json_history(domain: str, output_dir: str) -> int:
+    """
+    将站点的 crawl_history.json 一次性迁移到 SQLite 后端。
+
+    原 JSON 文件保持不变，可用于回退。
+
+    Args:
+        domain: 站点域名
+        output_dir: 输出目录
+
+    Returns:
+        int: 迁移的 URL 数量
+    """
+    history_path = _get_history_path(domain, output_dir)
+    data = _read_json_history(history_path)
+    urls = data.get('urls', {})
+
+    store = SqliteUrlStore(get_db_path(domain, output_dir), factory=UrlHistory.from_dict)
+    try:
+        store.set_meta('site', data.get('site') or domain)
+        store.set_meta('first_crawl', data.get('first_crawl') or _get_timestamp())
+        store.set_meta('last_crawl', data.get('last_crawl') or _get_timestamp())
+        store.update_many(urls)
+    finally:
+        store.close()
+
+    logger.info(f"迁移历史记录到 SQLite: {domain}, {len(urls)} 个 URL")
+    return len(urls)
+
+
+def _load_sqlite_history(
+    domain: str,
+    output_dir: str,
+    checkpoint_items: int = 100,
+    checkpoint_seconds: float = 30.0
+) -> CrawlHistory:
+    """加载 SQLite 后端历史记录，首次使用时自动迁移 JSON 历史"""
+    db_path = get_db_path(domain, output_dir)
+
+    if not os.path.exists(db_path) and os.path.exists(_get_history_path(domain, output_dir)):
+        try:
+            migrate_json_history(domain, output_dir)
+        except Exception as e:
+            logger.error(f"迁移历史记录失败: {domain}, 错误: {e}")
+
+    store = SqliteUrlStore(
+        db_path,
+        commit_every=checkpoint_items,
+        factory=UrlHistory.from_dict,
+        commit_interval=checkpoint_seconds
+    )
+    now = _get_timestamp()
+    history = CrawlHistory(
+        site=store.get_meta('site') or domain,
+        first_crawl=store.get_meta('first_crawl') or now,
+        last_crawl=store.get_meta('last_crawl') or now,
+        urls=store
+    )
+    logger.info(f"加载历史记录 (sqlite): {domain}, {len(store)} 个 URL")
+    return history
+
+
+def _store_entry(history: CrawlHistory, url: str, entry: UrlHistory) -> None:
+    """写回条目并记录到增量日志，日志过长时压缩"""
+    history.urls[url] = entry
+
+    journal = history.journal
+    if journal is not None:
+        journal.append(url, entry)
+        if _journal_needs_compaction(history):
+            _compact_journal(history)
+
+
+def _journal_needs_compaction(history: CrawlHistory) -> bool:
+    """日志行数超过历史条目数（且不少于下限）时压缩，摊还后每次更新 O(1)"""
+    return history.journal.lines >= max(JOURNAL_COMPACT_MIN_LINES, len(history.urls))
+
+
+def _compact_journal(history: CrawlHistory) -> None:
+    """将内存中的完整历史写入 crawl_history.json，并清空日志"""
+    journal = history.journal
+    history_path = os.path.join(os.path.dirname(journal.path), 'crawl_history.json')
+    try:
+        _write_json_atomic(history, history_path)
+        journal.reset()
+        logger.info(f"压缩历史日志: {history.site}, {len(history.urls)} 个 URL")
+    except Exception as e:
+        # 压缩失败时保留日志，数据不会丢失
+        journal.flush()
+        logger.error(f"压缩历史日志失败: {history_path}, 错误: {e}")
+
+
+def _write_json_atomic(history: CrawlHistory, history_path: str) -> None:
+    """先写临时文件再原子替换，避免写到一半时崩溃损坏历史文件"""
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    tmp_path = f"{history_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history.to_dict(), f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, history_path)
+
+
+def _read_json_history(history_path: str) -> dict:
+    """读取 JSON 历史文件，URL 条目在解析时即转换为紧凑表示"""
+    with open(history_path, 'r', encoding='utf-8') as f:
+        return json.load(f, object_hook=_decode_entry)
+
+
+def _decode_entry(obj: dict):
+    """json object_hook：识别 URL 条目并转换为 UrlHistory"""
+    if 'first_seen' in obj:
+        return UrlHistory.from_dict(obj)
+    return obj
+
+
+def _encode_timestamp(value: int | str | None) -> int | str | None:
+    """ISO 时间戳 -> epoch 秒；无法解析时保留原值"""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return _intern(value)
+
+
+def _decode_timestamp(value: int | str | None) -> str | None:
+    """epoch 秒 -> ISO 时间戳"""
+    if isinstance(value, int):
+        return datetime.fromtimestamp(value).isoformat()
+    return value
+
+
+def _encode_hash(value: bytes | str | None) -> bytes | str | None:
+    """SHA256 十六进制串 -> 32 字节摘要；其他格式保留原值"""
+    if isinstance(value, str) and len(value) == 64:
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            pass
+    return value or None
+
+
+def _decode_hash(value: bytes | str | None) -> str | None:
+    """32 字节摘要 -> 十六进制串"""
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def _encode_simhash(value: int | str | None) -> int | None:
+    """SimHash 十六进制串转换为整数"""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(value, 16)
+    except ValueError:
+        return None
+
+
+def _decode_simhash(value: int | None) -> str | None:
+    """SimHash 整数转换为 16 位十六进制串"""
+    return None if value is None else f'{value:016x}'
+
+
+def _encode_links(value: list[str] | tuple[str, ...] | None) -> tuple[str, ...] | None:
+    """出链保存为驻留字符串元组（导航等公共链接在各条目间共享）"""
+    if value is None:
+        return None
+    return tuple(sys.intern(url) for url in value)
+
+
+def _intern(value: str | None) -> str | None:
+    """驻留字符串，重复的路径/日期共享同一对象"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _is_before(first_seen: int | str | None, cutoff_ts: int, cutoff_str: str) -> bool:
+    """判断 first_seen 是否早于截止时间（兼容未能解析为 epoch 的旧值）"""
+    if isinstance(first_seen, int):
+        return first_seen < cutoff_ts
+    return (first_seen or '') < cutoff_str
+
+
+def _new_history(domain: str) -> CrawlHistory:
+    """创建空的历史记录"""
+    return CrawlHistory(
+        site=domain,
+        first_crawl=_get_timestamp(),
+        last_crawl=_get_timestamp(),
+        urls={}
+    )
+
+
 def _get_history_path(domain: str, output_dir: str) -> str:
     """获取历史记录文件路径"""
     return os.path.join(output_dir, domain, 'crawl_history.json')
 
 
+def _get_journal_path(domain: str, output_dir: str) -> str:
+    """获取历史日志文件路径"""
+    return os.path.join(output_dir, domain, JOURNAL_NAME)
+
+
 def _get_timestamp() -> str:
     """获取当前时间戳（ISO 格式）"""
     return datetime.now().isoformat()
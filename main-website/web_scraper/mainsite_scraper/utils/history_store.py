@@ -0,0 +1,188 @@
+"""
+历史记录存储后端 - 基于 SQLite（WAL 模式）的 URL 历史存储
+
+与 JSON 单文件不同，SQLite 后端支持：
+- 按 URL 点查（无需启动时加载全部历史）
+- 爬取过程中增量写入（upsert）
+- 按 first_seen 快速清理过期条目
+
+作者：伍志勇
+"""
+
+import json
+import os
+import sqlite3
+import time
+import logging
+from collections.abc import Callable, ItemsView, Iterator, MutableMapping, ValuesView
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# 历史数据库文件名（与 crawl_history.json 位于同一站点目录）
+HISTORY_DB_NAME = 'crawl_history.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    first_seen TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_urls_first_seen ON urls (first_seen);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class _StoreItemsView(ItemsView):
+    """单次查询遍历全部条目，避免逐条点查"""
+
+    def __iter__(self):
+        yield from self._mapping._iter_rows()
+
+
+class _StoreValuesView(ValuesView):
+    """单次查询遍历全部值"""
+
+    def __iter__(self):
+        for _, entry in self._mapping._iter_rows():
+            yield entry
+
+
+class SqliteUrlStore(MutableMapping):
+    """
+    基于 SQLite 的 URL -> 历史条目映射。
+
+    行为与 CrawlHistory.urls 字典保持一致，可直接替换：
+    读取为点查，写入为 upsert，每 commit_every 次写入或距上次提交超过
+    commit_interval 秒时提交一次事务（即增量检查点）。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        commit_every: int = 500,
+        factory: Callable[[dict], Any] | None = None,
+        commit_interval: float = 30.0
+    ):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self._factory = factory
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def __getitem__(self, url: str) -> Any:
+        row = self._conn.execute(
+            'SELECT data FROM urls WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(url)
+        return self._decode(row[0])
+
+    def __setitem__(self, url: str, entry: Any) -> None:
+        data = entry.to_dict() if hasattr(entry, 'to_dict') else dict(entry)
+        self._conn.execute(
+            'INSERT INTO urls (url, first_seen, data) VALUES (?, ?, ?) '
+            'ON CONFLICT(url) DO UPDATE SET first_seen = excluded.first_seen, data = excluded.data',
+            (url, data.get('first_seen'), json.dumps(data, ensure_ascii=False))
+        )
+        self._mark_dirty()
+
+    def __delitem__(self, url: str) -> None:
+        cursor = self._conn.execute('DELETE FROM urls WHERE url = ?', (url,))
+        if cursor.rowcount == 0:
+            raise KeyError(url)
+        self._mark_dirty()
+
+    def __contains__(self, url: object) -> bool:
+        return self._conn.execute(
+            'SELECT 1 FROM urls WHERE url = ?', (url,)
+        ).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (url,) in self._conn.execute('SELECT url FROM urls'):
+            yield url
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+
+    def items(self) -> ItemsView:
+        return _StoreItemsView(self)
+
+    def values(self) -> ValuesView:
+        return _StoreValuesView(self)
+
+    def update_many(self, entries: dict[str, Any]) -> None:
+        """批量写入条目（单个事务）"""
+        for url, entry in entries.items():
+            self[url] = entry
+        self.commit()
+
+    def delete_first_seen_before(self, cutoff: str) -> int:
+        """删除 first_seen 早于 cutoff 的条目，返回删除数量"""
+        cursor = self._conn.execute(
+            'DELETE FROM urls WHERE first_seen IS NULL OR first_seen < ?', (cutoff,)
+        )
+        self.commit()
+        return cursor.rowcount
+
+    def vacuum(self) -> None:
+        """提交后重建数据库文件，回收删除条目占用的空间"""
+        self.commit()
+        self._conn.execute('VACUUM')
+
+    def get_meta(self, key: str, default: str | None = None) -> str | None:
+        """读取元数据"""
+        row = self._conn.execute(
+            'SELECT value FROM meta WHERE key = ?', (key,)
+        ).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str) -> None:
+        """写入元数据"""
+        self._conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, value)
+        )
+        self._mark_dirty()
+
+    def commit(self) -> None:
+        """提交未完成的写入"""
+        self._conn.commit()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """提交并关闭连接"""
+        self.commit()
+        self._conn.close()
+
+    def _iter_rows(self) -> Iterator[tuple[str, Any]]:
+        for url, data in self._conn.execute('SELECT url, data FROM urls'):
+            yield url, self._decode(data)
+
+    def _decode(self, data: str) -> Any:
+        entry = json.loads(data)
+        return self._factory(entry) if self._factory else entry
+
+    def _mark_dirty(self) -> None:
+        self._pending += 1
+        if (self._pending >= self.commit_every
+                or time.monotonic() - self._last_commit >= self.commit_interval):
+            self.commit()
+
+
+def get_db_path(domain: str, output_dir: str) -> str:
+    """获取历史数据库文件路径"""
+    return os.path.join(output_dir, domain, HISTORY_DB_NAME)
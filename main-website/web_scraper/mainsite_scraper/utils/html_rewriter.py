@@ -0,0 +1,352 @@
+"""
+HTML 链接重写模块 - 单次扫描完成链接解析与内容规范化
+
+一次扫描同时得到：
+- 文档片段与链接槽位（href/src/action/srcset/poster/data-src，以及值为 URL 的 content），
+  render() 时按需替换为绝对 URL 或本地路径，无需再次扫描
+- 规范化文本（去除注释、script/style/noscript，压缩空白），用于内容哈希
+
+扫描只在注释、script/style/noscript/textarea/title 元素和起始标签处停下，链接属性只在起始标签内解析，
+其余内容（包括看起来像属性的正文文本）按切片整体处理。
+
+作者：伍志勇
+"""
+
+import re
+import urllib.parse
+import logging
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# 作为链接解析的属性
+LINK_ATTRIBUTES = ('href', 'src', 'action', 'poster', 'srcset', 'data-src', 'content')
+
+# 不做解析的链接前缀
+_SKIP_PREFIXES = ('#', 'javascript:', 'mailto:', 'tel:', 'data:')
+
+# 起始标签（属性值中的 > 不结束标签）
+_START_TAG_PATTERN = r'<[a-zA-Z](?:"[^"]*"|\'[^\']*\'|[^\'">])*>'
+
+# 扫描：注释 | script/style/noscript 整个元素 | textarea/title 整个元素（内容为纯文本）| 起始标签
+_SCAN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|(?P<open><(?P<tag>script|style|noscript)\b[^>]*>)(?P<body>.*?)</(?P=tag)\s*>'
+    r'|(?P<rcdata><(?P<rtag>textarea|title)\b(?:"[^"]*"|\'[^\']*\'|[^\'">])*>).*?</(?P=rtag)\s*>'
+    r'|(?P<start>' + _START_TAG_PATTERN + r')',
+    re.DOTALL | re.IGNORECASE
+)
+
+# 起始标签中的链接属性（属性名前必须是空白或引号，避免匹配 data-href 之类的属性）
+_ATTR_RE = re.compile(
+    r'(?<=[\s"\'])(?P<attr>' + '|'.join(re.escape(a) for a in LINK_ATTRIBUTES) + r')'
+    r'\s*=\s*(?P<value>"[^"]*"|\'[^\']*\'|[^\s"\'<>]+)',
+    re.IGNORECASE
+)
+
+# noscript 内容中的起始标签
+_START_TAG_RE = re.compile(_START_TAG_PATTERN)
+
+
+class _UrlResolver:
+    """相对链接解析：常见形式走快速路径，其余调用 urljoin 并缓存"""
+
+    def __init__(self, base_url: str):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.base_url = base_url
+        self.scheme = parsed.scheme
+        self.origin = f'{parsed.scheme}://{parsed.netloc}'
+        self.directory = self.origin + parsed.path[:parsed.path.rfind('/') + 1] if parsed.path else self.origin + '/'
+        self._cache: dict[str, str] = {}
+
+    def __call__(self, url: str) -> str:
+        if url.startswith(('http://', 'https://')):
+            return url
+        if url.startswith('//'):
+            return f'{self.scheme}:{url}'
+        if '/.' not in url and not url.startswith(('.', '?', '#')):
+            if url.startswith('/'):
+                return self.origin + url
+            if ':' not in url.partition('/')[0]:
+                # 普通相对路径（不含 ./ ../ 与协议）
+                return self.directory + url
+
+        resolved = self._cache.get(url)
+        if resolved is None:
+            resolved = urllib.parse.urljoin(self.base_url, url)
+            self._cache[url] = resolved
+        return resolved
+
+
+class Link:
+    """文档中的一个链接槽位"""
+
+    __slots__ = ('attr', 'url', 'quote')
+
+    def __init__(self, attr: str, url: str, quote: str):
+        self.attr = attr
+        self.url = url  # 绝对 URL
+        self.quote = quote  # 属性值的引号字符
+
+    def __repr__(self) -> str:
+        return f'Link({self.attr!r}, {self.url!r})'
+
+
+class HtmlDocument:
+    """
+    分词后的 HTML 文档。
+
+    Attributes:
+        parts: 文档片段（字符串或 Link）
+        links: 文档中的全部链接
+        text: 规范化文本（用于内容哈希）
+    """
+
+    __slots__ = ('parts', 'links', 'text')
+
+    def __init__(self, parts: list, links: list[Link], text: str):
+        self.parts = parts
+        self.links = links
+        self.text = text
+
+    def render(self, resolve: Callable[[Link], str | None] | None = None) -> str:
+        """
+        输出重写后的 HTML。
+
+        Args:
+            resolve: 返回链接的替换值（如本地相对路径），返回 None 时使用绝对 URL
+
+        Returns:
+            str: 重写后的 HTML
+        """
+        out = []
+        for part in self.parts:
+            if part.__class__ is str:
+                out.append(part)
+                continue
+            value = (resolve(part) if resolve else None) or part.url
+            out.append(value.replace(part.quote, '%22' if part.quote == '"' else '%27'))
+        return ''.join(out)
+
+
+def parse_html(html: str, base_url: str) -> HtmlDocument:
+    """
+    单次扫描 HTML：拆分链接槽位并生成规范化文本。
+
+    Args:
+        html: HTML 内容
+        base_url: 页面 URL（用于解析相对链接）
+
+    Returns:
+        HtmlDocument: 分词后的文档
+    """
+    parts: list = []
+    links: list[Link] = []
+    kept: list[str] = []  # 计入规范化文本的原始片段
+    resolve = _UrlResolver(base_url)
+    pos = 0
+    text_pos = 0
+
+    for match in _SCAN_RE.finditer(html):
+        tag = match.group('start')
+        if tag is not None:
+            # 没有链接属性的标签留在字面片段中
+            if _ATTR_RE.search(tag):
+                parts.append(html[pos:match.start()])
+                _split_attrs(tag, resolve, parts, links)
+                pos = match.end()
+            continue
+
+        rcdata = match.group('rcdata')
+        if rcdata is not None:
+            # textarea/title：只解析起始标签，内容为纯文本（计入规范化文本）
+            if _ATTR_RE.search(rcdata):
+                parts.append(html[pos:match.start()])
+                _split_attrs(rcdata, resolve, parts, links)
+                parts.append(html[match.end('rcdata'):match.end()])
+                pos = match.end()
+            continue
+
+        # 注释与 script/style/noscript：整体保留在文档中，不计入规范化文本
+        start, end = match.span()
+        kept.append(html[text_pos:start])
+        text_pos = end
+
+        opening = match.group('open')
+        if opening is None:
+            continue
+
+        parts.append(html[pos:start])
+        if match.group('tag').lower() == 'noscript':
+            # noscript 内容是 HTML，其中起始标签的链接同样需要解析
+            _split_tags(match.group(0), resolve, parts, links)
+        else:
+            # script/style 内容为原始文本，只解析起始标签（如 script src）
+            _split_attrs(opening, resolve, parts, links)
+            parts.append(html[match.end('open'):end])
+        pos = end
+
+    parts.append(html[pos:])
+    kept.append(html[text_pos:])
+
+    return HtmlDocument(parts, links, _normalize_text(''.join(kept)))
+
+
+def rewrite_html(
+    html: str,
+    base_url: str,
+    resolve: Callable[[Link], str | None] | None = None
+) -> tuple[str, str]:
+    """
+    重写 HTML 链接并返回规范化文本。
+
+    Args:
+        html: HTML 内容
+        base_url: 页面 URL
+        resolve: 链接替换函数（见 HtmlDocument.render）
+
+    Returns:
+        tuple[str, str]: (重写后的 HTML, 规范化文本)
+    """
+    document = parse_html(html, base_url)
+    return document.render(resolve), document.text
+
+
+def normalize_html(html: str) -> str:
+    """
+    规范化 HTML（不解析链接）。
+
+    - 移除注释、<script>、<style>、<noscript> 内容
+    - 压缩空白字符，忽略紧邻标签的空白
+
+    Args:
+        html: 原始 HTML
+
+    Returns:
+        str: 规范化后的文本
+    """
+    kept: list[str] = []
+    text_pos = 0
+
+    for match in _SCAN_RE.finditer(html):
+        if match.group('open') is not None or match.group(0).startswith('<!--'):
+            kept.append(html[text_pos:match.start()])
+            text_pos = match.end()
+
+    kept.append(html[text_pos:])
+    return _normalize_text(''.join(kept))
+
+
+def _normalize_text(text: str) -> str:
+    """压缩空白为单个空格，并去除紧邻标签的空白"""
+    return ' '.join(text.split()).replace('> ', '>').replace(' <', '<')
+
+
+def _split_tags(fragment: str, resolve: _UrlResolver, parts: list, links: list[Link]) -> None:
+    """把 HTML 片段（noscript 元素）中各起始标签的链接属性拆成链接槽位"""
+    pos = 0
+    for match in _START_TAG_RE.finditer(fragment):
+        if _ATTR_RE.search(match.group()):
+            parts.append(fragment[pos:match.start()])
+            _split_attrs(match.group(), resolve, parts, links)
+            pos = match.end()
+    parts.append(fragment[pos:])
+
+
+def _split_attrs(fragment: str, resolve: _UrlResolver, parts: list, links: list[Link]) -> None:
+    """把起始标签拆成字面片段与链接槽位"""
+    pos = 0
+    for match in _ATTR_RE.finditer(fragment):
+        _add_link(fragment, match, match.group('attr').lower(), pos, resolve, parts, links)
+        pos = match.end('value')
+    parts.append(fragment[pos:])
+
+
+def _add_link(
+    source: str,
+    match: re.Match,
+    attr: str,
+    pos: int,
+    resolve: _UrlResolver,
+    parts: list,
+    links: list[Link]
+) -> None:
+    """把 source[pos:属性值结束] 追加到 parts，属性值中的 URL 替换为链接槽位"""
+    raw = match.group('value')
+    quote = raw[0]
+    if quote in '"\'' and attr != 'srcset' and attr != 'content':
+        # 常见情况：带引号的单个 URL
+        url = raw[1:-1].strip()
+        if not url or url.startswith(_SKIP_PREFIXES):
+            parts.append(source[pos:match.end('value')])
+            return
+        value_start = match.start('value') + 1
+        offset = value_start + raw.find(url, 1) - 1
+        parts.append(source[pos:offset])
+        link = Link(attr, resolve(url), quote)
+        parts.append(link)
+        links.append(link)
+        parts.append(source[offset + len(url):match.end('value')])
+        return
+
+    value_start = match.start('value')
+    quote = raw[0] if raw[0] in '"\'' else ''
+    value = raw[1:-1] if quote else raw
+    if quote:
+        value_start += 1
+
+    if attr == 'srcset':
+        candidates = _split_srcset(value)
+    elif attr == 'content':
+        # content 只有看起来是 URL 时才解析（如 og:image）
+        candidates = [(0, len(value))] if value.startswith(('http://', 'https://', '/')) else []
+    else:
+        candidates = [(0, len(value))]
+
+    cursor = pos
+    for url_start, url_end in candidates:
+        url = value[url_start:url_end].strip()
+        if not url or url.startswith(_SKIP_PREFIXES):
+            continue
+
+        offset = value_start + url_start
+        parts.append(source[cursor:offset] if quote else source[cursor:offset] + '"')
+        link = Link(attr, resolve(url), quote or '"')
+        parts.append(link)
+        links.append(link)
+        cursor = offset + (url_end - url_start)
+        if not quote:
+            parts.append('"')
+
+    parts.append(source[cursor:match.end('value')])
+
+
+def _split_srcset(value: str) -> list[tuple[int, int]]:
+    """
+    返回 srcset 中每个候选 URL 的 (起始, 结束) 位置。
+
+    按 HTML 规范：URL 为连续的非空白字符（末尾逗号表示候选项结束），
+    之后到下一个逗号为描述符（1x、480w），URL 中间的逗号不拆分。
+    """
+    spans = []
+    i, n = 0, len(value)
+    while i < n:
+        while i < n and (value[i].isspace() or value[i] == ','):
+            i += 1
+        if i >= n:
+            break
+
+        j = i
+        while j < n and not value[j].isspace():
+            j += 1
+        end = j
+        while end > i and value[end - 1] == ',':
+            end -= 1
+        spans.append((i, end))
+
+        if end == j:
+            # 跳过描述符
+            comma = value.find(',', j)
+            j = n if comma == -1 else comma + 1
+        i = j
+    return spans
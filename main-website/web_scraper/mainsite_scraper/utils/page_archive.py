@@ -0,0 +1,463 @@
+"""
+页面归档模块 - 把页面追加写入滚动的压缩分段文件，并以 SQLite 偏移索引按 URL 随机读取
+
+逐页保存 .html 文件会在大站点上产生数百万个小文件（inode、rsync、备份都很慢）。
+归档模式下每个页面编码为一条独立压缩的记录，追加到站点目录下 _archive/ 中的分段文件：
+
+- warc：WARC/1.1 response 记录，每条记录一个 gzip 成员（标准 .warc.gz，可用 warcio 等工具读取）
+- zstd：每条记录一个 zstd 帧，内容为一行 JSON 元数据 + 页面正文（需要安装 zstandard）
+
+分段文件达到大小上限后切换到下一个；每次运行从新的分段开始，已有分段只读。
+索引记录每个 URL 最新一条记录所在的分段、偏移与长度，读取时只解压这一条记录。
+记录中的页面正文与目录模式保存的文件相同（链接已重写），
+原有目录结构可随时从归档导出（见 scripts/export_archive.py）。
+
+作者：伍志勇
+"""
+
+import base64
+import gzip
+import hashlib
+import http
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterator
+
+from .visited_urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# 归档格式
+ARCHIVE_FORMATS = ('warc', 'zstd')
+
+# 归档目录（位于站点输出目录下）及索引文件名
+ARCHIVE_DIR = '_archive'
+ARCHIVE_INDEX_NAME = 'index.sqlite3'
+
+# 各格式分段文件扩展名
+SEGMENT_EXTENSIONS = {'warc': '.warc.gz', 'zstd': '.zst'}
+
+# 分段文件名：pages-00001.warc.gz
+_SEGMENT_RE = re.compile(r'^pages-(\d{5,})(\.warc\.gz|\.zst)$')
+
+# 重写后的正文与原始响应不同，这些响应头不再写入记录
+_DROPPED_HEADERS = frozenset({'content-length', 'content-encoding', 'transfer-encoding', 'content-type'})
+
+
+@dataclass
+class ArchivedPage:
+    """从归档中读出的页面"""
+    url: str
+    fetched: str  # UTC ISO 8601 时间
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    content_hash: str | None = None
+    simhash: str | None = None
+    local_path: str | None = None  # 导出时相对站点目录的路径
+    extra: dict = field(default_factory=dict)
+
+
+def encode_record(
+    archive_format: str,
+    url: str,
+    body: bytes,
+    status: int = 200,
+    headers: dict[str, str] | None = None,
+    content_hash: str | None = None,
+    simhash: str | None = None,
+    local_path: str | None = None,
+    fetched: str | None = None,
+    zstd_level: int = 3
+) -> bytes:
+    """
+    把页面编码为一条独立压缩的记录（纯函数，可在页面处理进程池中执行）。
+
+    Args:
+        archive_format: warc 或 zstd
+        url: 页面 URL
+        body: 保存的页面正文（UTF-8 HTML）
+        status: HTTP 状态码
+        headers: 原始响应头
+        content_hash: 规范化文本的内容哈希
+        simhash: SimHash 指纹（十六进制）
+        local_path: 导出时相对站点目录的路径
+        fetched: 抓取时间（UTC ISO 8601，默认当前时间）
+        zstd_level: zstd 压缩级别
+
+    Returns:
+        bytes: 压缩后的记录，可直接追加到分段文件
+    """
+    fetched = fetched or utc_now()
+    if archive_format == 'warc':
+        fields = [
+            ('WARC-Type', 'response'),
+            ('WARC-Record-ID', f'<urn:uuid:{uuid.uuid4()}>'),
+            ('WARC-Date', fetched),
+            ('WARC-Target-URI', url),
+            ('WARC-Payload-Digest', 'sha256:' + base64.b32encode(hashlib.sha256(body).digest()).decode('ascii')),
+            ('Content-Type', 'application/http; msgtype=response'),
+        ]
+        for name, value in (
+            ('X-Crawler-Content-Hash', content_hash),
+            ('X-Crawler-Simhash', simhash),
+            ('X-Crawler-Local-Path', local_path),
+        ):
+            if value:
+                fields.append((name, value))
+        return gzip.compress(_warc_record(fields, _http_block(status, headers or {}, body)), compresslevel=6)
+
+    if archive_format == 'zstd':
+        meta = {
+            'url': url,
+            'fetched': fetched,
+            'status': status,
+            'headers': headers or {},
+            'content_hash': content_hash,
+            'simhash': simhash,
+            'local_path': local_path,
+        }
+        payload = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n' + body
+        return _zstd().ZstdCompressor(level=zstd_level).compress(payload)
+
+    raise ValueError(f"不支持的归档格式: {archive_format}，可选: {', '.join(ARCHIVE_FORMATS)}")
+
+
+def decode_record(archive_format: str, data: bytes) -> ArchivedPage:
+    """
+    解码一条压缩记录。
+
+    Args:
+        archive_format: warc 或 zstd
+        data: encode_record 的输出（或分段文件中按索引读出的字节）
+
+    Returns:
+        ArchivedPage: 页面
+    """
+    if archive_format == 'warc':
+        record = gzip.decompress(data)
+        head, _, rest = record.partition(b'\r\n\r\n')
+        fields = _parse_fields(head.split(b'\r\n')[1:])
+        block = rest[:int(fields.get('content-length', len(rest)))]
+        http_head, _, body = block.partition(b'\r\n\r\n')
+        status_line, *header_lines = http_head.split(b'\r\n')
+        return ArchivedPage(
+            url=fields.get('warc-target-uri', ''),
+            fetched=fields.get('warc-date', ''),
+            status=int(status_line.split()[1]),
+            headers=_parse_fields(header_lines, lower=False),
+            body=body,
+            content_hash=fields.get('x-crawler-content-hash'),
+            simhash=fields.get('x-crawler-simhash'),
+            local_path=fields.get('x-crawler-local-path'),
+        )
+
+    if archive_format == 'zstd':
+        payload = _zstd().ZstdDecompressor().decompress(data)
+        head, _, body = payload.partition(b'\n')
+        meta = json.loads(head)
+        return ArchivedPage(
+            url=meta.pop('url'),
+            fetched=meta.pop('fetched'),
+            status=meta.pop('status', 200),
+            headers=meta.pop('headers', {}),
+            body=body,
+            content_hash=meta.pop('content_hash', None),
+            simhash=meta.pop('simhash', None),
+            local_path=meta.pop('local_path', None),
+            extra=meta,
+        )
+
+    raise ValueError(f"不支持的归档格式: {archive_format}，可选: {', '.join(ARCHIVE_FORMATS)}")
+
+
+def check_format(archive_format: str) -> None:
+    """检查归档格式可用（zstd 需要 zstandard 包），不可用时抛出 ValueError"""
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"不支持的归档格式: {archive_format}，可选: {', '.join(ARCHIVE_FORMATS)}")
+    if archive_format == 'zstd':
+        _zstd()
+
+
+def utc_now() -> str:
+    """当前 UTC 时间（WARC-Date 格式）"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class PageArchive:
+    """
+    站点页面归档：滚动分段文件 + URL 偏移索引。
+
+    写入只追加到本次运行新建的分段；同一 URL 再次写入时索引指向最新记录，
+    旧记录留在原分段中（不再被索引引用）。
+    """
+
+    def __init__(
+        self,
+        site_dir: str,
+        archive_format: str = 'warc',
+        segment_bytes: int = 1024 * 1024 * 1024,
+        commit_every: int = 100
+    ):
+        """
+        Args:
+            site_dir: 站点输出目录（<output>/<domain>）
+            archive_format: warc 或 zstd（打开已有归档时以索引中记录的格式为准）
+            segment_bytes: 单个分段文件大小上限
+            commit_every: 每写入多少条记录刷新分段并提交索引
+        """
+        check_format(archive_format)
+        self.site_dir = site_dir
+        self.archive_dir = os.path.join(site_dir, ARCHIVE_DIR)
+        self.archive_format = archive_format
+        self.segment_bytes = segment_bytes
+        self.commit_every = commit_every
+
+        self.records_written = 0
+        self.bytes_written = 0
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.archive_dir, ARCHIVE_INDEX_NAME))
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' key TEXT PRIMARY KEY, url TEXT NOT NULL, segment INTEGER NOT NULL,'
+            ' offset INTEGER NOT NULL, length INTEGER NOT NULL, fetched TEXT,'
+            ' content_hash TEXT, local_path TEXT'
+            ') WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID')
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'format'").fetchone()
+        if row is None:
+            self._conn.execute("INSERT INTO meta (name, value) VALUES ('format', ?)", (archive_format,))
+            self._conn.commit()
+        elif row[0] != archive_format:
+            raise ValueError(f"归档 {self.archive_dir} 的格式为 {row[0]}，与设置的 {archive_format} 不同")
+
+        self._segment = None
+        self._segment_number = self._last_segment_number()
+        self._segment_size = 0
+        self._pending = 0
+
+    @classmethod
+    def open_existing(cls, site_dir: str) -> 'PageArchive':
+        """以索引中记录的格式打开已有归档（导出、读取用）"""
+        index_path = os.path.join(site_dir, ARCHIVE_DIR, ARCHIVE_INDEX_NAME)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"归档索引不存在: {index_path}")
+        conn = sqlite3.connect(index_path)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'format'").fetchone()
+        finally:
+            conn.close()
+        return cls(site_dir, row[0] if row else 'warc')
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def __contains__(self, url: str) -> bool:
+        return self._conn.execute(
+            'SELECT 1 FROM pages WHERE key = ?', (canonicalize_url(url),)
+        ).fetchone() is not None
+
+    def append(
+        self,
+        url: str,
+        record: bytes,
+        fetched: str | None = None,
+        content_hash: str | None = None,
+        local_path: str | None = None
+    ) -> None:
+        """
+        追加一条 encode_record 生成的记录并更新索引。
+
+        Args:
+            url: 页面 URL
+            record: 压缩后的记录
+            fetched: 抓取时间
+            content_hash: 内容哈希
+            local_path: 导出时相对站点目录的路径
+        """
+        if self._segment is None or (self._segment_size and self._segment_size + len(record) > self.segment_bytes):
+            self._roll()
+
+        offset = self._segment_size
+        self._segment.write(record)
+        self._segment_size += len(record)
+        self.records_written += 1
+        self.bytes_written += len(record)
+
+        self._conn.execute(
+            'INSERT OR REPLACE INTO pages (key, url, segment, offset, length, fetched, content_hash, local_path)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (canonicalize_url(url), url, self._segment_number, offset, len(record), fetched, content_hash, local_path)
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def read(self, url: str) -> ArchivedPage | None:
+        """按 URL 读取最新一条记录，不存在时返回 None"""
+        row = self._conn.execute(
+            'SELECT segment, offset, length FROM pages WHERE key = ?', (canonicalize_url(url),)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._read_at(*row)
+
+    def iter_pages(self) -> Iterator[ArchivedPage]:
+        """按分段顺序读取索引中的全部页面（每个 URL 的最新记录）"""
+        rows = self._conn.execute('SELECT segment, offset, length FROM pages ORDER BY segment, offset').fetchall()
+        current, f = None, None
+        try:
+            for segment, offset, length in rows:
+                if segment != current:
+                    if f is not None:
+                        f.close()
+                    current, f = segment, open(self._segment_path(segment), 'rb')
+                f.seek(offset)
+                yield decode_record(self.archive_format, f.read(length))
+        finally:
+            if f is not None:
+                f.close()
+
+    def export(self, dest_dir: str | None = None) -> int:
+        """
+        导出为目录模式的文件结构（页面写到记录中的 local_path）。
+
+        Args:
+            dest_dir: 导出目录（默认为站点目录本身；其他目录时一并复制资源目录）
+
+        Returns:
+            int: 导出的页面数
+        """
+        dest_dir = dest_dir or self.site_dir
+        self.flush()
+        count = 0
+        for page in self.iter_pages():
+            if not page.local_path:
+                continue
+            path = os.path.join(dest_dir, *page.local_path.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(page.body)
+            count += 1
+
+        assets_dir = os.path.join(self.site_dir, '_assets')
+        if os.path.abspath(dest_dir) != os.path.abspath(self.site_dir) and os.path.isdir(assets_dir):
+            shutil.copytree(assets_dir, os.path.join(dest_dir, '_assets'), dirs_exist_ok=True)
+        return count
+
+    def flush(self) -> None:
+        """刷新分段文件后提交索引（索引只引用已落盘的记录）"""
+        if self._segment is not None:
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        """关闭分段文件与索引"""
+        if self._conn is None:
+            return
+        self.flush()
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        self._conn.close()
+        self._conn = None
+
+    def _roll(self) -> None:
+        """切换到下一个分段文件"""
+        if self._segment is not None:
+            self.flush()
+            self._segment.close()
+        self._segment_number += 1
+        path = self._segment_path(self._segment_number)
+        self._segment = open(path, 'xb')
+        self._segment_size = 0
+        if self.archive_format == 'warc':
+            info = gzip.compress(_warcinfo_record(os.path.basename(path)))
+            self._segment.write(info)
+            self._segment_size = len(info)
+        logger.info(f"新建归档分段: {path}")
+
+    def _read_at(self, segment: int, offset: int, length: int) -> ArchivedPage:
+        if segment == self._segment_number and self._segment is not None:
+            self._segment.flush()
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            return decode_record(self.archive_format, f.read(length))
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.archive_dir, f'pages-{number:05d}{SEGMENT_EXTENSIONS[self.archive_format]}')
+
+    def _last_segment_number(self) -> int:
+        """已有分段的最大编号（新分段从下一个编号开始）"""
+        numbers = [int(m.group(1)) for m in map(_SEGMENT_RE.match, os.listdir(self.archive_dir)) if m]
+        return max(numbers, default=0)
+
+
+def _zstd():
+    """延迟导入 zstandard（只有 zstd 格式需要）"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd 归档格式需要安装 zstandard: pip install zstandard") from None
+    return zstandard
+
+
+def _warc_record(fields: list[tuple[str, str]], block: bytes) -> bytes:
+    """WARC/1.1 记录：头部字段 + 内容块 + 两个 CRLF"""
+    lines = ['WARC/1.1'] + [f'{name}: {_header_value(value)}' for name, value in fields]
+    lines.append(f'Content-Length: {len(block)}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + block + b'\r\n\r\n'
+
+
+def _warcinfo_record(filename: str) -> bytes:
+    """分段开头的 warcinfo 记录"""
+    block = b'software: mainsite_scraper\r\nformat: WARC File Format 1.1\r\n'
+    return _warc_record([
+        ('WARC-Type', 'warcinfo'),
+        ('WARC-Record-ID', f'<urn:uuid:{uuid.uuid4()}>'),
+        ('WARC-Date', utc_now()),
+        ('WARC-Filename', filename),
+        ('Content-Type', 'application/warc-fields'),
+    ], block)
+
+
+def _http_block(status: int, headers: dict[str, str], body: bytes) -> bytes:
+    """HTTP 响应内容块：状态行 + 响应头（正文已重写为 UTF-8）+ 正文"""
+    try:
+        reason = http.HTTPStatus(status).phrase
+    except ValueError:
+        reason = ''
+    lines = [f'HTTP/1.1 {status} {reason}'.rstrip()]
+    lines += [
+        f'{name}: {_header_value(value)}' for name, value in headers.items()
+        if name.lower() not in _DROPPED_HEADERS
+    ]
+    lines.append('Content-Type: text/html; charset=utf-8')
+    lines.append(f'Content-Length: {len(body)}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + body
+
+
+def _header_value(value) -> str:
+    """头部值不能包含换行"""
+    return ' '.join(str(value).splitlines())
+
+
+def _parse_fields(lines: list[bytes], lower: bool = True) -> dict[str, str]:
+    fields = {}
+    for line in lines:
+        name, sep, value = line.decode('utf-8', errors='replace').partition(':')
+        if sep:
+            fields[name.strip().lower() if lower else name.strip()] = value.strip()
+    return fields
@@ -0,0 +1,122 @@
+"""
+页面处理模块 - Pipeline 中的 CPU 密集步骤
+
+HTML 扫描与文本规范化、内容哈希、SimHash 指纹、链接重写与 UTF-8 编码集中在本模块的
+顶层函数中：既可在 reactor 线程内直接调用，也可提交到进程池（参数与结果均可 pickle），
+避免大页面阻塞网络 I/O。
+
+作者：伍志勇
+"""
+
+from .content_hash import compute_normalized_hash
+from .html_rewriter import HtmlDocument, parse_html
+from .simhash import compute_simhash
+from .telemetry import NULL_TELEMETRY, CrawlTelemetry
+
+
+class PageResult:
+    """
+    页面处理结果。
+
+    Attributes:
+        content_hash: 规范化文本的 SHA256 哈希
+        simhash: 64 位 SimHash 指纹
+        links: 页面中的全部链接（绝对 URL，去重，保持出现顺序）
+        body: 以绝对 URL 重写后的 UTF-8 HTML（未要求渲染时为 None）
+        document: 分词后的文档（仅在进程内调用且 keep_document=True 时保留，供后续渲染）
+    """
+
+    __slots__ = ('content_hash', 'simhash', 'links', 'body', 'document')
+
+    def __init__(
+        self,
+        content_hash: str,
+        simhash: int,
+        links: list[str],
+        body: bytes | None = None,
+        document: HtmlDocument | None = None
+    ):
+        self.content_hash = content_hash
+        self.simhash = simhash
+        self.links = links
+        self.body = body
+        self.document = document
+
+    def __getstate__(self):
+        return (self.content_hash, self.simhash, self.links, self.body)
+
+    def __setstate__(self, state):
+        self.content_hash, self.simhash, self.links, self.body = state
+        self.document = None
+
+
+def process_page(
+    html: str,
+    url: str,
+    render: bool = True,
+    keep_document: bool = False,
+    telemetry: CrawlTelemetry = NULL_TELEMETRY,
+    domain: str | None = None
+) -> PageResult:
+    """
+    扫描页面并计算哈希与指纹。
+
+    Args:
+        html: HTML 内容
+        url: 页面 URL
+        render: 是否同时以绝对 URL 重写链接并编码为 UTF-8（不需要本地化链接时）
+        keep_document: 是否在结果中保留分词后的文档（进程内调用时避免重复扫描）
+        telemetry: 各步骤耗时记录（进程池中不记录）
+        domain: 站点域名（耗时记录用）
+
+    Returns:
+        PageResult: 处理结果
+    """
+    with telemetry.timer('pipeline_parse_html_seconds', domain):
+        document = parse_html(html, url)
+    with telemetry.timer('pipeline_compute_hash_seconds', domain):
+        content_hash = compute_normalized_hash(document.text)
+    with telemetry.timer('pipeline_simhash_seconds', domain):
+        fingerprint = compute_simhash(document.text)
+
+    body = None
+    if render:
+        body = render_document(document, None, telemetry, domain)
+
+    links = list(dict.fromkeys(link.url for link in document.links))
+    return PageResult(content_hash, fingerprint, links, body, document if keep_document else None)
+
+
+def render_page(
+    html: str,
+    url: str,
+    replacements: dict[str, str],
+    telemetry: CrawlTelemetry = NULL_TELEMETRY,
+    domain: str | None = None
+) -> bytes:
+    """
+    重新扫描页面并按替换表重写链接（进程池中使用，避免在进程间传递分词后的文档）。
+
+    Args:
+        html: HTML 内容
+        url: 页面 URL
+        replacements: 绝对 URL -> 替换值（如本地相对路径），不在表中的链接使用绝对 URL
+        telemetry: 各步骤耗时记录
+        domain: 站点域名
+
+    Returns:
+        bytes: 重写后的 UTF-8 HTML
+    """
+    return render_document(parse_html(html, url), replacements, telemetry, domain)
+
+
+def render_document(
+    document: HtmlDocument,
+    replacements: dict[str, str] | None,
+    telemetry: CrawlTelemetry = NULL_TELEMETRY,
+    domain: str | None = None
+) -> bytes:
+    """按替换表重写已分词的文档并编码为 UTF-8"""
+    with telemetry.timer('pipeline_render_seconds', domain):
+        resolve = (lambda link: replacements.get(link.url)) if replacements else None
+        return document.render(resolve).encode('utf-8')
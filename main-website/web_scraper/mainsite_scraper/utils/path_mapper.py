@@ -0,0 +1,180 @@
+"""
+本地路径映射模块 - URL 到本地文件路径的稳定映射
+
+同一 URL 在不同运行中总是映射到同一路径：
+- 路径部分原样保留（/news/a → news/a.html，/ → index.html）
+- 查询参数以截断的 SHA-256 摘要作为后缀（/list?page=2 → list_q<摘要>.html），
+  与进程的 PYTHONHASHSEED 无关
+- 不同 URL 映射到同一路径时（如 /a 与 /a.html），后出现的 URL 追加完整 URL 的摘要，
+  不会互相覆盖
+
+已保存的页面记录在站点目录下的路径索引（_path_index.json）中，
+再次爬取时无需扫描输出目录即可判断页面是否已在磁盘上。
+
+作者：伍志勇
+"""
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import urllib.parse
+
+logger = logging.getLogger(__name__)
+
+# 路径索引文件名（位于站点输出目录下）
+PATH_INDEX_FILE = '_path_index.json'
+
+# 摘要截断长度（十六进制字符数，48 位）
+DIGEST_LENGTH = 12
+
+
+def url_to_relpath(url: str) -> str:
+    """
+    根据 URL 生成站点目录下的相对路径（纯函数，跨进程稳定）。
+
+    Args:
+        url: 页面绝对 URL
+
+    Returns:
+        str: 以 / 分隔的相对路径
+    """
+    parsed = urllib.parse.urlsplit(url)
+    path = parsed.path.strip('/')
+
+    # 如果路径为空，使用 index.html
+    if not path:
+        path = 'index.html'
+
+    # 查询参数使用截断摘要作为后缀
+    if parsed.query:
+        path = f"{path}_q{_digest(parsed.query)}.html"
+
+    # 如果路径不以 .html 结尾且没有扩展名，添加 .html
+    if not path.endswith('.html') and '.' not in path.split('/')[-1]:
+        path = path + '.html'
+
+    return path
+
+
+class PathMapper:
+    """
+    站点内 URL → 本地路径映射。
+
+    映射结果在本次运行内缓存；已保存的页面写入路径索引，
+    下次运行时优先沿用索引中的路径。
+    """
+
+    def __init__(self, site_dir: str, verify_files: bool = True):
+        """
+        Args:
+            site_dir: 站点输出目录（<output>/<domain>）
+            verify_files: saved_path 是否检查文件存在（归档模式下页面不在磁盘上，以索引为准）
+        """
+        self.site_dir = site_dir
+        self.verify_files = verify_files
+        self.index_path = os.path.join(site_dir, PATH_INDEX_FILE)
+
+        self._saved: dict[str, str] = self._load_index()  # URL 键 → 已保存的相对路径
+        self._paths: dict[str, str] = {}  # URL 键 → 相对路径（本次运行缓存）
+        self._owners: dict[str, str] = {path: key for key, path in self._saved.items()}
+        self._dirty = False
+
+    def local_path(self, url: str) -> str:
+        """
+        返回 URL 对应的本地文件路径。
+
+        Args:
+            url: 页面绝对 URL
+
+        Returns:
+            str: 本地文件完整路径
+        """
+        key = _url_key(url)
+        relpath = self._paths.get(key)
+        if relpath is None:
+            relpath = self._saved.get(key) or self._claim(key, url_to_relpath(url))
+            self._paths[key] = relpath
+        return os.path.join(self.site_dir, *relpath.split('/'))
+
+    def mark_saved(self, url: str) -> None:
+        """记录页面已保存到 local_path(url)"""
+        key = _url_key(url)
+        relpath = self._paths.get(key)
+        if relpath is None:
+            self.local_path(url)
+            relpath = self._paths[key]
+        if self._saved.get(key) != relpath:
+            self._saved[key] = relpath
+            self._dirty = True
+
+    def saved_path(self, url: str) -> str | None:
+        """
+        返回已保存页面的本地路径。
+
+        Args:
+            url: 页面绝对 URL
+
+        Returns:
+            str | None: 页面在索引中且文件存在（verify_files=False 时不检查）时返回完整路径，否则返回 None
+        """
+        relpath = self._saved.get(_url_key(url))
+        if relpath is None:
+            return None
+        full_path = os.path.join(self.site_dir, *relpath.split('/'))
+        if self.verify_files and not os.path.exists(full_path):
+            return None
+        return full_path
+
+    def save(self) -> None:
+        """保存路径索引（先写临时文件再原子替换）"""
+        if not self._dirty:
+            return
+
+        os.makedirs(self.site_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._saved, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def _claim(self, key: str, relpath: str) -> str:
+        """占用路径；已被其他 URL 占用时追加完整 URL 的摘要"""
+        owner = self._owners.get(relpath)
+        if owner is not None and owner != key:
+            stem, ext = posixpath.splitext(relpath)
+            relpath = f"{stem}_u{_digest(key)}{ext or '.html'}"
+            logger.debug(f"本地路径冲突: {key} -> {relpath}")
+        self._owners.setdefault(relpath, key)
+        return relpath
+
+    def _load_index(self) -> dict[str, str]:
+        """读取路径索引，文件不存在或损坏时返回空索引"""
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"读取路径索引失败: {self.index_path}, 错误: {e}")
+            return {}
+        return {k: v for k, v in data.items() if isinstance(v, str)}
+
+
+def _url_key(url: str) -> str:
+    """
+    URL 映射键：忽略协议、www. 前缀、片段和路径末尾斜杠
+    （http/https、/about 与 /about/ 视为同一页面）
+    """
+    parsed = urllib.parse.urlsplit(url)
+    netloc = parsed.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    key = netloc + parsed.path.rstrip('/')
+    return f"{key}?{parsed.query}" if parsed.query else key
+
+
+def _digest(value: str) -> str:
+    """截断的 SHA-256 十六进制摘要"""
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:DIGEST_LENGTH]
@@ -0,0 +1,276 @@
+"""
+自适应礼貌策略模块 - 按站点学习响应延迟与错误率，决定请求间隔与并发数
+
+替代固定的 DOWNLOAD_DELAY：
+- 请求间隔 = 平滑后的响应延迟 / 并发数，不低于最小间隔和 robots.txt 的 Crawl-delay / Request-rate
+- 站点健康（连续成功、错误率低、延迟没有明显上升）时并发数逐步加 1
+- 429 / 503 时并发数减半、间隔加倍；带 Retry-After 时在指定时间之前不再发出请求
+- 其他 5xx 与连接错误计入错误率，超过阈值时同样减半并发
+
+本模块只做决策，由 AdaptivePolitenessMiddleware 应用到 Scrapy 的下载槽位。
+
+作者：伍志勇
+"""
+
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from protego import Protego
+
+# 需要退避的状态码（服务器明确表示过载或限流）
+BACKOFF_STATUSES = frozenset({429, 503})
+
+# 响应延迟与错误率的平滑系数（指数加权移动平均）；错误率平滑得更慢，单次错误不会触发减速
+LATENCY_ALPHA = 0.3
+ERROR_ALPHA = 0.1
+
+# 平滑延迟超过基线的 2 倍且至少高出该秒数时视为站点变慢（避免毫秒级延迟的抖动触发减速）
+DEGRADED_SLACK = 0.1
+
+
+def parse_retry_after(value: str | bytes | None, now: datetime | None = None) -> float | None:
+    """
+    解析 Retry-After 响应头。
+
+    Args:
+        value: 秒数或 HTTP 日期
+        now: 当前时间（测试用）
+
+    Returns:
+        float | None: 需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+def robots_delay(body: bytes | str, user_agent: str) -> float | None:
+    """
+    robots.txt 要求的最小请求间隔（Crawl-delay 与 Request-rate 中较大者）。
+
+    Args:
+        body: robots.txt 内容
+        user_agent: 匹配的 User-agent
+
+    Returns:
+        float | None: 秒数，未设置时返回 None
+    """
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='ignore')
+    parser = Protego.parse(body)
+    delays = []
+    crawl_delay = parser.crawl_delay(user_agent)
+    if crawl_delay:
+        delays.append(float(crawl_delay))
+    rate = parser.request_rate(user_agent)
+    if rate and rate.requests:
+        delays.append(rate.seconds / rate.requests)
+    return max(delays) if delays else None
+
+
+class HostState:
+    """单个站点（下载槽位）的状态"""
+
+    __slots__ = (
+        'concurrency', 'delay', 'latency', 'best_latency', 'error_rate',
+        'successes', 'crawl_delay', 'backoff_until', 'responses', 'errors'
+    )
+
+    def __init__(self, concurrency: int, delay: float):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.latency: float | None = None  # 平滑后的响应延迟
+        self.best_latency: float | None = None  # 平滑延迟的最小值（站点健康时的基线）
+        self.error_rate = 0.0
+        self.successes = 0  # 上次调整并发后的连续成功次数
+        self.crawl_delay: float | None = None
+        self.backoff_until = 0.0  # time.monotonic() 时间，之前不发出请求
+        self.responses = 0
+        self.errors = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'concurrency': self.concurrency,
+            'delay': round(self.delay, 3),
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'crawl_delay': self.crawl_delay,
+            'responses': self.responses,
+            'errors': self.errors,
+        }
+
+
+class PolitenessController:
+    """按站点决定请求间隔与并发数"""
+
+    def __init__(
+        self,
+        min_delay: float = 0.25,
+        max_delay: float = 30.0,
+        start_delay: float = 1.0,
+        start_concurrency: int = 1,
+        max_concurrency: int = 4,
+        ramp_after: int = 10,
+        error_threshold: float = 0.1,
+        max_retry_after: float = 600.0,
+        max_crawl_delay: float = 60.0
+    ):
+        """
+        Args:
+            min_delay: 最小请求间隔（秒）
+            max_delay: 按延迟计算或退避时的最大请求间隔（Crawl-delay 与 Retry-After 另有上限）
+            start_delay: 尚无响应数据时的请求间隔
+            start_concurrency: 初始并发数
+            max_concurrency: 最大并发数
+            ramp_after: 连续成功多少次后并发数加 1
+            error_threshold: 错误率超过该值时减半并发且不再增加
+            max_retry_after: Retry-After 等待时间上限（秒）
+            max_crawl_delay: Crawl-delay 上限（秒）
+        """
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.start_delay = start_delay
+        self.start_concurrency = max(1, start_concurrency)
+        self.max_concurrency = max(self.start_concurrency, max_concurrency)
+        self.ramp_after = ramp_after
+        self.error_threshold = error_threshold
+        self.max_retry_after = max_retry_after
+        self.max_crawl_delay = max_crawl_delay
+        self.hosts: dict[str, HostState] = {}
+
+    def state(self, key: str) -> HostState:
+        """获取站点状态（首次出现时创建）"""
+        state = self.hosts.get(key)
+        if state is None:
+            state = self.hosts[key] = HostState(self.start_concurrency, max(self.min_delay, self.start_delay))
+        return state
+
+    def set_crawl_delay(self, key: str, seconds: float | None) -> float | None:
+        """
+        设置 robots.txt 要求的最小间隔（有 Crawl-delay 的站点并发数固定为 1）。
+
+        Returns:
+            float | None: 实际使用的间隔（超出上限时截断）
+        """
+        if not seconds:
+            return None
+        state = self.state(key)
+        state.crawl_delay = min(float(seconds), self.max_crawl_delay)
+        state.concurrency = 1
+        state.delay = max(state.delay, state.crawl_delay)
+        return state.crawl_delay
+
+    def on_response(
+        self,
+        key: str,
+        status: int,
+        latency: float | None,
+        retry_after: float | None = None,
+        now: float | None = None
+    ) -> list[str]:
+        """
+        根据响应调整站点状态。
+
+        Args:
+            key: 站点（下载槽位）
+            status: HTTP 状态码
+            latency: 下载耗时（秒）
+            retry_after: Retry-After 秒数
+            now: 当前 time.monotonic() 时间
+
+        Returns:
+            list[str]: 本次做出的决策（ramp_up / ramp_down / backoff / retry_after / error）
+        """
+        state = self.state(key)
+        state.responses += 1
+
+        if status in BACKOFF_STATUSES:
+            return self._backoff(state, retry_after, time.monotonic() if now is None else now)
+        if status >= 500:
+            return self._error(state)
+
+        decisions = []
+        state.error_rate = _ewma(state.error_rate, 0.0, ERROR_ALPHA)
+        if latency is not None:
+            state.latency = latency if state.latency is None else _ewma(state.latency, latency, LATENCY_ALPHA)
+            if state.best_latency is None or state.latency < state.best_latency:
+                state.best_latency = state.latency
+        state.successes += 1
+
+        degrading = (
+            state.latency is not None and state.best_latency is not None
+            and state.latency > max(2 * state.best_latency, state.best_latency + DEGRADED_SLACK)
+        )
+        if degrading and state.concurrency > 1:
+            state.concurrency -= 1
+            state.successes = 0
+            decisions.append('ramp_down')
+        elif (
+            state.successes >= self.ramp_after
+            and not degrading
+            and state.error_rate < self.error_threshold
+            and state.concurrency < self.max_concurrency
+            and state.crawl_delay is None
+        ):
+            state.concurrency += 1
+            state.successes = 0
+            decisions.append('ramp_up')
+
+        if state.latency is not None:
+            state.delay = min(self.max_delay, state.latency / state.concurrency)
+        state.delay = max(state.delay, self.floor(state))
+        return decisions
+
+    def on_error(self, key: str) -> list[str]:
+        """连接错误、超时等下载异常"""
+        state = self.state(key)
+        state.responses += 1
+        return self._error(state)
+
+    def floor(self, state: HostState) -> float:
+        """站点的最小请求间隔"""
+        return max(self.min_delay, state.crawl_delay or 0.0)
+
+    def _backoff(self, state: HostState, retry_after: float | None, now: float) -> list[str]:
+        """服务器过载：并发减半、间隔加倍，有 Retry-After 时暂停到指定时间"""
+        decisions = ['backoff']
+        state.errors += 1
+        state.error_rate = _ewma(state.error_rate, 1.0, ERROR_ALPHA)
+        state.successes = 0
+        if state.concurrency > 1:
+            state.concurrency = max(1, state.concurrency // 2)
+            decisions.append('ramp_down')
+        state.delay = max(self.floor(state), min(self.max_delay, max(state.delay * 2, self.start_delay)))
+        if retry_after is not None:
+            state.backoff_until = max(state.backoff_until, now + min(retry_after, self.max_retry_after))
+            decisions.append('retry_after')
+        return decisions
+
+    def _error(self, state: HostState) -> list[str]:
+        """计入错误率；超过阈值时减半并发并加倍间隔"""
+        decisions = ['error']
+        state.errors += 1
+        state.error_rate = _ewma(state.error_rate, 1.0, ERROR_ALPHA)
+        state.successes = 0
+        if state.error_rate > self.error_threshold:
+            if state.concurrency > 1:
+                state.concurrency = max(1, state.concurrency // 2)
+                decisions.append('ramp_down')
+            state.delay = max(self.floor(state), min(self.max_delay, state.delay * 2))
+        return decisions
+
+
+def _ewma(current: float, value: float, alpha: float) -> float:
+    return (1 - alpha) * current + alpha * value
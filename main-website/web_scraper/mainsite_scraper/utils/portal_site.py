@@ -0,0 +1,213 @@
+"""
+门户站点状态模块 - 单个目标站点的爬取状态
+
+一个进程爬取多个站点时，每个站点各自维护：
+- 目标域名、允许域名集合与预编译的 URL 过滤器
+- 爬取历史（首次使用时才加载，可随时保存并释放）
+- 页面预算
+- sitemap 全部失败时的链接发现状态（深度上限、Bloom 过滤器去重）
+
+作者：伍志勇
+"""
+
+import logging
+import urllib.parse
+
+from .bloom_filter import BloomFilter
+from .history_manager import CrawlHistory, checkpoint_history, cleanup_expired, load_history, save_history
+from .history_store import SqliteUrlStore
+from .url_filter import UrlFilter, get_allowed_domains
+
+logger = logging.getLogger(__name__)
+
+
+class PortalSite:
+    """单个目标站点的爬取状态"""
+
+    def __init__(
+        self,
+        target_url: str,
+        output_dir: str,
+        history_backend: str = 'json',
+        checkpoint_items: int = 100,
+        checkpoint_seconds: float = 30.0,
+        sitemap_url: str | None = None,
+        max_pages: int = 0,
+        history_expire_days: int = 90,
+        max_depth: int = 0,
+        link_capacity: int = 1_000_000,
+        link_error_rate: float = 0.001
+    ):
+        """
+        Args:
+            target_url: 站点首页 URL
+            output_dir: 输出目录
+            history_backend: 历史存储后端（json 或 sqlite）
+            checkpoint_items: 每累计多少条更新写一次历史检查点
+            checkpoint_seconds: 距上次检查点超过多少秒写一次历史检查点
+            sitemap_url: 指定的 sitemap URL（默认尝试常见路径）
+            max_pages: 页面请求预算（0 表示不限制）
+            history_expire_days: 历史记录过期天数
+            max_depth: 链接发现的最大深度（0 表示不限制）
+            link_capacity: 链接去重 Bloom 过滤器容量
+            link_error_rate: 链接去重 Bloom 过滤器误判率
+        """
+        if '://' not in target_url:
+            target_url = f'https://{target_url}'
+
+        self.target_url = target_url
+        self.output_dir = output_dir
+        self.history_backend = history_backend
+        self.checkpoint_items = checkpoint_items
+        self.checkpoint_seconds = checkpoint_seconds
+        self.max_pages = max_pages
+        self.history_expire_days = history_expire_days
+        self.max_depth = max_depth
+        self.link_capacity = link_capacity
+        self.link_error_rate = link_error_rate
+
+        # 解析目标域名
+        parsed = urllib.parse.urlparse(target_url)
+        self.domain = parsed.netloc.lower()
+        if self.domain.startswith('www.'):
+            self.domain = self.domain[4:]
+
+        # 允许域名与预编译的 URL 过滤器（每个站点构建一次）
+        self.allowed_domains = get_allowed_domains(target_url)
+        self.url_filter = UrlFilter(self.domain)
+
+        # Sitemap URL
+        if sitemap_url:
+            self.sitemap_urls = [sitemap_url]
+        else:
+            # 尝试常见的 sitemap 路径
+            base_url = f"{parsed.scheme}://{parsed.netloc}"
+            self.sitemap_urls = [
+                f"{base_url}/sitemap.xml",
+                f"{base_url}/sitemap_index.xml",
+            ]
+
+        self.pages_requested = 0
+        self._history: CrawlHistory | None = None
+
+        # sitemap 尝试结果：全部失败（或没有 URL）时改为从首页跟随链接
+        self._sitemaps_pending = len(self.sitemap_urls)
+        self.sitemap_found = False
+        self.link_discovery = False
+        self._seen_links: BloomFilter | None = None
+
+    def __repr__(self) -> str:
+        return f'PortalSite({self.domain!r})'
+
+    @property
+    def history(self) -> CrawlHistory:
+        """爬取历史（首次访问时加载并清理过期条目）"""
+        if self._history is None:
+            self._history = load_history(
+                self.domain,
+                self.output_dir,
+                self.history_backend,
+                checkpoint_items=self.checkpoint_items,
+                checkpoint_seconds=self.checkpoint_seconds,
+            )
+            expired_count = cleanup_expired(self._history, days=self.history_expire_days)
+            if expired_count > 0:
+                logger.info(f"清理了 {expired_count} 条过期历史记录: {self.domain}")
+        return self._history
+
+    @property
+    def history_loaded(self) -> bool:
+        """历史是否已加载"""
+        return self._history is not None
+
+    def consume_budget(self) -> bool:
+        """
+        占用一个页面请求预算。
+
+        Returns:
+            bool: 预算未用完时返回 True
+        """
+        if self.max_pages and self.pages_requested >= self.max_pages:
+            return False
+        self.pages_requested += 1
+        return True
+
+    def sitemap_done(self, found: bool) -> bool:
+        """
+        记录一个 sitemap 尝试的结果。
+
+        Args:
+            found: 该 sitemap 是否产出了 URL 或子 sitemap
+
+        Returns:
+            bool: 这是最后一个尝试且全部失败时返回 True（此时开启链接发现）
+        """
+        self._sitemaps_pending -= 1
+        self.sitemap_found = self.sitemap_found or found
+        if self._sitemaps_pending == 0 and not self.sitemap_found:
+            self.link_discovery = True
+            return True
+        return False
+
+    def within_depth(self, depth: int) -> bool:
+        """深度为 depth 的页面是否还可以继续跟随链接"""
+        return not self.max_depth or depth < self.max_depth
+
+    def mark_seen(self, url: str) -> bool:
+        """
+        链接去重（Bloom 过滤器首次使用时才分配）。
+
+        Returns:
+            bool: 链接此前未出现时返回 True
+        """
+        if self._seen_links is None:
+            self._seen_links = BloomFilter(self.link_capacity, self.link_error_rate)
+        added = self._seen_links.add(url)
+        if added and len(self._seen_links) == self.link_capacity:
+            logger.warning(f"链接去重过滤器已达到容量 {self.link_capacity}，此后误判率上升: {self.domain}")
+        return added
+
+    def save(self) -> None:
+        """保存已加载的历史"""
+        if self._history is not None:
+            save_history(self._history, self.output_dir)
+
+    def release(self) -> None:
+        """
+        写入检查点并释放历史（下次访问时重新加载）。
+
+        只刷新增量日志（sqlite 后端提交事务），不重写 crawl_history.json：
+        重新加载时回放日志，日志过长时按检查点规则压缩。
+        """
+        if self._history is None:
+            return
+        checkpoint_history(self._history)
+        if isinstance(self._history.urls, SqliteUrlStore):
+            self._history.urls.close()
+        self._history = None
+
+
+def load_targets(targets_path: str | None = None, urls: str | None = None) -> list[tuple[str, str | None]]:
+    """
+    读取目标站点列表。
+
+    Args:
+        targets_path: 目标列表文件（每行 `<url> [sitemap_url]`，# 开头为注释）
+        urls: 逗号分隔的站点 URL
+
+    Returns:
+        list[tuple[str, str | None]]: (站点 URL, sitemap URL)
+    """
+    targets: list[tuple[str, str | None]] = []
+
+    if targets_path:
+        with open(targets_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.split('#', 1)[0].split()
+                if fields:
+                    targets.append((fields[0], fields[1] if len(fields) > 1 else None))
+
+    if urls:
+        targets.extend((url.strip(), None) for url in urls.split(',') if url.strip())
+
+    return targets
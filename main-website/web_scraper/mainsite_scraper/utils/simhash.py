@@ -0,0 +1,194 @@
+"""
+SimHash 近似重复检测模块
+
+门户网站模板生成的页面常常只相差一个时间戳或计数器，精确哈希无法识别。
+本模块为页面文本计算 64 位 SimHash 指纹（相似文本的指纹汉明距离小），
+并提供基于多置换表 LSH 的索引，查找近似重复页面时无需与全部指纹逐一比较。
+
+作者：伍志勇
+"""
+
+import hashlib
+import re
+from collections import Counter
+from itertools import combinations
+from math import comb
+
+# 指纹位数
+SIMHASH_BITS = 64
+
+# 每个特征包含的词数（词级 shingle）
+SHINGLE_SIZE = 3
+
+# LSH 索引的键位数下限（达到后不再增加分块）与置换表数上限
+MIN_KEY_BITS = 16
+MAX_TABLES = 32
+
+_TAG_RE = re.compile(r'<[^>]*>')
+_WORD_RE = re.compile(r'\w+')
+
+# 字节 → 8 个计数槽位（每槽 32 位）的展开表，用于一次累加 64 位的计数
+_LANE_BITS = 32
+_SPREAD = [
+    sum(1 << (_LANE_BITS * j) for j in range(8) if byte >> j & 1)
+    for byte in range(256)
+]
+
+
+def compute_simhash(text: str) -> int:
+    """
+    计算文本的 64 位 SimHash 指纹。
+
+    去除标签后按词切分，以相邻 SHINGLE_SIZE 个词为一个特征，
+    每一位取所有特征哈希在该位上的多数值。
+
+    Args:
+        text: 规范化文本（见 content_hash.compute_normalized_hash）
+
+    Returns:
+        int: 64 位指纹
+    """
+    words = _WORD_RE.findall(_TAG_RE.sub(' ', text).lower())
+    if len(words) > SHINGLE_SIZE:
+        features = Counter(
+            ' '.join(words[i:i + SHINGLE_SIZE])
+            for i in range(len(words) - SHINGLE_SIZE + 1)
+        )
+    else:
+        features = Counter([' '.join(words)])
+
+    # 各位计数打包在一个大整数中（64 个 32 位槽位），每个特征只做一次加法
+    acc = 0
+    total = 0
+    for feature, count in features.items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        spread = 0
+        for k in range(8):
+            spread |= _SPREAD[(h >> (8 * k)) & 0xff] << (8 * _LANE_BITS * k)
+        acc += spread * count
+        total += count
+
+    mask = (1 << _LANE_BITS) - 1
+    fingerprint = 0
+    for i in range(SIMHASH_BITS):
+        if 2 * ((acc >> (_LANE_BITS * i)) & mask) > total:
+            fingerprint |= 1 << i
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个指纹的汉明距离"""
+    return (a ^ b).bit_count()
+
+
+def max_distance(similarity: float) -> int:
+    """
+    相似度阈值对应的最大汉明距离。
+
+    Args:
+        similarity: 相似度阈值（0~1，1 表示完全相同）
+
+    Returns:
+        int: 最大汉明距离
+    """
+    if not 0.0 < similarity <= 1.0:
+        raise ValueError(f"相似度阈值必须在 (0, 1] 范围内: {similarity}")
+    return int((1.0 - similarity) * SIMHASH_BITS + 1e-9)
+
+
+class SimHashIndex:
+    """
+    SimHash 指纹的 LSH 索引（多置换表）。
+
+    把 64 位指纹分成 blocks 块（blocks > max_distance）：汉明距离不超过 max_distance 的
+    两个指纹至少有 blocks - max_distance 块完全相同（抽屉原理）。每种
+    blocks - max_distance 块的组合建一张表，以这些块的位作为键；查询时只比较
+    至少一张表中键相同的候选，而不是遍历全部指纹。
+
+    分块数从 max_distance + 1 开始增加，直到键位数不少于 MIN_KEY_BITS
+    或表数将超过 MAX_TABLES。例如距离 3 时 4 块 4 张表（键 16 位），
+    距离 6 时 8 块 28 张表（键 16 位）。键位数为 b 时每张表的候选约为总数的 1/2^b；
+    距离 7 以上时键位数受表数上限限制（8 位及以下），候选数明显增多。
+    每个指纹在每张表中各占一项，内存随表数增长。
+    """
+
+    def __init__(self, distance: int = 3, max_tables: int = MAX_TABLES):
+        """
+        Args:
+            distance: 视为近似重复的最大汉明距离
+            max_tables: 置换表数上限
+        """
+        if not 0 <= distance < SIMHASH_BITS:
+            raise ValueError(f"汉明距离必须在 [0, {SIMHASH_BITS}) 范围内: {distance}")
+        self.distance = distance
+
+        blocks = distance + 1
+        while (blocks < SIMHASH_BITS
+               and SIMHASH_BITS * (blocks - distance) // blocks < MIN_KEY_BITS
+               and comb(blocks + 1, distance) <= max_tables):
+            blocks += 1
+
+        # 各块的位掩码（在原位置，不移位）
+        block_masks = []
+        start = 0
+        for i in range(blocks):
+            width = SIMHASH_BITS // blocks + (1 if i < SIMHASH_BITS % blocks else 0)
+            block_masks.append(((1 << width) - 1) << start)
+            start += width
+
+        # 每张表的键为指纹与若干块掩码之和按位与
+        self._masks: list[int] = [
+            sum(chosen) for chosen in combinations(block_masks, blocks - distance)
+        ]
+        self._buckets: list[dict[int, set[str]]] = [{} for _ in self._masks]
+        self._fingerprints: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._fingerprints
+
+    def add(self, key: str, fingerprint: int) -> None:
+        """加入（或替换）指纹"""
+        self.remove(key)
+        self._fingerprints[key] = fingerprint
+        for buckets, mask in zip(self._buckets, self._masks):
+            buckets.setdefault(fingerprint & mask, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        """移除指纹（不存在时忽略）"""
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for buckets, mask in zip(self._buckets, self._masks):
+            band = fingerprint & mask
+            keys = buckets.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del buckets[band]
+
+    def query(self, fingerprint: int, exclude: str | None = None) -> tuple[str, int] | None:
+        """
+        查找最相似的已索引指纹。
+
+        Args:
+            fingerprint: 待查询指纹
+            exclude: 不参与匹配的键（如页面自身）
+
+        Returns:
+            tuple[str, int] | None: (键, 汉明距离)，没有距离不超过阈值的指纹时返回 None
+        """
+        best: tuple[str, int] | None = None
+        seen: set[str] = set()
+        for buckets, mask in zip(self._buckets, self._masks):
+            for key in buckets.get(fingerprint & mask, ()):
+                if key == exclude or key in seen:
+                    continue
+                seen.add(key)
+                distance = hamming_distance(fingerprint, self._fingerprints[key])
+                # 距离相同时取键较小者，结果与集合遍历顺序无关
+                if distance <= self.distance and (best is None or (distance, key) < (best[1], best[0])):
+                    best = (key, distance)
+        return best
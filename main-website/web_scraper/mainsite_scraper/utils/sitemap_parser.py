@@ -4,15 +4,26 @@ Sitemap 解析模块 - 解析 sitemap.xml 获取 URL 列表
 作者：伍志勇
 """
 
+import gzip
+import io
 import logging
 import urllib.parse
 import xml.etree.ElementTree as ET
-from typing import Generator
+from typing import Generator, IO
 from dataclasses import dataclass
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# 单个 sitemap 解压后的最大字节数（sitemap 协议上限 50 MB）
+MAX_SITEMAP_SIZE = 50 * 1024 * 1024
+
+# 每次送入解析器的字节数
+_CHUNK_SIZE = 64 * 1024
+
+# gzip 文件头
+_GZIP_MAGIC = b'\x1f\x8b'
+
 
 @dataclass
 class SitemapUrl:
@@ -21,107 +32,146 @@ class SitemapUrl:
     lastmod: str | None = None
     changefreq: str | None = None
     priority: float | None = None
+    is_sitemap: bool = False  # True 表示 sitemap 索引中的子 sitemap
 
 
-def parse_sitemap(sitemap_url: str, response_text: str) -> Generator[SitemapUrl, None, None]:
+def iter_sitemap(
+    sitemap_url: str,
+    body: bytes | str,
+    max_size: int | None = MAX_SITEMAP_SIZE
+) -> Generator[SitemapUrl, None, None]:
     """
-    解析 sitemap.xml 内容，获取 URL 列表。
+    流式解析 sitemap，边读取边产出条目。
 
-    支持两种格式：
-    1. 标准 sitemap (urlset)
-    2. Sitemap 索引 (sitemapindex) - 递归解析
+    - 根元素为 sitemapindex 时产出子 sitemap（is_sitemap=True），
+      为 urlset 时产出页面 URL，两者在同一次遍历中判断
+    - 每个 <url> / <sitemap> 处理后立即释放，内存占用与文件大小无关
+    - gzip 压缩内容（.xml.gz）自动解压
 
     Args:
-        sitemap_url: sitemap 的 URL（用于解析相对路径）
-        response_text: sitemap XML 内容
+        sitemap_url: sitemap 的 URL（用于日志）
+        body: sitemap 内容（bytes 或 str）
+        max_size: 解压后最大字节数，超出后停止解析（None 表示不限制）
 
     Yields:
         SitemapUrl: URL 条目
     """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    is_index = False
+    depth = 0
+    size = 0
+
     try:
-        root = ET.fromstring(response_text)
-    except ET.ParseError as e:
+        for chunk in _iter_chunks(body):
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                logger.warning(f"sitemap 超过 {max_size} 字节，停止解析: {sitemap_url}")
+                return
+
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    depth += 1
+                    if root is None:
+                        root = elem
+                        tag = _local_name(elem.tag)
+                        if tag == 'sitemapindex':
+                            is_index = True
+                        elif tag != 'urlset':
+                            logger.warning(f"未知的 sitemap 格式: {elem.tag}")
+                            return
+                    continue
+
+                depth -= 1
+                if depth == 1:
+                    entry = _parse_entry(elem, is_index)
+                    if entry is not None:
+                        yield entry
+                    # 释放已处理的元素
+                    root.clear()
+
+        parser.close()
+    except (ET.ParseError, OSError, EOFError) as e:
         logger.error(f"解析 sitemap 失败: {sitemap_url}, 错误: {e}")
+
+
+def parse_sitemap(sitemap_url: str, response_text: bytes | str) -> Generator[SitemapUrl | str, None, None]:
+    """
+    解析 sitemap.xml 内容，获取 URL 列表。
+
+    支持两种格式：
+    1. 标准 sitemap (urlset) - 产出 SitemapUrl
+    2. Sitemap 索引 (sitemapindex) - 产出子 sitemap URL
+
+    Args:
+        sitemap_url: sitemap 的 URL（用于解析相对路径）
+        response_text: sitemap XML 内容（支持 gzip 压缩的 bytes）
+
+    Yields:
+        SitemapUrl | str: URL 条目或子 sitemap URL
+    """
+    for entry in iter_sitemap(sitemap_url, response_text):
+        yield entry.url if entry.is_sitemap else entry
+
+
+def _iter_chunks(body: bytes | str) -> Generator[bytes | str, None, None]:
+    """按块读取内容，gzip 压缩的 bytes 边读边解压"""
+    if isinstance(body, str):
+        for i in range(0, len(body), _CHUNK_SIZE):
+            yield body[i:i + _CHUNK_SIZE]
         return
 
-    # 获取 XML 命名空间
-    ns = _get_namespace(root)
-
-    # 判断是 sitemap 索引还是标准 sitemap
-    if root.tag.endswith('sitemapindex'):
-        # Sitemap 索引，提取子 sitemap URL
-        yield from _parse_sitemap_index(root, ns)
-    elif root.tag.endswith('urlset'):
-        # 标准 sitemap
-        yield from _parse_urlset(root, ns)
-    else:
-        logger.warning(f"未知的 sitemap 格式: {root.tag}")
-
-
-def _get_namespace(element: ET.Element) -> dict[str, str]:
-    """获取 XML 命名空间"""
-    if element.tag.startswith('{'):
-        ns_uri = element.tag[1:element.tag.index('}')]
-        return {'ns': ns_uri}
-    return {}
-
-
-def _parse_sitemap_index(root: ET.Element, ns: dict[str, str]) -> Generator[str, None, None]:
-    """解析 sitemap 索引，返回子 sitemap URL"""
-    if ns:
-        sitemaps = root.findall('ns:sitemap', ns)
-    else:
-        sitemaps = root.findall('sitemap')
-
-    for sitemap in sitemaps:
-        if ns:
-            loc = sitemap.find('ns:loc', ns)
-        else:
-            loc = sitemap.find('loc')
-
-        if loc is not None and loc.text:
-            yield loc.text.strip()
-
-
-def _parse_urlset(root: ET.Element, ns: dict[str, str]) -> Generator[SitemapUrl, None, None]:
-    """解析标准 sitemap urlset"""
-    if ns:
-        urls = root.findall('ns:url', ns)
-    else:
-        urls = root.findall('url')
-
-    for url_elem in urls:
-        url_data = _parse_url_element(url_elem, ns)
-        if url_data and url_data.url:
-            yield url_data
-
-
-def _parse_url_element(url_elem: ET.Element, ns: dict[str, str]) -> SitemapUrl | None:
-    """解析单个 URL 元素"""
-    # 获取 loc
-    if ns:
-        loc = url_elem.find('ns:loc', ns)
-        lastmod = url_elem.find('ns:lastmod', ns)
-        changefreq = url_elem.find('ns:changefreq', ns)
-        priority = url_elem.find('ns:priority', ns)
-    else:
-        loc = url_elem.find('loc')
-        lastmod = url_elem.find('lastmod')
-        changefreq = url_elem.find('changefreq')
-        priority = url_elem.find('priority')
-
-    if loc is None or not loc.text:
+    stream: IO[bytes] = io.BytesIO(body)
+    if body[:2] == _GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=stream)
+
+    while True:
+        chunk = stream.read(_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _local_name(tag: str) -> str:
+    """去掉命名空间的标签名"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _parse_entry(elem: ET.Element, is_sitemap: bool) -> SitemapUrl | None:
+    """解析单个 <url> 或 <sitemap> 元素"""
+    if _local_name(elem.tag) != ('sitemap' if is_sitemap else 'url'):
+        return None
+
+    fields = {}
+    for child in elem:
+        if child.text:
+            fields[_local_name(child.tag)] = child.text.strip()
+
+    loc = fields.get('loc')
+    if not loc:
         return None
 
     return SitemapUrl(
-        url=loc.text.strip(),
-        lastmod=lastmod.text.strip() if lastmod is not None and lastmod.text else None,
-        changefreq=changefreq.text.strip() if changefreq is not None and changefreq.text else None,
-        priority=float(priority.text.strip()) if priority is not None and priority.text else None,
+        url=loc,
+        lastmod=fields.get('lastmod'),
+        changefreq=fields.get('changefreq'),
+        priority=_parse_priority(fields.get('priority')),
+        is_sitemap=is_sitemap,
     )
 
 
-def get_urls_with_lastmod(sitemap_url: str, response_text: str) -> dict[str, str | None]:
+def _parse_priority(priority: str | None) -> float | None:
+    """解析 priority，格式错误时返回 None"""
+    if not priority:
+        return None
+    try:
+        return float(priority)
+    except ValueError:
+        return None
+
+
+def get_urls_with_lastmod(sitemap_url: str, response_text: bytes | str) -> dict[str, str | None]:
     """
     获取 URL 及其 lastmod 时间戳。
 
@@ -133,12 +183,13 @@ def get_urls_with_lastmod(sitemap_url: str, response_text: str) -> dict[str, str
         dict[url, lastmod]: URL 到 lastmod 的映射（无 lastmod 时为 None）
     """
     result = {}
-    for sitemap_url_entry in parse_sitemap(sitemap_url, response_text):
-        result[sitemap_url_entry.url] = sitemap_url_entry.lastmod
+    for entry in iter_sitemap(sitemap_url, response_text):
+        if not entry.is_sitemap:
+            result[entry.url] = entry.lastmod
     return result
 
 
-def get_all_urls(sitemap_url: str, response_text: str) -> list[str]:
+def get_all_urls(sitemap_url: str, response_text: bytes | str) -> list[str]:
     """
     获取所有 URL 列表（不含 lastmod）。
 
@@ -149,24 +200,31 @@ def get_all_urls(sitemap_url: str, response_text: str) -> list[str]:
     Returns:
         list[str]: URL 列表
     """
-    return [entry.url for entry in parse_sitemap(sitemap_url, response_text)]
+    return [entry.url for entry in iter_sitemap(sitemap_url, response_text) if not entry.is_sitemap]
 
 
-def is_sitemap_index(response_text: str) -> bool:
+def is_sitemap_index(sitemap_url: str, response_text: bytes | str) -> bool:
     """
     检查是否为 sitemap 索引文件。
 
+    只读取到根元素为止，不解析整个文档。
+
     Args:
+        sitemap_url: sitemap 的 URL
         response_text: sitemap XML 内容
 
     Returns:
         bool: 如果是 sitemap 索引返回 True
     """
+    parser = ET.XMLPullParser(events=('start',))
     try:
-        root = ET.fromstring(response_text)
-        return root.tag.endswith('sitemapindex')
-    except ET.ParseError:
-        return False
+        for chunk in _iter_chunks(response_text):
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                return _local_name(elem.tag) == 'sitemapindex'
+    except (ET.ParseError, OSError, EOFError):
+        logger.debug(f"无法识别 sitemap 类型: {sitemap_url}")
+    return False
 
 
 def parse_lastmod(lastmod_str: str | None) -> datetime | None:
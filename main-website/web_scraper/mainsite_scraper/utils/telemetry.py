@@ -0,0 +1,237 @@
+"""
+爬取性能遥测模块 - 按站点记录各阶段耗时与字节数的直方图
+
+用于判断爬取慢在哪里：下载延迟 / 下载间隔（自适应礼貌策略、DOWNLOAD_DELAY）、
+页面解析 CPU 时间、内容哈希、Pipeline 各阶段与磁盘写入。
+报告可输出为 JSON 或 Prometheus 文本格式。
+
+作者：伍志勇
+"""
+
+import bisect
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# 耗时直方图分桶上界（秒）
+SECONDS_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+# 字节数直方图分桶上界
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(9))  # 1KB ~ 64MB
+
+# Prometheus 指标名前缀
+METRIC_PREFIX = 'mainsite_'
+
+# 指标说明（报告中的 HELP 文本）；以 _bytes 结尾的指标使用字节分桶
+METRICS = {
+    'download_latency_seconds': '请求发出到收到响应的耗时',
+    'download_delay_seconds': '收到响应时下载槽位的请求间隔（自适应礼貌策略 / DOWNLOAD_DELAY）',
+    'response_bytes': '响应正文字节数',
+    'parse_page_cpu_seconds': 'parse_page 构建 item 的 CPU 时间',
+    'extract_links_cpu_seconds': '链接发现的 CPU 时间',
+    'pipeline_parse_html_seconds': 'Pipeline：HTML 扫描与文本规范化',
+    'pipeline_compute_hash_seconds': 'Pipeline：内容哈希',
+    'pipeline_simhash_seconds': 'Pipeline：SimHash 指纹',
+    'pipeline_dedup_seconds': 'Pipeline：近似重复查询',
+    'pipeline_assets_seconds': 'Pipeline：资源下载（等待时间）',
+    'pipeline_render_seconds': 'Pipeline：链接重写',
+    'pipeline_compress_seconds': 'Pipeline：归档记录编码与压缩',
+    'pipeline_write_seconds': 'Pipeline：写入文件',
+    'pipeline_worker_seconds': 'Pipeline：进程池处理（含排队等待）',
+    'written_bytes': 'Pipeline 写入的字节数（归档模式为压缩后的记录）',
+}
+
+
+class Histogram:
+    """固定分桶的直方图（非累计计数，输出时再累计）"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """记录一个观测值"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        估算分位数（返回所在分桶的上界，落在 +Inf 桶时返回最大值）。
+
+        Args:
+            q: 分位（0~1）
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def merge(self, other: 'Histogram') -> None:
+        """合并另一个相同分桶的直方图"""
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': round(self.max, 6),
+            'buckets': {_format_bound(b): n for b, n in zip(self.buckets + (float('inf'),), self.counts)},
+        }
+
+
+class CrawlTelemetry:
+    """按 (指标, 站点) 记录直方图"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started = time.time()
+        self._histograms: dict[str, dict[str, Histogram]] = {}
+
+    def observe(self, metric: str, domain: str | None, value: float) -> None:
+        """
+        记录观测值。
+
+        Args:
+            metric: 指标名（见 METRICS）
+            domain: 站点域名
+            value: 秒数或字节数
+        """
+        if not self.enabled:
+            return
+        by_domain = self._histograms.setdefault(metric, {})
+        histogram = by_domain.get(domain or '')
+        if histogram is None:
+            buckets = BYTES_BUCKETS if metric.endswith('_bytes') else SECONDS_BUCKETS
+            histogram = by_domain[domain or ''] = Histogram(buckets)
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, metric: str, domain: str | None, clock=time.perf_counter) -> Iterator[None]:
+        """
+        记录代码块耗时。
+
+        Args:
+            metric: 指标名
+            domain: 站点域名
+            clock: 计时函数（perf_counter 为墙钟时间，thread_time 为当前线程 CPU 时间）
+        """
+        if not self.enabled:
+            yield
+            return
+        started = clock()
+        try:
+            yield
+        finally:
+            self.observe(metric, domain, clock() - started)
+
+    def totals(self) -> dict[str, Histogram]:
+        """各指标合并全部站点后的直方图"""
+        result = {}
+        for metric, by_domain in self._histograms.items():
+            total = None
+            for histogram in by_domain.values():
+                if total is None:
+                    total = Histogram(histogram.buckets)
+                total.merge(histogram)
+            result[metric] = total
+        return result
+
+    def to_dict(self) -> dict:
+        """JSON 报告：全部站点合计及按站点的直方图"""
+        return {
+            'started': self.started,
+            'generated': time.time(),
+            'totals': {metric: h.to_dict() for metric, h in sorted(self.totals().items())},
+            'domains': {
+                metric: {domain: h.to_dict() for domain, h in sorted(by_domain.items())}
+                for metric, by_domain in sorted(self._histograms.items())
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式报告（按站点的 histogram 指标）"""
+        lines = []
+        for metric, by_domain in sorted(self._histograms.items()):
+            name = METRIC_PREFIX + metric
+            lines.append(f'# HELP {name} {METRICS.get(metric, metric)}')
+            lines.append(f'# TYPE {name} histogram')
+            for domain, histogram in sorted(by_domain.items()):
+                label = f'domain="{_escape_label(domain)}"'
+                cumulative = 0
+                for bound, n in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{label},le="{_format_bound(bound)}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label}}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{{label}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path: str, report_format: str = 'json') -> None:
+        """
+        写出报告（临时文件 + 原子重命名，运行中可随时读取）。
+
+        Args:
+            path: 报告路径
+            report_format: json 或 prometheus
+        """
+        if report_format == 'prometheus':
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def summary_lines(self) -> list[str]:
+        """各指标汇总（日志输出用）：耗时指标按合计耗时从高到低，其后为字节数指标"""
+        lines = []
+        totals = self.totals()
+        for metric, h in sorted(totals.items(), key=lambda kv: (not kv[0].endswith('seconds'), -kv[1].sum)):
+            if metric.endswith('seconds'):
+                lines.append(
+                    f"{metric}: 次数 {h.count}, 合计 {h.sum:.2f}s, 平均 {h.sum / h.count * 1000:.1f}ms, "
+                    f"p95 ≤ {h.quantile(0.95) * 1000:.1f}ms"
+                )
+            else:
+                lines.append(f"{metric}: 次数 {h.count}, 合计 {h.sum / 1024 / 1024:.1f}MB")
+        return lines
+
+
+# 未启用遥测时使用的空实例
+NULL_TELEMETRY = CrawlTelemetry(enabled=False)
+
+
+def _format_bound(bound: float) -> str:
+    if bound == float('inf'):
+        return '+Inf'
+    return f'{bound:g}'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -7,6 +7,7 @@ URL 过滤模块 - 域名边界检查、语言过滤、通用排除规则
 import re
 import urllib.parse
 import logging
+from functools import lru_cache
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -93,6 +94,116 @@ EXCLUDE_EXTENSIONS = [
 ]
 
 
+# 完整 URL 中路径之前的部分（协议 + 网络位置），网络位置作为分组 1
+_URL_PREFIX = r'^[a-z][a-z0-9+.-]*://([^/?#]*)'
+_URL_PREFIX_RE = re.compile(_URL_PREFIX, re.IGNORECASE)
+
+
+def _to_url_pattern(pattern: str) -> str:
+    """将路径前缀模式（^/zh/）转换为匹配完整 URL 的模式"""
+    if pattern.startswith('^/'):
+        return _URL_PREFIX + pattern[1:]
+    return pattern
+
+
+def _alternation(patterns: list[str]) -> str:
+    """非捕获分组的多选结构"""
+    return '(?:' + '|'.join(f'(?:{p})' for p in patterns) + ')'
+
+
+class _PatternSet:
+    """
+    合并为单个正则的模式集合。
+
+    - 使用非捕获分组合并，保留 re 模块的前缀优化
+    - 路径前缀模式（^/zh/）共享同一个 URL 前缀，作用于 URL 路径
+    - 以 ^ 锚定的模式把锚点提到分支最外层，避免在每个位置尝试所有分支
+
+    只有命中时才逐个查找原始模式（用于日志）。
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = patterns
+
+        path = [p[1:] for p in patterns if p.startswith('^/')]
+        anchored = [p[1:] for p in patterns if p.startswith('^') and not p.startswith('^/')]
+        floating = [p for p in patterns if not p.startswith('^')]
+
+        branches = []
+        if path:
+            branches.append(_URL_PREFIX + _alternation(path))
+        if anchored:
+            branches.append('^' + _alternation(anchored))
+        if floating:
+            branches.append(_alternation(floating))
+
+        self.combined = re.compile('|'.join(branches))
+        self._compiled = [(p, re.compile(_to_url_pattern(p))) for p in patterns]
+
+    def search(self, text: str) -> Optional[str]:
+        """返回命中的原始模式，未命中返回 None"""
+        if self.combined.search(text) is None:
+            return None
+        for pattern, compiled in self._compiled:
+            if compiled.search(text):
+                return pattern
+        return None
+
+
+# 预编译的合并正则（语言模式作用于小写 URL）
+_LANGUAGE_EXCLUDE = _PatternSet(LANGUAGE_EXCLUDE_PATTERNS)
+_COMMON_EXCLUDE = _PatternSet(COMMON_EXCLUDE_PATTERNS)
+
+# 扩展名集合（不含点号），取 URL 最后一个点号之后的部分查找
+_EXCLUDE_EXTENSION_SET = frozenset(ext[1:] for ext in EXCLUDE_EXTENSIONS)
+
+
+class UrlFilter:
+    """
+    预编译的 URL 过滤器。
+
+    每个爬虫构建一次：允许域名集合只计算一次，语言与排除模式各合并为一个正则，
+    扩展名使用集合查找。filter() 与 filter_url() 返回相同的 (是否保留, 原因)。
+    """
+
+    def __init__(self, target_domain: str):
+        """
+        Args:
+            target_domain: 目标域名（如 example.com）或目标 URL
+        """
+        self.target_domain = target_domain
+        self.allowed_domains = frozenset(get_allowed_domains(target_domain))
+
+    def is_allowed_domain(self, url: str) -> bool:
+        """检查 URL 是否在允许的域名范围内"""
+        match = _URL_PREFIX_RE.match(url)
+        if match is None:
+            logger.debug(f"域名检查失败（非绝对 URL）: {url}")
+            return False
+        return match.group(1).lower() in self.allowed_domains
+
+    def filter(self, url: str) -> tuple[bool, str]:
+        """
+        综合过滤 URL。
+
+        Args:
+            url: 要检查的 URL
+
+        Returns:
+            tuple[bool, str]: (是否保留, 原因)
+        """
+        if not self.is_allowed_domain(url):
+            return False, "域名不在允许范围内"
+
+        if not is_english_url(url):
+            return False, "非英文页面"
+
+        if should_exclude(url):
+            return False, "匹配排除模式"
+
+        return True, "通过"
+
+
 def is_allowed_domain(url: str, target_domain: str) -> bool:
     """
     检查 URL 是否在允许的域名范围内。
@@ -104,17 +215,7 @@ def is_allowed_domain(url: str, target_domain: str) -> bool:
     Returns:
         bool: 如果域名在允许范围内返回 True
     """
-    try:
-        parsed = urllib.parse.urlparse(url)
-        netloc = parsed.netloc.lower()
-
-        # 获取允许的域名列表
-        allowed = get_allowed_domains(target_domain)
-
-        return netloc in allowed
-    except Exception as e:
-        logger.debug(f"域名检查失败: {url}, 错误: {e}")
-        return False
+    return _get_filter(target_domain).is_allowed_domain(url)
 
 
 def is_english_url(url: str) -> bool:
@@ -126,6 +227,8 @@ def is_english_url(url: str) -> bool:
     2. 如果 URL 匹配语言包含模式（英文），返回 True
     3. 如果没有语言标识，默认返回 True（保留）
 
+    路径前缀模式（如 ^/zh/）匹配 URL 路径，子域名模式匹配完整 URL。
+
     Args:
         url: 要检查的 URL
 
@@ -135,17 +238,12 @@ def is_english_url(url: str) -> bool:
     url_lower = url.lower()
 
     # 检查排除模式
-    for pattern in LANGUAGE_EXCLUDE_PATTERNS:
-        if re.search(pattern, url_lower):
-            logger.debug(f"排除非英文 URL (匹配模式 {pattern}): {url}")
-            return False
-
-    # 检查包含模式（如果有明确的英文标识，保留）
-    for pattern in LANGUAGE_INCLUDE_PATTERNS:
-        if re.search(pattern, url_lower):
-            return True
+    pattern = _LANGUAGE_EXCLUDE.search(url_lower)
+    if pattern:
+        logger.debug(f"排除非英文 URL (匹配模式 {pattern}): {url}")
+        return False
 
-    # 没有语言标识，默认保留
+    # 有明确的英文标识或没有语言标识，均保留
     return True
 
 
@@ -160,16 +258,16 @@ def should_exclude(url: str) -> bool:
         bool: 如果应该排除返回 True
     """
     # 检查排除模式
-    for pattern in COMMON_EXCLUDE_PATTERNS:
-        if re.search(pattern, url):
-            logger.debug(f"排除 URL (匹配模式 {pattern}): {url}")
-            return True
+    pattern = _COMMON_EXCLUDE.search(url)
+    if pattern:
+        logger.debug(f"排除 URL (匹配模式 {pattern}): {url}")
+        return True
 
     # 检查文件扩展名
-    for ext in EXCLUDE_EXTENSIONS:
-        if url.lower().endswith(ext):
-            logger.debug(f"排除 URL (文件类型 {ext}): {url}")
-            return True
+    ext = url.rpartition('.')[2].lower()
+    if ext in _EXCLUDE_EXTENSION_SET:
+        logger.debug(f"排除 URL (文件类型 .{ext}): {url}")
+        return True
 
     return False
 
@@ -184,12 +282,16 @@ def get_allowed_domains(target_url: str) -> list[str]:
     - en 子域名（英文）
 
     Args:
-        target_url: 目标 URL
+        target_url: 目标 URL 或域名（如 example.com）
 
     Returns:
         list[str]: 允许的域名列表
     """
     try:
+        # 不带协议的域名按网络位置解析
+        if '://' not in target_url:
+            target_url = f'//{target_url}'
+
         parsed = urllib.parse.urlparse(target_url)
         netloc = parsed.netloc.lower()
 
@@ -219,10 +321,18 @@ def get_allowed_domains(target_url: str) -> list[str]:
         return []
 
 
+@lru_cache(maxsize=64)
+def _get_filter(target_domain: str) -> UrlFilter:
+    """按目标域名缓存过滤器，避免每次调用重新解析"""
+    return UrlFilter(target_domain)
+
+
 def filter_url(url: str, target_domain: str) -> tuple[bool, str]:
     """
     综合过滤 URL。
 
+    大量 URL 请直接使用 UrlFilter 实例。
+
     Args:
         url: 要检查的 URL
         target_domain: 目标域名
@@ -230,16 +340,4 @@ def filter_url(url: str, target_domain: str) -> tuple[bool, str]:
     Returns:
         tuple[bool, str]: (是否保留, 原因)
     """
-    # 检查域名
-    if not is_allowed_domain(url, target_domain):
-        return False, "域名不在允许范围内"
-
-    # 检查语言
-    if not is_english_url(url):
-        return False, "非英文页面"
-
-    # 检查排除规则
-    if should_exclude(url):
-        return False, "匹配排除模式"
-
-    return True, "通过"
+    return _get_filter(target_domain).filter(url)
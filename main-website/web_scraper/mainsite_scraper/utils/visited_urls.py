@@ -0,0 +1,182 @@
+"""
+已访问 URL 集合模块 - 规范化 URL + 可扩展 Bloom 过滤器 + 磁盘精确校验
+
+爬虫与 Pipeline 共用一个实例（每次爬取一个，覆盖全部站点）：
+- URL 先规范化（忽略协议、主机大小写、www.、默认端口、末尾斜杠、片段和跟踪参数），
+  同一页面的不同写法只算一次
+- 内存中只保存 Bloom 过滤器，大小随 URL 数扩展，并受内存上限约束
+- Bloom 过滤器判定"可能已存在"时才查询 SQLite 精确表，排除误判；
+  判定"不存在"的 URL（绝大多数新 URL）无需访问磁盘
+
+精确表只保存本次爬取的 URL，打开时清空，关闭时删除。
+
+作者：伍志勇
+"""
+
+import os
+import sqlite3
+import logging
+import urllib.parse
+
+from .bloom_filter import ScalableBloomFilter
+
+logger = logging.getLogger(__name__)
+
+# 精确表数据库文件名
+VISITED_DB_NAME = 'visited_urls.sqlite3'
+
+# 规范化时移除的跟踪参数（utm_* 另按前缀匹配）
+TRACKING_PARAMS = frozenset({
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'spm',
+})
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化 URL，作为去重键。
+
+    Args:
+        url: 绝对 URL
+
+    Returns:
+        str: 规范化后的键（不含协议），如 example.com/products?id=1
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+
+    host = (parts.hostname or '').rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f'{host}:{port}'
+
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+
+    query = parts.query
+    if query:
+        query = '&'.join(
+            pair for pair in query.split('&')
+            if pair and not _is_tracking_param(pair.split('=', 1)[0])
+        )
+
+    return f'{netloc}{path}?{query}' if query else f'{netloc}{path}'
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name.startswith('utm_') or name in TRACKING_PARAMS
+
+
+class VisitedUrls:
+    """
+    已访问 URL 集合。
+
+    与 set 相同的 `url in visited` / add 用法，add 返回是否为新 URL。
+    不指定 db_path 时只使用 Bloom 过滤器（极少数新 URL 会被误判为已访问）。
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        initial_capacity: int = 100_000,
+        error_rate: float = 0.001,
+        max_bytes: int = 0,
+        commit_every: int = 1000
+    ):
+        """
+        Args:
+            db_path: 精确表数据库路径（None 表示不做精确校验）
+            initial_capacity: Bloom 过滤器初始容量
+            error_rate: Bloom 过滤器误判率
+            max_bytes: Bloom 过滤器内存上限（0 表示不限制）
+            commit_every: 精确表每累计多少次写入提交一次
+        """
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self._bloom = ScalableBloomFilter(initial_capacity, error_rate, max_bytes)
+        self._conn: sqlite3.Connection | None = None
+        self._pending_writes = 0
+
+        # 精确校验次数与其中的误判次数
+        self.exact_lookups = 0
+        self.false_positives = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            _remove_db(db_path)
+            self._conn = sqlite3.connect(db_path)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=OFF')
+            self._conn.execute('CREATE TABLE visited (url TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    def __len__(self) -> int:
+        return len(self._bloom)
+
+    def __contains__(self, url: str) -> bool:
+        key = canonicalize_url(url)
+        return key in self._bloom and self._confirm(key)
+
+    @property
+    def nbytes(self) -> int:
+        """Bloom 过滤器占用的字节数"""
+        return self._bloom.nbytes
+
+    def add(self, url: str) -> bool:
+        """
+        记录 URL。
+
+        Returns:
+            bool: URL 此前未访问时返回 True
+        """
+        key = canonicalize_url(url)
+        if not self._bloom.add(key) and self._confirm(key):
+            return False
+
+        if self._conn is not None:
+            self._conn.execute('INSERT OR IGNORE INTO visited (url) VALUES (?)', (key,))
+            self._pending_writes += 1
+            if self._pending_writes >= self.commit_every:
+                self._conn.commit()
+                self._pending_writes = 0
+        return True
+
+    def stats(self) -> dict[str, int]:
+        """统计信息（写入 Scrapy 统计项）"""
+        return {
+            'count': len(self),
+            'bloom_bytes': self.nbytes,
+            'bloom_filters': self._bloom.num_filters,
+            'exact_lookups': self.exact_lookups,
+            'false_positives': self.false_positives,
+        }
+
+    def close(self) -> None:
+        """关闭并删除精确表"""
+        if self._conn is None:
+            return
+        self._conn.close()
+        self._conn = None
+        _remove_db(self.db_path)
+
+    def _confirm(self, key: str) -> bool:
+        """Bloom 过滤器判定可能存在时查询精确表（无精确表时信任 Bloom 过滤器）"""
+        if self._conn is None:
+            return True
+        self.exact_lookups += 1
+        found = self._conn.execute('SELECT 1 FROM visited WHERE url = ?', (key,)).fetchone() is not None
+        if not found:
+            self.false_positives += 1
+        return found
+
+
+def _remove_db(db_path: str) -> None:
+    """删除数据库文件及 WAL 附属文件"""
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(db_path + suffix)
+        except FileNotFoundError:
+            pass
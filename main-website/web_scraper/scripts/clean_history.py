@@ -4,8 +4,10 @@
 
 用于清理爬取历史记录，支持：
 - 按站点清理
-- 清理所有站点
+- 清理所有站点（多进程并行，每个进程一次处理一个站点）
 - 按时间清理
+- 压缩：删除页面文件已不存在的条目（归档模式下查归档索引）
+- 汇总报告（可输出为 JSON）
 
 作者：伍志勇
 """
@@ -14,16 +16,27 @@ import argparse
 import json
 import os
 import sys
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 # 添加项目路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
 
-from utils.history_manager import load_history, save_history, cleanup_expired, CrawlHistory
+from utils.history_cleaner import CleanReport, clean_site_history, summarize_reports
+from utils.history_manager import load_history
+from utils.history_store import SqliteUrlStore, get_db_path
 
 
-def clean_site(site: str, output_dir: str, days: int | None, dry_run: bool = False) -> int:
+def clean_site(
+    site: str,
+    output_dir: str,
+    days: int | None,
+    dry_run: bool = False,
+    backend: str = 'json',
+    compact: bool = False,
+    force: bool = False
+) -> int:
     """
     清理指定站点的历史记录。
 
@@ -32,67 +45,144 @@ def clean_site(site: str, output_dir: str, days: int | None, dry_run: bool = Fal
         output_dir: 输出目录
         days: 清理多少天前的记录（None 表示不过期清理）
         dry_run: 是否只显示不实际执行
+        backend: 历史存储后端（json 或 sqlite）
+        compact: 是否删除页面已不存在的条目
+        force: 所有页面都不存在时仍然压缩
 
     Returns:
         int: 清理的条目数量
     """
-    history = load_history(site, output_dir)
-
-    if days is not None:
-        removed = cleanup_expired(history, days)
-    else:
-        removed = 0
-
-    if removed > 0 and not dry_run:
-        save_history(history, output_dir)
-        print(f"已清理 {site}: {removed} 条记录")
-    elif removed > 0 and dry_run:
-        print(f"[DRY-RUN] 将清理 {site}: {removed} 条记录")
-    else:
-        print(f"{site}: 无需清理")
-
-    return removed
-
-
-def clean_all_sites(output_dir: str, days: int | None, dry_run: bool = False) -> int:
+    report = clean_site_history(site, output_dir, days, compact, dry_run, backend, force)
+    print_site_report(report, dry_run)
+    return report.removed
+
+
+def clean_all_sites(
+    output_dir: str,
+    days: int | None,
+    dry_run: bool = False,
+    backend: str = 'json',
+    compact: bool = False,
+    force: bool = False,
+    workers: int | None = None,
+    report_path: str | None = None
+) -> int:
     """
     清理所有站点的历史记录。
 
+    各站点在进程池中并行处理；workers 为 1 时在当前进程中依次处理。
+
     Args:
         output_dir: 输出目录
         days: 清理多少天前的记录
         dry_run: 是否只显示不实际执行
+        backend: 历史存储后端（json 或 sqlite）
+        compact: 是否删除页面已不存在的条目
+        force: 所有页面都不存在时仍然压缩
+        workers: 进程数（默认：CPU 核数）
+        report_path: 汇总报告 JSON 输出路径
 
     Returns:
         int: 总清理条目数量
     """
-    total_removed = 0
-    sites_cleaned = 0
-
-    # 遍历输出目录下的所有站点
     output_path = Path(output_dir)
     if not output_path.exists():
         print(f"输出目录不存在: {output_dir}")
         return 0
 
-    for site_dir in output_path.iterdir():
-        if site_dir.is_dir():
-                site = site_dir.name
-                removed = clean_site(site, output_dir, days, dry_run)
-                if removed > 0:
-                    total_removed += removed
-                    sites_cleaned += 1
+    sites = sorted(site_dir.name for site_dir in output_path.iterdir() if site_dir.is_dir())
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sites) or 1))
+    options = (days, compact, dry_run, backend, force)
+
+    started = time.perf_counter()
+    reports: list[CleanReport] = []
+    errors: dict[str, str] = {}
+
+    if workers == 1:
+        for site in sites:
+            try:
+                reports.append(clean_site_history(site, output_dir, *options))
+            except Exception as e:
+                errors[site] = str(e)
+                print(f"{site}: 清理失败: {e}")
+                continue
+            print_site_report(reports[-1], dry_run)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(clean_site_history, site, output_dir, *options): site
+                for site in sites
+            }
+            for future in as_completed(futures):
+                site = futures[future]
+                try:
+                    reports.append(future.result())
+                except Exception as e:
+                    errors[site] = str(e)
+                    print(f"{site}: 清理失败: {e}")
+                    continue
+                print_site_report(reports[-1], dry_run)
+
+    totals = summarize_reports(reports)
+    totals.update(sites_failed=len(errors), workers=workers, seconds=round(time.perf_counter() - started, 3))
+    print_summary(totals, dry_run)
+
+    if report_path:
+        reports.sort(key=lambda r: r.site)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'totals': totals,
+                'sites': [r.to_dict() for r in reports],
+                'errors': errors,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"报告已写入: {report_path}")
+
+    return totals['removed']
+
+
+def print_site_report(report: CleanReport, dry_run: bool = False) -> None:
+    """输出单个站点的清理结果"""
+    detail = f"过期 {report.expired}, 页面缺失 {report.missing}"
+    if report.skipped and not report.removed:
+        print(f"{report.site}: 跳过（{report.skipped}）")
+        return
+    if report.removed and dry_run:
+        print(f"[DRY-RUN] 将清理 {report.site}: {report.removed} 条记录（{detail}）")
+    elif report.removed:
+        print(f"已清理 {report.site}: {report.removed} 条记录（{detail}）, "
+              f"{_format_size(report.bytes_before)} -> {_format_size(report.bytes_after)}")
+    else:
+        print(f"{report.site}: 无需清理")
+    if report.skipped:
+        print(f"  注意: {report.skipped}")
 
-    print(f"\n总计: 清理 {sites_cleaned} 个站点, {total_removed} 条记录")
-    return total_removed
 
+def print_summary(totals: dict, dry_run: bool = False) -> None:
+    """输出汇总报告"""
+    prefix = '[DRY-RUN] ' if dry_run else ''
+    print(f"\n{prefix}总计: {totals['sites']} 个站点, 清理 {totals['sites_cleaned']} 个, "
+          f"跳过 {totals['sites_skipped']} 个, 失败 {totals['sites_failed']} 个")
+    print(f"  扫描条目: {totals['scanned']}")
+    print(f"  删除条目: {totals['removed']}（过期 {totals['expired']}, 页面缺失 {totals['missing']}）")
+    print(f"  历史文件: {_format_size(totals['bytes_before'])} -> {_format_size(totals['bytes_after'])}")
+    print(f"  耗时: {totals['seconds']:.2f} 秒（{totals['workers']} 个进程）")
 
-def list_sites(output_dir: str) -> None:
+
+def _format_size(size: int) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def list_sites(output_dir: str, backend: str = 'json') -> None:
     """
-    列出所有站点及其统计信息。
+    列出所有站点及其统计信息（只读，sqlite 后端只列出已有数据库的站点）。
 
     Args:
         output_dir: 输出目录
+        backend: 历史存储后端（json 或 sqlite）
     """
     output_path = Path(output_dir)
     if not output_path.exists():
@@ -105,11 +195,16 @@ def list_sites(output_dir: str) -> None:
     for site_dir in output_path.iterdir():
         if site_dir.is_dir():
                 site = site_dir.name
-                history = load_history(site, output_dir)
+                # 只列出已有 sqlite 数据库的站点，不触发从 JSON 的自动迁移
+                if backend == 'sqlite' and not os.path.exists(get_db_path(site, output_dir)):
+                    continue
+                history = load_history(site, output_dir, backend)
 
                 total_urls = len(history.urls)
                 first_crawl = history.first_crawl[:19] if history.first_crawl else 'N/A'
                 last_crawl = history.last_crawl[:19] if history.last_crawl else 'N/A'
+                if isinstance(history.urls, SqliteUrlStore):
+                    history.urls.close()
 
                 print(f"\n{site}:")
                 print(f"  URL 数量: {total_urls}")
@@ -149,6 +244,38 @@ def main():
         help='输出目录（默认：./output）'
     )
 
+    parser.add_argument(
+        '--backend',
+        choices=['json', 'sqlite'],
+        default='json',
+        help='历史存储后端（默认：json）'
+    )
+
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='删除页面文件已不存在的条目（归档模式下查归档索引）'
+    )
+
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='压缩时即使站点所有页面都不存在也删除（默认视为输出目录不对而跳过）'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='--all 时并行处理的进程数（默认：CPU 核数）'
+    )
+
+    parser.add_argument(
+        '--report',
+        type=str,
+        metavar='PATH',
+        help='--all 时把汇总报告写入 JSON 文件'
+    )
+
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -170,17 +297,22 @@ def main():
 
     # 列出站点
     if args.list:
-        list_sites(args.output_dir)
+        list_sites(args.output_dir, args.backend)
         return
 
     # 清理指定站点
     if args.site:
-        clean_site(args.site, args.output_dir, args.older_than, args.dry_run)
+        clean_site(
+            args.site, args.output_dir, args.older_than, args.dry_run, args.backend, args.compact, args.force
+        )
         return
 
     # 清理所有站点
     if args.all:
-        clean_all_sites(args.output_dir, args.older_than, args.dry_run)
+        clean_all_sites(
+            args.output_dir, args.older_than, args.dry_run, args.backend,
+            args.compact, args.force, args.workers, args.report
+        )
 
 
 if __name__ == '__main__':
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+页面归档导出脚本
+
+把归档模式（OUTPUT_MODE = 'warc' / 'zstd'）保存的页面导出为逐页 .html 的目录结构，
+与 files 模式的输出相同（路径见历史记录与 _path_index.json），支持：
+- 按站点导出
+- 导出所有站点
+- 导出到其他目录（一并复制资源目录）
+- 按 URL 查看单个页面
+
+作者：伍志勇
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.page_archive import ARCHIVE_DIR, PageArchive
+
+
+def export_site(site: str, output_dir: str, dest_dir: str | None = None) -> int:
+    """
+    导出指定站点的归档。
+
+    Args:
+        site: 站点域名
+        output_dir: 输出目录
+        dest_dir: 导出目录（默认导出到站点目录本身）
+
+    Returns:
+        int: 导出的页面数
+    """
+    site_dir = os.path.join(output_dir, site)
+    if not os.path.isdir(os.path.join(site_dir, ARCHIVE_DIR)):
+        print(f"{site}: 无页面归档，跳过")
+        return 0
+
+    archive = PageArchive.open_existing(site_dir)
+    try:
+        target = os.path.join(dest_dir, site) if dest_dir else None
+        count = archive.export(target)
+    finally:
+        archive.close()
+
+    print(f"已导出 {site}: {count} 个页面 -> {target or site_dir}")
+    return count
+
+
+def export_all_sites(output_dir: str, dest_dir: str | None = None) -> int:
+    """
+    导出所有站点的归档。
+
+    Args:
+        output_dir: 输出目录
+        dest_dir: 导出目录
+
+    Returns:
+        int: 导出的页面总数
+    """
+    output_path = Path(output_dir)
+    if not output_path.exists():
+        print(f"输出目录不存在: {output_dir}")
+        return 0
+
+    total = 0
+    for site_dir in output_path.iterdir():
+        if site_dir.is_dir():
+            total += export_site(site_dir.name, output_dir, dest_dir)
+
+    print(f"\n总计: 导出 {total} 个页面")
+    return total
+
+
+def show_page(site: str, output_dir: str, url: str) -> bool:
+    """
+    输出归档中单个页面的元数据与正文。
+
+    Returns:
+        bool: 页面是否存在
+    """
+    archive = PageArchive.open_existing(os.path.join(output_dir, site))
+    try:
+        page = archive.read(url)
+    finally:
+        archive.close()
+
+    if page is None:
+        print(f"归档中没有该 URL: {url}", file=sys.stderr)
+        return False
+
+    print(f"URL: {page.url}", file=sys.stderr)
+    print(f"抓取时间: {page.fetched}  状态: {page.status}  内容哈希: {page.content_hash}", file=sys.stderr)
+    print(f"导出路径: {page.local_path}", file=sys.stderr)
+    sys.stdout.buffer.write(page.body)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='导出页面归档为逐页 HTML 目录结构',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        '--site',
+        type=str,
+        help='指定要导出的站点域名'
+    )
+
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='导出所有站点'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default='./output',
+        help='输出目录（默认：./output）'
+    )
+
+    parser.add_argument(
+        '--dest',
+        type=str,
+        help='导出目录（默认：导出到各站点目录本身）'
+    )
+
+    parser.add_argument(
+        '--url',
+        type=str,
+        help='只输出指定 URL 的页面正文（需同时指定 --site）'
+    )
+
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.site:
+            parser.error('--url 需要同时指定 --site')
+        sys.exit(0 if show_page(args.site, args.output_dir, args.url) else 1)
+
+    if not args.site and not args.all:
+        parser.error('请指定 --site 或 --all')
+
+    if args.site:
+        export_site(args.site, args.output_dir, args.dest)
+        return
+
+    if args.all:
+        export_all_sites(args.output_dir, args.dest)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+历史记录迁移脚本
+
+将 crawl_history.json 一次性迁移到 SQLite 历史后端，支持：
+- 按站点迁移
+- 迁移所有站点
+
+原 JSON 文件保留不变，可随时切回 json 后端。
+
+作者：伍志勇
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.history_manager import migrate_json_history
+from utils.history_store import get_db_path
+
+
+def migrate_site(site: str, output_dir: str, overwrite: bool = False) -> int:
+    """
+    迁移指定站点的历史记录。
+
+    Args:
+        site: 站点域名
+        output_dir: 输出目录
+        overwrite: 已存在 SQLite 历史时是否覆盖
+
+    Returns:
+        int: 迁移的 URL 数量
+    """
+    json_path = os.path.join(output_dir, site, 'crawl_history.json')
+    db_path = get_db_path(site, output_dir)
+
+    if not os.path.exists(json_path):
+        print(f"{site}: 无 JSON 历史记录，跳过")
+        return 0
+
+    if os.path.exists(db_path):
+        if not overwrite:
+            print(f"{site}: 已存在 SQLite 历史记录，跳过（使用 --overwrite 覆盖）")
+            return 0
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    count = migrate_json_history(site, output_dir)
+    print(f"已迁移 {site}: {count} 个 URL")
+    return count
+
+
+def migrate_all_sites(output_dir: str, overwrite: bool = False) -> int:
+    """
+    迁移所有站点的历史记录。
+
+    Args:
+        output_dir: 输出目录
+        overwrite: 已存在 SQLite 历史时是否覆盖
+
+    Returns:
+        int: 迁移的 URL 总数
+    """
+    output_path = Path(output_dir)
+    if not output_path.exists():
+        print(f"输出目录不存在: {output_dir}")
+        return 0
+
+    total = 0
+    for site_dir in output_path.iterdir():
+        if site_dir.is_dir():
+            total += migrate_site(site_dir.name, output_dir, overwrite)
+
+    print(f"\n总计: 迁移 {total} 个 URL")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='将 crawl_history.json 迁移到 SQLite 历史后端',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        '--site',
+        type=str,
+        help='指定要迁移的站点域名'
+    )
+
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='迁移所有站点'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default='./output',
+        help='输出目录（默认：./output）'
+    )
+
+    parser.add_argument(
+        '--overwrite',
+        action='store_true',
+        help='覆盖已存在的 SQLite 历史记录'
+    )
+
+    args = parser.parse_args()
+
+    if not args.site and not args.all:
+        parser.error('请指定 --site 或 --all')
+
+    if args.site:
+        migrate_site(args.site, args.output_dir, args.overwrite)
+        return
+
+    if args.all:
+        migrate_all_sites(args.output_dir, args.overwrite)
+
+
+if __name__ == '__main__':
+    main()
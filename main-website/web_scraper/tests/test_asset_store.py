@@ -0,0 +1,111 @@
+"""
+资源存储模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import hashlib
+import os
+import tempfile
+import sys
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.asset_store import AssetStore
+
+
+class FakeResponse:
+    """最小化的 requests 响应"""
+
+    def __init__(self, status_code: int, body: bytes):
+        self.status_code = status_code
+        self.body = body
+
+    def iter_content(self, chunk_size: int):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """按 URL 返回固定内容的会话，记录请求次数"""
+
+    def __init__(self, responses: dict):
+        self.responses = responses
+        self.requested = []
+
+    def get(self, url, timeout=None, stream=False):
+        self.requested.append(url)
+        response = self.responses.get(url)
+        if isinstance(response, Exception):
+            raise response
+        if response is None:
+            return FakeResponse(404, b'')
+        return FakeResponse(200, response)
+
+
+class TestAssetStore:
+    """测试 AssetStore"""
+
+    def test_content_addressed(self):
+        """测试相同内容只保存一份"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            session = FakeSession({
+                'https://example.com/a.css': b'body{}',
+                'https://cdn.example.com/b.css': b'body{}',
+            })
+            store = AssetStore(tmpdir, session=session)
+
+            path_a = store.fetch('https://example.com/a.css', '.css')
+            path_b = store.fetch('https://cdn.example.com/b.css', '.css')
+
+            assert path_a == path_b
+            assert path_a == store.blob_path(hashlib.sha256(b'body{}').hexdigest(), '.css')
+            assert store.blobs_written == 1
+            assert store.blobs_reused == 1
+            with open(path_a, 'rb') as f:
+                assert f.read() == b'body{}'
+
+    def test_url_index(self):
+        """测试同一 URL 只下载一次"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            session = FakeSession({'https://example.com/logo.png': b'PNG'})
+            store = AssetStore(tmpdir, session=session)
+
+            first = store.fetch('https://example.com/logo.png', '.png')
+            second = store.fetch('https://example.com/logo.png', '.png')
+
+            assert first == second
+            assert store.lookup('https://example.com/logo.png') == first
+            assert session.requested == ['https://example.com/logo.png']
+
+    def test_failed_download(self):
+        """测试下载失败返回 None 且不留下临时文件"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            session = FakeSession({
+                'https://example.com/error.js': requests.ConnectionError('refused'),
+            })
+            store = AssetStore(tmpdir, session=session)
+
+            assert store.fetch('https://example.com/missing.js', '.js') is None
+            assert store.fetch('https://example.com/error.js', '.js') is None
+            assert store.lookup('https://example.com/missing.js') is None
+            assert not os.path.exists(store.blobs_dir) or os.listdir(store.blobs_dir) == []
+
+    def test_blob_layout(self):
+        """测试 blob 按哈希前两位分目录"""
+        store = AssetStore('/output/example.com')
+        path = store.blob_path('abcdef', '.CSS')
+        assert path == os.path.join('/output/example.com', '_assets', 'blobs', 'ab', 'abcdef.css')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,84 @@
+"""
+Bloom 过滤器模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.bloom_filter import BloomFilter, ScalableBloomFilter
+
+
+class TestBloomFilter:
+    """测试 BloomFilter"""
+
+    def test_add_and_contains(self):
+        """测试已加入的元素一定存在，重复加入返回 False"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        urls = [f'https://example.com/page/{i}' for i in range(1000)]
+
+        assert all(bloom.add(url) for url in urls[:10])
+        for url in urls[10:]:
+            bloom.add(url)
+
+        assert all(url in bloom for url in urls)
+        assert not bloom.add(urls[0])
+        # 被误判为已存在的元素不计入
+        assert 990 <= len(bloom) <= 1000
+
+    def test_false_positive_rate(self):
+        """测试达到容量时误判率接近设定值"""
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        for i in range(10000):
+            bloom.add(f'https://example.com/a/{i}')
+
+        false_positives = sum(f'https://example.com/b/{i}' in bloom for i in range(10000))
+        assert false_positives < 200
+
+    def test_size(self):
+        """测试位数组大小按容量与误判率计算"""
+        bloom = BloomFilter(capacity=1_000_000, error_rate=0.001)
+        assert 1_700_000 < bloom.nbytes < 1_900_000
+        assert bloom.num_hashes == 10
+        assert len(bloom) == 0
+        assert not bloom.is_full
+
+    def test_invalid_arguments(self):
+        """测试非法参数"""
+        with pytest.raises(ValueError):
+            BloomFilter(capacity=0)
+        with pytest.raises(ValueError):
+            BloomFilter(error_rate=1.0)
+
+
+class TestScalableBloomFilter:
+    """测试 ScalableBloomFilter"""
+
+    def test_grows_beyond_initial_capacity(self):
+        """测试写满后扩展，总误判率保持在设定值附近"""
+        bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+        for i in range(20000):
+            bloom.add(f'https://example.com/a/{i}')
+
+        assert bloom.num_filters > 1
+        assert all(f'https://example.com/a/{i}' in bloom for i in range(20000))
+        false_positives = sum(f'https://example.com/b/{i}' in bloom for i in range(10000))
+        assert false_positives < 200
+
+    def test_memory_cap(self):
+        """测试达到内存上限后不再扩展"""
+        bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01, max_bytes=8000)
+        for i in range(20000):
+            bloom.add(f'https://example.com/a/{i}')
+
+        assert bloom.saturated
+        assert bloom.nbytes <= 8000
+        assert not bloom.add('https://example.com/a/0')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
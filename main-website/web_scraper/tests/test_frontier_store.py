@@ -0,0 +1,140 @@
+"""
+爬取队列存储模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.frontier_store import FrontierStore
+
+
+def drain(store: FrontierStore) -> list[bytes]:
+    """依次取出全部请求"""
+    payloads = []
+    while (entry := store.pop()) is not None:
+        payloads.append(entry[1])
+    return payloads
+
+
+class TestFrontierStore:
+    """测试 FrontierStore"""
+
+    def test_priority_order(self):
+        """测试新 URL 优先，其次 lastmod 从新到旧，再按深度"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = FrontierStore(os.path.join(tmpdir, 'frontier.sqlite3'))
+            store.push(b'old-known', 'a.com', 'f1', is_new=False, lastmod='2026-03-01')
+            store.push(b'new-deep', 'a.com', 'f2', depth=3)
+            store.push(b'new-shallow', 'a.com', 'f3', depth=1)
+            store.push(b'new-recent', 'a.com', 'f4', lastmod='2026-02-01', depth=5)
+            store.push(b'new-older', 'a.com', 'f5', lastmod='2025-12-01')
+            store.push(b'sitemap', 'a.com', None, priority=10, is_new=False)
+
+            assert drain(store) == [
+                b'sitemap', b'new-recent', b'new-older', b'new-shallow', b'new-deep', b'old-known'
+            ]
+            store.close()
+
+    def test_duplicate_fingerprint(self):
+        """测试相同指纹只入队一次（完成后仍然去重），无指纹不去重"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = FrontierStore(os.path.join(tmpdir, 'frontier.sqlite3'))
+            assert store.push(b'a', 'a.com', 'f1')
+            assert not store.push(b'a', 'a.com', 'f1')
+
+            request_id, _ = store.pop()
+            store.done(request_id)
+            assert not store.push(b'a', 'a.com', 'f1')
+
+            assert store.push(b'b', 'a.com', None)
+            assert store.push(b'b', 'a.com', None)
+            assert len(store) == 2
+            store.close()
+
+    def test_round_robin_domains(self):
+        """测试各站点轮流出队"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = FrontierStore(os.path.join(tmpdir, 'frontier.sqlite3'))
+            for i in range(3):
+                store.push(f'a{i}'.encode(), 'a.com', f'a{i}')
+            store.push(b'b0', 'b.com', 'b0')
+
+            assert drain(store) == [b'a0', b'b0', b'a1', b'a2']
+            store.close()
+
+    def test_max_active_domains(self):
+        """测试活跃站点数上限：站点的请求全部完成后等待中的站点才加入轮转"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = FrontierStore(os.path.join(tmpdir, 'frontier.sqlite3'), max_active_domains=2)
+            for domain in ('a', 'b', 'c'):
+                for i in range(2):
+                    store.push(f'{domain}{i}'.encode(), f'{domain}.com', f'{domain}{i}')
+
+            popped = [store.pop() for _ in range(3)]
+            assert [payload for _, payload in popped] == [b'a0', b'b0', b'a1']
+            assert store.active_domains == 2
+
+            # a 的请求仍在下载中，回调可能继续产出请求：保持活跃
+            store.push(b'a2', 'a.com', 'a2')
+            assert store.pop()[1] == b'b1'
+            popped.append(store.pop())
+            assert popped[-1][1] == b'a2'
+
+            # a 的请求全部完成后退出，c 加入
+            for request_id, payload in popped:
+                if payload.startswith(b'a'):
+                    store.done(request_id)
+            assert store.active_domains == 2
+            assert store.pop()[1] == b'c0'
+            store.close()
+
+    def test_admit_when_idle(self):
+        """测试活跃站点只剩下载中的请求时，等待中的站点临时超出上限加入"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = FrontierStore(os.path.join(tmpdir, 'frontier.sqlite3'), max_active_domains=1)
+            store.push(b'a0', 'a.com', 'a0')
+            store.push(b'b0', 'b.com', 'b0')
+
+            assert store.pop()[1] == b'a0'
+            assert store.pop()[1] == b'b0'
+            assert store.active_domains == 2
+            assert store.pop() is None
+            store.close()
+
+    def test_resume(self):
+        """测试重新打开后恢复待抓取与中断时正在下载的请求"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'frontier.sqlite3')
+            store = FrontierStore(path)
+            for i in range(4):
+                store.push(f'r{i}'.encode(), 'a.com', f'r{i}')
+            done_id, _ = store.pop()
+            store.done(done_id)
+            store.pop()  # 下载中被杀
+            store.close()
+
+            resumed = FrontierStore(path)
+            assert len(resumed) == 3
+            assert drain(resumed) == [b'r1', b'r2', b'r3']
+            resumed.close()
+
+    def test_clear(self):
+        """测试正常完成后清空队列"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'frontier.sqlite3')
+            store = FrontierStore(path)
+            store.push(b'a', 'a.com', 'f1')
+            store.clear()
+            assert len(store) == 0
+            assert store.push(b'a', 'a.com', 'f1')
+            store.close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
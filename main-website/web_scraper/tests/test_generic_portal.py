@@ -0,0 +1,100 @@
+"""
+通用门户爬虫链接发现单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scrapy import Request
+from scrapy.http import HtmlResponse, Response
+
+from mainsite_scraper.spiders.generic_portal import GenericPortalSpider
+
+HOME = 'https://example.com/'
+
+
+def page(*links: str) -> bytes:
+    anchors = ''.join(f'<a href="{link}">{link}</a>' for link in links)
+    return f'<html><head><title>t</title></head><body>{anchors}</body></html>'.encode()
+
+
+def crawl(output_dir: str, pages: dict[str, tuple[bytes, str | None]]) -> list[str]:
+    """
+    模拟一次没有 sitemap 的站点爬取。
+
+    Args:
+        output_dir: 输出目录（两次运行共用，保存历史）
+        pages: URL → (页面内容, ETag)，请求头中的 If-None-Match 与 ETag 相同时返回 304
+
+    Returns:
+        list[str]: 返回 200 的页面 URL
+    """
+    spider = GenericPortalSpider(url=HOME, output_dir=output_dir)
+    site = spider.site
+    queue = []
+    for _ in site.sitemap_urls:
+        queue.extend(spider._sitemap_attempt_done(site, False))
+
+    fetched = []
+    while queue:
+        request = queue.pop(0)
+        body, etag = pages[request.url]
+        headers = {'Content-Type': 'text/html'}
+        if etag:
+            headers['ETag'] = etag
+        if etag and request.headers.get('If-None-Match', b'').decode() == etag:
+            response = Response(request.url, status=304, headers=headers, request=request)
+        else:
+            response = HtmlResponse(request.url, body=body, headers=headers, request=request)
+            fetched.append(request.url)
+
+        for output in request.callback(response) or ():
+            if isinstance(output, Request):
+                queue.append(output)
+            else:
+                spider.item_scraped(output, response, spider)
+
+    spider.closed('finished')
+    return fetched
+
+
+class TestLinkDiscoveryRerun:
+    """测试重复运行时的链接发现"""
+
+    def test_without_validators(self):
+        """测试没有校验头时重新抓取非叶子页面，发现其下新增的页面并跳过叶子页面"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pages = {
+                HOME: (page('/a'), None),
+                'https://example.com/a': (page('/a/b'), None),
+                'https://example.com/a/b': (page(), None),
+            }
+            assert crawl(tmpdir, pages) == list(pages)
+
+            pages['https://example.com/a'] = (page('/a/b', '/a/new'), None)
+            pages['https://example.com/a/new'] = (page(), None)
+            assert crawl(tmpdir, pages) == [HOME, 'https://example.com/a', 'https://example.com/a/new']
+
+    def test_not_modified(self):
+        """测试 304 页面沿用历史出链，发现未变化页面之下新增的页面"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pages = {
+                HOME: (page('/a'), '"h1"'),
+                'https://example.com/a': (page('/a/b'), '"a1"'),
+                'https://example.com/a/b': (page(), '"b1"'),
+            }
+            assert crawl(tmpdir, pages) == list(pages)
+
+            pages['https://example.com/a/b'] = (page('/a/b/new'), '"b2"')
+            pages['https://example.com/a/b/new'] = (page(), None)
+            assert crawl(tmpdir, pages) == [HOME, 'https://example.com/a/b', 'https://example.com/a/b/new']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
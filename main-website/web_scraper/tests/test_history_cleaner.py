@@ -0,0 +1,188 @@
+"""
+历史记录清理模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import io
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.history_cleaner import clean_site_history, iter_history_file, summarize_reports
+from utils.history_manager import CrawlHistory, load_history, save_history
+from utils.page_archive import PageArchive, encode_record
+
+SITE = 'example.com'
+
+
+def _days_ago(days: int) -> str:
+    return (datetime.now() - timedelta(days=days)).isoformat(timespec='seconds')
+
+
+def _make_site(tmpdir: str, backend: str = 'json') -> str:
+    """old 已过期；kept 页面存在；gone 页面已删除；dup 为未保存页面的重复条目"""
+    site_dir = os.path.join(tmpdir, SITE)
+    os.makedirs(site_dir)
+    kept_path = os.path.join(site_dir, 'kept.html')
+    with open(kept_path, 'w') as f:
+        f.write('<html></html>')
+
+    history = CrawlHistory(SITE, _days_ago(100), _days_ago(1), {
+        'https://example.com/old': {'first_seen': _days_ago(60), 'content_hash': 'a' * 64,
+                                    'local_path': kept_path},
+        'https://example.com/kept': {'first_seen': _days_ago(5), 'content_hash': 'b' * 64,
+                                     'local_path': kept_path, 'etag': '"中文"'},
+        'https://example.com/gone': {'first_seen': _days_ago(5), 'content_hash': 'c' * 64,
+                                     'local_path': os.path.join(site_dir, 'gone.html')},
+        'https://example.com/dup': {'first_seen': _days_ago(5), 'content_hash': 'd' * 64,
+                                    'local_path': None, 'duplicate_of': 'https://example.com/kept'},
+    })
+    save_history(history, tmpdir)
+    if backend == 'sqlite':
+        # 首次以 SQLite 后端加载时自动从 JSON 迁移
+        load_history(SITE, tmpdir, 'sqlite').urls.close()
+    return site_dir
+
+
+class TestIterHistoryFile:
+    """测试流式解析"""
+
+    def test_small_chunks(self):
+        """测试分块边界落在任意位置时解析结果与 json.load 相同"""
+        data = {
+            'site': SITE,
+            'urls': {f'https://example.com/{i}': {'first_seen': _days_ago(i), 'n': 12345678, 'ok': True}
+                     for i in range(20)},
+            'last_crawl': _days_ago(0),
+        }
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+
+        parsed = {}
+        for key, value in iter_history_file(io.StringIO(text), chunk_size=7):
+            parsed[key] = dict(value) if key == 'urls' else value
+        assert parsed == data
+
+    def test_unconsumed_entries_are_skipped(self):
+        """测试未遍历的 urls 不影响后续字段"""
+        text = json.dumps({'urls': {'a': {'first_seen': None}}, 'site': SITE})
+        assert [key for key, _ in iter_history_file(io.StringIO(text), chunk_size=4)] == ['urls', 'site']
+
+    def test_malformed(self):
+        """测试格式错误时抛出 ValueError"""
+        with pytest.raises(ValueError):
+            list(iter_history_file(io.StringIO('{"urls": {"a": {"first_seen": ')))
+
+
+class TestCleanSiteHistory:
+    """测试 clean_site_history"""
+
+    def test_expire_and_compact(self):
+        """测试过期与压缩，输出格式与 save_history 相同"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _make_site(tmpdir)
+            report = clean_site_history(SITE, tmpdir, days=30, compact=True)
+
+            assert (report.scanned, report.expired, report.missing) == (4, 1, 1)
+            assert report.bytes_after < report.bytes_before
+            history = load_history(SITE, tmpdir)
+            assert set(history.urls) == {'https://example.com/kept', 'https://example.com/dup'}
+            assert history.urls['https://example.com/kept']['etag'] == '"中文"'
+
+            history_path = os.path.join(tmpdir, SITE, 'crawl_history.json')
+            with open(history_path, encoding='utf-8') as f:
+                text = f.read()
+            assert text == json.dumps(json.loads(text), ensure_ascii=False, indent=2)
+
+    def test_dry_run(self):
+        """测试预览模式不修改文件"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _make_site(tmpdir)
+            history_path = os.path.join(tmpdir, SITE, 'crawl_history.json')
+            before = os.path.getmtime(history_path), os.path.getsize(history_path)
+
+            report = clean_site_history(SITE, tmpdir, days=30, compact=True, dry_run=True)
+            assert report.removed == 2
+            assert (os.path.getmtime(history_path), os.path.getsize(history_path)) == before
+            assert not os.path.exists(history_path + '.tmp')
+
+    def test_compact_guard(self):
+        """测试所有页面都不存在时不压缩（force 时仍然删除）"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            site_dir = _make_site(tmpdir)
+            os.remove(os.path.join(site_dir, 'kept.html'))
+
+            report = clean_site_history(SITE, tmpdir, days=30, compact=True)
+            assert (report.expired, report.missing) == (1, 0)
+            assert report.skipped
+            assert len(load_history(SITE, tmpdir).urls) == 3
+
+            report = clean_site_history(SITE, tmpdir, compact=True, force=True)
+            assert report.missing == 2
+            assert set(load_history(SITE, tmpdir).urls) == {'https://example.com/dup'}
+
+    def test_relocated_output_dir(self):
+        """测试 local_path 记录的是爬取时的输出目录，换算到当前站点目录"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _make_site(tmpdir)
+            moved = os.path.join(tmpdir, 'moved')
+            os.rename(os.path.join(tmpdir, SITE), os.path.join(tmpdir, 'tmp-site'))
+            os.makedirs(moved)
+            os.rename(os.path.join(tmpdir, 'tmp-site'), os.path.join(moved, SITE))
+
+            report = clean_site_history(SITE, moved, compact=True)
+            assert report.missing == 1
+
+    def test_archive_mode(self):
+        """测试归档模式下按归档索引判断页面是否存在"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            site_dir = _make_site(tmpdir)
+            os.remove(os.path.join(site_dir, 'kept.html'))
+            archive = PageArchive(site_dir, 'warc')
+            url = 'https://example.com/kept'
+            archive.append(url, encode_record('warc', url, b'<html></html>'), local_path='kept.html')
+            archive.close()
+
+            report = clean_site_history(SITE, tmpdir, days=30, compact=True)
+            assert (report.expired, report.missing) == (1, 1)
+            assert 'https://example.com/kept' in load_history(SITE, tmpdir).urls
+
+    def test_journal_is_replayed(self):
+        """测试有未回放的日志时先回放再清理"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _make_site(tmpdir)
+            history = load_history(SITE, tmpdir)
+            history.urls['https://example.com/new'] = history.urls['https://example.com/kept']
+            history.journal.append('https://example.com/new', history.urls['https://example.com/new'])
+            history.journal.flush()
+
+            clean_site_history(SITE, tmpdir, days=30)
+            assert not os.path.exists(os.path.join(tmpdir, SITE, 'crawl_history.journal'))
+            assert 'https://example.com/new' in load_history(SITE, tmpdir).urls
+
+    def test_sqlite(self):
+        """测试 SQLite 后端"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _make_site(tmpdir, 'sqlite')
+            report = clean_site_history(SITE, tmpdir, days=30, compact=True, backend='sqlite')
+            assert (report.scanned, report.expired, report.missing) == (4, 1, 1)
+            assert len(load_history(SITE, tmpdir, 'sqlite').urls) == 2
+
+    def test_summarize(self):
+        """测试汇总报告"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _make_site(tmpdir)
+            reports = [
+                clean_site_history(SITE, tmpdir, days=30, compact=True),
+                clean_site_history('missing.com', tmpdir, days=30),
+            ]
+            totals = summarize_reports(reports)
+            assert totals['sites'] == 2
+            assert totals['sites_cleaned'] == 1
+            assert totals['sites_skipped'] == 1
+            assert totals['removed'] == 2
@@ -19,7 +19,12 @@ from utils.history_manager import (
     update_history,
     cleanup_expired,
     get_stats,
+    checkpoint_history,
+    record_not_modified,
+    get_conditional_headers,
     CrawlHistory,
+    HistoryJournal,
+    UrlHistory,
 )
 
 
@@ -279,6 +284,231 @@ class TestCleanupExpired:
         assert 'https://example.com/new/' in history.urls
 
 
+class TestUrlHistory:
+    """测试 UrlHistory 紧凑表示"""
+
+    def test_compact_fields(self):
+        """测试摘要与时间戳以紧凑格式保存"""
+        digest = 'ab' * 32
+        entry = UrlHistory.from_dict({
+            'first_seen': '2026-01-01T00:00:00',
+            'content_hash': digest,
+            'local_path': 'output/example.com/index.html',
+        })
+        assert isinstance(entry.first_seen, int)
+        assert entry.content_hash == bytes.fromhex(digest)
+        assert entry['content_hash'] == digest
+        assert entry['first_seen'] == '2026-01-01T00:00:00'
+        assert not hasattr(entry, '__dict__')
+
+    def test_to_dict_roundtrip(self):
+        """测试导出格式与原 JSON 一致"""
+        data = {
+            'first_seen': '2026-01-01T00:00:00',
+            'content_hash': 'cd' * 32,
+            'local_path': 'index.html',
+            'last_modified': '2026-03-01',
+        }
+        assert UrlHistory.from_dict(data).to_dict() == data
+
+    def test_simhash_roundtrip(self):
+        """测试 SimHash 以整数保存、以十六进制串导出"""
+        data = {
+            'first_seen': '2026-01-01T00:00:00',
+            'content_hash': 'cd' * 32,
+            'local_path': 'index.html',
+            'last_modified': None,
+            'simhash': '00ff00ff00ff00ff',
+            'duplicate_of': 'https://example.com/a',
+        }
+        entry = UrlHistory.from_dict(data)
+        assert entry.simhash == 0x00ff00ff00ff00ff
+        assert entry.to_dict() == data
+
+    def test_links_roundtrip(self):
+        """测试出链以元组保存，叶子页面的空出链与未记录区分"""
+        data = {
+            'first_seen': '2026-01-01T00:00:00',
+            'content_hash': 'cd' * 32,
+            'local_path': 'index.html',
+            'last_modified': None,
+            'links': ['https://example.com/a', 'https://example.com/b'],
+        }
+        entry = UrlHistory.from_dict(data)
+        assert entry.links == ('https://example.com/a', 'https://example.com/b')
+        assert entry.to_dict() == data
+
+        assert UrlHistory.from_dict({**data, 'links': []}).links == ()
+        assert UrlHistory.from_dict({'first_seen': None}).links is None
+
+    def test_non_standard_values_preserved(self):
+        """测试非 SHA256 哈希和无法解析的时间戳按原样保留"""
+        entry = UrlHistory.from_dict({'first_seen': 'unknown', 'content_hash': 'abc123'})
+        assert entry['first_seen'] == 'unknown'
+        assert entry['content_hash'] == 'abc123'
+
+    def test_interned_local_path(self):
+        """测试相同本地路径共享同一对象"""
+        a = UrlHistory.from_dict({'first_seen': None, 'local_path': ''.join(['a/', 'b.html'])})
+        b = UrlHistory.from_dict({'first_seen': None, 'local_path': ''.join(['a/', 'b.html'])})
+        assert a.local_path is b.local_path
+
+    def test_save_load_export_compatible(self):
+        """测试保存后的 JSON 仍为原格式"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = load_history('example.com', tmpdir)
+            update_history(history, 'https://example.com/', 'ef' * 32, 'index.html', '2026-03-01')
+            save_history(history, tmpdir)
+
+            with open(os.path.join(tmpdir, 'example.com', 'crawl_history.json')) as f:
+                entry = json.load(f)['urls']['https://example.com/']
+            assert entry['content_hash'] == 'ef' * 32
+            assert isinstance(entry['first_seen'], str)
+
+            reloaded = load_history('example.com', tmpdir)
+            assert is_new_or_updated('https://example.com/', None, reloaded, 'ef' * 32)[0] is False
+            assert is_new_or_updated('https://example.com/', None, reloaded, '01' * 32)[0] is True
+
+
+class TestHistoryJournal:
+    """测试增量历史日志（检查点与回放）"""
+
+    def test_replay_after_crash(self):
+        """测试未调用 save_history 时，重新加载会回放日志"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = load_history('example.com', tmpdir, checkpoint_items=2)
+            update_history(history, 'https://example.com/a', 'hash_a', None, '2026-03-01')
+            update_history(history, 'https://example.com/b', 'hash_b', None)
+            # 模拟崩溃：不调用 save_history
+
+            reloaded = load_history('example.com', tmpdir)
+            assert reloaded.urls['https://example.com/a']['content_hash'] == 'hash_a'
+            assert reloaded.urls['https://example.com/b']['content_hash'] == 'hash_b'
+            should_crawl, _ = is_new_or_updated('https://example.com/a', '2026-03-01', reloaded)
+            assert should_crawl is False
+
+    def test_unflushed_updates_not_written(self):
+        """测试未达到阈值的更新仍在缓冲区"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = load_history('example.com', tmpdir, checkpoint_items=10, checkpoint_seconds=3600)
+            update_history(history, 'https://example.com/a', 'hash_a', None)
+            assert not os.path.exists(history.journal.path)
+
+            checkpoint_history(history)
+            assert os.path.exists(history.journal.path)
+
+    def test_save_truncates_journal(self):
+        """测试完整保存后清空日志"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = load_history('example.com', tmpdir, checkpoint_items=1)
+            update_history(history, 'https://example.com/a', 'hash_a', None)
+            assert os.path.exists(history.journal.path)
+
+            save_history(history, tmpdir)
+            assert not os.path.exists(history.journal.path)
+            assert not os.path.exists(os.path.join(tmpdir, 'example.com', 'crawl_history.json.tmp'))
+            assert 'https://example.com/a' in load_history('example.com', tmpdir).urls
+
+    def test_journal_overrides_saved_history(self):
+        """测试日志中的更新覆盖 JSON 中的旧值"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = load_history('example.com', tmpdir, checkpoint_items=1)
+            update_history(history, 'https://example.com/a', 'old', None)
+            save_history(history, tmpdir)
+            update_history(history, 'https://example.com/a', 'new', None)
+
+            reloaded = load_history('example.com', tmpdir)
+            assert reloaded.urls['https://example.com/a']['content_hash'] == 'new'
+
+    def test_cleanup_is_journaled(self):
+        """测试清理过期条目写入日志，崩溃后回放不会恢复"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = load_history('example.com', tmpdir)
+            history.urls['https://example.com/old'] = UrlHistory.from_dict(
+                {'first_seen': '2020-01-01T00:00:00', 'content_hash': 'old'}
+            )
+            save_history(history, tmpdir)
+
+            history = load_history('example.com', tmpdir)
+            assert cleanup_expired(history, days=90) == 1
+
+            reloaded = load_history('example.com', tmpdir)
+            assert 'https://example.com/old' not in reloaded.urls
+
+    def test_skip_truncated_line(self):
+        """测试跳过崩溃时写了一半的日志行"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'crawl_history.journal')
+            with open(path, 'w') as f:
+                f.write(json.dumps({'url': 'https://example.com/a', 'entry': {'first_seen': 'x'}}) + '\n')
+                f.write('{"url": "https://example.com/b", "ent')
+
+            urls = {}
+            assert HistoryJournal.replay(path, urls) == 1
+            assert list(urls) == ['https://example.com/a']
+
+
+class TestConditionalGet:
+    """测试条件请求（ETag / Last-Modified）"""
+
+    def test_no_validators(self):
+        """测试无校验头时不生成条件请求头"""
+        history = CrawlHistory(site='example.com', first_crawl='', last_crawl='')
+        assert get_conditional_headers('https://example.com/', history) == {}
+
+        update_history(history, 'https://example.com/', 'hash', None)
+        assert get_conditional_headers('https://example.com/', history) == {}
+        assert 'etag' not in history.urls['https://example.com/'].to_dict()
+
+    def test_conditional_headers(self):
+        """测试记录校验头并生成条件请求头"""
+        history = CrawlHistory(site='example.com', first_crawl='', last_crawl='')
+        update_history(
+            history, 'https://example.com/', 'hash', None,
+            etag='"abc"', http_last_modified='Wed, 01 Apr 2026 00:00:00 GMT'
+        )
+
+        assert get_conditional_headers('https://example.com/', history) == {
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': 'Wed, 01 Apr 2026 00:00:00 GMT',
+        }
+
+    def test_update_keeps_validators(self):
+        """测试未返回校验头的更新不会清除已有校验头"""
+        history = CrawlHistory(site='example.com', first_crawl='', last_crawl='')
+        update_history(history, 'https://example.com/', 'old', None, etag='"v1"')
+        update_history(history, 'https://example.com/', 'new', None)
+
+        assert history.urls['https://example.com/'].etag == '"v1"'
+
+    def test_record_not_modified(self):
+        """测试 304 只刷新校验头，不改变内容哈希"""
+        history = CrawlHistory(site='example.com', first_crawl='', last_crawl='')
+        update_history(history, 'https://example.com/', 'hash', 'index.html', etag='"v1"')
+        record_not_modified(history, 'https://example.com/', etag='"v2"')
+
+        entry = history.urls['https://example.com/']
+        assert entry['content_hash'] == 'hash'
+        assert entry['local_path'] == 'index.html'
+        assert entry.etag == '"v2"'
+
+        # 未知 URL 忽略
+        record_not_modified(history, 'https://example.com/missing')
+        assert 'https://example.com/missing' not in history.urls
+
+    def test_validators_persisted(self):
+        """测试校验头随历史保存与加载"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = load_history('example.com', tmpdir)
+            update_history(history, 'https://example.com/', 'hash', None, etag='"abc"')
+            save_history(history, tmpdir)
+
+            loaded = load_history('example.com', tmpdir)
+            assert get_conditional_headers('https://example.com/', loaded) == {
+                'If-None-Match': '"abc"'
+            }
+
+
 class TestGetStats:
     """测试 get_stats 函数"""
 
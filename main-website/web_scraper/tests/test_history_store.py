@@ -0,0 +1,170 @@
+"""
+历史记录存储后端单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import json
+import os
+import tempfile
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.history_store import SqliteUrlStore, get_db_path
+from utils.history_manager import (
+    load_history,
+    save_history,
+    is_new_or_updated,
+    update_history,
+    cleanup_expired,
+    get_stats,
+    migrate_json_history,
+)
+
+
+def _write_json_history(tmpdir: str, domain: str, urls: dict) -> None:
+    """写入 JSON 历史文件"""
+    history_dir = os.path.join(tmpdir, domain)
+    os.makedirs(history_dir, exist_ok=True)
+    with open(os.path.join(history_dir, 'crawl_history.json'), 'w') as f:
+        json.dump({
+            'site': domain,
+            'first_crawl': '2026-01-01T00:00:00',
+            'last_crawl': '2026-03-01T00:00:00',
+            'urls': urls
+        }, f)
+
+
+class TestSqliteUrlStore:
+    """测试 SqliteUrlStore 映射"""
+
+    def test_point_lookup(self):
+        """测试点查与 upsert"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SqliteUrlStore(os.path.join(tmpdir, 'h.sqlite3'))
+            store['https://example.com/'] = {'first_seen': '2026-01-01T00:00:00', 'content_hash': 'a'}
+            store['https://example.com/'] = {'first_seen': '2026-01-01T00:00:00', 'content_hash': 'b'}
+
+            assert 'https://example.com/' in store
+            assert 'https://example.com/missing' not in store
+            assert store['https://example.com/']['content_hash'] == 'b'
+            assert len(store) == 1
+            store.close()
+
+    def test_missing_key(self):
+        """测试缺失 URL 抛出 KeyError"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SqliteUrlStore(os.path.join(tmpdir, 'h.sqlite3'))
+            with pytest.raises(KeyError):
+                store['https://example.com/']
+            with pytest.raises(KeyError):
+                del store['https://example.com/']
+            assert store.get('https://example.com/') is None
+            store.close()
+
+    def test_persistence(self):
+        """测试重新打开后数据仍在"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'h.sqlite3')
+            store = SqliteUrlStore(path)
+            store['https://example.com/a'] = {'first_seen': '2026-01-01T00:00:00'}
+            store.set_meta('site', 'example.com')
+            store.close()
+
+            reopened = SqliteUrlStore(path)
+            assert 'https://example.com/a' in reopened
+            assert reopened.get_meta('site') == 'example.com'
+            assert dict(reopened.items()) == {
+                'https://example.com/a': {'first_seen': '2026-01-01T00:00:00'}
+            }
+            reopened.close()
+
+    def test_delete_first_seen_before(self):
+        """测试按 first_seen 删除"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SqliteUrlStore(os.path.join(tmpdir, 'h.sqlite3'))
+            store['https://example.com/old'] = {'first_seen': '2025-01-01T00:00:00'}
+            store['https://example.com/new'] = {'first_seen': '2026-03-01T00:00:00'}
+
+            removed = store.delete_first_seen_before('2026-01-01T00:00:00')
+            assert removed == 1
+            assert list(store) == ['https://example.com/new']
+            store.close()
+
+
+class TestSqliteBackend:
+    """测试 history_manager 的 sqlite 后端"""
+
+    def test_roundtrip(self):
+        """测试加载、更新、保存与再次加载"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = load_history('example.com', tmpdir, backend='sqlite')
+            update_history(history, 'https://example.com/', 'hash1', 'index.html', '2026-03-01')
+            save_history(history, tmpdir)
+            history.urls.close()
+
+            assert os.path.exists(get_db_path('example.com', tmpdir))
+
+            reloaded = load_history('example.com', tmpdir, backend='sqlite')
+            should_crawl, _ = is_new_or_updated('https://example.com/', '2026-03-01', reloaded)
+            assert should_crawl is False
+            should_crawl, _ = is_new_or_updated('https://example.com/', '2026-03-10', reloaded)
+            assert should_crawl is True
+            assert get_stats(reloaded)['urls_with_local_path'] == 1
+            reloaded.urls.close()
+
+    def test_update_existing_is_persisted(self):
+        """测试更新已有条目会写回存储"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = load_history('example.com', tmpdir, backend='sqlite')
+            update_history(history, 'https://example.com/', 'old', None)
+            update_history(history, 'https://example.com/', 'new', 'index.html')
+            assert history.urls['https://example.com/']['content_hash'] == 'new'
+            history.urls.close()
+
+    def test_auto_migrate_from_json(self):
+        """测试首次使用 sqlite 后端时自动迁移 JSON 历史"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _write_json_history(tmpdir, 'example.com', {
+                'https://example.com/': {'first_seen': '2026-01-01T00:00:00', 'content_hash': 'abc'}
+            })
+
+            history = load_history('example.com', tmpdir, backend='sqlite')
+            assert history.first_crawl == '2026-01-01T00:00:00'
+            assert history.urls['https://example.com/']['content_hash'] == 'abc'
+            history.urls.close()
+
+    def test_migrate_json_history(self):
+        """测试显式迁移"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _write_json_history(tmpdir, 'example.com', {
+                f'https://example.com/{i}': {'first_seen': '2026-01-01T00:00:00'} for i in range(10)
+            })
+            assert migrate_json_history('example.com', tmpdir) == 10
+
+    def test_cleanup_expired(self):
+        """测试 sqlite 后端清理过期条目"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _write_json_history(tmpdir, 'example.com', {
+                'https://example.com/old/': {'first_seen': '2025-01-01T00:00:00'},
+            })
+            history = load_history('example.com', tmpdir, backend='sqlite')
+            update_history(history, 'https://example.com/new/', 'h', None)
+
+            removed = cleanup_expired(history, days=30)
+            assert removed == 1
+            assert 'https://example.com/old/' not in history.urls
+            assert 'https://example.com/new/' in history.urls
+            history.urls.close()
+
+    def test_unknown_backend(self):
+        """测试未知后端"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with pytest.raises(ValueError):
+                load_history('example.com', tmpdir, backend='lmdb')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
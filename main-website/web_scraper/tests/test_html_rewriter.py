@@ -0,0 +1,139 @@
+"""
+HTML 链接重写模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.html_rewriter import (
+    parse_html,
+    rewrite_html,
+    normalize_html,
+)
+
+
+BASE_URL = 'https://example.com/news/article'
+
+
+class TestRewriteHtml:
+    """测试 rewrite_html 函数"""
+
+    def test_relative_links(self):
+        """测试相对链接转换为绝对链接"""
+        html, _ = rewrite_html(
+            '<a href="/about/">About</a><img src="logo.png"><form action="search"></form>',
+            BASE_URL
+        )
+        assert 'href="https://example.com/about/"' in html
+        assert 'src="https://example.com/news/logo.png"' in html
+        assert 'action="https://example.com/news/search"' in html
+
+    def test_srcset_and_poster(self):
+        """测试 srcset 与 poster"""
+        html, _ = rewrite_html(
+            '<img srcset="a.png 1x, /c/w_100,h_100/b.png 2x"><video poster="/p.jpg"></video>',
+            BASE_URL
+        )
+        assert 'srcset="https://example.com/news/a.png 1x, https://example.com/c/w_100,h_100/b.png 2x"' in html
+        assert 'poster="https://example.com/p.jpg"' in html
+
+    def test_skip_special_links(self):
+        """测试锚点、javascript、mailto、data 链接保持不变"""
+        source = (
+            '<a href="#top">t</a><a href="javascript:void(0)">j</a>'
+            '<a href="mailto:a@example.com">m</a><img src="data:image/png;base64,AAAA">'
+        )
+        html, _ = rewrite_html(source, BASE_URL)
+        assert html == source
+
+    def test_preserve_document(self):
+        """测试注释、脚本内容和引号风格保持不变"""
+        source = (
+            "<!-- keep --><script src='app.js'>var a = '<a href=\"x\">';</script>"
+            "<link rel=stylesheet href=site.css><div data-href=\"x\">text</div>"
+        )
+        html, _ = rewrite_html(source, BASE_URL)
+        assert '<!-- keep -->' in html
+        assert "src='https://example.com/news/app.js'" in html
+        assert "var a = '<a href=\"x\">';" in html
+        assert 'href="https://example.com/news/site.css"' in html
+        assert 'data-href="x"' in html
+
+    def test_meta_content(self):
+        """测试 meta content 只在为 URL 时解析"""
+        html, _ = rewrite_html(
+            '<meta name="viewport" content="width=device-width">'
+            '<meta property="og:image" content="/og.png">',
+            BASE_URL
+        )
+        assert 'content="width=device-width"' in html
+        assert 'content="https://example.com/og.png"' in html
+
+    def test_resolve(self):
+        """测试替换函数"""
+        document = parse_html('<a href="/about/">a</a><img src="/logo.png">', BASE_URL)
+        assert [link.url for link in document.links] == [
+            'https://example.com/about/',
+            'https://example.com/logo.png',
+        ]
+
+        html = document.render(lambda link: 'logo.png' if link.attr == 'src' else None)
+        assert html == '<a href="https://example.com/about/">a</a><img src="logo.png">'
+
+    def test_attribute_like_text(self):
+        """测试正文中形如属性的文本不被解析"""
+        source = '<p>Set action = submit and src=foo.png</p>'
+        document = parse_html(source, BASE_URL)
+        assert document.links == []
+        assert document.render() == source
+
+    def test_textarea_and_pre(self):
+        """测试 textarea/pre 内容保持不变，不会吞掉结束标签"""
+        source = (
+            '<textarea name="t">width=3 href=abc</textarea>'
+            '<pre>href=abc <a href=x.html>x</a></pre>'
+        )
+        html, _ = rewrite_html(source, BASE_URL)
+        assert '<textarea name="t">width=3 href=abc</textarea>' in html
+        assert '<pre>href=abc <a href="https://example.com/news/x.html">x</a></pre>' in html
+
+    def test_unquoted_value_stops_at_tag(self):
+        """测试无引号属性值不包含 < 和 >，引号内的 > 不结束标签"""
+        html, _ = rewrite_html('<a title="a>b" href=/x>y</a><img src=a.png/>', BASE_URL)
+        assert html == (
+            '<a title="a>b" href="https://example.com/x">y</a>'
+            '<img src="https://example.com/news/a.png/">'
+        )
+
+
+class TestNormalizeHtml:
+    """测试规范化文本"""
+
+    def test_same_as_parse(self):
+        """测试 normalize_html 与 parse_html 的规范化文本一致"""
+        source = (
+            '<!DOCTYPE html><html><head><style>a {}</style></head>\n'
+            '<body>\n  <p>Hello   <b>World</b></p><noscript><img src="x.png"></noscript>\n</body></html>'
+        )
+        assert normalize_html(source) == parse_html(source, BASE_URL).text
+
+    def test_removes_ignored_content(self):
+        """测试移除注释、脚本、样式与 noscript"""
+        text = normalize_html(
+            '<p>Hi</p><!-- c --><script>x()</script><style>p{}</style><noscript>n</noscript>'
+        )
+        assert text == '<p>Hi</p>'
+
+    def test_text_uses_original_links(self):
+        """测试规范化文本基于原始链接（与保存路径无关）"""
+        _, text = rewrite_html('<a href="/about/">About</a>', BASE_URL)
+        assert text == '<a href="/about/">About</a>'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
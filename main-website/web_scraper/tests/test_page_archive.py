@@ -0,0 +1,114 @@
+"""
+页面归档模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import gzip
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.page_archive import ARCHIVE_DIR, PageArchive, decode_record, encode_record
+
+HEADERS = {'Content-Type': 'text/html; charset=gbk', 'Content-Length': '123', 'Etag': '"abc"'}
+
+
+def _archive_page(archive: PageArchive, url: str, body: bytes, local_path: str) -> None:
+    record = encode_record(
+        archive.archive_format, url, body, 200, HEADERS,
+        content_hash='h' * 64, simhash='00ff00ff00ff00ff', local_path=local_path
+    )
+    archive.append(url, record, content_hash='h' * 64, local_path=local_path)
+
+
+class TestRecord:
+    """测试记录编码与解码"""
+
+    def test_warc_round_trip(self):
+        """测试 WARC 记录往返，原始响应头中与正文不符的字段被替换"""
+        body = '<html><body>中文页面</body></html>'.encode('utf-8')
+        record = encode_record('warc', 'https://example.com/a', body, 200, HEADERS, content_hash='abc')
+        page = decode_record('warc', record)
+
+        assert page.url == 'https://example.com/a'
+        assert page.status == 200
+        assert page.body == body
+        assert page.content_hash == 'abc'
+        assert page.headers['Etag'] == '"abc"'
+        assert page.headers['Content-Type'] == 'text/html; charset=utf-8'
+        assert page.headers['Content-Length'] == str(len(body))
+        assert gzip.decompress(record).startswith(b'WARC/1.1\r\nWARC-Type: response\r\n')
+
+    def test_zstd_round_trip(self):
+        """测试 zstd 记录往返"""
+        pytest.importorskip('zstandard')
+        body = b'<html>page</html>'
+        page = decode_record('zstd', encode_record('zstd', 'https://example.com/a', body, 200, HEADERS))
+        assert (page.url, page.status, page.body) == ('https://example.com/a', 200, body)
+
+    def test_unknown_format(self):
+        """测试不支持的格式"""
+        with pytest.raises(ValueError):
+            encode_record('tar', 'https://example.com/', b'')
+
+
+class TestPageArchive:
+    """测试 PageArchive"""
+
+    def test_random_access_and_reopen(self):
+        """测试按 URL 随机读取，重新打开后写入新分段且索引指向最新记录"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive = PageArchive(tmpdir, 'warc')
+            for i in range(5):
+                _archive_page(archive, f'https://example.com/p{i}', f'page {i}'.encode(), f'p{i}.html')
+            archive.close()
+
+            archive = PageArchive(tmpdir, 'warc')
+            _archive_page(archive, 'https://www.example.com/p1/', b'page 1 v2', 'p1.html')
+            assert len(archive) == 5
+            assert 'https://example.com/p3' in archive
+            assert archive.read('https://example.com/p3').body == b'page 3'
+            assert archive.read('https://example.com/p1').body == b'page 1 v2'
+            assert archive.read('https://example.com/missing') is None
+            archive.close()
+
+            segments = sorted(os.listdir(os.path.join(tmpdir, ARCHIVE_DIR)))
+            assert [s for s in segments if s.startswith('pages-')] == ['pages-00001.warc.gz', 'pages-00002.warc.gz']
+
+    def test_rolls_segments(self):
+        """测试分段达到大小上限后切换"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive = PageArchive(tmpdir, 'warc', segment_bytes=2048)
+            for i in range(20):
+                _archive_page(archive, f'https://example.com/p{i}', os.urandom(600), f'p{i}.html')
+            assert archive.read('https://example.com/p0') is not None
+            assert archive.read('https://example.com/p19') is not None
+            archive.close()
+
+            names = os.listdir(os.path.join(tmpdir, ARCHIVE_DIR))
+            assert len([n for n in names if n.startswith('pages-')]) > 1
+
+    def test_export(self):
+        """测试导出为目录结构"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive = PageArchive(tmpdir, 'warc')
+            _archive_page(archive, 'https://example.com/', b'home', 'index.html')
+            _archive_page(archive, 'https://example.com/news/a', b'news', 'news/a.html')
+            archive.close()
+
+            dest = os.path.join(tmpdir, 'export')
+            assert PageArchive.open_existing(tmpdir).export(dest) == 2
+            with open(os.path.join(dest, 'news', 'a.html'), 'rb') as f:
+                assert f.read() == b'news'
+
+    def test_format_mismatch(self):
+        """测试已有归档的格式与设置不同时报错"""
+        pytest.importorskip('zstandard')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            PageArchive(tmpdir, 'warc').close()
+            with pytest.raises(ValueError):
+                PageArchive(tmpdir, 'zstd')
@@ -0,0 +1,75 @@
+"""
+页面处理模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import multiprocessing
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.content_hash import compute_hash
+from utils.html_rewriter import parse_html
+from utils.page_worker import process_page, render_page
+from utils.simhash import compute_simhash
+
+PAGE_URL = 'https://example.com/products/item.html'
+PAGE_HTML = """<html><head><title>Item</title><link href="/static/site.css" rel="stylesheet"></head>
+<body><h1>Item</h1><a href="../about/">About</a><a href="/static/site.css">again</a>
+<img src="img/photo.png"><p>Product   description   text.</p></body></html>"""
+
+
+class TestProcessPage:
+    """测试 process_page / render_page"""
+
+    def test_matches_inline_steps(self):
+        """测试结果与逐步调用一致"""
+        result = process_page(PAGE_HTML, PAGE_URL)
+        document = parse_html(PAGE_HTML, PAGE_URL)
+
+        assert result.content_hash == compute_hash(PAGE_HTML)
+        assert result.simhash == compute_simhash(document.text)
+        assert result.body == document.render().encode('utf-8')
+        assert result.links == [
+            'https://example.com/static/site.css',
+            'https://example.com/about/',
+            'https://example.com/products/img/photo.png',
+        ]
+        assert result.document is None
+
+    def test_render_with_replacements(self):
+        """测试按替换表重写，进程内保留文档时结果一致"""
+        replacements = {'https://example.com/static/site.css': '../_assets/blobs/ab/abc.css'}
+        rendered = render_page(PAGE_HTML, PAGE_URL, replacements)
+
+        assert rendered.count(b'href="../_assets/blobs/ab/abc.css"') == 2
+        assert b'src="https://example.com/products/img/photo.png"' in rendered
+
+        result = process_page(PAGE_HTML, PAGE_URL, render=False, keep_document=True)
+        assert result.body is None
+        assert result.document.render(lambda link: replacements.get(link.url)).encode('utf-8') == rendered
+
+    def test_pickle_drops_document(self):
+        """测试结果在进程间传递时不携带分词后的文档"""
+        result = process_page(PAGE_HTML, PAGE_URL, render=False, keep_document=True)
+        restored = pickle.loads(pickle.dumps(result))
+
+        assert restored.document is None
+        assert restored.content_hash == result.content_hash
+        assert restored.links == result.links
+
+    def test_process_pool(self):
+        """测试在 spawn 进程池中执行"""
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            result = pool.submit(process_page, PAGE_HTML, PAGE_URL).result(timeout=60)
+
+        assert result.body == process_page(PAGE_HTML, PAGE_URL).body
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,102 @@
+"""
+本地路径映射模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.path_mapper import PathMapper, url_to_relpath
+
+
+class TestUrlToRelpath:
+    """测试 url_to_relpath 函数"""
+
+    def test_plain_paths(self):
+        """测试普通路径"""
+        assert url_to_relpath('https://example.com/') == 'index.html'
+        assert url_to_relpath('https://example.com/news/article') == 'news/article.html'
+        assert url_to_relpath('https://example.com/about/') == 'about.html'
+        assert url_to_relpath('https://example.com/page.html') == 'page.html'
+
+    def test_query_digest(self):
+        """测试查询参数使用截断摘要"""
+        first = url_to_relpath('https://example.com/list?page=1')
+        second = url_to_relpath('https://example.com/list?page=2')
+        assert first.startswith('list_q') and first.endswith('.html')
+        assert len(first) == len('list_q.html') + 12
+        assert first != second
+
+    def test_stable_across_processes(self):
+        """测试不同 PYTHONHASHSEED 的进程得到相同路径"""
+        code = (
+            'import sys; sys.path.insert(0, sys.argv[1]);'
+            'from utils.path_mapper import url_to_relpath;'
+            'print(url_to_relpath("https://example.com/list?page=2"))'
+        )
+        root = os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper')
+        outputs = set()
+        for seed in ('1', '2'):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            result = subprocess.run(
+                [sys.executable, '-c', code, root],
+                env=env, capture_output=True, text=True, check=True
+            )
+            outputs.add(result.stdout.strip())
+        assert outputs == {url_to_relpath('https://example.com/list?page=2')}
+
+
+class TestPathMapper:
+    """测试 PathMapper"""
+
+    def test_same_page_variants(self):
+        """测试协议、www. 与末尾斜杠不同的 URL 映射到同一路径"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mapper = PathMapper(tmpdir)
+            path = mapper.local_path('https://example.com/about/')
+            assert mapper.local_path('http://www.example.com/about') == path
+            assert path == os.path.join(tmpdir, 'about.html')
+
+    def test_collision(self):
+        """测试不同 URL 映射到同一路径时不会覆盖"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mapper = PathMapper(tmpdir)
+            first = mapper.local_path('https://example.com/a')
+            second = mapper.local_path('https://example.com/a.html')
+            assert first == os.path.join(tmpdir, 'a.html')
+            assert second != first
+            assert second.endswith('.html')
+
+    def test_index_roundtrip(self):
+        """测试路径索引在下次运行时沿用"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mapper = PathMapper(tmpdir)
+            mapper.local_path('https://example.com/a')
+            path = mapper.local_path('https://example.com/a.html')
+            with open(path, 'w') as f:
+                f.write('<html></html>')
+            mapper.mark_saved('https://example.com/a.html')
+            mapper.save()
+
+            # 新的运行中先遇到 /a.html，仍然沿用上次的路径
+            reloaded = PathMapper(tmpdir)
+            assert reloaded.saved_path('https://example.com/a.html') == path
+            assert reloaded.local_path('https://example.com/a.html') == path
+            assert reloaded.saved_path('https://example.com/a') is None
+
+    def test_saved_path_requires_file(self):
+        """测试索引中的文件被删除后不再视为已保存"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mapper = PathMapper(tmpdir)
+            mapper.mark_saved('https://example.com/gone')
+            assert mapper.saved_path('https://example.com/gone') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
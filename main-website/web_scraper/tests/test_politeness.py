@@ -0,0 +1,91 @@
+"""
+自适应礼貌策略模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.politeness import PolitenessController, parse_retry_after, robots_delay
+
+
+class TestParsing:
+    """测试 Retry-After 与 robots.txt 解析"""
+
+    def test_retry_after(self):
+        """测试秒数与 HTTP 日期两种格式"""
+        now = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        assert parse_retry_after(b'120') == 120.0
+        assert parse_retry_after('Thu, 01 Jan 2026 12:00:30 GMT', now=now) == 30.0
+        assert parse_retry_after('Thu, 01 Jan 2026 11:00:00 GMT', now=now) == 0.0
+        assert parse_retry_after('soon') is None
+        assert parse_retry_after(None) is None
+
+    def test_robots_delay(self):
+        """测试 Crawl-delay 与 Request-rate 取较大者"""
+        body = b'User-agent: *\nCrawl-delay: 2\nRequest-rate: 1/5\nDisallow: /private/\n'
+        assert robots_delay(body, 'Mozilla/5.0') == 5.0
+        assert robots_delay(b'User-agent: *\nDisallow:\n', 'Mozilla/5.0') is None
+
+
+class TestPolitenessController:
+    """测试 PolitenessController"""
+
+    def test_ramps_up_when_healthy(self):
+        """测试站点健康时并发数逐步增加，间隔随延迟缩短"""
+        controller = PolitenessController(min_delay=0.01, max_concurrency=4, ramp_after=5)
+        decisions = []
+        for _ in range(30):
+            decisions += controller.on_response('example.com', 200, 0.2)
+
+        state = controller.state('example.com')
+        assert decisions.count('ramp_up') == 3
+        assert state.concurrency == 4
+        assert state.delay == pytest.approx(0.05)
+
+    def test_backoff_with_retry_after(self):
+        """测试 429 时并发减半、间隔加倍并记录 Retry-After 截止时间"""
+        controller = PolitenessController(min_delay=0.01, start_concurrency=4, max_retry_after=60)
+        controller.on_response('example.com', 200, 0.2)
+        decisions = controller.on_response('example.com', 429, 0.01, retry_after=120, now=1000.0)
+
+        state = controller.state('example.com')
+        assert decisions == ['backoff', 'ramp_down', 'retry_after']
+        assert state.concurrency == 2
+        assert state.backoff_until == 1060.0
+        assert state.delay == pytest.approx(1.0)
+
+    def test_crawl_delay_is_floor(self):
+        """测试 Crawl-delay 作为间隔下限，并发数固定为 1"""
+        controller = PolitenessController(min_delay=0.01, ramp_after=1, max_crawl_delay=10)
+        assert controller.set_crawl_delay('example.com', 30) == 10
+        for _ in range(5):
+            controller.on_response('example.com', 200, 0.05)
+
+        state = controller.state('example.com')
+        assert state.concurrency == 1
+        assert state.delay == 10
+
+    def test_errors_slow_down(self):
+        """测试单次错误不减速，持续错误时减半并发"""
+        controller = PolitenessController(start_concurrency=4)
+        assert controller.on_error('example.com') == ['error']
+        assert controller.state('example.com').concurrency == 4
+
+        controller.on_response('example.com', 500, 0.1)
+        assert controller.state('example.com').concurrency == 2
+
+    def test_latency_degradation(self):
+        """测试延迟明显上升时并发数减 1"""
+        controller = PolitenessController(start_concurrency=3)
+        controller.on_response('example.com', 200, 0.1)
+        decisions = []
+        for _ in range(5):
+            decisions += controller.on_response('example.com', 200, 1.0)
+        assert 'ramp_down' in decisions
+        assert controller.state('example.com').concurrency < 3
@@ -0,0 +1,128 @@
+"""
+门户站点状态模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.history_manager import update_history
+from utils.portal_site import PortalSite, load_targets
+
+
+class TestPortalSite:
+    """测试 PortalSite"""
+
+    def test_domain_and_sitemaps(self):
+        """测试域名解析与默认 sitemap 路径"""
+        site = PortalSite('https://www.example.com/', '/tmp/unused')
+        assert site.domain == 'example.com'
+        assert 'en.example.com' in site.allowed_domains
+        assert site.sitemap_urls == [
+            'https://www.example.com/sitemap.xml',
+            'https://www.example.com/sitemap_index.xml',
+        ]
+        assert PortalSite('example.org', '/tmp/unused').target_url == 'https://example.org'
+
+    def test_lazy_history(self):
+        """测试历史在首次访问时加载，释放后重新加载"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            site = PortalSite('https://example.com/', tmpdir)
+            assert not site.history_loaded
+
+            update_history(site.history, 'https://example.com/a', 'ab' * 32, 'a.html')
+            assert site.history_loaded
+
+            site.release()
+            assert not site.history_loaded
+            assert 'https://example.com/a' in site.history.urls
+
+    def test_release_flushes_journal(self):
+        """测试 json 后端释放时只刷新增量日志，不重写历史文件"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            site = PortalSite('https://example.com/', tmpdir)
+            update_history(site.history, 'https://example.com/a', 'ab' * 32, 'a.html')
+            site.release()
+            assert os.path.exists(os.path.join(tmpdir, 'example.com', 'crawl_history.journal'))
+            assert not os.path.exists(os.path.join(tmpdir, 'example.com', 'crawl_history.json'))
+
+            update_history(site.history, 'https://example.com/b', 'cd' * 32, 'b.html')
+            site.save()
+            assert os.path.exists(os.path.join(tmpdir, 'example.com', 'crawl_history.json'))
+            assert not os.path.exists(os.path.join(tmpdir, 'example.com', 'crawl_history.journal'))
+            site.release()
+            assert set(site.history.urls) == {'https://example.com/a', 'https://example.com/b'}
+
+    def test_release_sqlite(self):
+        """测试 sqlite 后端释放时关闭连接并可重新打开"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            site = PortalSite('https://example.com/', tmpdir, history_backend='sqlite')
+            update_history(site.history, 'https://example.com/a', 'ab' * 32, 'a.html')
+            site.release()
+            assert site.history.urls['https://example.com/a'].local_path == 'a.html'
+            site.release()
+
+    def test_budget(self):
+        """测试页面预算"""
+        site = PortalSite('https://example.com/', '/tmp/unused', max_pages=2)
+        assert site.consume_budget()
+        assert site.consume_budget()
+        assert not site.consume_budget()
+
+        unlimited = PortalSite('https://example.com/', '/tmp/unused')
+        assert all(unlimited.consume_budget() for _ in range(100))
+
+    def test_link_discovery(self):
+        """测试全部 sitemap 失败后才开启链接发现"""
+        site = PortalSite('https://example.com/', '/tmp/unused')
+        assert not site.sitemap_done(False)
+        assert site.sitemap_done(False)
+        assert site.link_discovery
+
+        found = PortalSite('https://example.com/', '/tmp/unused')
+        assert not found.sitemap_done(False)
+        assert not found.sitemap_done(True)
+        assert not found.link_discovery
+
+    def test_depth_and_seen_links(self):
+        """测试深度上限与链接去重"""
+        site = PortalSite('https://example.com/', '/tmp/unused', max_depth=2, link_capacity=100)
+        assert site.within_depth(1)
+        assert not site.within_depth(2)
+        assert PortalSite('https://example.com/', '/tmp/unused').within_depth(100)
+
+        assert site.mark_seen('https://example.com/a')
+        assert not site.mark_seen('https://example.com/a')
+        assert site.mark_seen('https://example.com/b')
+
+
+class TestLoadTargets:
+    """测试 load_targets 函数"""
+
+    def test_file_and_urls(self):
+        """测试目标列表文件与逗号分隔 URL"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'targets.txt')
+            with open(path, 'w') as f:
+                f.write('# vendors\n')
+                f.write('https://a.com/\n')
+                f.write('\n')
+                f.write('https://b.com/ https://b.com/custom-sitemap.xml  # 自定义 sitemap\n')
+
+            targets = load_targets(path, 'https://c.com, https://d.com')
+
+        assert targets == [
+            ('https://a.com/', None),
+            ('https://b.com/', 'https://b.com/custom-sitemap.xml'),
+            ('https://c.com', None),
+            ('https://d.com', None),
+        ]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,181 @@
+"""
+爬取队列调度器单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse, XmlResponse
+from scrapy.utils.test import get_crawler
+
+from mainsite_scraper.scheduler import FRONTIER_ID_KEY, FrontierScheduler
+from mainsite_scraper.spiders.multi_portal import MultiPortalSpider
+from mainsite_scraper.utils import portal_site
+from mainsite_scraper.utils.frontier_store import STATE_DONE, STATE_IN_FLIGHT
+
+
+class DummySpider(Spider):
+    name = 'dummy'
+
+
+def open_scheduler(tmpdir: str) -> FrontierScheduler:
+    crawler = get_crawler(DummySpider)
+    scheduler = FrontierScheduler(crawler, frontier_path=os.path.join(tmpdir, 'frontier.sqlite3'))
+    scheduler.open(DummySpider())
+    return scheduler
+
+
+def state(scheduler: FrontierScheduler, request) -> int:
+    return scheduler.store._conn.execute(
+        'SELECT state FROM frontier WHERE id = ?', (request.meta[FRONTIER_ID_KEY],)
+    ).fetchone()[0]
+
+
+def response_for(request) -> HtmlResponse:
+    return HtmlResponse(request.url, body=b'<html></html>', request=request)
+
+
+def crawl_sites(tmpdir: str, sites: int, pages: int, max_active_domains: int | None) -> int:
+    """
+    逐个请求模拟多站点爬取（sitemap → 页面）。
+
+    Returns:
+        int: 加载站点历史的次数
+    """
+    targets = os.path.join(tmpdir, 'targets.txt')
+    with open(targets, 'w') as f:
+        for i in range(sites):
+            f.write(f'https://s{i}.com/ https://s{i}.com/sitemap.xml\n')
+
+    spider = MultiPortalSpider(targets=targets, output_dir=tmpdir, max_open_histories=2)
+    scheduler = FrontierScheduler(
+        get_crawler(MultiPortalSpider),
+        frontier_path=os.path.join(tmpdir, 'frontier.sqlite3'),
+        max_active_domains=max_active_domains,
+    )
+    scheduler.open(spider)
+
+    with mock.patch.object(portal_site, 'load_history', wraps=portal_site.load_history) as load:
+        for request in spider.start_requests():
+            scheduler.enqueue_request(request)
+
+        while (request := scheduler.next_request()) is not None:
+            if request.url.endswith('sitemap.xml'):
+                urls = ''.join(f'<url><loc>{request.url[:-11]}p{n}</loc></url>' for n in range(pages))
+                body = f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+                response = XmlResponse(request.url, body=body.encode(), request=request)
+            else:
+                response = HtmlResponse(
+                    request.url, body=b'<html></html>', headers={'Content-Type': 'text/html'}, request=request
+                )
+
+            scheduler.response_started(request)
+            for output in request.callback(response):
+                if isinstance(output, Request):
+                    scheduler.enqueue_request(output)
+                else:
+                    spider.item_scraped(output, response, spider)
+            scheduler.output_finished(request)
+
+        spider.closed('finished')
+        scheduler.close('finished')
+        return load.call_count
+
+
+class TestFrontierScheduler:
+    """测试请求完成标记"""
+
+    def test_done_after_items_leave_pipeline(self):
+        """测试回调输出结束且条目离开管道后才标记为完成"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scheduler = open_scheduler(tmpdir)
+            scheduler.enqueue_request(Request('https://a.com/1'))
+            request = scheduler.next_request()
+            response = response_for(request)
+
+            scheduler.response_started(request)
+            scheduler.item_started(request)
+            scheduler.output_finished(request)
+            assert state(scheduler, request) == STATE_IN_FLIGHT
+
+            scheduler.item_finished({}, response, None)
+            assert state(scheduler, request) == STATE_DONE
+            scheduler.close('shutdown')
+
+    def test_done_without_items(self):
+        """测试没有产出条目的请求在回调输出结束后标记为完成"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scheduler = open_scheduler(tmpdir)
+            scheduler.enqueue_request(Request('https://a.com/1'))
+            request = scheduler.next_request()
+
+            scheduler.response_started(request)
+            scheduler.output_finished(request)
+            assert state(scheduler, request) == STATE_DONE
+            scheduler.close('shutdown')
+
+    def test_spider_error(self):
+        """测试回调抛出异常时标记为完成"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scheduler = open_scheduler(tmpdir)
+            scheduler.enqueue_request(Request('https://a.com/1'))
+            request = scheduler.next_request()
+
+            scheduler.spider_error(None, response_for(request), None)
+            assert state(scheduler, request) == STATE_DONE
+            scheduler.close('shutdown')
+
+    def test_redirect(self):
+        """测试重定向请求入队后原请求标记为完成，回调中产出的请求不影响原请求"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scheduler = open_scheduler(tmpdir)
+            scheduler.enqueue_request(Request('https://a.com/1'))
+            scheduler.enqueue_request(Request('https://a.com/2'))
+            first = scheduler.next_request()
+            second = scheduler.next_request()
+
+            scheduler.enqueue_request(first.replace(url='https://a.com/1/'))
+            assert state(scheduler, first) == STATE_DONE
+
+            scheduler.response_started(second)
+            scheduler.enqueue_request(second.replace(url='https://a.com/3'))
+            assert state(scheduler, second) == STATE_IN_FLIGHT
+            scheduler.close('shutdown')
+
+    def test_resume_unfinished(self):
+        """测试已下载但尚未处理完毕的请求在重新打开后恢复为待抓取"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scheduler = open_scheduler(tmpdir)
+            scheduler.enqueue_request(Request('https://a.com/1'))
+            request = scheduler.next_request()
+            scheduler.response_started(request)
+            scheduler.item_started(request)
+            scheduler.close('shutdown')
+
+            scheduler = open_scheduler(tmpdir)
+            assert scheduler.next_request().url == 'https://a.com/1'
+            scheduler.close('shutdown')
+
+
+class TestActiveDomains:
+    """测试多站点爬取时活跃站点数与打开的历史数上限一致"""
+
+    def test_history_loaded_once_per_site(self):
+        """测试站点数超过上限时每个站点的历史只加载一次（不限制时轮转导致反复加载）"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert crawl_sites(tmpdir, sites=5, pages=3, max_active_domains=None) == 5
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert crawl_sites(tmpdir, sites=5, pages=3, max_active_domains=0) > 5
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
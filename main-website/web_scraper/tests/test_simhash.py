@@ -0,0 +1,122 @@
+"""
+SimHash 近似重复检测模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.simhash import (
+    SimHashIndex,
+    compute_simhash,
+    hamming_distance,
+    max_distance,
+)
+
+
+def make_page(seed: int, footer: str) -> str:
+    """生成只有页脚不同的模板页面"""
+    rng = random.Random(seed)
+    words = ' '.join(f'word{rng.randint(0, 2000)}' for _ in range(1000))
+    return f'<html><body><p>{words}</p><span>Updated {footer}</span></body></html>'
+
+
+class TestComputeSimhash:
+    """测试 compute_simhash 函数"""
+
+    def test_identical_text(self):
+        """测试相同文本得到相同指纹"""
+        assert compute_simhash(make_page(1, 'a')) == compute_simhash(make_page(1, 'a'))
+
+    def test_near_duplicate(self):
+        """测试只差时间戳的页面指纹距离很小"""
+        a = compute_simhash(make_page(1, '2026-01-01 10:00'))
+        b = compute_simhash(make_page(1, '2026-03-05 18:30'))
+        c = compute_simhash(make_page(2, '2026-01-01 10:00'))
+        assert hamming_distance(a, b) <= max_distance(0.9)
+        assert hamming_distance(a, c) > max_distance(0.8)
+
+    def test_ignores_tags(self):
+        """测试只计算标签之间的文本"""
+        assert compute_simhash('<p>hello world</p>') == compute_simhash('<div>hello world</div>')
+
+
+class TestSimHashIndex:
+    """测试 SimHashIndex"""
+
+    def test_max_distance(self):
+        """测试相似度阈值换算"""
+        assert max_distance(1.0) == 0
+        assert max_distance(0.95) == 3
+        assert max_distance(0.9) == 6
+        with pytest.raises(ValueError):
+            max_distance(0)
+
+    def test_query_within_distance(self):
+        """测试查询距离阈值内最相似的指纹"""
+        index = SimHashIndex(distance=3)
+        base = 0x0123456789abcdef
+        index.add('a', base)
+        index.add('b', base ^ 0b111)
+        index.add('far', ~base & (2 ** 64 - 1))
+
+        assert index.query(base ^ 0b1) == ('a', 1)
+        assert index.query(base, exclude='a') == ('b', 3)
+        assert index.query(base ^ 0b1111 << 40, exclude='a') is None
+
+    def test_replace_and_remove(self):
+        """测试替换与移除指纹"""
+        index = SimHashIndex(distance=2)
+        index.add('a', 0)
+        index.add('a', 2 ** 64 - 1)
+        assert len(index) == 1
+        assert index.query(0) is None
+
+        index.remove('a')
+        assert 'a' not in index
+        assert index.query(2 ** 64 - 1) is None
+
+    def test_matches_linear_scan(self):
+        """测试 LSH 查询结果与逐一比较一致"""
+        rng = random.Random(7)
+        index = SimHashIndex(distance=4)
+        fingerprints = {}
+        for i in range(500):
+            base = rng.getrandbits(64)
+            fingerprints[f'p{i}'] = base
+            index.add(f'p{i}', base)
+
+        for key, base in list(fingerprints.items())[:50]:
+            probe = base
+            for bit in rng.sample(range(64), 4):
+                probe ^= 1 << bit
+            expected = min(
+                (hamming_distance(probe, fp), k) for k, fp in fingerprints.items()
+            )
+            assert index.query(probe) == (expected[1], expected[0])
+
+    def test_tables_cover_max_distance(self):
+        """测试多置换表：键位数足够宽，且最大距离处的指纹都能找到"""
+        rng = random.Random(11)
+        for distance in (3, 6, 8):
+            index = SimHashIndex(distance=distance)
+            assert len(index._masks) <= 32
+            if distance <= 6:
+                assert min(bin(mask).count('1') for mask in index._masks) >= 16
+
+            base = rng.getrandbits(64)
+            index.add('a', base)
+            for _ in range(200):
+                probe = base
+                for bit in rng.sample(range(64), distance):
+                    probe ^= 1 << bit
+                assert index.query(probe) == ('a', distance)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
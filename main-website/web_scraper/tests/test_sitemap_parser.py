@@ -5,12 +5,14 @@ Sitemap 解析模块单元测试
 """
 
 import pytest
+import gzip
 import sys
 import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
 
 from utils.sitemap_parser import (
+    iter_sitemap,
     parse_sitemap,
     get_urls_with_lastmod,
     is_sitemap_index,
@@ -88,6 +90,69 @@ class TestParseSitemap:
         assert len(urls) == 0
 
 
+class TestIterSitemap:
+    """测试 iter_sitemap 流式解析"""
+
+    WELL_FORMED_INDEX = '''<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap>
+    <loc>https://example.com/sitemap-products.xml</loc>
+    <lastmod>2026-03-01</lastmod>
+  </sitemap>
+  <sitemap>
+    <loc>https://example.com/sitemap-news.xml.gz</loc>
+  </sitemap>
+</sitemapindex>
+'''
+
+    def test_urlset_bytes(self):
+        """测试 bytes 输入"""
+        urls = list(iter_sitemap('https://example.com/sitemap.xml', STANDARD_SITEMAP.encode()))
+        assert [u.url for u in urls] == [
+            'https://example.com/',
+            'https://example.com/products/',
+            'https://example.com/about/',
+        ]
+        assert not any(u.is_sitemap for u in urls)
+
+    def test_gzip(self):
+        """测试 gzip 压缩的 sitemap"""
+        body = gzip.compress(STANDARD_SITEMAP.encode())
+        urls = list(iter_sitemap('https://example.com/sitemap.xml.gz', body))
+        assert len(urls) == 3
+        assert urls[1].lastmod == '2026-03-10'
+
+    def test_index_single_pass(self):
+        """测试 sitemap 索引产出子 sitemap"""
+        entries = list(iter_sitemap('https://example.com/sitemap.xml', self.WELL_FORMED_INDEX))
+        assert [e.url for e in entries] == [
+            'https://example.com/sitemap-products.xml',
+            'https://example.com/sitemap-news.xml.gz',
+        ]
+        assert all(e.is_sitemap for e in entries)
+        assert entries[0].lastmod == '2026-03-01'
+
+    def test_max_size(self):
+        """测试超过大小限制时停止解析"""
+        urls = ''.join(f'<url><loc>https://example.com/{i}/</loc></url>' for i in range(20000))
+        body = f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+        parsed = list(iter_sitemap('https://example.com/sitemap.xml', body, max_size=100 * 1024))
+        assert 0 < len(parsed) < 20000
+
+    def test_truncated_keeps_parsed_entries(self):
+        """测试截断的 sitemap 保留已解析的条目"""
+        # 在第三个 <url> 中间截断
+        body = STANDARD_SITEMAP[:STANDARD_SITEMAP.index('https://example.com/about/')]
+        urls = list(iter_sitemap('https://example.com/sitemap.xml', body))
+        assert len(urls) == 2
+
+    def test_invalid_priority(self):
+        """测试格式错误的 priority"""
+        body = '<urlset><url><loc>https://example.com/</loc><priority>high</priority></url></urlset>'
+        urls = list(iter_sitemap('https://example.com/sitemap.xml', body))
+        assert urls[0].priority is None
+
+
 class TestGetUrlsWithLastmod:
     """测试 get_urls_with_lastmod 函数"""
 
@@ -113,6 +178,11 @@ class TestIsSitemapIndex:
         """测试 sitemap 索引"""
         assert is_sitemap_index('https://example.com/sitemap.xml', SITEMAP_INDEX) is True
 
+    def test_is_index_gzip(self):
+        """测试 gzip 压缩的 sitemap 索引"""
+        body = gzip.compress(TestIterSitemap.WELL_FORMED_INDEX.encode())
+        assert is_sitemap_index('https://example.com/sitemap.xml.gz', body) is True
+
     def test_is_not_index(self):
         """测试标准 sitemap"""
         assert is_sitemap_index('https://example.com/sitemap.xml', STANDARD_SITEMAP) is False
@@ -0,0 +1,95 @@
+"""
+爬取性能遥测模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.telemetry import NULL_TELEMETRY, SECONDS_BUCKETS, CrawlTelemetry, Histogram
+
+
+class TestHistogram:
+    """测试 Histogram"""
+
+    def test_observe_and_quantile(self):
+        """测试计数、合计与分位数估算"""
+        histogram = Histogram(SECONDS_BUCKETS)
+        for _ in range(90):
+            histogram.observe(0.003)
+        for _ in range(10):
+            histogram.observe(2.0)
+
+        assert histogram.count == 100
+        assert histogram.sum == pytest.approx(20.27)
+        assert histogram.quantile(0.5) == 0.005
+        assert histogram.quantile(0.95) == 2.0
+        assert histogram.max == 2.0
+
+    def test_overflow_bucket(self):
+        """测试超出最大分桶的观测值"""
+        histogram = Histogram((1.0, 10.0))
+        histogram.observe(100.0)
+        assert histogram.counts == [0, 0, 1]
+        assert histogram.quantile(0.5) == 100.0
+
+
+class TestCrawlTelemetry:
+    """测试 CrawlTelemetry"""
+
+    def test_per_domain_and_totals(self):
+        """测试按站点记录与合计"""
+        telemetry = CrawlTelemetry()
+        telemetry.observe('download_latency_seconds', 'a.com', 0.2)
+        telemetry.observe('download_latency_seconds', 'b.com', 0.4)
+        telemetry.observe('response_bytes', 'a.com', 50_000)
+
+        report = telemetry.to_dict()
+        assert report['totals']['download_latency_seconds']['count'] == 2
+        assert report['domains']['download_latency_seconds']['b.com']['sum'] == 0.4
+        assert report['domains']['response_bytes']['a.com']['buckets']['65536'] == 1
+
+    def test_timer(self):
+        """测试计时器，未启用时不记录"""
+        telemetry = CrawlTelemetry()
+        with telemetry.timer('pipeline_write_seconds', 'a.com'):
+            pass
+        assert telemetry.totals()['pipeline_write_seconds'].count == 1
+
+        with NULL_TELEMETRY.timer('pipeline_write_seconds', 'a.com'):
+            pass
+        NULL_TELEMETRY.observe('response_bytes', 'a.com', 1)
+        assert NULL_TELEMETRY.totals() == {}
+
+    def test_prometheus_format(self):
+        """测试 Prometheus 文本格式（累计分桶）"""
+        telemetry = CrawlTelemetry()
+        telemetry.observe('pipeline_compute_hash_seconds', 'a.com', 0.002)
+        telemetry.observe('pipeline_compute_hash_seconds', 'a.com', 0.02)
+
+        text = telemetry.to_prometheus()
+        assert '# TYPE mainsite_pipeline_compute_hash_seconds histogram' in text
+        assert 'mainsite_pipeline_compute_hash_seconds_bucket{domain="a.com",le="0.0025"} 1' in text
+        assert 'mainsite_pipeline_compute_hash_seconds_bucket{domain="a.com",le="+Inf"} 2' in text
+        assert 'mainsite_pipeline_compute_hash_seconds_count{domain="a.com"} 2' in text
+
+    def test_write_report(self):
+        """测试写出 JSON 报告"""
+        telemetry = CrawlTelemetry()
+        telemetry.observe('written_bytes', 'a.com', 2048)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'report', 'crawl_telemetry.json')
+            telemetry.write_report(path)
+            with open(path, encoding='utf-8') as f:
+                report = json.load(f)
+        assert report['totals']['written_bytes']['sum'] == 2048
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
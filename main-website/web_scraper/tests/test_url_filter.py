@@ -17,6 +17,7 @@ from utils.url_filter import (
     should_exclude,
     get_allowed_domains,
     filter_url,
+    UrlFilter,
 )
 
 
@@ -160,5 +161,33 @@ class TestFilterUrl:
         assert "排除" in reason
 
 
+class TestUrlFilter:
+    """测试预编译的 UrlFilter"""
+
+    def test_filter(self):
+        """测试综合过滤结果"""
+        url_filter = UrlFilter('example.com')
+        cases = {
+            'https://example.com/products/': (True, "通过"),
+            'https://www.example.com/en/about/': (True, "通过"),
+            'https://example.com/zh/products/': (False, "非英文页面"),
+            'https://zh.example.com/products/': (False, "域名不在允许范围内"),
+            'https://other.com/page/': (False, "域名不在允许范围内"),
+            'https://example.com/wp-admin/': (False, "匹配排除模式"),
+            'https://example.com/files/report.PDF': (False, "匹配排除模式"),
+            'https://example.com/blog/page/2': (False, "匹配排除模式"),
+        }
+        for url, expected in cases.items():
+            assert url_filter.filter(url) == expected
+            assert filter_url(url, 'example.com') == expected
+
+    def test_allowed_domains_cached(self):
+        """测试允许域名集合"""
+        url_filter = UrlFilter('example.com')
+        assert url_filter.allowed_domains == frozenset(get_allowed_domains('example.com'))
+        assert url_filter.is_allowed_domain('https://EN.example.com/page') is True
+        assert url_filter.is_allowed_domain('https://blog.example.com/page') is False
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,84 @@
+"""
+已访问 URL 集合模块单元测试
+
+作者：伍志勇
+"""
+
+import pytest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mainsite_scraper'))
+
+from utils.visited_urls import VisitedUrls, canonicalize_url
+
+
+class TestCanonicalizeUrl:
+    """测试 canonicalize_url 函数"""
+
+    def test_equivalent_forms(self):
+        """测试协议、主机大小写、www.、默认端口、末尾斜杠与片段"""
+        key = canonicalize_url('https://example.com/products')
+        assert canonicalize_url('http://Example.COM/products/') == key
+        assert canonicalize_url('https://www.example.com:443/products#specs') == key
+        assert canonicalize_url('https://example.com') == 'example.com/'
+
+    def test_tracking_params(self):
+        """测试移除跟踪参数，保留其余参数及顺序"""
+        assert canonicalize_url(
+            'https://example.com/list?utm_source=x&page=2&gclid=abc&sort=asc&UTM_Medium=y'
+        ) == 'example.com/list?page=2&sort=asc'
+        assert canonicalize_url('https://example.com/?fbclid=1') == 'example.com/'
+
+    def test_distinct_urls(self):
+        """测试不同路径、参数与端口保持区分"""
+        assert canonicalize_url('https://example.com/a') != canonicalize_url('https://example.com/A')
+        assert canonicalize_url('https://example.com/?id=1') != canonicalize_url('https://example.com/?id=2')
+        assert canonicalize_url('http://example.com:8080/') == 'example.com:8080/'
+
+
+class TestVisitedUrls:
+    """测试 VisitedUrls"""
+
+    def test_add_and_contains(self):
+        """测试规范化后相同的 URL 只记录一次"""
+        visited = VisitedUrls()
+        assert visited.add('https://example.com/a/')
+        assert not visited.add('http://www.example.com/a?utm_source=mail')
+        assert 'https://example.com/a' in visited
+        assert 'https://example.com/b' not in visited
+        assert len(visited) == 1
+
+    def test_exact_store_rejects_false_positives(self):
+        """测试 Bloom 过滤器误判时由精确表纠正，关闭后删除数据库"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'visited.sqlite3')
+            # 极小的过滤器 + 内存上限，迫使大量误判
+            visited = VisitedUrls(path, initial_capacity=10, error_rate=0.5, max_bytes=1)
+            urls = [f'https://example.com/page/{i}' for i in range(500)]
+
+            assert all(visited.add(url) for url in urls)
+            assert all(url in visited for url in urls)
+            assert not any(visited.add(url) for url in urls)
+            assert 'https://example.com/other' not in visited
+            assert visited.false_positives > 0
+
+            visited.close()
+            assert not os.path.exists(path)
+
+    def test_reopen_starts_empty(self):
+        """测试精确表只保存本次爬取的 URL"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'visited.sqlite3')
+            first = VisitedUrls(path)
+            first.add('https://example.com/a')
+            first._conn.commit()
+
+            second = VisitedUrls(path)
+            assert 'https://example.com/a' not in second
+            second.close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])